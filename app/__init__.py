@@ -21,6 +21,9 @@ def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
+    from app.utils.serializers import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
     # Log database configuration (without credentials)
     db_uri = app.config['SQLALCHEMY_DATABASE_URI']
     if db_uri and 'postgresql://' in db_uri:
@@ -33,6 +36,30 @@ def create_app(config_name='default'):
     migrate.init_app(app, db)
     login_manager.init_app(app)
     
+    from app.utils.cache import dashboard_cache
+    dashboard_cache.init_app(app)
+    
+    from app.utils import query_stats
+    query_stats.init_app(app)
+    
+    from app.services.rollups import register_rollup_events
+    register_rollup_events()
+    
+    from app.services.automation import register_automation_events
+    register_automation_events()
+
+    from app.services.webhooks import register_webhook_events
+    register_webhook_events()
+
+    from app.services.exercise_index import register_exercise_index_events
+    register_exercise_index_events()
+
+    from app.services.exercise_search import register_exercise_search_ddl
+    register_exercise_search_ddl()
+    
+    from app.cli import register_commands
+    register_commands(app)
+    
     # Configure CORS with proper origin restrictions
     import os
     cors_origins = os.environ.get('CORS_ORIGINS', '*')
@@ -0,0 +1,138 @@
+"""Flask CLI commands (``flask <group> <command>``)."""
+from datetime import date, datetime
+import click
+from flask.cli import AppGroup, with_appcontext
+
+rollups_cli = AppGroup('rollups', help='Maintain pre-aggregated analytics tables.')
+
+
+@rollups_cli.command('backfill')
+@click.option('--trainer-id', type=int, help='Only rebuild this trainer.')
+@click.option('--since', 'start', help='First day to rebuild (YYYY-MM-DD).')
+@click.option('--until', 'end', help='Last day to rebuild (YYYY-MM-DD).')
+def rollups_backfill(trainer_id, start, end):
+    """Rebuild daily_trainer_metrics from sessions and payments."""
+    from app.services.rollups import backfill
+
+    written = backfill(
+        trainer_id=trainer_id,
+        start=date.fromisoformat(start) if start else None,
+        end=date.fromisoformat(end) if end else None
+    )
+    click.echo(f"✅ Rebuilt rollups for {len(written)} trainer(s), {sum(written.values())} row(s) written")
+
+
+bookings_cli = AppGroup('bookings', help='Maintain online booking indexes.')
+
+
+@bookings_cli.command('rebuild-occupancy')
+@click.option('--trainer-id', type=int, help='Only rebuild this trainer.')
+@click.option('--since', help='First date to rebuild (YYYY-MM-DD, default: today).')
+def bookings_rebuild_occupancy(trainer_id, since):
+    """Recompute booking_slot_occupancy from open online bookings."""
+    from app.services.slot_occupancy import rebuild
+
+    written = rebuild(trainer_id=trainer_id, since=date.fromisoformat(since) if since else None)
+    click.echo(f"✅ Rebuilt {written} slot occupancy row(s)")
+
+
+campaigns_cli = AppGroup('campaigns', help='Run marketing campaigns.')
+
+
+@campaigns_cli.command('run')
+@click.argument('campaign_id', type=int)
+def campaigns_run(campaign_id):
+    """Send (or resume) an active campaign in the foreground."""
+    from app import db
+    from app.models.marketing import MarketingCampaign
+    from app.services.campaigns import CampaignExecutor
+
+    campaign = db.session.get(MarketingCampaign, campaign_id)
+    if campaign is None or campaign.status != 'active':
+        raise click.ClickException(f'Campaign {campaign_id} is not active')
+    stats = CampaignExecutor(campaign).run()
+    click.echo(f"✅ Sent {stats['sent']} message(s), {stats['failed']} failed "
+               f"in {stats['elapsed_seconds']}s ({stats['messages_per_second']} msgs/sec)")
+
+
+stripe_cli = AppGroup('stripe', help='Process stored Stripe webhook events.')
+
+
+@stripe_cli.command('apply')
+def stripe_apply():
+    """Apply pending Stripe events in the foreground."""
+    from app.services.stripe_events import apply_pending
+
+    stats = apply_pending()
+    click.echo(f"✅ Applied {stats['applied']}, ignored {stats['ignored']}, failed {stats['failed']} event(s)")
+
+
+@stripe_cli.command('replay')
+@click.option('--event-id', 'event_ids', multiple=True, help='Stripe event id (repeat for several).')
+@click.option('--type', 'event_type', help='Only events of this type.')
+@click.option('--since', help='Only events received on or after this date (YYYY-MM-DD).')
+@click.option('--failed', 'failed_only', is_flag=True, help='Only events that failed.')
+def stripe_replay(event_ids, event_type, since, failed_only):
+    """Mark stored Stripe events pending again and queue them for the worker."""
+    from app.services.stripe_events import replay
+
+    reset = replay(event_ids=event_ids, event_type=event_type,
+                   since=datetime.fromisoformat(since) if since else None, failed_only=failed_only)
+    click.echo(f"✅ Queued {reset} event(s) for replay")
+
+
+workflows_cli = AppGroup('workflows', help='Run scheduled workflow steps.')
+
+
+@workflows_cli.command('run')
+@click.option('--batch-size', default=500, show_default=True, help='Executions advanced per transaction.')
+@click.option('--poll-interval', default=1.0, show_default=True, help='Seconds between ticks.')
+@click.option('--burst', is_flag=True, help='Advance everything due now, then exit.')
+def workflows_run(batch_size, poll_interval, burst):
+    """Advance workflow executions as their steps come due."""
+    from app.services.workflow_scheduler import WorkflowScheduler
+
+    scheduler = WorkflowScheduler(batch_size=batch_size, poll_interval=poll_interval)
+    advanced = scheduler.run(burst=burst)
+    click.echo(f"✅ Scheduler stopped after advancing {advanced} execution(s)")
+
+
+@click.command('worker')
+@click.option('--queue', 'queues', multiple=True, default=('default', 'email', 'webhooks'), show_default=True,
+              help='Queue to consume (repeat for several).')
+@click.option('--batch-size', default=10, show_default=True, help='Jobs claimed per poll.')
+@click.option('--poll-interval', default=2.0, show_default=True, help='Seconds to sleep when idle.')
+@click.option('--burst', is_flag=True, help='Exit once no jobs are due.')
+@with_appcontext
+def worker_command(queues, batch_size, poll_interval, burst):
+    """Run background jobs (emails, SMS, webhooks) from the job queue."""
+    from app.services.job_queue import Worker
+
+    processed = Worker(queues, batch_size=batch_size, poll_interval=poll_interval).run(burst=burst)
+    click.echo(f"✅ Worker stopped after {processed} job(s)")
+
+
+exercises_cli = AppGroup('exercises', help='Maintain the exercise library.')
+
+
+@exercises_cli.command('rebuild-search')
+def exercises_rebuild_search():
+    """Create missing full-text search objects and re-index every exercise."""
+    from app import db
+    from app.services.exercise_search import install
+
+    if not install(db.session.connection(), rebuild=True):
+        raise click.ClickException(f'Full-text search is not supported on {db.engine.dialect.name}')
+    db.session.commit()
+    click.echo("✅ Exercise search index rebuilt")
+
+
+def register_commands(app):
+    """Attach all CLI command groups to ``app``."""
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(bookings_cli)
+    app.cli.add_command(campaigns_cli)
+    app.cli.add_command(stripe_cli)
+    app.cli.add_command(workflows_cli)
+    app.cli.add_command(exercises_cli)
+    app.cli.add_command(worker_command)
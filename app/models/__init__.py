@@ -8,24 +8,27 @@ from app.models.calendar import CalendarIntegration
 from app.models.intake import ClientIntake
 from app.models.marketing import EmailTemplate, SMSTemplate, MarketingCampaign, CommunicationLog
 from app.models.flow import WorkflowTemplate, WorkflowExecution, AutomationRule
-from app.models.exercise_library import ExerciseLibrary, ProgramTemplate
+from app.models.exercise_library import ExerciseLibrary, ProgramTemplate, ExerciseIndexGeneration
 from app.models.settings import TrainerSettings, SystemSettings
 from app.models.messaging import Message, MessageNotification
 from app.models.progress import ProgressPhoto, CustomMetric, ProgressEntry
 from app.models.nutrition import NutritionPlan, FoodLog, Habit, HabitLog
-from app.models.payments import PaymentPlan, Subscription, Payment, Invoice
-from app.models.booking import BookingAvailability, BookingException, OnlineBooking, BookingSettings
+from app.models.payments import PaymentPlan, Subscription, Payment, Invoice, StripeEvent
+from app.models.booking import BookingAvailability, BookingException, OnlineBooking, BookingSettings, BookingSlotOccupancy
 from app.models.integrations import Integration, VideoConference, WebhookEndpoint, AppCustomization
+from app.models.analytics import DailyTrainerMetric, DashboardCacheGeneration
+from app.models.jobs import Job
 
 __all__ = [
     'Organization', 'User', 'Client', 'Session', 'Program', 'Exercise', 'CalendarIntegration',
     'ClientIntake', 'EmailTemplate', 'SMSTemplate', 'MarketingCampaign', 'CommunicationLog',
     'WorkflowTemplate', 'WorkflowExecution', 'AutomationRule',
-    'ExerciseLibrary', 'ProgramTemplate', 'TrainerSettings', 'SystemSettings',
+    'ExerciseLibrary', 'ProgramTemplate', 'ExerciseIndexGeneration', 'TrainerSettings', 'SystemSettings',
     'Message', 'MessageNotification',
     'ProgressPhoto', 'CustomMetric', 'ProgressEntry',
     'NutritionPlan', 'FoodLog', 'Habit', 'HabitLog',
-    'PaymentPlan', 'Subscription', 'Payment', 'Invoice',
-    'BookingAvailability', 'BookingException', 'OnlineBooking', 'BookingSettings',
-    'Integration', 'VideoConference', 'WebhookEndpoint', 'AppCustomization'
+    'PaymentPlan', 'Subscription', 'Payment', 'Invoice', 'StripeEvent',
+    'BookingAvailability', 'BookingException', 'OnlineBooking', 'BookingSettings', 'BookingSlotOccupancy',
+    'Integration', 'VideoConference', 'WebhookEndpoint', 'AppCustomization',
+    'DailyTrainerMetric', 'DashboardCacheGeneration', 'Job'
 ]
@@ -0,0 +1,63 @@
+"""Pre-aggregated analytics models."""
+from datetime import datetime, timezone
+from app import db
+
+
+class DailyTrainerMetric(db.Model):
+    """
+    One pre-aggregated counter for a trainer on a single day.
+
+    Rows are maintained by ``app.services.rollups`` whenever sessions or
+    payments change, so analytics endpoints read O(days) rows instead of
+    every transaction in the window.
+
+    Metrics:
+        sessions_status - sessions scheduled that day, by status
+        sessions_type   - sessions scheduled that day, by session_type
+        revenue_method  - completed payments that day, by payment_method
+        revenue_client  - completed payments that day, by client_id
+    """
+
+    __tablename__ = 'daily_trainer_metrics'
+    __table_args__ = (
+        db.UniqueConstraint('trainer_id', 'metric_date', 'metric', 'dimension',
+                            name='uq_daily_trainer_metrics_key'),
+        db.Index('ix_daily_trainer_metrics_trainer_metric_date', 'trainer_id', 'metric', 'metric_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    metric_date = db.Column(db.Date, nullable=False)
+
+    # What is being counted and the bucket it belongs to
+    metric = db.Column(db.String(30), nullable=False)
+    dimension = db.Column(db.String(100), nullable=False)
+
+    # Values
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0)
+
+    # Timestamps
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f'<DailyTrainerMetric {self.trainer_id} {self.metric_date} {self.metric}:{self.dimension}>'
+
+
+class DashboardCacheGeneration(db.Model):
+    """
+    Dashboard cache generation of one trainer.
+
+    ``app.utils.cache`` embeds the generation in every cached dashboard
+    key and bumps it in the transaction that writes the trainer's data.
+    Every web worker and ``flask worker`` process shares the row, so a
+    commit anywhere orphans the trainer's cached dashboards everywhere.
+    """
+
+    __tablename__ = 'dashboard_cache_generations'
+
+    trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, autoincrement=False)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DashboardCacheGeneration {self.trainer_id}: {self.generation}>'
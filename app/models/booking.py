@@ -8,6 +8,9 @@ class BookingAvailability(db.Model):
     """Trainer availability for online booking."""
     
     __tablename__ = 'booking_availability'
+    __table_args__ = (
+        db.Index('ix_booking_availability_trainer_day', 'trainer_id', 'day_of_week', 'is_active'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -41,6 +44,9 @@ class BookingException(db.Model):
     """Exceptions to regular availability (holidays, vacations, etc)."""
     
     __tablename__ = 'booking_exceptions'
+    __table_args__ = (
+        db.Index('ix_booking_exceptions_trainer_dates', 'trainer_id', 'start_date', 'end_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -73,6 +79,10 @@ class OnlineBooking(db.Model):
     """Client online booking requests."""
     
     __tablename__ = 'online_bookings'
+    __table_args__ = (
+        db.Index('ix_online_bookings_trainer_date_status', 'trainer_id', 'requested_date', 'status'),
+        db.Index('ix_online_bookings_trainer_status', 'trainer_id', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -89,6 +99,10 @@ class OnlineBooking(db.Model):
     duration_minutes = db.Column(db.Integer, default=60)
     session_type = db.Column(db.String(50))
     
+    # Start of the availability slot this booking holds a seat in (None if
+    # it falls outside configured availability)
+    slot_start = db.Column(db.Time)
+    
     # Status
     status = db.Column(db.String(20), default='pending')  # pending, confirmed, declined, cancelled
     
@@ -128,6 +142,34 @@ class OnlineBooking(db.Model):
         return f'<OnlineBooking {self.id} - {self.status}>'
 
 
+class BookingSlotOccupancy(db.Model):
+    """
+    Seats taken in one availability slot on one date.
+    
+    ``booked`` counts pending and confirmed bookings whose ``slot_start``
+    is this slot. It is maintained by ``app.services.slot_occupancy`` with
+    conditional updates, so the row doubles as the lock that prevents
+    overbooking.
+    """
+    
+    __tablename__ = 'booking_slot_occupancy'
+    __table_args__ = (
+        db.UniqueConstraint('trainer_id', 'slot_date', 'slot_start', name='uq_booking_slot_occupancy_slot'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    slot_date = db.Column(db.Date, nullable=False)
+    slot_start = db.Column(db.Time, nullable=False)
+    booked = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Timestamps
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f'<BookingSlotOccupancy {self.trainer_id} {self.slot_date} {self.slot_start}: {self.booked}>'
+
+
 class BookingSettings(db.Model):
     """Booking system settings for trainers."""
     
@@ -7,6 +7,10 @@ class Client(db.Model):
     """Client model representing gym members or personal training clients."""
     
     __tablename__ = 'clients'
+    __table_args__ = (
+        db.Index('ix_clients_trainer_active_last_name', 'trainer_id', 'is_active', 'last_name'),
+        db.Index('ix_clients_trainer_created', 'trainer_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -44,6 +48,10 @@ class Client(db.Model):
     trainer = db.relationship('User', back_populates='clients')
     sessions = db.relationship('Session', back_populates='client', lazy='dynamic')
     programs = db.relationship('Program', back_populates='client', lazy='dynamic')
+    # Read-only list, newest first, for eager loading (``programs`` is a query)
+    ordered_programs = db.relationship(
+        'Program', viewonly=True, order_by='desc(Program.created_at)'
+    )
     
     @property
     def full_name(self):
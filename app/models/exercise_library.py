@@ -1,13 +1,23 @@
 """Exercise library for workout program builder."""
 from datetime import datetime, timezone
 from app import db
-import json
+from app.models.types import JSONType
 
 
 class ExerciseLibrary(db.Model):
     """Master exercise library with detailed information."""
     
     __tablename__ = 'exercise_library'
+    __table_args__ = (
+        db.Index('ix_exercise_library_wger_id', 'wger_id', unique=True),
+        # Containment (@>) lookups for the muscle and equipment filters
+        db.Index('ix_exercise_library_primary_muscles', 'primary_muscle_groups', postgresql_using='gin',
+                 postgresql_ops={'primary_muscle_groups': 'jsonb_path_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_exercise_library_secondary_muscles', 'secondary_muscle_groups', postgresql_using='gin',
+                 postgresql_ops={'secondary_muscle_groups': 'jsonb_path_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_exercise_library_equipment', 'equipment_required', postgresql_using='gin',
+                 postgresql_ops={'equipment_required': 'jsonb_path_ops'}).ddl_if(dialect='postgresql'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -17,19 +27,19 @@ class ExerciseLibrary(db.Model):
     category = db.Column(db.String(50))  # strength, cardio, flexibility, balance, mobility
     
     # Targeting
-    primary_muscle_groups = db.Column(db.Text)  # JSON array
-    secondary_muscle_groups = db.Column(db.Text)  # JSON array
+    primary_muscle_groups = db.Column(JSONType)  # JSON array
+    secondary_muscle_groups = db.Column(JSONType)  # JSON array
     
     # Classification
     difficulty_level = db.Column(db.String(20))  # beginner, intermediate, advanced
-    equipment_required = db.Column(db.Text)  # JSON array
+    equipment_required = db.Column(JSONType)  # JSON array
     exercise_type = db.Column(db.String(50))  # compound, isolation, bodyweight, cardio
     
     # Instructions
     setup_instructions = db.Column(db.Text)
-    execution_steps = db.Column(db.Text)  # JSON array of steps
-    common_mistakes = db.Column(db.Text)  # JSON array
-    tips_and_cues = db.Column(db.Text)  # JSON array
+    execution_steps = db.Column(JSONType)  # JSON array of steps
+    common_mistakes = db.Column(JSONType)  # JSON array
+    tips_and_cues = db.Column(JSONType)  # JSON array
     
     # Media
     image_url = db.Column(db.String(300))
@@ -37,12 +47,12 @@ class ExerciseLibrary(db.Model):
     animation_url = db.Column(db.String(300))
     
     # Modifications & Alternatives
-    easier_variations = db.Column(db.Text)  # JSON array of exercise IDs
-    harder_variations = db.Column(db.Text)  # JSON array of exercise IDs
-    alternative_exercises = db.Column(db.Text)  # JSON array of exercise IDs
+    easier_variations = db.Column(JSONType)  # JSON array of exercise IDs
+    harder_variations = db.Column(JSONType)  # JSON array of exercise IDs
+    alternative_exercises = db.Column(JSONType)  # JSON array of exercise IDs
     
     # Safety & Contraindications
-    contraindications = db.Column(db.Text)  # JSON array
+    contraindications = db.Column(JSONType)  # JSON array
     injury_considerations = db.Column(db.Text)
     
     # Metrics
@@ -51,7 +61,7 @@ class ExerciseLibrary(db.Model):
     typical_rest_seconds = db.Column(db.Integer)
     
     # Tags for searching
-    tags = db.Column(db.Text)  # JSON array
+    tags = db.Column(JSONType)  # JSON array
     
     # Popularity & Usage
     usage_count = db.Column(db.Integer, default=0)
@@ -62,6 +72,10 @@ class ExerciseLibrary(db.Model):
     created_by_trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     is_public = db.Column(db.Boolean, default=True)
     
+    # WGER mirror (set for exercises synced from wger.de)
+    wger_id = db.Column(db.Integer)
+    wger_updated_at = db.Column(db.DateTime)  # WGER last_update of the synced version
+    
     # Status
     is_active = db.Column(db.Boolean, default=True)
     
@@ -73,28 +87,20 @@ class ExerciseLibrary(db.Model):
     creator = db.relationship('User', backref='custom_exercises', foreign_keys=[created_by_trainer_id])
     
     def get_primary_muscles(self):
-        """Parse primary muscle groups from JSON."""
-        if self.primary_muscle_groups:
-            return json.loads(self.primary_muscle_groups)
-        return []
+        """Primary muscle groups (list)."""
+        return self.primary_muscle_groups or []
     
     def get_equipment(self):
-        """Parse equipment from JSON."""
-        if self.equipment_required:
-            return json.loads(self.equipment_required)
-        return []
+        """Equipment (list)."""
+        return self.equipment_required or []
     
     def get_execution_steps(self):
-        """Parse execution steps from JSON."""
-        if self.execution_steps:
-            return json.loads(self.execution_steps)
-        return []
+        """Execution steps (list)."""
+        return self.execution_steps or []
     
     def get_tags(self):
-        """Parse tags from JSON."""
-        if self.tags:
-            return json.loads(self.tags)
-        return []
+        """Tags (list)."""
+        return self.tags or []
     
     def increment_usage(self):
         """Increment usage counter."""
@@ -124,10 +130,10 @@ class ProgramTemplate(db.Model):
     session_duration_minutes = db.Column(db.Integer)
     
     # Template Data
-    template_data = db.Column(db.Text)  # JSON structure of the full program
+    template_data = db.Column(JSONType)  # JSON structure of the full program
     
     # Equipment
-    required_equipment = db.Column(db.Text)  # JSON array
+    required_equipment = db.Column(JSONType)  # JSON array
     
     # Popularity
     usage_count = db.Column(db.Integer, default=0)
@@ -149,10 +155,27 @@ class ProgramTemplate(db.Model):
     creator = db.relationship('User', backref='program_templates', foreign_keys=[created_by_trainer_id])
     
     def get_template_data(self):
-        """Parse template data from JSON."""
-        if self.template_data:
-            return json.loads(self.template_data)
-        return {}
+        """Template data (dict)."""
+        return self.template_data or {}
     
     def __repr__(self):
         return f'<ProgramTemplate {self.name}>'
+
+
+class ExerciseIndexGeneration(db.Model):
+    """
+    Generation of the exercise library's in-memory index (a single row).
+
+    ``app.services.exercise_index`` bumps it in every transaction that
+    changes an indexed exercise column. Each process compares it with the
+    generation its index was built from, so a change made by any worker or
+    script is picked up everywhere on the next request.
+    """
+
+    __tablename__ = 'exercise_index_generation'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ExerciseIndexGeneration {self.generation}>'
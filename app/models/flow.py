@@ -1,6 +1,7 @@
 """Workflow and flow management models."""
 from datetime import datetime, timezone
 from app import db
+from app.models.types import JSONType
 import json
 
 
@@ -18,10 +19,10 @@ class WorkflowTemplate(db.Model):
     
     # Trigger Configuration
     trigger_type = db.Column(db.String(50))  # client_signup, intake_complete, session_complete, program_end
-    trigger_config = db.Column(db.Text)  # JSON configuration
+    trigger_config = db.Column(JSONType)  # JSON configuration
     
     # Workflow Steps
-    steps = db.Column(db.Text)  # JSON array of workflow steps
+    steps = db.Column(JSONType)  # JSON array of workflow steps
     
     # Status
     is_active = db.Column(db.Boolean, default=True)
@@ -34,14 +35,12 @@ class WorkflowTemplate(db.Model):
     trainer = db.relationship('User', backref='workflow_templates')
     
     def get_steps(self):
-        """Parse workflow steps from JSON."""
-        if self.steps:
-            return json.loads(self.steps)
-        return []
+        """Workflow steps (list)."""
+        return self.steps or []
     
     def set_steps(self, steps):
-        """Set workflow steps as JSON."""
-        self.steps = json.dumps(steps)
+        """Replace the workflow steps."""
+        self.steps = steps
     
     def __repr__(self):
         return f'<WorkflowTemplate {self.name}>'
@@ -51,6 +50,9 @@ class WorkflowExecution(db.Model):
     """Active workflow execution instance."""
     
     __tablename__ = 'workflow_executions'
+    __table_args__ = (
+        db.Index('ix_workflow_executions_status_next_step', 'status', 'next_step_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     workflow_template_id = db.Column(db.Integer, db.ForeignKey('workflow_templates.id'), nullable=False)
@@ -67,7 +69,7 @@ class WorkflowExecution(db.Model):
     # Timestamps
     started_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     completed_at = db.Column(db.DateTime)
-    next_step_at = db.Column(db.DateTime)
+    next_step_at = db.Column(db.DateTime)  # when the current step is due (see services.workflow_scheduler)
     
     # Relationships
     workflow_template = db.relationship('WorkflowTemplate', backref='executions')
@@ -97,6 +99,9 @@ class AutomationRule(db.Model):
     """Automation rules for triggering actions."""
     
     __tablename__ = 'automation_rules'
+    __table_args__ = (
+        db.Index('ix_automation_rules_trainer_active', 'trainer_id', 'is_active'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -106,11 +111,11 @@ class AutomationRule(db.Model):
     
     # Trigger Conditions
     trigger_event = db.Column(db.String(100))  # session_no_show, client_inactive, program_complete
-    trigger_conditions = db.Column(db.Text)  # JSON object with conditions
+    trigger_conditions = db.Column(JSONType)  # JSON object with conditions
     
     # Actions
     action_type = db.Column(db.String(50))  # send_email, send_sms, create_task, assign_program
-    action_config = db.Column(db.Text)  # JSON configuration for the action
+    action_config = db.Column(JSONType)  # JSON configuration for the action
     
     # Status
     is_active = db.Column(db.Boolean, default=True)
@@ -127,16 +132,12 @@ class AutomationRule(db.Model):
     trainer = db.relationship('User', backref='automation_rules')
     
     def get_trigger_conditions(self):
-        """Parse trigger conditions from JSON."""
-        if self.trigger_conditions:
-            return json.loads(self.trigger_conditions)
-        return {}
+        """Trigger conditions (dict)."""
+        return self.trigger_conditions or {}
     
     def get_action_config(self):
-        """Parse action configuration from JSON."""
-        if self.action_config:
-            return json.loads(self.action_config)
-        return {}
+        """Action configuration (dict)."""
+        return self.action_config or {}
     
     def __repr__(self):
         return f'<AutomationRule {self.name}>'
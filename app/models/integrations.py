@@ -1,6 +1,7 @@
 """Third-party integrations models."""
 from datetime import datetime, timezone
 from app import db
+from app.models.types import JSONType
 import json
 
 
@@ -108,7 +109,7 @@ class WebhookEndpoint(db.Model):
     secret = db.Column(db.String(100))
     
     # Events to Subscribe
-    events = db.Column(db.Text)  # JSON array of event types
+    events = db.Column(JSONType)  # JSON array of event types
     
     # Status
     is_active = db.Column(db.Boolean, default=True)
@@ -117,6 +118,7 @@ class WebhookEndpoint(db.Model):
     total_calls = db.Column(db.Integer, default=0)
     successful_calls = db.Column(db.Integer, default=0)
     failed_calls = db.Column(db.Integer, default=0)
+    consecutive_failures = db.Column(db.Integer, default=0)  # reset on success; disabled at webhooks.DISABLE_AFTER
     last_called_at = db.Column(db.DateTime)
     last_error = db.Column(db.Text)
     
@@ -128,10 +130,12 @@ class WebhookEndpoint(db.Model):
     trainer = db.relationship('User', backref='webhooks')
     
     def get_events(self):
-        """Parse events from JSON."""
-        if self.events:
-            return json.loads(self.events)
-        return []
+        """Subscribed event types (list)."""
+        return self.events or []
+    
+    def set_events(self, events):
+        """Set subscribed event types (``'*'`` subscribes to all)."""
+        self.events = list(events)
     
     def __repr__(self):
         return f'<WebhookEndpoint {self.name}>'
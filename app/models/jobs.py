@@ -0,0 +1,53 @@
+"""Background job queue models."""
+from datetime import datetime, timezone
+from app import db
+import json
+
+
+class Job(db.Model):
+    """
+    A unit of background work, claimed and run by ``flask worker``.
+
+    Lifecycle: ``queued`` -> ``running`` -> ``succeeded``; a failed run goes
+    back to ``queued`` with a later ``run_at`` until ``max_attempts`` is
+    reached, then ends as ``failed``.
+    """
+
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('ix_jobs_queue_status_run_at', 'queue', 'status', 'run_at'),
+        db.Index('ix_jobs_status_locked_at', 'status', 'locked_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    queue = db.Column(db.String(50), nullable=False, default='default')
+    task = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text)  # JSON keyword arguments for the task
+
+    # Status
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    last_error = db.Column(db.Text)
+
+    # Scheduling / Locking
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(100))
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    finished_at = db.Column(db.DateTime)
+
+    def get_payload(self):
+        """Parse task arguments from JSON."""
+        if self.payload:
+            return json.loads(self.payload)
+        return {}
+
+    def set_payload(self, payload):
+        """Set task arguments as JSON."""
+        self.payload = json.dumps(payload or {})
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.task} - {self.status}>'
@@ -113,6 +113,10 @@ class MarketingCampaign(db.Model):
     delivered_count = db.Column(db.Integer, default=0)
     opened_count = db.Column(db.Integer, default=0)
     clicked_count = db.Column(db.Integer, default=0)
+    failed_count = db.Column(db.Integer, default=0)
+    
+    # Execution checkpoint: last client (by id) whose messages are committed
+    last_client_id = db.Column(db.Integer)
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
@@ -143,6 +147,9 @@ class CommunicationLog(db.Model):
     """Log of sent communications."""
     
     __tablename__ = 'communication_logs'
+    __table_args__ = (
+        db.Index('ix_communication_logs_campaign_sent', 'campaign_id', 'sent_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     campaign_id = db.Column(db.Integer, db.ForeignKey('marketing_campaigns.id'))
@@ -1,7 +1,7 @@
 """Nutrition and habit tracking models."""
 from datetime import datetime, timezone
 from app import db
-import json
+from app.models.types import JSONType
 
 
 class NutritionPlan(db.Model):
@@ -26,11 +26,11 @@ class NutritionPlan(db.Model):
     
     # Meal Structure
     meals_per_day = db.Column(db.Integer, default=3)
-    meal_plan_data = db.Column(db.Text)  # JSON structure of meals
+    meal_plan_data = db.Column(JSONType)  # JSON structure of meals
     
     # Guidelines
-    dietary_preferences = db.Column(db.Text)  # JSON array
-    foods_to_avoid = db.Column(db.Text)  # JSON array
+    dietary_preferences = db.Column(JSONType)  # JSON array
+    foods_to_avoid = db.Column(JSONType)  # JSON array
     supplements = db.Column(db.Text)
     hydration_target = db.Column(db.Integer)  # ml per day
     
@@ -53,10 +53,8 @@ class NutritionPlan(db.Model):
     trainer = db.relationship('User', backref='nutrition_plans_created')
     
     def get_meal_plan(self):
-        """Parse meal plan from JSON."""
-        if self.meal_plan_data:
-            return json.loads(self.meal_plan_data)
-        return {}
+        """Meal plan (dict)."""
+        return self.meal_plan_data or {}
     
     def __repr__(self):
         return f'<NutritionPlan {self.name}>'
@@ -1,6 +1,7 @@
 """Payment and billing models."""
 from datetime import datetime, timezone
 from app import db
+from app.models.types import JSONType
 import json
 
 
@@ -57,9 +58,16 @@ class Subscription(db.Model):
     """Client subscription to a payment plan."""
     
     __tablename__ = 'subscriptions'
+    __table_args__ = (
+        db.Index('ix_subscriptions_trainer_status', 'trainer_id', 'status'),
+        db.Index('ix_subscriptions_client_status', 'client_id', 'status'),
+        db.Index('ix_subscriptions_stripe_subscription', 'stripe_subscription_id'),
+        db.Index('ix_subscriptions_stripe_customer', 'stripe_customer_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False)
+    trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'))  # Denormalized from client for tenant-scoped queries
     payment_plan_id = db.Column(db.Integer, db.ForeignKey('payment_plans.id'), nullable=False)
     
     # Subscription Details
@@ -98,9 +106,15 @@ class Payment(db.Model):
     """Payment transactions."""
     
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('ix_payments_trainer_status_date', 'trainer_id', 'status', 'payment_date'),
+        db.Index('ix_payments_client_date', 'client_id', 'payment_date'),
+        db.Index('ix_payments_stripe_payment_intent', 'stripe_payment_intent_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False)
+    trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'))  # Denormalized from client for tenant-scoped queries
     subscription_id = db.Column(db.Integer, db.ForeignKey('subscriptions.id'))
     
     # Payment Details
@@ -158,7 +172,7 @@ class Invoice(db.Model):
     currency = db.Column(db.String(3), default='USD')
     
     # Line Items
-    items = db.Column(db.Text)  # JSON array of invoice items
+    items = db.Column(JSONType)  # JSON array of invoice items
     
     # Status
     status = db.Column(db.String(20), default='draft')  # draft, sent, paid, overdue, cancelled
@@ -180,10 +194,46 @@ class Invoice(db.Model):
     payment = db.relationship('Payment', backref='invoice', uselist=False)
     
     def get_items(self):
-        """Parse invoice items from JSON."""
-        if self.items:
-            return json.loads(self.items)
-        return []
+        """Invoice line items (list)."""
+        return self.items or []
     
     def __repr__(self):
         return f'<Invoice {self.invoice_number}>'
+
+
+class StripeEvent(db.Model):
+    """
+    A verified Stripe webhook event, stored raw before it is applied.
+
+    ``event_id`` is unique, so Stripe's retries are recorded once. The worker
+    applies ``pending`` events in Stripe ``created`` order and marks them
+    ``applied``, ``ignored`` (no handler) or ``failed``. Setting events back to
+    ``pending`` replays them.
+    """
+    
+    __tablename__ = 'stripe_events'
+    __table_args__ = (
+        db.Index('ix_stripe_events_status_created', 'status', 'stripe_created', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.String(255), nullable=False, unique=True)
+    event_type = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # raw event JSON as received
+    stripe_created = db.Column(db.Integer)  # event 'created' (unix time), the apply order
+    
+    # Processing
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, applied, ignored, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    
+    # Timestamps
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
+    
+    def get_payload(self):
+        """Parse the raw event from JSON."""
+        return json.loads(self.payload)
+    
+    def __repr__(self):
+        return f'<StripeEvent {self.event_id} {self.event_type} - {self.status}>'
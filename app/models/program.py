@@ -7,6 +7,11 @@ class Program(db.Model):
     """Training program model."""
     
     __tablename__ = 'programs'
+    __table_args__ = (
+        db.Index('ix_programs_trainer_status', 'trainer_id', 'status'),
+        db.Index('ix_programs_trainer_created', 'trainer_id', 'created_at'),
+        db.Index('ix_programs_client_created', 'client_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -40,6 +45,10 @@ class Program(db.Model):
     trainer = db.relationship('User', back_populates='programs')
     client = db.relationship('Client', back_populates='programs')
     exercises = db.relationship('Exercise', back_populates='program', lazy='dynamic', cascade='all, delete-orphan')
+    # Read-only list in program order, for eager loading (``exercises`` is a query)
+    ordered_exercises = db.relationship(
+        'Exercise', viewonly=True, order_by=lambda: (Exercise.day_number, Exercise.order_in_day)
+    )
     
     def __repr__(self):
         return f'<Program {self.name}>'
@@ -49,6 +58,9 @@ class Exercise(db.Model):
     """Exercise model for training programs."""
     
     __tablename__ = 'exercises'
+    __table_args__ = (
+        db.Index('ix_exercises_program_day_order', 'program_id', 'day_number', 'order_in_day'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     program_id = db.Column(db.Integer, db.ForeignKey('programs.id'), nullable=False)
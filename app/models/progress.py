@@ -1,7 +1,7 @@
 """Progress tracking models."""
 from datetime import datetime, timezone
 from app import db
-import json
+from app.models.types import JSONType
 
 
 class ProgressPhoto(db.Model):
@@ -104,7 +104,7 @@ class ProgressEntry(db.Model):
     arm = db.Column(db.Float)
     
     # Custom Metrics (JSON)
-    custom_metrics_data = db.Column(db.Text)  # JSON: {metric_id: value}
+    custom_metrics_data = db.Column(JSONType)  # JSON: {metric_id: value}
     
     # Notes
     notes = db.Column(db.Text)
@@ -120,16 +120,13 @@ class ProgressEntry(db.Model):
     trainer = db.relationship('User', backref='tracked_progress')
     
     def get_custom_metrics(self):
-        """Parse custom metrics from JSON."""
-        if self.custom_metrics_data:
-            return json.loads(self.custom_metrics_data)
-        return {}
+        """Custom metric values keyed by metric id (dict)."""
+        return self.custom_metrics_data or {}
     
     def set_custom_metric(self, metric_id, value):
         """Set a custom metric value."""
-        metrics = self.get_custom_metrics()
-        metrics[str(metric_id)] = value
-        self.custom_metrics_data = json.dumps(metrics)
+        # A new dict, so the change is detected on flush
+        self.custom_metrics_data = {**self.get_custom_metrics(), str(metric_id): value}
     
     def __repr__(self):
         return f'<ProgressEntry {self.entry_date} for Client {self.client_id}>'
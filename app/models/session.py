@@ -7,6 +7,11 @@ class Session(db.Model):
     """Training session model."""
     
     __tablename__ = 'sessions'
+    __table_args__ = (
+        db.Index('ix_sessions_trainer_start', 'trainer_id', 'scheduled_start'),
+        db.Index('ix_sessions_trainer_status_start', 'trainer_id', 'status', 'scheduled_start'),
+        db.Index('ix_sessions_client_start', 'client_id', 'scheduled_start'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -0,0 +1,52 @@
+"""Custom column types shared by the models."""
+import json
+from sqlalchemy import Text, cast, false, literal, or_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import JSON, TypeDecorator
+
+
+class JSONType(TypeDecorator):
+    """
+    JSON document column: ``JSONB`` on PostgreSQL, ``JSON`` elsewhere.
+
+    Values are decoded once when a row is loaded and kept on the instance,
+    so reads are plain attribute access. Python ``None`` is stored as SQL
+    NULL. Changes are detected on assignment, not on in-place mutation:
+    assign a new list/dict to persist an edit. Assign Python values, not
+    ``json.dumps`` output (a string is stored as a JSON string).
+    """
+
+    impl = JSON
+    cache_ok = True
+
+    def __init__(self):
+        super().__init__(none_as_null=True)
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB(none_as_null=True))
+        return dialect.type_descriptor(JSON(none_as_null=True))
+
+    def coerce_compared_value(self, op, value):
+        return self.impl.coerce_compared_value(op, value)
+
+
+def json_array_contains_any(columns, values, dialect):
+    """
+    WHERE clause: any of ``columns`` (JSON arrays) has an element in ``values``.
+
+    PostgreSQL uses ``@>`` containment, which the ``jsonb_path_ops`` GIN
+    indexes serve. Other dialects match the serialized element in the
+    JSON text.
+
+    Args:
+        columns: JSONType columns holding arrays
+        values: Exact element values
+        dialect: Dialect name of the bind the query runs on
+    """
+    if dialect == 'postgresql':
+        clauses = [column.op('@>')(cast(literal([value], JSONB), JSONB)) for column in columns for value in values]
+    else:
+        clauses = [cast(column, Text).contains(json.dumps(value), autoescape=True)
+                   for column in columns for value in values]
+    return or_(*clauses) if clauses else false()
@@ -1,59 +1,71 @@
-from flask import Blueprint, jsonify, request
-import requests
-bp = Blueprint('api', __name__, url_prefix='/api/v1')
-
-# ...existing code...
-
-@bp.route('/exercises/search', methods=['GET'])
-def api_search_exercises():
-    """Proxy search to WGER API for exercises."""
-    query = request.args.get('q', '')
-    language = request.args.get('language', '2')  # 2 = English
-    page = request.args.get('page', 1)
-    per_page = request.args.get('limit', 20)
-
-    # WGER API endpoint
-    wger_url = f"https://wger.de/api/v2/exercise/"
-    params = {
-        'language': language,
-        'status': '2',  # only public
-        'limit': per_page,
-        'page': page,
-    }
-    if query:
-        params['name'] = query
-
-    try:
-        resp = requests.get(wger_url, params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        # Optionally filter results by query in name/description
-        if query:
-            filtered = [ex for ex in data.get('results', []) if query.lower() in ex['name'].lower() or query.lower() in (ex['description'] or '').lower()]
-        else:
-            filtered = data.get('results', [])
-        return jsonify({'exercises': filtered, 'count': len(filtered)})
-    except Exception as e:
-        return jsonify({'error': str(e), 'exercises': [], 'count': 0}), 500
 """API routes for external integrations."""
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
+from sqlalchemy.orm import load_only
 from app.models.client import Client
 from app.models.session import Session
 from app.models.program import Program
+from app.services import wger
+from app.services.exercise_index import exercise_index
 from datetime import datetime
 
 bp = Blueprint('api', __name__, url_prefix='/api/v1')
 
 
-@bp.route('/clients', methods=['GET'])
+@bp.route('/exercises/search', methods=['GET'])
+def api_search_exercises():
+    """
+    Search exercises in the local WGER mirror.
+    
+    Results come from the in-memory exercise index. The WGER API is only
+    queried (and cached) when the mirror has no match or for other
+    languages, so search keeps working offline.
+    
+    Query Parameters:
+        - q: Search text (prefix match on every word)
+        - language: WGER language id (default: 2, English)
+        - page: Page number (default: 1)
+        - limit: Results per page (default: 20, max: 100)
+    """
+    query = request.args.get('q', '').strip()
+    language = request.args.get('language', str(wger.LANGUAGE_ID))
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    trainer_id = current_user.id if current_user.is_authenticated else None
+    
+    exercises, total, source = [], 0, 'local'
+    if language == str(wger.LANGUAGE_ID):
+        total, exercises = exercise_index.search(query, trainer_id, (page - 1) * per_page, per_page)
+    
+    if not total:
+        # Cold miss (or a language the mirror does not hold): ask WGER
+        remote = wger.search_remote(query, language, page, per_page)
+        if remote is not None:
+            exercises, total, source = remote, len(remote), 'remote'
+    
+    return jsonify({
+        'exercises': exercises,
+        'count': len(exercises),
+        'total': total,
+        'page': page,
+        'source': source
+    })
+
+
+# Flat, unpaginated lists in the response shape /api/v1/clients, /sessions and
+# /programs had before those URLs moved to the paginated api_* list views.
+# Kept for existing integrations; new code should use the paginated lists.
+
+@bp.route('/legacy/clients', methods=['GET'])
 @login_required
 def api_get_clients():
-    """Get all clients via API."""
+    """Get all active clients as a flat list (legacy shape)."""
     clients = Client.query.filter_by(
         trainer_id=current_user.id,
         is_active=True
-    ).all()
+    ).options(load_only(
+        Client.first_name, Client.last_name, Client.email, Client.phone, Client.fitness_goal
+    )).all()
     
     return jsonify({
         'clients': [{
@@ -67,19 +79,25 @@ def api_get_clients():
     })
 
 
-@bp.route('/sessions', methods=['GET'])
+@bp.route('/legacy/sessions', methods=['GET'])
 @login_required
 def api_get_sessions():
-    """Get sessions via API."""
+    """Get sessions as a flat list (legacy shape)."""
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = Session.query.filter_by(trainer_id=current_user.id)
+    query = Session.query.filter_by(trainer_id=current_user.id).options(load_only(
+        Session.title, Session.client_id, Session.scheduled_start, Session.scheduled_end, Session.status,
+        Session.location
+    ))
     
-    if start_date:
-        query = query.filter(Session.scheduled_start >= datetime.fromisoformat(start_date))
-    if end_date:
-        query = query.filter(Session.scheduled_end <= datetime.fromisoformat(end_date))
+    try:
+        if start_date:
+            query = query.filter(Session.scheduled_start >= datetime.fromisoformat(start_date))
+        if end_date:
+            query = query.filter(Session.scheduled_end <= datetime.fromisoformat(end_date))
+    except ValueError:
+        return jsonify({'error': 'Invalid date format, expected ISO 8601'}), 400
     
     sessions = query.all()
     
@@ -96,13 +114,16 @@ def api_get_sessions():
     })
 
 
-@bp.route('/programs', methods=['GET'])
+@bp.route('/legacy/programs', methods=['GET'])
 @login_required
 def api_get_programs():
-    """Get programs via API."""
+    """Get programs as a flat list (legacy shape)."""
     client_id = request.args.get('client_id', type=int)
     
-    query = Program.query.filter_by(trainer_id=current_user.id)
+    query = Program.query.filter_by(trainer_id=current_user.id).options(load_only(
+        Program.name, Program.client_id, Program.goal, Program.duration_weeks, Program.status,
+        Program.is_ai_generated
+    ))
     
     if client_id:
         query = query.filter_by(client_id=client_id)
@@ -8,6 +8,9 @@ from app import db
 from app.models.booking import BookingAvailability, BookingException, OnlineBooking
 from app.models.client import Client
 from app.models.user import User
+from app.utils.pagination import paginate_query, InvalidCursor
+from app.services.scheduling import TrainerSchedule, BLOCKING_BOOKING_STATUSES, CLOSED_EXCEPTION_TYPES
+from app.services.slot_occupancy import SlotFull, occupancy_for, release_seat, reserve_seat
 
 api_booking = Blueprint('api_booking', __name__, url_prefix='/api/v1/booking')
 
@@ -170,8 +173,14 @@ def get_bookings():
         if status:
             query = query.filter_by(status=status)
         
-        query = query.order_by(OnlineBooking.requested_date.desc())
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            items, pagination = paginate_query(
+                query, OnlineBooking.requested_date, descending=True, page=page, per_page=per_page,
+                cursor=request.args.get('cursor'),
+                include_total=request.args.get('include_total', 'false').lower() == 'true'
+            )
+        except InvalidCursor as e:
+            return error_response(str(e))
         
         bookings = [{
             'id': b.id, 'client_id': b.client_id, 'status': b.status,
@@ -180,12 +189,9 @@ def get_bookings():
             'session_type': b.session_type, 'guest_name': b.guest_name,
             'guest_email': b.guest_email, 'notes': b.notes,
             'created_at': b.created_at.isoformat()
-        } for b in pagination.items]
+        } for b in items]
         
-        return success_response({'bookings': bookings, 'pagination': {
-            'page': pagination.page, 'per_page': pagination.per_page,
-            'total_pages': pagination.pages, 'total_items': pagination.total
-        }})
+        return success_response({'bookings': bookings, 'pagination': pagination})
     except Exception as e:
         return error_response(f'Error fetching bookings: {str(e)}', 500)
 
@@ -202,22 +208,45 @@ def create_booking():
         if not data.get('client_id') and (not data.get('guest_name') or not data.get('guest_email')):
             return error_response('guest_name and guest_email required for non-client bookings')
         
+        requested_date = date.fromisoformat(data['requested_date'])
+        requested_time = datetime.strptime(data['requested_time'], '%H:%M').time()
+        duration = data.get('duration_minutes', 60)
+        requested_start = datetime.combine(requested_date, requested_time)
+        requested_end = requested_start + timedelta(minutes=duration)
+        
+        schedule = TrainerSchedule.load(current_user.id, requested_date, include_bookings=False)
+        if not schedule.is_within_working_hours(requested_start, requested_end):
+            return error_response('Requested time is outside the trainer\'s availability', 409)
+        if schedule.conflicts(requested_start, requested_end):
+            return error_response('Requested time conflicts with an existing session', 409)
+        # Seats are counted per slot, so a booking must not straddle two of them
+        slot = schedule.slot_at(requested_start, requested_end)
+        if slot is None and schedule.has_slots(requested_date):
+            return error_response('Requested time must fit inside a single availability slot', 409)
+        
         booking = OnlineBooking(
             trainer_id=current_user.id,
             client_id=data.get('client_id'),
-            requested_date=date.fromisoformat(data['requested_date']),
-            requested_time=datetime.strptime(data['requested_time'], '%H:%M').time(),
+            requested_date=requested_date,
+            requested_time=requested_time,
+            duration_minutes=duration,
+            slot_start=slot.start_time if slot else None,
             session_type=data.get('session_type'),
             status='pending',
             guest_name=data.get('guest_name'),
             guest_email=data.get('guest_email'),
             guest_phone=data.get('guest_phone'),
-            notes=data.get('notes')
+            client_notes=data.get('notes')
         )
+        # Takes the seat atomically; concurrent requests for the last seat get SlotFull
+        reserve_seat(booking, slot.max_bookings if slot else None)
         db.session.add(booking)
         db.session.commit()
         
         return success_response({'id': booking.id, 'status': 'pending'}, 'Booking request created', 201)
+    except SlotFull as e:
+        db.session.rollback()
+        return error_response(str(e), 409)
     except Exception as e:
         db.session.rollback()
         return error_response(f'Error creating booking: {str(e)}', 500)
@@ -236,6 +265,19 @@ def update_booking_status(booking_id):
         if new_status not in ['confirmed', 'declined', 'cancelled']:
             return error_response('Invalid status')
         
+        # Keep the slot's seat count in step with the booking
+        was_holding = booking.status in BLOCKING_BOOKING_STATUSES
+        if was_holding and new_status not in BLOCKING_BOOKING_STATUSES:
+            release_seat(booking)
+        elif not was_holding and new_status in BLOCKING_BOOKING_STATUSES and booking.slot_start:
+            slot = BookingAvailability.query.filter_by(
+                trainer_id=booking.trainer_id,
+                day_of_week=booking.requested_date.weekday(),
+                start_time=booking.slot_start,
+                is_active=True
+            ).first()
+            reserve_seat(booking, slot.max_bookings if slot else None)
+        
         booking.status = new_status
         if new_status == 'confirmed':
             booking.confirmed_at = datetime.utcnow()
@@ -243,50 +285,115 @@ def update_booking_status(booking_id):
         booking.updated_at = datetime.utcnow()
         db.session.commit()
         return success_response({'id': booking.id, 'status': new_status}, f'Booking {new_status}')
+    except SlotFull as e:
+        db.session.rollback()
+        return error_response(str(e), 409)
     except Exception as e:
         db.session.rollback()
         return error_response(f'Error updating booking: {str(e)}', 500)
 
+# Longest window the range search will compute in one request
+MAX_RANGE_DAYS = 31
+
+@api_booking.route('/open-slots', methods=['GET'])
+@login_required
+def get_open_slots():
+    """
+    Open slots across a date range for one or more trainers.
+    
+    Query Parameters:
+        - start_date: First day (ISO format, default: today)
+        - end_date: Last day (ISO format, default: start_date + 6 days, max 31 days)
+        - duration: Slot length in minutes (default: 60)
+        - trainer_ids: Comma-separated trainer ids in your organization (default: you)
+    
+    Each table is fetched once for all trainers and days, then every
+    trainer's range is computed in a single sweep.
+    """
+    try:
+        start_date = date.fromisoformat(request.args.get('start_date', str(date.today())))
+        end_date = date.fromisoformat(request.args.get('end_date', str(start_date + timedelta(days=6))))
+        duration = request.args.get('duration', 60, type=int)
+        if end_date < start_date:
+            return error_response('end_date must not be before start_date')
+        if (end_date - start_date).days + 1 > MAX_RANGE_DAYS:
+            return error_response(f'Date range cannot exceed {MAX_RANGE_DAYS} days')
+        if duration <= 0:
+            return error_response('duration must be positive')
+        
+        trainer_ids = [current_user.id]
+        if request.args.get('trainer_ids'):
+            try:
+                trainer_ids = sorted({int(t) for t in request.args['trainer_ids'].split(',') if t.strip()})
+            except ValueError:
+                return error_response('trainer_ids must be a comma-separated list of integers')
+        
+        # Only trainers from the caller's organization (or the caller) are visible
+        trainer_query = User.query.filter(User.id.in_(trainer_ids))
+        if current_user.organization_id:
+            trainer_query = trainer_query.filter(
+                User.organization_id == current_user.organization_id,
+                User.role.in_(['owner', 'admin', 'trainer'])
+            )
+        else:
+            trainer_query = trainer_query.filter(User.id == current_user.id)
+        trainers = {t.id: t for t in trainer_query.all()}
+        missing = [tid for tid in trainer_ids if tid not in trainers]
+        if missing:
+            return error_response(f"Trainers not found in your organization: {', '.join(map(str, missing))}", 404)
+        
+        schedules = TrainerSchedule.load_many(trainer_ids, start_date, end_date)
+        now = datetime.utcnow()
+        
+        results = []
+        for tid in trainer_ids:
+            slots = schedules[tid].free_slots_range(duration, not_before=now)
+            first_day = next(iter(slots), None)
+            results.append({
+                'trainer_id': tid,
+                'trainer_name': trainers[tid].full_name,
+                'next_available': slots[first_day][0]['start'] if first_day else None,
+                'slots': slots
+            })
+        
+        return success_response({
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'duration': duration,
+            'trainers': results
+        })
+    except ValueError as e:
+        return error_response(f'Invalid date: {str(e)}')
+    except Exception as e:
+        return error_response(f'Error searching availability: {str(e)}', 500)
+
 @api_booking.route('/check-availability/<string:check_date>', methods=['GET'])
 @login_required
 def check_date_availability(check_date):
     """Check if specific date/time is available for booking."""
     try:
         target_date = date.fromisoformat(check_date)
-        day_of_week = target_date.weekday()
+        schedule = TrainerSchedule.load(current_user.id, target_date, include_bookings=False)
         
-        # Check exceptions first
-        exception = BookingException.query.filter(
-            BookingException.trainer_id == current_user.id,
-            BookingException.start_date <= target_date,
-            BookingException.end_date >= target_date
-        ).first()
-        
-        if exception and exception.exception_type == 'unavailable':
+        exception = schedule.exception_for(target_date)
+        if exception and exception.exception_type in CLOSED_EXCEPTION_TYPES:
             return success_response({'available': False, 'reason': 'Trainer unavailable'})
         
-        # Get regular availability for this day
-        slots = BookingAvailability.query.filter_by(
-            trainer_id=current_user.id,
-            day_of_week=day_of_week,
-            is_active=True
-        ).all()
-        
-        # Count existing bookings
-        existing = OnlineBooking.query.filter(
-            OnlineBooking.trainer_id == current_user.id,
-            OnlineBooking.requested_date == target_date,
-            OnlineBooking.status.in_(['pending', 'confirmed'])
-        ).count()
+        # Seats taken per slot, from the occupancy index
+        booked = occupancy_for(current_user.id, target_date)
         
         available_slots = []
-        for slot in slots:
-            if slot.max_bookings > existing:
+        for slot_start, slot_end, slot in schedule.availability_slots(target_date):
+            # Slots fully taken by a training session cannot be booked
+            if slot is None or schedule.busy.gaps(slot_start, slot_end) == []:
+                continue
+            remaining = (slot.max_bookings or 1) - booked.get(slot.start_time, 0)
+            if remaining > 0:
                 available_slots.append({
-                    'start_time': slot.start_time.strftime('%H:%M'),
-                    'end_time': slot.end_time.strftime('%H:%M'),
+                    'start_time': slot_start.strftime('%H:%M'),
+                    'end_time': slot_end.strftime('%H:%M'),
                     'session_type': slot.session_type,
-                    'slots_remaining': slot.max_bookings - existing
+                    'slots_remaining': remaining
                 })
         
         return success_response({
@@ -7,6 +7,11 @@ from app.models.session import Session
 from app.models.program import Program
 from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload, load_only
+from app.utils.loading import register_profile
+from app.utils.pagination import paginate_query, InvalidCursor
+from app.utils.query_stats import query_budget
+from app.utils.serializers import InvalidFields, parse_fields, register_schema
 
 api_clients = Blueprint('api_clients', __name__, url_prefix='/api/v1/clients')
 
@@ -22,43 +27,40 @@ def success_response(data, message='Success', status_code=200):
     return jsonify({'data': data, 'message': message, 'success': True}), status_code
 
 
-def client_to_dict(client, include_details=False):
-    """Convert client model to dictionary."""
-    client_dict = {
-        'id': client.id,
-        'first_name': client.first_name,
-        'last_name': client.last_name,
-        'full_name': client.full_name,
-        'email': client.email,
-        'phone': client.phone,
-        'is_active': client.is_active,
-        'created_at': client.created_at.isoformat() if client.created_at else None,
-        'updated_at': client.updated_at.isoformat() if client.updated_at else None,
-    }
-    
-    if include_details:
-        client_dict.update({
-            'date_of_birth': client.date_of_birth.isoformat() if client.date_of_birth else None,
-            'gender': client.gender,
-            'address': client.address,
-            'emergency_contact': client.emergency_contact,
-            'emergency_phone': client.emergency_phone,
-            'fitness_goal': client.fitness_goal,
-            'medical_conditions': client.medical_conditions,
-            'fitness_level': client.fitness_level,
-            'weight': client.weight,
-            'height': client.height,
-            'membership_type': client.membership_type,
-            'membership_start': client.membership_start.isoformat() if client.membership_start else None,
-            'membership_end': client.membership_end.isoformat() if client.membership_end else None,
-            'notes': client.notes,
-        })
-    
-    return client_dict
+CLIENT_FIELDS = (
+    'id', 'first_name', 'last_name', 'full_name', 'email', 'phone', 'is_active', 'created_at', 'updated_at',
+)
+
+CLIENT_DETAIL_FIELDS = CLIENT_FIELDS + (
+    'date_of_birth', 'gender', 'address', 'emergency_contact', 'emergency_phone', 'fitness_goal',
+    'medical_conditions', 'fitness_level', 'weight', 'height', 'membership_type', 'membership_start',
+    'membership_end', 'notes',
+)
+
+CLIENT_REQUIRES = {'full_name': ('first_name', 'last_name')}
+
+client_schema = register_schema('client', Client, CLIENT_FIELDS, requires=CLIENT_REQUIRES)
+client_detail_schema = register_schema('client_detail', Client, CLIENT_DETAIL_FIELDS, requires=CLIENT_REQUIRES)
+
+
+# include_programs of the client detail view: fetched in the client's query
+client_detail_loading = register_profile(
+    'client_detail',
+    programs=joinedload(Client.ordered_programs).load_only(
+        Program.name, Program.status, Program.start_date, Program.end_date
+    ),
+)
+
+
+def client_to_dict(client, include_details=False, fields=None):
+    """Convert client model to dictionary (``fields`` limits the keys)."""
+    schema = client_detail_schema if include_details else client_schema
+    return schema.dump(client, fields)
 
 
 @api_clients.route('', methods=['GET'])
 @login_required
+@query_budget(3)
 def get_clients():
     """
     GET /api/v1/clients
@@ -72,14 +74,25 @@ def get_clients():
         - fitness_level (str): Filter by fitness level
         - sort_by (str): Sort field (default: 'last_name')
         - sort_order (str): 'asc' or 'desc' (default: 'asc')
+        - cursor (str): Opt into keyset pagination ('' for the first page,
+          then next_cursor/prev_cursor from the previous response)
+        - include_total (bool): Include total_items in cursor mode (default: false)
+        - fields (str): Comma-separated client fields to return (default: all)
     
     Returns:
         JSON with clients list, pagination info, and metadata
     """
     try:
+        try:
+            fields = parse_fields(request.args.get('fields'), client_schema)
+        except InvalidFields as e:
+            return error_response(str(e))
+        
         # Pagination parameters
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
         
         # Filter parameters
         search = request.args.get('search', '').strip()
@@ -112,33 +125,28 @@ def get_clients():
         if fitness_level:
             query = query.filter_by(fitness_level=fitness_level)
         
-        # Apply sorting
+        # Apply sorting and pagination
         sort_column = getattr(Client, sort_by, Client.last_name)
-        if sort_order == 'desc':
-            query = query.order_by(sort_column.desc())
-        else:
-            query = query.order_by(sort_column.asc())
-        
-        # Execute query with pagination
-        pagination = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        query = query.options(*client_schema.load_options(fields, sort_column))
+        try:
+            clients, pagination = paginate_query(
+                query,
+                sort_column,
+                descending=sort_order == 'desc',
+                page=page,
+                per_page=per_page,
+                cursor=cursor,
+                include_total=include_total
+            )
+        except InvalidCursor as e:
+            return error_response(str(e))
         
         # Format response
-        clients_data = [client_to_dict(client) for client in pagination.items]
+        clients_data = client_schema.dump_many(clients, fields)
         
         return success_response({
             'clients': clients_data,
-            'pagination': {
-                'page': pagination.page,
-                'per_page': pagination.per_page,
-                'total_pages': pagination.pages,
-                'total_items': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            },
+            'pagination': pagination,
             'filters': {
                 'search': search,
                 'status': status,
@@ -154,6 +162,7 @@ def get_clients():
 
 @api_clients.route('/<int:client_id>', methods=['GET'])
 @login_required
+@query_budget(3)
 def get_client(client_id):
     """
     GET /api/v1/clients/<id>
@@ -162,25 +171,36 @@ def get_client(client_id):
     Query Parameters:
         - include_sessions (bool): Include recent sessions (default: false)
         - include_programs (bool): Include assigned programs (default: false)
+        - fields (str): Comma-separated client fields to return (default: all)
     
     Returns:
         JSON with client details and optional related data
     """
     try:
+        try:
+            fields = parse_fields(request.args.get('fields'), client_detail_schema)
+        except InvalidFields as e:
+            return error_response(str(e))
+        
+        include_sessions = request.args.get('include_sessions', '').lower() == 'true'
+        include_programs = request.args.get('include_programs', '').lower() == 'true'
+        
         client = Client.query.filter_by(
             id=client_id,
             trainer_id=current_user.id
-        ).first()
+        ).options(*client_detail_loading.options(programs=include_programs)).first()
         
         if not client:
             return error_response('Client not found', 404)
         
         # Get client data with full details
-        client_data = client_to_dict(client, include_details=True)
+        client_data = client_to_dict(client, include_details=True, fields=fields)
         
-        # Optional: Include sessions
-        if request.args.get('include_sessions', '').lower() == 'true':
-            sessions = Session.query.filter_by(client_id=client_id).order_by(
+        # Optional: Include sessions (the 10 most recent, so not eager-loaded)
+        if include_sessions:
+            sessions = Session.query.filter_by(client_id=client_id).options(load_only(
+                Session.scheduled_start, Session.scheduled_end, Session.status, Session.session_type
+            )).order_by(
                 Session.scheduled_start.desc()
             ).limit(10).all()
             
@@ -193,10 +213,8 @@ def get_client(client_id):
             } for s in sessions]
         
         # Optional: Include programs
-        if request.args.get('include_programs', '').lower() == 'true':
-            programs = Program.query.filter_by(client_id=client_id).order_by(
-                Program.created_at.desc()
-            ).all()
+        if include_programs:
+            programs = client.ordered_programs
             
             client_data['programs'] = [{
                 'id': p.id,
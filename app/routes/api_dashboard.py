@@ -2,15 +2,17 @@
 from datetime import datetime, date, timedelta
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import func, and_
-from app import db
+from sqlalchemy import and_
 from app.models.client import Client
 from app.models.session import Session
 from app.models.program import Program
 from app.models.progress import ProgressEntry
 from app.models.nutrition import NutritionPlan, FoodLog
-from app.models.booking import OnlineBooking
 from app.models.payments import Payment, Subscription
+from app.services.dashboard_stats import get_overview_counters
+from app.services.rollups import session_summary, session_series, revenue_summary, revenue_series
+from app.utils.cache import cached_per_trainer
+from app.utils.aggregation import BUCKETS
 
 api_dashboard = Blueprint('api_dashboard', __name__, url_prefix='/api/v1/dashboard')
 
@@ -27,74 +29,36 @@ def success_response(data=None, message=None, status_code=200):
 
 @api_dashboard.route('/overview', methods=['GET'])
 @login_required
+@cached_per_trainer('overview')
 def get_dashboard_overview():
     """Get comprehensive dashboard overview."""
     try:
         days = request.args.get('days', 30, type=int)
         start_date = date.today() - timedelta(days=days)
         
-        # Client stats
-        total_clients = Client.query.filter_by(trainer_id=current_user.id, status='active').count()
-        new_clients = Client.query.filter(
-            Client.trainer_id == current_user.id,
-            Client.created_at >= start_date
-        ).count()
-        
-        # Session stats
-        total_sessions = Session.query.filter_by(trainer_id=current_user.id).count()
-        completed_sessions = Session.query.filter_by(
-            trainer_id=current_user.id, status='completed'
-        ).filter(Session.session_date >= start_date).count()
-        
-        upcoming_sessions = Session.query.filter(
-            Session.trainer_id == current_user.id,
-            Session.session_date >= date.today(),
-            Session.status == 'scheduled'
-        ).count()
-        
-        # Program stats
-        active_programs = Program.query.filter_by(
-            trainer_id=current_user.id, status='active'
-        ).count()
-        
-        # Revenue stats
-        revenue = db.session.query(func.sum(Payment.amount)).filter(
-            Payment.trainer_id == current_user.id,
-            Payment.payment_status == 'completed',
-            Payment.payment_date >= start_date
-        ).scalar() or 0
-        
-        # Active subscriptions
-        active_subscriptions = Subscription.query.filter_by(
-            trainer_id=current_user.id, status='active'
-        ).count()
-        
-        # Pending bookings
-        pending_bookings = OnlineBooking.query.filter_by(
-            trainer_id=current_user.id, status='pending'
-        ).count()
+        counters = get_overview_counters(current_user.id, since=start_date)
         
         return success_response({
             'period_days': days,
             'clients': {
-                'total_active': total_clients,
-                'new_this_period': new_clients
+                'total_active': counters['clients_active'],
+                'new_this_period': counters['clients_new']
             },
             'sessions': {
-                'total': total_sessions,
-                'completed_this_period': completed_sessions,
-                'upcoming': upcoming_sessions
+                'total': counters['sessions_total'],
+                'completed_this_period': counters['sessions_completed'],
+                'upcoming': counters['sessions_upcoming']
             },
             'programs': {
-                'active': active_programs
+                'active': counters['programs_active']
             },
             'revenue': {
-                'total_this_period': float(revenue),
+                'total_this_period': counters['revenue'],
                 'currency': 'USD',
-                'active_subscriptions': active_subscriptions
+                'active_subscriptions': counters['subscriptions_active']
             },
             'bookings': {
-                'pending': pending_bookings
+                'pending': counters['bookings_pending']
             }
         })
     except Exception as e:
@@ -102,6 +66,7 @@ def get_dashboard_overview():
 
 @api_dashboard.route('/activity', methods=['GET'])
 @login_required
+@cached_per_trainer('activity')
 def get_recent_activity():
     """Get recent activity feed."""
     try:
@@ -125,12 +90,12 @@ def get_recent_activity():
         # Recent sessions
         recent_sessions = Session.query.filter_by(
             trainer_id=current_user.id
-        ).order_by(Session.session_date.desc()).limit(5).all()
+        ).order_by(Session.scheduled_start.desc()).limit(5).all()
         
         for session in recent_sessions:
             activities.append({
                 'type': 'session',
-                'timestamp': session.session_date.isoformat(),
+                'timestamp': session.scheduled_start.isoformat(),
                 'description': f'Session: {session.session_type} - {session.status}',
                 'session_id': session.id,
                 'client_id': session.client_id,
@@ -161,6 +126,7 @@ def get_recent_activity():
 
 @api_dashboard.route('/calendar', methods=['GET'])
 @login_required
+@cached_per_trainer('calendar')
 def get_calendar_view():
     """Get calendar view of sessions."""
     try:
@@ -169,17 +135,17 @@ def get_calendar_view():
         
         sessions = Session.query.filter(
             Session.trainer_id == current_user.id,
-            Session.session_date >= date.fromisoformat(start_date),
-            Session.session_date <= date.fromisoformat(end_date)
-        ).order_by(Session.session_date, Session.session_time).all()
+            Session.scheduled_start >= date.fromisoformat(start_date),
+            Session.scheduled_start < date.fromisoformat(end_date) + timedelta(days=1)
+        ).order_by(Session.scheduled_start).all()
         
         calendar_events = []
         for s in sessions:
             calendar_events.append({
                 'id': s.id,
-                'date': s.session_date.isoformat(),
-                'time': s.session_time.strftime('%H:%M') if s.session_time else None,
-                'duration': s.duration_minutes,
+                'date': s.scheduled_start.date().isoformat(),
+                'time': s.scheduled_start.strftime('%H:%M'),
+                'duration': int((s.scheduled_end - s.scheduled_start).total_seconds() // 60),
                 'client_id': s.client_id,
                 'session_type': s.session_type,
                 'status': s.status,
@@ -252,83 +218,63 @@ def get_client_progress_summary(client_id):
 
 @api_dashboard.route('/stats/sessions', methods=['GET'])
 @login_required
+@cached_per_trainer('stats_sessions')
 def get_session_stats():
     """Get detailed session statistics."""
     try:
         days = request.args.get('days', 30, type=int)
+        bucket = request.args.get('bucket', 'day')
+        if bucket not in BUCKETS:
+            return error_response(f"bucket must be one of: {', '.join(BUCKETS)}")
         start_date = date.today() - timedelta(days=days)
         
-        sessions = Session.query.filter(
-            Session.trainer_id == current_user.id,
-            Session.session_date >= start_date
-        ).all()
-        
-        # Group by status
-        by_status = {}
-        for s in sessions:
-            by_status[s.status] = by_status.get(s.status, 0) + 1
-        
-        # Group by type
-        by_type = {}
-        for s in sessions:
-            by_type[s.session_type] = by_type.get(s.session_type, 0) + 1
-        
-        # Daily count
-        daily_counts = {}
-        for s in sessions:
-            date_key = s.session_date.isoformat()
-            daily_counts[date_key] = daily_counts.get(date_key, 0) + 1
-        
-        return success_response({
+        # Grouped in SQL over the daily rollup; no Session rows are loaded
+        summary = session_summary(current_user.id, start=start_date)
+        response = {
             'period_days': days,
-            'total_sessions': len(sessions),
-            'by_status': by_status,
-            'by_type': by_type,
-            'daily_counts': daily_counts
-        })
+            'total_sessions': summary['total_sessions'],
+            'by_status': summary['by_status'],
+            'by_type': summary['by_type'],
+            'daily_counts': summary['counts_by_bucket']
+        }
+        if bucket != 'day':
+            response['bucket'] = bucket
+            response['counts_by_bucket'] = session_series(current_user.id, start=start_date, bucket=bucket)
+        
+        return success_response(response)
     except Exception as e:
         return error_response(f'Error fetching session stats: {str(e)}', 500)
 
 @api_dashboard.route('/stats/revenue', methods=['GET'])
 @login_required
+@cached_per_trainer('stats_revenue')
 def get_revenue_breakdown():
     """Get revenue breakdown and trends."""
     try:
         days = request.args.get('days', 90, type=int)
+        bucket = request.args.get('bucket', 'month')
+        if bucket not in BUCKETS:
+            return error_response(f"bucket must be one of: {', '.join(BUCKETS)}")
         start_date = date.today() - timedelta(days=days)
         
-        payments = Payment.query.filter(
-            Payment.trainer_id == current_user.id,
-            Payment.payment_status == 'completed',
-            Payment.payment_date >= start_date
-        ).all()
-        
-        total = sum(p.amount for p in payments)
-        
-        # Monthly breakdown
-        monthly = {}
-        for p in payments:
-            month_key = p.payment_date.strftime('%Y-%m')
-            monthly[month_key] = monthly.get(month_key, 0) + float(p.amount)
-        
-        # By payment method
-        by_method = {}
-        for p in payments:
-            method = p.payment_method or 'unknown'
-            by_method[method] = by_method.get(method, 0) + float(p.amount)
+        # Grouped in SQL over the daily rollup; no Payment rows are loaded
+        summary = revenue_summary(current_user.id, start=start_date, bucket=bucket)
         
         # Average per client
-        unique_clients = len(set(p.client_id for p in payments))
-        avg_per_client = float(total / unique_clients) if unique_clients > 0 else 0
+        unique_clients = summary['unique_clients']
+        avg_per_client = summary['total_revenue'] / unique_clients if unique_clients > 0 else 0
         
         return success_response({
             'period_days': days,
-            'total_revenue': float(total),
-            'total_transactions': len(payments),
+            'total_revenue': summary['total_revenue'],
+            'total_transactions': summary['total_transactions'],
             'unique_clients': unique_clients,
             'average_per_client': avg_per_client,
-            'monthly_breakdown': monthly,
-            'by_payment_method': by_method,
+            'bucket': bucket,
+            'revenue_by_bucket': summary['revenue_by_bucket'],
+            'monthly_breakdown': summary['revenue_by_bucket'] if bucket == 'month' else revenue_series(
+                current_user.id, start=start_date),
+            'by_payment_method': summary['by_payment_method'],
             'currency': 'USD'
         })
     except Exception as e:
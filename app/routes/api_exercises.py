@@ -9,10 +9,14 @@ This module provides comprehensive exercise library management including:
 """
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import func, or_
-import json
+from sqlalchemy import or_
 from app import db
 from app.models.exercise_library import ExerciseLibrary
+from app.models.types import json_array_contains_any
+from app.services import exercise_search
+from app.services.exercise_index import exercise_index
+from app.utils.pagination import paginate_query, InvalidCursor
+from app.utils.serializers import InvalidFields, parse_fields, register_schema
 
 api_exercises = Blueprint('api_exercises', __name__, url_prefix='/api/v1/exercises')
 
@@ -21,52 +25,44 @@ api_exercises = Blueprint('api_exercises', __name__, url_prefix='/api/v1/exercis
 # Helper Functions
 # ============================================================================
 
-def exercise_to_dict(exercise, include_usage=False):
+EXERCISE_FIELDS = (
+    'id', 'name', 'description', 'category', 'primary_muscle_groups', 'secondary_muscle_groups',
+    'difficulty_level', 'equipment_required', 'exercise_type', 'setup_instructions', 'execution_steps',
+    'common_mistakes', 'tips_and_cues', 'image_url', 'video_url', 'animation_url', 'easier_variations',
+    'harder_variations', 'alternative_exercises', 'contraindications', 'injury_considerations',
+    'typical_sets', 'typical_reps', 'typical_rest_seconds', 'tags', 'is_custom', 'is_public', 'is_active',
+    'created_at', 'updated_at',
+)
+
+EXERCISE_LIST_FIELDS = (
+    'primary_muscle_groups', 'secondary_muscle_groups', 'equipment_required', 'execution_steps',
+    'common_mistakes', 'tips_and_cues', 'easier_variations', 'harder_variations', 'alternative_exercises',
+    'contraindications', 'tags',
+)
+
+exercise_schema = register_schema(
+    'exercise', ExerciseLibrary, EXERCISE_FIELDS, defaults={field: [] for field in EXERCISE_LIST_FIELDS},
+    deferred=('description', 'setup_instructions', 'execution_steps', 'common_mistakes', 'tips_and_cues',
+              'injury_considerations'),
+)
+
+
+def exercise_to_dict(exercise, include_usage=False, fields=None):
     """
     Convert an ExerciseLibrary object to a dictionary.
     
     Args:
         exercise: ExerciseLibrary object to convert
         include_usage: Whether to include usage statistics
+        fields: Schema fields to return (default: all)
         
     Returns:
         Dictionary representation of the exercise
     """
-    data = {
-        'id': exercise.id,
-        'name': exercise.name,
-        'description': exercise.description,
-        'category': exercise.category,
-        'primary_muscle_groups': exercise.get_primary_muscles(),
-        'secondary_muscle_groups': json.loads(exercise.secondary_muscle_groups) if exercise.secondary_muscle_groups else [],
-        'difficulty_level': exercise.difficulty_level,
-        'equipment_required': exercise.get_equipment(),
-        'exercise_type': exercise.exercise_type,
-        'setup_instructions': exercise.setup_instructions,
-        'execution_steps': exercise.get_execution_steps(),
-        'common_mistakes': json.loads(exercise.common_mistakes) if exercise.common_mistakes else [],
-        'tips_and_cues': json.loads(exercise.tips_and_cues) if exercise.tips_and_cues else [],
-        'image_url': exercise.image_url,
-        'video_url': exercise.video_url,
-        'animation_url': exercise.animation_url,
-        'easier_variations': json.loads(exercise.easier_variations) if exercise.easier_variations else [],
-        'harder_variations': json.loads(exercise.harder_variations) if exercise.harder_variations else [],
-        'alternative_exercises': json.loads(exercise.alternative_exercises) if exercise.alternative_exercises else [],
-        'contraindications': json.loads(exercise.contraindications) if exercise.contraindications else [],
-        'injury_considerations': exercise.injury_considerations,
-        'typical_sets': exercise.typical_sets,
-        'typical_reps': exercise.typical_reps,
-        'typical_rest_seconds': exercise.typical_rest_seconds,
-        'tags': exercise.get_tags(),
-        'is_custom': exercise.is_custom,
-        'is_public': exercise.is_public,
-        'is_active': exercise.is_active,
-        'created_at': exercise.created_at.isoformat() if exercise.created_at else None,
-        'updated_at': exercise.updated_at.isoformat() if exercise.updated_at else None,
-    }
+    data = exercise_schema.dump(exercise, fields)
     
     # Include creator info for custom exercises
-    if exercise.is_custom and exercise.created_by_trainer_id:
+    if (fields is None or 'is_custom' in fields) and exercise.is_custom and exercise.created_by_trainer_id:
         data['created_by_trainer_id'] = exercise.created_by_trainer_id
     
     # Include usage stats if requested
@@ -152,7 +148,8 @@ def get_exercises():
     Query Parameters:
         - page: Page number (default: 1)
         - per_page: Items per page (default: 20, max: 100)
-        - search: Search in name and description
+        - search: Full-text search in name, tags, muscles, cues and
+          description (stemmed; the last word matches as a prefix)
         - category: Filter by category (strength, cardio, flexibility, balance, mobility)
         - muscle: Filter by muscle group (partial match)
         - equipment: Filter by equipment (partial match)
@@ -160,108 +157,213 @@ def get_exercises():
         - exercise_type: Filter by type (compound, isolation, bodyweight, cardio)
         - custom_only: Show only custom exercises (true/false)
         - include_usage: Include usage statistics (true/false)
-        - sort_by: Sort field (default: name)
-        - sort_order: Sort order (asc/desc, default: asc)
+        - include_facets: Include counts per category, difficulty, type,
+          muscle and equipment for the filtered exercises (true/false)
+        - sort_by: Sort field (default: relevance when searching, else name)
+        - sort_order: Sort order (asc/desc, default: desc for relevance,
+          else asc)
+        - cursor: Opt into keyset pagination ('' for the first page, then
+          next_cursor/prev_cursor from the previous response)
+        - include_total: Include total_items in cursor mode (true/false)
+        - fields: Comma-separated exercise fields to return (default: all
+          but description, setup_instructions, execution_steps,
+          common_mistakes, tips_and_cues and injury_considerations, which
+          are only read from the database when named here)
+        
+    Listings without a cursor, sorted by anything but usage_count, are
+    answered from the in-memory exercise index intersected with the
+    full-text matches; only the rows of the requested page are loaded.
+    Without a full-text backend, search falls back to ILIKE.
         
     Returns:
         JSON response with paginated exercise list
     """
     try:
+        try:
+            fields = parse_fields(request.args.get('fields'), exercise_schema, default=exercise_schema.list_fields)
+        except InvalidFields as e:
+            return error_response(str(e))
+        
         # Pagination
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
         
-        # Base query - only active exercises
-        query = ExerciseLibrary.query.filter_by(is_active=True)
-        
-        # Filter: custom only or include all
+        # Filters
         custom_only = request.args.get('custom_only', 'false').lower() == 'true'
-        if custom_only:
-            query = query.filter_by(is_custom=True, created_by_trainer_id=current_user.id)
-        else:
-            # Show public exercises + user's custom exercises
-            query = query.filter(
-                or_(
-                    ExerciseLibrary.is_public == True,
-                    ExerciseLibrary.created_by_trainer_id == current_user.id
-                )
-            )
-        
-        # Search
         search_term = request.args.get('search')
-        if search_term:
-            search_pattern = f"%{search_term}%"
-            query = query.filter(
-                or_(
-                    ExerciseLibrary.name.ilike(search_pattern),
-                    ExerciseLibrary.description.ilike(search_pattern)
-                )
-            )
-        
-        # Filters
         category = request.args.get('category')
-        if category:
-            query = query.filter_by(category=category)
-        
         muscle = request.args.get('muscle')
-        if muscle:
-            muscle_pattern = f"%{muscle}%"
-            query = query.filter(
-                or_(
-                    ExerciseLibrary.primary_muscle_groups.ilike(muscle_pattern),
-                    ExerciseLibrary.secondary_muscle_groups.ilike(muscle_pattern)
-                )
-            )
-        
         equipment = request.args.get('equipment')
-        if equipment:
-            equipment_pattern = f"%{equipment}%"
-            query = query.filter(ExerciseLibrary.equipment_required.ilike(equipment_pattern))
-        
         difficulty = request.args.get('difficulty')
-        if difficulty:
-            query = query.filter_by(difficulty_level=difficulty)
-        
         exercise_type = request.args.get('exercise_type')
-        if exercise_type:
-            query = query.filter_by(exercise_type=exercise_type)
+        include_usage = request.args.get('include_usage', 'false').lower() == 'true'
+        include_facets = request.args.get('include_facets', 'false').lower() == 'true'
         
-        # Sorting
-        sort_by = request.args.get('sort_by', 'name')
-        sort_order = request.args.get('sort_order', 'asc').lower()
+        # Full-text search (None when the database has no search backend)
+        ranked = None
+        if search_term:
+            found = exercise_search.search(search_term)
+            if found is not None:
+                ranked, search_term = found
         
-        valid_sort_fields = ['name', 'category', 'difficulty_level', 'usage_count', 'created_at']
+        # Sorting (search results default to relevance)
+        default_sort = 'relevance' if ranked is not None and cursor is None else 'name'
+        sort_by = request.args.get('sort_by', default_sort)
+        sort_order = request.args.get('sort_order', 'asc' if sort_by != 'relevance' else 'desc').lower()
+        
+        valid_sort_fields = ['relevance', 'name', 'category', 'difficulty_level', 'usage_count', 'created_at']
         if sort_by not in valid_sort_fields:
             return error_response(f'Invalid sort_by field. Must be one of: {", ".join(valid_sort_fields)}')
-        
-        sort_column = getattr(ExerciseLibrary, sort_by)
-        if sort_order == 'desc':
-            query = query.order_by(sort_column.desc())
+        if sort_by == 'relevance' and cursor is not None:
+            return error_response('sort_by=relevance does not support cursor pagination')
+        
+        # Select only the columns the response reads
+        load_columns = []
+        if 'is_custom' in fields:
+            load_columns.append(ExerciseLibrary.created_by_trainer_id)
+        if include_usage:
+            load_columns += [ExerciseLibrary.usage_count, ExerciseLibrary.average_rating]
+        
+        use_index = cursor is None and sort_by != 'usage_count' and (not search_term or ranked is not None)
+        facets = None
+        if include_facets or use_index:
+            index = exercise_index.snapshot()
+            matching_ids = index.filter(
+                current_user.id,
+                custom_only=custom_only,
+                category=category,
+                muscle=muscle,
+                equipment=equipment,
+                difficulty=difficulty,
+                exercise_type=exercise_type
+            )
+            if ranked is not None:
+                matching_ids &= {exercise_id for exercise_id, _ in ranked}
+            if include_facets:
+                facets = index.facets(matching_ids)
+        
+        if use_index:
+            # Filtered listing from the in-memory index; only the page is loaded
+            page = max(page, 1)
+            per_page = per_page if per_page > 0 else 20
+            offset = (page - 1) * per_page
+            if sort_by == 'relevance' and ranked is not None:
+                ordered = [exercise_id for exercise_id, _ in ranked if exercise_id in matching_ids]
+                if sort_order == 'asc':
+                    ordered.reverse()
+                page_ids = ordered[offset:offset + per_page]
+            else:
+                sort_field = 'name' if sort_by == 'relevance' else sort_by
+                page_ids = index.page(matching_ids, sort_field, sort_order == 'desc', offset, per_page)
+            items = []
+            if page_ids:
+                rows = {
+                    exercise.id: exercise
+                    for exercise in ExerciseLibrary.query.filter(
+                        ExerciseLibrary.id.in_(page_ids),
+                        ExerciseLibrary.is_active == True
+                    ).options(*exercise_schema.load_options(fields, *load_columns))
+                }
+                items = [rows[exercise_id] for exercise_id in page_ids if exercise_id in rows]
+            total = len(matching_ids)
+            total_pages = -(-total // per_page)
+            pagination = {
+                'page': page,
+                'per_page': per_page,
+                'total_pages': total_pages,
+                'total_items': total,
+                'has_next': page < total_pages,
+                'has_prev': page > 1
+            }
         else:
-            query = query.order_by(sort_column.asc())
-        
-        # Execute query with pagination
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            # Base query - only active exercises
+            query = ExerciseLibrary.query.filter_by(is_active=True)
+            
+            # Filter: custom only or include all
+            if custom_only:
+                query = query.filter_by(is_custom=True, created_by_trainer_id=current_user.id)
+            else:
+                # Show public exercises + user's custom exercises
+                query = query.filter(
+                    or_(
+                        ExerciseLibrary.is_public == True,
+                        ExerciseLibrary.created_by_trainer_id == current_user.id
+                    )
+                )
+            
+            # Search
+            if search_term:
+                match = exercise_search.match_clause(search_term) if ranked is not None else None
+                if match is not None:
+                    query = query.filter(match)
+                else:
+                    search_pattern = f"%{search_term}%"
+                    query = query.filter(
+                        or_(
+                            ExerciseLibrary.name.ilike(search_pattern),
+                            ExerciseLibrary.description.ilike(search_pattern)
+                        )
+                    )
+            
+            if category:
+                query = query.filter_by(category=category)
+            
+            # Partial names resolve to the known values, matched as array elements
+            dialect = db.session.get_bind().dialect.name
+            if muscle:
+                index = exercise_index.snapshot()
+                query = query.filter(json_array_contains_any(
+                    [ExerciseLibrary.primary_muscle_groups, ExerciseLibrary.secondary_muscle_groups],
+                    index.values_matching(index.muscles, muscle), dialect
+                ))
+            
+            if equipment:
+                index = exercise_index.snapshot()
+                query = query.filter(json_array_contains_any(
+                    [ExerciseLibrary.equipment_required],
+                    index.values_matching(index.equipment, equipment), dialect
+                ))
+            
+            if difficulty:
+                query = query.filter_by(difficulty_level=difficulty)
+            
+            if exercise_type:
+                query = query.filter_by(exercise_type=exercise_type)
+            
+            sort_column = getattr(ExerciseLibrary, sort_by)
+            query = query.options(*exercise_schema.load_options(fields, sort_column, *load_columns))
+            
+            # Execute query with pagination
+            try:
+                items, pagination = paginate_query(
+                    query,
+                    sort_column,
+                    descending=sort_order == 'desc',
+                    page=page,
+                    per_page=per_page,
+                    cursor=cursor,
+                    include_total=include_total
+                )
+            except InvalidCursor as e:
+                return error_response(str(e))
         
         # Convert to dict
-        include_usage = request.args.get('include_usage', 'false').lower() == 'true'
-        
         exercises = [
-            exercise_to_dict(exercise, include_usage=include_usage)
-            for exercise in pagination.items
+            exercise_to_dict(exercise, include_usage=include_usage, fields=fields)
+            for exercise in items
         ]
         
-        return success_response({
+        data = {
             'exercises': exercises,
-            'pagination': {
-                'page': pagination.page,
-                'per_page': pagination.per_page,
-                'total_pages': pagination.pages,
-                'total_items': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
-        })
+            'pagination': pagination
+        }
+        if search_term and search_term != request.args.get('search'):
+            data['corrected_search'] = search_term
+        if facets is not None:
+            data['facets'] = facets
+        return success_response(data)
         
     except Exception as e:
         return error_response(f'Error fetching exercises: {str(e)}', 500)
@@ -275,11 +377,17 @@ def get_exercise(exercise_id):
     
     Query Parameters:
         - include_usage: Include usage statistics (true/false)
+        - fields: Comma-separated exercise fields to return (default: all)
         
     Returns:
         JSON response with exercise details
     """
     try:
+        try:
+            fields = parse_fields(request.args.get('fields'), exercise_schema)
+        except InvalidFields as e:
+            return error_response(str(e))
+        
         exercise = ExerciseLibrary.query.get(exercise_id)
         
         if not exercise:
@@ -292,7 +400,7 @@ def get_exercise(exercise_id):
         
         include_usage = request.args.get('include_usage', 'false').lower() == 'true'
         
-        return success_response(exercise_to_dict(exercise, include_usage=include_usage))
+        return success_response(exercise_to_dict(exercise, include_usage=include_usage, fields=fields))
         
     except Exception as e:
         return error_response(f'Error fetching exercise: {str(e)}', 500)
@@ -356,24 +464,24 @@ def create_exercise():
             name=data['name'],
             description=data.get('description'),
             category=data['category'],
-            primary_muscle_groups=json.dumps(data.get('primary_muscle_groups', [])),
-            secondary_muscle_groups=json.dumps(data.get('secondary_muscle_groups', [])),
+            primary_muscle_groups=data.get('primary_muscle_groups', []),
+            secondary_muscle_groups=data.get('secondary_muscle_groups', []),
             difficulty_level=data.get('difficulty_level', 'intermediate'),
-            equipment_required=json.dumps(data.get('equipment_required', [])),
+            equipment_required=data.get('equipment_required', []),
             exercise_type=data.get('exercise_type', 'compound'),
             setup_instructions=data.get('setup_instructions'),
-            execution_steps=json.dumps(data.get('execution_steps', [])),
-            common_mistakes=json.dumps(data.get('common_mistakes', [])),
-            tips_and_cues=json.dumps(data.get('tips_and_cues', [])),
+            execution_steps=data.get('execution_steps', []),
+            common_mistakes=data.get('common_mistakes', []),
+            tips_and_cues=data.get('tips_and_cues', []),
             image_url=data.get('image_url'),
             video_url=data.get('video_url'),
             animation_url=data.get('animation_url'),
-            contraindications=json.dumps(data.get('contraindications', [])),
+            contraindications=data.get('contraindications', []),
             injury_considerations=data.get('injury_considerations'),
             typical_sets=data.get('typical_sets'),
             typical_reps=data.get('typical_reps'),
             typical_rest_seconds=data.get('typical_rest_seconds'),
-            tags=json.dumps(data.get('tags', [])),
+            tags=data.get('tags', []),
             is_custom=True,
             created_by_trainer_id=current_user.id,
             is_public=data.get('is_public', False),
@@ -453,7 +561,7 @@ def update_exercise(exercise_id):
         
         for field in json_fields:
             if field in data:
-                setattr(exercise, field, json.dumps(data[field]))
+                setattr(exercise, field, data[field])
         
         db.session.commit()
         
@@ -524,26 +632,11 @@ def get_exercise_stats():
         JSON response with exercise statistics
     """
     try:
-        # Total counts
-        total_exercises = ExerciseLibrary.query.filter_by(is_active=True).count()
-        standard_exercises = ExerciseLibrary.query.filter_by(is_custom=False, is_active=True).count()
-        custom_exercises = ExerciseLibrary.query.filter_by(
-            is_custom=True,
-            created_by_trainer_id=current_user.id,
-            is_active=True
-        ).count()
-        
-        # Category breakdown
-        category_breakdown = db.session.query(
-            ExerciseLibrary.category,
-            func.count(ExerciseLibrary.id)
-        ).filter_by(is_active=True).group_by(ExerciseLibrary.category).all()
-        
-        # Difficulty breakdown
-        difficulty_breakdown = db.session.query(
-            ExerciseLibrary.difficulty_level,
-            func.count(ExerciseLibrary.id)
-        ).filter_by(is_active=True).group_by(ExerciseLibrary.difficulty_level).all()
+        # Counts from the in-memory exercise index
+        index = exercise_index.snapshot()
+        total_exercises = len(index.docs)
+        standard_exercises = total_exercises - len(index.custom)
+        custom_exercises = len(index.custom & index.by_owner.get(current_user.id, set()))
         
         # Most popular exercises (by usage)
         popular_exercises = ExerciseLibrary.query.filter_by(
@@ -556,8 +649,8 @@ def get_exercise_stats():
             'total_exercises': total_exercises,
             'standard_exercises': standard_exercises,
             'custom_exercises': custom_exercises,
-            'by_category': {cat: count for cat, count in category_breakdown if cat},
-            'by_difficulty': {diff: count for diff, count in difficulty_breakdown if diff},
+            'by_category': index.category_counts,
+            'by_difficulty': index.difficulty_counts,
             'most_popular': [
                 {
                     'id': ex.id,
@@ -585,17 +678,12 @@ def get_categories():
         JSON response with category list
     """
     try:
-        categories = db.session.query(
-            ExerciseLibrary.category,
-            func.count(ExerciseLibrary.id).label('count')
-        ).filter_by(is_active=True).group_by(ExerciseLibrary.category).all()
-        
         category_list = [
             {
                 'name': cat,
                 'count': count
             }
-            for cat, count in categories if cat
+            for cat, count in exercise_index.snapshot().category_counts.items()
         ]
         
         return success_response(category_list)
@@ -614,17 +702,7 @@ def get_muscle_groups():
         JSON response with muscle group list
     """
     try:
-        # Get all exercises
-        exercises = ExerciseLibrary.query.filter_by(is_active=True).all()
-        
-        # Collect all unique muscles
-        muscles = set()
-        for exercise in exercises:
-            muscles.update(exercise.get_primary_muscles())
-            if exercise.secondary_muscle_groups:
-                muscles.update(json.loads(exercise.secondary_muscle_groups))
-        
-        muscle_list = sorted([m for m in muscles if m])
+        muscle_list = exercise_index.snapshot().muscles
         
         return success_response(muscle_list)
         
@@ -642,15 +720,7 @@ def get_equipment():
         JSON response with equipment list
     """
     try:
-        # Get all exercises
-        exercises = ExerciseLibrary.query.filter_by(is_active=True).all()
-        
-        # Collect all unique equipment
-        equipment = set()
-        for exercise in exercises:
-            equipment.update(exercise.get_equipment())
-        
-        equipment_list = sorted([e for e in equipment if e])
+        equipment_list = exercise_index.snapshot().equipment
         
         return success_response(equipment_list)
         
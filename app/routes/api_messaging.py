@@ -7,6 +7,7 @@ from app import db
 from app.models.messaging import Message, MessageNotification
 from app.models.client import Client
 from app.models.user import User
+from app.utils.serializers import InvalidFields, parse_fields, register_schema
 
 api_messaging = Blueprint('api_messaging', __name__, url_prefix='/api/v1/messages')
 
@@ -24,26 +25,21 @@ def success_response(data=None, message=None, status_code=200):
         response['message'] = message
     return jsonify(response), status_code
 
-def message_to_dict(message):
-    """Convert Message model to dictionary."""
-    return {
-        'id': message.id,
-        'sender_id': message.sender_id,
-        'sender_name': message.sender.first_name + ' ' + message.sender.last_name if message.sender else 'Unknown',
-        'recipient_type': message.recipient_type,
-        'recipient_id': message.recipient_id,
-        'subject': message.subject,
-        'content': message.content,
-        'message_type': message.message_type,
-        'attachment_url': message.attachment_url,
-        'thread_id': message.thread_id,
-        'parent_message_id': message.parent_message_id,
-        'is_read': message.is_read,
-        'read_at': message.read_at.isoformat() if message.read_at else None,
-        'is_archived': message.is_archived,
-        'sent_at': message.sent_at.isoformat() if message.sent_at else None,
-        'reply_count': len(message.replies) if message.replies else 0,
-    }
+MESSAGE_FIELDS = (
+    'id', 'sender_id', 'sender_name', 'recipient_type', 'recipient_id', 'subject', 'content', 'message_type',
+    'attachment_url', 'thread_id', 'parent_message_id', 'is_read', 'read_at', 'is_archived', 'sent_at',
+    'reply_count',
+)
+
+message_schema = register_schema('message', Message, MESSAGE_FIELDS, computed={
+    'sender_name': lambda m: m.sender.first_name + ' ' + m.sender.last_name if m.sender else 'Unknown',
+    'reply_count': lambda m: len(m.replies) if m.replies else 0,
+})
+
+
+def message_to_dict(message, fields=None):
+    """Convert Message model to dictionary (``fields`` limits the keys)."""
+    return message_schema.dump(message, fields)
 
 
 @api_messaging.route('', methods=['GET'])
@@ -57,8 +53,14 @@ def get_messages():
         - unread_only: Show only unread messages (true/false)
         - archived: Show archived messages (true/false)
         - limit: Limit number of results (default: 50)
+        - fields: Comma-separated message fields to return (default: all)
     """
     try:
+        try:
+            fields = parse_fields(request.args.get('fields'), message_schema)
+        except InvalidFields as e:
+            return error_response(str(e), 400)
+        
         thread_id = request.args.get('thread_id')
         unread_only = request.args.get('unread_only', 'false').lower() == 'true'
         archived = request.args.get('archived', 'false').lower() == 'true'
@@ -100,7 +102,7 @@ def get_messages():
         messages = query.all()
         
         return success_response({
-            'messages': [message_to_dict(msg) for msg in messages],
+            'messages': message_schema.dump_many(messages, fields),
             'count': len(messages)
         })
     except Exception as e:
@@ -3,10 +3,10 @@ from datetime import datetime, date, timedelta
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from sqlalchemy import func
-import json
 from app import db
 from app.models.nutrition import NutritionPlan, FoodLog
 from app.models.client import Client
+from app.utils.pagination import paginate_query, InvalidCursor
 
 api_nutrition = Blueprint('api_nutrition', __name__, url_prefix='/api/v1/nutrition')
 
@@ -40,8 +40,14 @@ def get_nutrition_plans():
         if status:
             query = query.filter_by(status=status)
         
-        query = query.order_by(NutritionPlan.created_at.desc())
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            items, pagination = paginate_query(
+                query, NutritionPlan.created_at, descending=True, page=page, per_page=per_page,
+                cursor=request.args.get('cursor'),
+                include_total=request.args.get('include_total', 'false').lower() == 'true'
+            )
+        except InvalidCursor as e:
+            return error_response(str(e))
         
         plans = [{
             'id': p.id, 'client_id': p.client_id, 'plan_name': p.plan_name,
@@ -50,12 +56,9 @@ def get_nutrition_plans():
             'daily_calories': p.daily_calories, 'protein_grams': p.protein_grams,
             'carbs_grams': p.carbs_grams, 'fat_grams': p.fat_grams,
             'dietary_preferences': p.dietary_preferences, 'created_at': p.created_at.isoformat()
-        } for p in pagination.items]
+        } for p in items]
         
-        return success_response({'plans': plans, 'pagination': {
-            'page': pagination.page, 'per_page': pagination.per_page,
-            'total_pages': pagination.pages, 'total_items': pagination.total
-        }})
+        return success_response({'plans': plans, 'pagination': pagination})
     except Exception as e:
         return error_response(f'Error fetching plans: {str(e)}', 500)
 
@@ -105,7 +108,7 @@ def create_nutrition_plan():
             protein_grams=data.get('protein_grams'),
             carbs_grams=data.get('carbs_grams'),
             fat_grams=data.get('fat_grams'),
-            meal_plan_data=json.dumps(data.get('meal_plan', {})),
+            meal_plan_data=data.get('meal_plan', {}),
             dietary_preferences=data.get('dietary_preferences'),
             foods_to_avoid=data.get('foods_to_avoid'),
             supplements=data.get('supplements'),
@@ -143,7 +146,7 @@ def update_nutrition_plan(plan_id):
         if 'end_date' in data:
             plan.end_date = date.fromisoformat(data['end_date']) if data['end_date'] else None
         if 'meal_plan' in data:
-            plan.meal_plan_data = json.dumps(data['meal_plan'])
+            plan.meal_plan_data = data['meal_plan']
         
         plan.updated_at = datetime.utcnow()
         db.session.commit()
@@ -7,8 +7,8 @@ import re
 from app import db
 from app.models.organization import Organization
 from app.models.user import User
-from app.models.client import Client
 from app.utils.rbac import owner_required, admin_required
+from app.services.dashboard_stats import get_overview_counters
 
 api_organization = Blueprint('api_organization', __name__, url_prefix='/api/v1/organization')
 
@@ -315,33 +315,16 @@ def get_organization_stats():
             return error_response('Organization not found', 404)
         
         # Get all trainers in organization
-        trainers = User.query.filter_by(
-            organization_id=org.id
-        ).filter(User.role.in_(['owner', 'admin', 'trainer'])).all()
-        
-        trainer_ids = [t.id for t in trainers]
-        
-        # Count total clients across all trainers
-        from app.models.session import Session
-        from app.models.program import Program
-        
-        total_clients = Client.query.filter(
-            Client.trainer_id.in_(trainer_ids)
-        ).count()
-        
-        active_clients = Client.query.filter(
-            Client.trainer_id.in_(trainer_ids),
-            Client.status == 'active'
-        ).count()
-        
-        total_sessions = Session.query.filter(
-            Session.trainer_id.in_(trainer_ids)
-        ).count()
-        
-        active_programs = Program.query.filter(
-            Program.trainer_id.in_(trainer_ids),
-            Program.status == 'active'
-        ).count()
+        trainer_ids = [row.id for row in db.session.query(User.id).filter(
+            User.organization_id == org.id,
+            User.role.in_(['owner', 'admin', 'trainer'])
+        )]
+        
+        # All counters in a single round trip
+        counters = get_overview_counters(
+            trainer_ids,
+            metrics=['clients_total', 'clients_active', 'sessions_total', 'programs_active']
+        )
         
         return success_response({
             'organization': {
@@ -349,19 +332,19 @@ def get_organization_stats():
                 'subscription_tier': org.subscription_tier
             },
             'members': {
-                'total_trainers': len(trainers),
+                'total_trainers': len(trainer_ids),
                 'max_trainers': org.max_trainers
             },
             'clients': {
-                'total': total_clients,
-                'active': active_clients,
+                'total': counters['clients_total'],
+                'active': counters['clients_active'],
                 'max_clients': org.max_clients
             },
             'sessions': {
-                'total': total_sessions
+                'total': counters['sessions_total']
             },
             'programs': {
-                'active': active_programs
+                'active': counters['programs_active']
             }
         })
     except Exception as e:
@@ -7,6 +7,8 @@ import json
 from app import db
 from app.models.payments import PaymentPlan, Subscription, Payment
 from app.models.client import Client
+from app.utils.pagination import paginate_query, InvalidCursor
+from app.services.rollups import revenue_summary
 
 api_payments = Blueprint('api_payments', __name__, url_prefix='/api/v1/payments')
 
@@ -116,8 +118,14 @@ def get_subscriptions():
         if status:
             query = query.filter_by(status=status)
         
-        query = query.order_by(Subscription.created_at.desc())
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            items, pagination = paginate_query(
+                query, Subscription.created_at, descending=True, page=page, per_page=per_page,
+                cursor=request.args.get('cursor'),
+                include_total=request.args.get('include_total', 'false').lower() == 'true'
+            )
+        except InvalidCursor as e:
+            return error_response(str(e))
         
         subscriptions = [{
             'id': s.id, 'client_id': s.client_id, 'payment_plan_id': s.payment_plan_id,
@@ -126,12 +134,9 @@ def get_subscriptions():
             'sessions_used': s.sessions_used, 'sessions_remaining': s.sessions_remaining,
             'next_billing_date': s.next_billing_date.isoformat() if s.next_billing_date else None,
             'created_at': s.created_at.isoformat()
-        } for s in pagination.items]
+        } for s in items]
         
-        return success_response({'subscriptions': subscriptions, 'pagination': {
-            'page': pagination.page, 'per_page': pagination.per_page,
-            'total_pages': pagination.pages, 'total_items': pagination.total
-        }})
+        return success_response({'subscriptions': subscriptions, 'pagination': pagination})
     except Exception as e:
         return error_response(f'Error fetching subscriptions: {str(e)}', 500)
 
@@ -218,20 +223,23 @@ def get_payments():
         if status:
             query = query.filter_by(payment_status=status)
         
-        query = query.order_by(Payment.payment_date.desc())
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            items, pagination = paginate_query(
+                query, Payment.payment_date, descending=True, page=page, per_page=per_page,
+                cursor=request.args.get('cursor'),
+                include_total=request.args.get('include_total', 'false').lower() == 'true'
+            )
+        except InvalidCursor as e:
+            return error_response(str(e))
         
         payments = [{
             'id': p.id, 'client_id': p.client_id, 'subscription_id': p.subscription_id,
             'payment_date': p.payment_date.isoformat(), 'amount': float(p.amount),
             'currency': p.currency, 'payment_method': p.payment_method,
             'payment_status': p.payment_status, 'transaction_id': p.transaction_id
-        } for p in pagination.items]
+        } for p in items]
         
-        return success_response({'payments': payments, 'pagination': {
-            'page': pagination.page, 'per_page': pagination.per_page,
-            'total_pages': pagination.pages, 'total_items': pagination.total
-        }})
+        return success_response({'payments': payments, 'pagination': pagination})
     except Exception as e:
         return error_response(f'Error fetching payments: {str(e)}', 500)
 
@@ -278,30 +286,19 @@ def get_revenue_stats():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date', str(date.today()))
         
-        query = Payment.query.filter(
-            Payment.trainer_id == current_user.id,
-            Payment.payment_status == 'completed'
+        summary = revenue_summary(
+            current_user.id,
+            start=date.fromisoformat(start_date) if start_date else None,
+            end=date.fromisoformat(end_date)
         )
-        
-        if start_date:
-            query = query.filter(Payment.payment_date >= date.fromisoformat(start_date))
-        query = query.filter(Payment.payment_date <= date.fromisoformat(end_date))
-        
-        payments = query.all()
-        total_revenue = sum(p.amount for p in payments)
-        
-        # Group by month
-        monthly = {}
-        for p in payments:
-            month_key = p.payment_date.strftime('%Y-%m')
-            monthly[month_key] = monthly.get(month_key, 0) + float(p.amount)
+        first_date = summary['first_date']
         
         return success_response({
-            'total_revenue': float(total_revenue),
-            'total_transactions': len(payments),
+            'total_revenue': summary['total_revenue'],
+            'total_transactions': summary['total_transactions'],
             'currency': 'USD',
-            'monthly_breakdown': monthly,
-            'period_start': start_date or payments[0].payment_date.isoformat() if payments else None,
+            'monthly_breakdown': summary['revenue_by_bucket'],
+            'period_start': start_date or (first_date.isoformat() if first_date else None),
             'period_end': end_date
         })
     except Exception as e:
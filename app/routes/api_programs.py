@@ -12,11 +12,16 @@ from datetime import datetime, date
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from sqlalchemy import func, or_
+from sqlalchemy.orm import joinedload, selectinload
 import json
 from app import db
 from app.models.program import Program, Exercise
 from app.models.client import Client
 from app.models.exercise_library import ExerciseLibrary
+from app.utils.loading import register_profile
+from app.utils.pagination import paginate_query, InvalidCursor
+from app.utils.query_stats import query_budget
+from app.utils.serializers import InvalidFields, parse_fields, register_schema
 
 api_programs = Blueprint('api_programs', __name__, url_prefix='/api/v1/programs')
 
@@ -25,7 +30,39 @@ api_programs = Blueprint('api_programs', __name__, url_prefix='/api/v1/programs'
 # Helper Functions
 # ============================================================================
 
-def program_to_dict(program, include_exercises=False, include_client=False):
+program_schema = register_schema('program', Program, (
+    'id', 'name', 'description', 'goal', 'duration_weeks', 'difficulty_level', 'is_ai_generated',
+    'ai_model_version', 'status', 'start_date', 'end_date', 'program_data', 'notes', 'created_at',
+    'updated_at', 'trainer_id', 'client_id',
+), computed={
+    'program_data': lambda program: json.loads(program.program_data) if program.program_data else None,
+}, deferred=('description', 'program_data', 'notes'))
+
+program_client_schema = register_schema('program_client', Client, ('id', 'email'), computed={
+    'name': lambda client: client.full_name,
+    'status': lambda client: 'active' if client.is_active else 'inactive',
+}, requires={'name': ('first_name', 'last_name'), 'status': ('is_active',)})
+
+program_exercise_schema = register_schema('program_exercise', Exercise, (
+    'id', 'program_id', 'name', 'description', 'exercise_type', 'muscle_group', 'equipment', 'sets',
+    'reps', 'duration_minutes', 'rest_seconds', 'weight', 'day_number', 'order_in_day', 'instructions',
+    'video_url', 'image_url', 'created_at', 'updated_at',
+))
+
+# Related rows of include_client/include_exercises, loaded with the programs
+program_list_loading = register_profile(
+    'program_list',
+    client=selectinload(Program.client).options(*program_client_schema.load_options()),
+    exercises=selectinload(Program.ordered_exercises),
+)
+program_detail_loading = register_profile(
+    'program_detail',
+    client=joinedload(Program.client).options(*program_client_schema.load_options()),
+    exercises=selectinload(Program.ordered_exercises),
+)
+
+
+def program_to_dict(program, include_exercises=False, include_client=False, fields=None):
     """
     Convert a Program object to a dictionary.
     
@@ -33,43 +70,21 @@ def program_to_dict(program, include_exercises=False, include_client=False):
         program: Program object to convert
         include_exercises: Whether to include exercise list
         include_client: Whether to include client details
+        fields: Program fields to include (default: all)
         
     Returns:
         Dictionary representation of the program
     """
-    data = {
-        'id': program.id,
-        'name': program.name,
-        'description': program.description,
-        'goal': program.goal,
-        'duration_weeks': program.duration_weeks,
-        'difficulty_level': program.difficulty_level,
-        'is_ai_generated': program.is_ai_generated,
-        'ai_model_version': program.ai_model_version,
-        'status': program.status,
-        'start_date': program.start_date.isoformat() if program.start_date else None,
-        'end_date': program.end_date.isoformat() if program.end_date else None,
-        'program_data': json.loads(program.program_data) if program.program_data else None,
-        'notes': program.notes,
-        'created_at': program.created_at.isoformat() if program.created_at else None,
-        'updated_at': program.updated_at.isoformat() if program.updated_at else None,
-        'trainer_id': program.trainer_id,
-        'client_id': program.client_id,
-    }
+    data = program_schema.dump(program, fields)
     
     # Include client details if requested
     if include_client and program.client:
-        data['client'] = {
-            'id': program.client.id,
-            'name': program.client.name,
-            'email': program.client.email,
-            'status': program.client.status
-        }
+        data['client'] = program_client_schema.serialize(program.client)
     
-    # Include exercises if requested
+    # Include exercises if requested (eager-loaded by the list/detail profiles)
     if include_exercises:
-        exercises = program.exercises.order_by(Exercise.day_number, Exercise.order_in_day).all()
-        data['exercises'] = [exercise_to_dict(ex) for ex in exercises]
+        exercises = program.ordered_exercises
+        data['exercises'] = program_exercise_schema.dump_many(exercises)
         data['total_exercises'] = len(exercises)
     
     return data
@@ -77,27 +92,7 @@ def program_to_dict(program, include_exercises=False, include_client=False):
 
 def exercise_to_dict(exercise):
     """Convert an Exercise object to a dictionary."""
-    return {
-        'id': exercise.id,
-        'program_id': exercise.program_id,
-        'name': exercise.name,
-        'description': exercise.description,
-        'exercise_type': exercise.exercise_type,
-        'muscle_group': exercise.muscle_group,
-        'equipment': exercise.equipment,
-        'sets': exercise.sets,
-        'reps': exercise.reps,
-        'duration_minutes': exercise.duration_minutes,
-        'rest_seconds': exercise.rest_seconds,
-        'weight': exercise.weight,
-        'day_number': exercise.day_number,
-        'order_in_day': exercise.order_in_day,
-        'instructions': exercise.instructions,
-        'video_url': exercise.video_url,
-        'image_url': exercise.image_url,
-        'created_at': exercise.created_at.isoformat() if exercise.created_at else None,
-        'updated_at': exercise.updated_at.isoformat() if exercise.updated_at else None,
-    }
+    return program_exercise_schema.serialize(exercise)
 
 
 def error_response(message, status_code=400, errors=None):
@@ -183,6 +178,7 @@ def validate_program_data(data, is_update=False):
 
 @api_programs.route('', methods=['GET'])
 @login_required
+@query_budget(5)
 def get_programs():
     """
     Get a paginated list of programs with filtering.
@@ -197,14 +193,27 @@ def get_programs():
         - include_client: Include client details (true/false)
         - sort_by: Sort field (default: created_at)
         - sort_order: Sort order (asc/desc, default: desc)
+        - cursor: Opt into keyset pagination ('' for the first page, then
+          next_cursor/prev_cursor from the previous response)
+        - include_total: Include total_items in cursor mode (true/false)
+        - fields: Comma-separated program fields to return (default: all
+          but the Text columns description, program_data and notes, which
+          are only read from the database when named here)
         
     Returns:
         JSON response with paginated program list
     """
     try:
+        try:
+            fields = parse_fields(request.args.get('fields'), program_schema, default=program_schema.list_fields)
+        except InvalidFields as e:
+            return error_response(str(e))
+        
         # Pagination
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
         
         # Base query - only programs for current trainer
         query = Program.query.filter_by(trainer_id=current_user.id)
@@ -231,33 +240,46 @@ def get_programs():
             return error_response(f'Invalid sort_by field. Must be one of: {", ".join(valid_sort_fields)}')
         
         sort_column = getattr(Program, sort_by)
-        if sort_order == 'desc':
-            query = query.order_by(sort_column.desc())
-        else:
-            query = query.order_by(sort_column.asc())
         
-        # Execute query with pagination
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        # Convert to dict
         include_exercises = request.args.get('include_exercises', 'false').lower() == 'true'
         include_client = request.args.get('include_client', 'false').lower() == 'true'
         
-        programs = [
-            program_to_dict(program, include_exercises=include_exercises, include_client=include_client)
-            for program in pagination.items
-        ]
+        # Select only the columns the response reads
+        load_columns = [sort_column]
+        if include_client:
+            load_columns.append(Program.client_id)
+        query = query.options(
+            *program_schema.load_options(fields, *load_columns),
+            *program_list_loading.options(client=include_client, exercises=include_exercises)
+        )
+        
+        # Execute query with pagination
+        try:
+            items, pagination = paginate_query(
+                query,
+                sort_column,
+                descending=sort_order == 'desc',
+                page=page,
+                per_page=per_page,
+                cursor=cursor,
+                include_total=include_total
+            )
+        except InvalidCursor as e:
+            return error_response(str(e))
+        
+        # Convert to dict
+        if include_exercises or include_client:
+            programs = [
+                program_to_dict(program, include_exercises=include_exercises, include_client=include_client,
+                                fields=fields)
+                for program in items
+            ]
+        else:
+            programs = program_schema.dump_many(items, fields)
         
         return success_response({
             'programs': programs,
-            'pagination': {
-                'page': pagination.page,
-                'per_page': pagination.per_page,
-                'total_pages': pagination.pages,
-                'total_items': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': pagination
         })
         
     except Exception as e:
@@ -266,6 +288,7 @@ def get_programs():
 
 @api_programs.route('/<int:program_id>', methods=['GET'])
 @login_required
+@query_budget(3)
 def get_program(program_id):
     """
     Get a single program by ID.
@@ -273,12 +296,23 @@ def get_program(program_id):
     Query Parameters:
         - include_exercises: Include exercise list (true/false)
         - include_client: Include client details (true/false)
+        - fields: Comma-separated program fields to return (default: all)
         
     Returns:
         JSON response with program details
     """
     try:
-        program = Program.query.get(program_id)
+        try:
+            fields = parse_fields(request.args.get('fields'), program_schema)
+        except InvalidFields as e:
+            return error_response(str(e))
+        
+        include_exercises = request.args.get('include_exercises', 'true').lower() == 'true'
+        include_client = request.args.get('include_client', 'false').lower() == 'true'
+        
+        program = Program.query.options(
+            *program_detail_loading.options(client=include_client, exercises=include_exercises)
+        ).get(program_id)
         
         if not program:
             return error_response('Program not found', 404)
@@ -287,11 +321,9 @@ def get_program(program_id):
         if program.trainer_id != current_user.id:
             return error_response('You do not have permission to view this program', 403)
         
-        include_exercises = request.args.get('include_exercises', 'true').lower() == 'true'
-        include_client = request.args.get('include_client', 'false').lower() == 'true'
-        
         return success_response(
-            program_to_dict(program, include_exercises=include_exercises, include_client=include_client)
+            program_to_dict(program, include_exercises=include_exercises, include_client=include_client,
+                            fields=fields)
         )
         
     except Exception as e:
@@ -3,10 +3,10 @@ from datetime import datetime, date, timedelta
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from sqlalchemy import func
-import json
 from app import db
 from app.models.progress import ProgressEntry, ProgressPhoto, CustomMetric
 from app.models.client import Client
+from app.utils.pagination import paginate_query, InvalidCursor
 
 api_progress = Blueprint('api_progress', __name__, url_prefix='/api/v1/progress')
 
@@ -44,8 +44,14 @@ def get_progress_entries():
         if end_date:
             query = query.filter(ProgressEntry.entry_date <= date.fromisoformat(end_date))
         
-        query = query.order_by(ProgressEntry.entry_date.desc())
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            items, pagination = paginate_query(
+                query, ProgressEntry.entry_date, descending=True, page=page, per_page=per_page,
+                cursor=request.args.get('cursor'),
+                include_total=request.args.get('include_total', 'false').lower() == 'true'
+            )
+        except InvalidCursor as e:
+            return error_response(str(e))
         
         entries = [{
             'id': e.id, 'client_id': e.client_id, 'entry_date': e.entry_date.isoformat(),
@@ -55,12 +61,9 @@ def get_progress_entries():
             'custom_metrics': e.get_custom_metrics(), 'notes': e.notes,
             'mood_rating': e.mood_rating, 'energy_level': e.energy_level,
             'created_at': e.created_at.isoformat()
-        } for e in pagination.items]
+        } for e in items]
         
-        return success_response({'entries': entries, 'pagination': {
-            'page': pagination.page, 'per_page': pagination.per_page,
-            'total_pages': pagination.pages, 'total_items': pagination.total
-        }})
+        return success_response({'entries': entries, 'pagination': pagination})
     except Exception as e:
         return error_response(f'Error fetching entries: {str(e)}', 500)
 
@@ -85,7 +88,7 @@ def create_progress_entry():
             waist=data.get('waist'), hips=data.get('hips'), thigh=data.get('thigh'),
             arm=data.get('arm'), notes=data.get('notes'),
             mood_rating=data.get('mood_rating'), energy_level=data.get('energy_level'),
-            custom_metrics_data=json.dumps(data.get('custom_metrics', {}))
+            custom_metrics_data=data.get('custom_metrics', {})
         )
         db.session.add(entry)
         db.session.commit()
@@ -113,7 +116,7 @@ def update_progress_entry(entry_id):
                 setattr(entry, field, data[field])
         
         if 'custom_metrics' in data:
-            entry.custom_metrics_data = json.dumps(data['custom_metrics'])
+            entry.custom_metrics_data = data['custom_metrics']
         
         entry.updated_at = datetime.utcnow()
         db.session.commit()
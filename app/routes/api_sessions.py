@@ -11,11 +11,17 @@ This module provides comprehensive session management including:
 from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
 from app import db
 from app.models.session import Session
 from app.models.client import Client
 from app.models.user import User
+from app.utils.loading import register_profile
+from app.utils.pagination import paginate_query, InvalidCursor
+from app.utils.query_stats import query_budget
+from app.utils.serializers import InvalidFields, parse_fields, register_schema
+from app.services.scheduling import TrainerSchedule, to_naive_utc
 
 api_sessions = Blueprint('api_sessions', __name__, url_prefix='/api/v1/sessions')
 
@@ -24,7 +30,35 @@ api_sessions = Blueprint('api_sessions', __name__, url_prefix='/api/v1/sessions'
 # Helper Functions
 # ============================================================================
 
-def session_to_dict(session, include_client=False, include_trainer=False):
+session_schema = register_schema('session', Session, (
+    'id', 'title', 'description', 'session_type', 'location', 'scheduled_start', 'scheduled_end',
+    'actual_start', 'actual_end', 'status', 'exercises_performed', 'notes', 'client_feedback',
+    'trainer_notes', 'google_event_id', 'outlook_event_id', 'created_at', 'updated_at', 'trainer_id',
+    'client_id',
+), deferred=('description', 'exercises_performed', 'notes', 'client_feedback', 'trainer_notes'))
+
+session_client_schema = register_schema('session_client', Client, ('id', 'email', 'phone'), computed={
+    'name': lambda client: client.full_name,
+    'status': lambda client: 'active' if client.is_active else 'inactive',
+}, requires={'name': ('first_name', 'last_name'), 'status': ('is_active',)})
+
+session_trainer_schema = register_schema('session_trainer', User, ('id', 'username', 'email', 'full_name'),
+                                         requires={'full_name': ('first_name', 'last_name', 'username')})
+
+# Related rows of include_client/include_trainer, loaded with the sessions
+session_list_loading = register_profile(
+    'session_list',
+    client=selectinload(Session.client).options(*session_client_schema.load_options()),
+    trainer=selectinload(Session.trainer).options(*session_trainer_schema.load_options()),
+)
+session_detail_loading = register_profile(
+    'session_detail',
+    client=joinedload(Session.client).options(*session_client_schema.load_options()),
+    trainer=joinedload(Session.trainer).options(*session_trainer_schema.load_options()),
+)
+
+
+def session_to_dict(session, include_client=False, include_trainer=False, fields=None):
     """
     Convert a Session object to a dictionary.
     
@@ -32,51 +66,20 @@ def session_to_dict(session, include_client=False, include_trainer=False):
         session: Session object to convert
         include_client: Whether to include full client details
         include_trainer: Whether to include full trainer details
+        fields: Session fields to include (default: all)
         
     Returns:
         Dictionary representation of the session
     """
-    data = {
-        'id': session.id,
-        'title': session.title,
-        'description': session.description,
-        'session_type': session.session_type,
-        'location': session.location,
-        'scheduled_start': session.scheduled_start.isoformat() if session.scheduled_start else None,
-        'scheduled_end': session.scheduled_end.isoformat() if session.scheduled_end else None,
-        'actual_start': session.actual_start.isoformat() if session.actual_start else None,
-        'actual_end': session.actual_end.isoformat() if session.actual_end else None,
-        'status': session.status,
-        'exercises_performed': session.exercises_performed,
-        'notes': session.notes,
-        'client_feedback': session.client_feedback,
-        'trainer_notes': session.trainer_notes,
-        'google_event_id': session.google_event_id,
-        'outlook_event_id': session.outlook_event_id,
-        'created_at': session.created_at.isoformat() if session.created_at else None,
-        'updated_at': session.updated_at.isoformat() if session.updated_at else None,
-        'trainer_id': session.trainer_id,
-        'client_id': session.client_id,
-    }
+    data = session_schema.dump(session, fields)
     
     # Include nested client details if requested
     if include_client and session.client:
-        data['client'] = {
-            'id': session.client.id,
-            'name': session.client.name,
-            'email': session.client.email,
-            'phone': session.client.phone,
-            'status': session.client.status
-        }
+        data['client'] = session_client_schema.serialize(session.client)
     
     # Include nested trainer details if requested
     if include_trainer and session.trainer:
-        data['trainer'] = {
-            'id': session.trainer.id,
-            'username': session.trainer.username,
-            'email': session.trainer.email,
-            'full_name': session.trainer.full_name
-        }
+        data['trainer'] = session_trainer_schema.serialize(session.trainer)
     
     return data
 
@@ -174,6 +177,7 @@ def validate_session_data(data, is_update=False):
 
 @api_sessions.route('', methods=['GET'])
 @login_required
+@query_budget(5)
 def get_sessions():
     """
     Get a paginated list of sessions with filtering and sorting.
@@ -190,14 +194,28 @@ def get_sessions():
         - include_trainer: Include trainer details (true/false)
         - sort_by: Sort field (default: scheduled_start)
         - sort_order: Sort order (asc/desc, default: desc)
+        - cursor: Opt into keyset pagination ('' for the first page, then
+          next_cursor/prev_cursor from the previous response)
+        - include_total: Include total_items in cursor mode (true/false)
+        - fields: Comma-separated session fields to return (default: all
+          but the Text columns description, exercises_performed, notes,
+          client_feedback and trainer_notes, which are only read from the
+          database when named here)
         
     Returns:
         JSON response with paginated session list
     """
     try:
+        try:
+            fields = parse_fields(request.args.get('fields'), session_schema, default=session_schema.list_fields)
+        except InvalidFields as e:
+            return error_response(str(e))
+        
         # Pagination
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
         
         # Base query - only sessions for current trainer
         query = Session.query.filter_by(trainer_id=current_user.id)
@@ -241,33 +259,48 @@ def get_sessions():
             return error_response(f'Invalid sort_by field. Must be one of: {", ".join(valid_sort_fields)}')
         
         sort_column = getattr(Session, sort_by)
-        if sort_order == 'desc':
-            query = query.order_by(sort_column.desc())
-        else:
-            query = query.order_by(sort_column.asc())
-        
-        # Execute query with pagination
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         
-        # Convert to dict
         include_client = request.args.get('include_client', 'false').lower() == 'true'
         include_trainer = request.args.get('include_trainer', 'false').lower() == 'true'
         
-        sessions = [
-            session_to_dict(session, include_client=include_client, include_trainer=include_trainer)
-            for session in pagination.items
-        ]
+        # Select only the columns the response reads
+        load_columns = [sort_column]
+        if include_client:
+            load_columns.append(Session.client_id)
+        if include_trainer:
+            load_columns.append(Session.trainer_id)
+        query = query.options(
+            *session_schema.load_options(fields, *load_columns),
+            *session_list_loading.options(client=include_client, trainer=include_trainer)
+        )
+        
+        # Execute query with pagination
+        try:
+            items, pagination = paginate_query(
+                query,
+                sort_column,
+                descending=sort_order == 'desc',
+                page=page,
+                per_page=per_page,
+                cursor=cursor,
+                include_total=include_total
+            )
+        except InvalidCursor as e:
+            return error_response(str(e))
+        
+        # Convert to dict
+        if include_client or include_trainer:
+            sessions = [
+                session_to_dict(session, include_client=include_client, include_trainer=include_trainer,
+                                fields=fields)
+                for session in items
+            ]
+        else:
+            sessions = session_schema.dump_many(items, fields)
         
         return success_response({
             'sessions': sessions,
-            'pagination': {
-                'page': pagination.page,
-                'per_page': pagination.per_page,
-                'total_pages': pagination.pages,
-                'total_items': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': pagination
         })
         
     except Exception as e:
@@ -276,6 +309,7 @@ def get_sessions():
 
 @api_sessions.route('/<int:session_id>', methods=['GET'])
 @login_required
+@query_budget(2)
 def get_session(session_id):
     """
     Get a single session by ID.
@@ -283,12 +317,23 @@ def get_session(session_id):
     Query Parameters:
         - include_client: Include client details (true/false)
         - include_trainer: Include trainer details (true/false)
+        - fields: Comma-separated session fields to return (default: all)
         
     Returns:
         JSON response with session details
     """
     try:
-        session = Session.query.get(session_id)
+        try:
+            fields = parse_fields(request.args.get('fields'), session_schema)
+        except InvalidFields as e:
+            return error_response(str(e))
+        
+        include_client = request.args.get('include_client', 'false').lower() == 'true'
+        include_trainer = request.args.get('include_trainer', 'false').lower() == 'true'
+        
+        session = Session.query.options(
+            *session_detail_loading.options(client=include_client, trainer=include_trainer)
+        ).get(session_id)
         
         if not session:
             return error_response('Session not found', 404)
@@ -297,11 +342,9 @@ def get_session(session_id):
         if session.trainer_id != current_user.id:
             return error_response('You do not have permission to view this session', 403)
         
-        include_client = request.args.get('include_client', 'false').lower() == 'true'
-        include_trainer = request.args.get('include_trainer', 'false').lower() == 'true'
-        
         return success_response(
-            session_to_dict(session, include_client=include_client, include_trainer=include_trainer)
+            session_to_dict(session, include_client=include_client, include_trainer=include_trainer,
+                            fields=fields)
         )
         
     except Exception as e:
@@ -342,28 +385,15 @@ def create_session():
         scheduled_start = datetime.fromisoformat(data['scheduled_start'].replace('Z', '+00:00'))
         scheduled_end = datetime.fromisoformat(data['scheduled_end'].replace('Z', '+00:00'))
         
-        conflict = Session.query.filter(
-            Session.trainer_id == current_user.id,
-            Session.status.in_(['scheduled', 'completed']),
-            or_(
-                and_(
-                    Session.scheduled_start <= scheduled_start,
-                    Session.scheduled_end > scheduled_start
-                ),
-                and_(
-                    Session.scheduled_start < scheduled_end,
-                    Session.scheduled_end >= scheduled_end
-                ),
-                and_(
-                    Session.scheduled_start >= scheduled_start,
-                    Session.scheduled_end <= scheduled_end
-                )
-            )
-        ).first()
+        schedule = TrainerSchedule.load(
+            current_user.id, to_naive_utc(scheduled_start).date(), to_naive_utc(scheduled_end).date(),
+            include_bookings=False
+        )
+        conflict = schedule.conflicts(scheduled_start, scheduled_end)
         
         if conflict:
             return error_response(
-                f'Scheduling conflict detected with session "{conflict.title}" at {conflict.scheduled_start.isoformat()}',
+                f'Scheduling conflict detected with session "{conflict.ref.title}" at {conflict.start.isoformat()}',
                 409
             )
         
@@ -433,29 +463,15 @@ def update_session(session_id):
             scheduled_start = datetime.fromisoformat(data.get('scheduled_start', session.scheduled_start.isoformat()).replace('Z', '+00:00'))
             scheduled_end = datetime.fromisoformat(data.get('scheduled_end', session.scheduled_end.isoformat()).replace('Z', '+00:00'))
             
-            conflict = Session.query.filter(
-                Session.id != session_id,
-                Session.trainer_id == current_user.id,
-                Session.status.in_(['scheduled', 'completed']),
-                or_(
-                    and_(
-                        Session.scheduled_start <= scheduled_start,
-                        Session.scheduled_end > scheduled_start
-                    ),
-                    and_(
-                        Session.scheduled_start < scheduled_end,
-                        Session.scheduled_end >= scheduled_end
-                    ),
-                    and_(
-                        Session.scheduled_start >= scheduled_start,
-                        Session.scheduled_end <= scheduled_end
-                    )
-                )
-            ).first()
+            schedule = TrainerSchedule.load(
+                current_user.id, to_naive_utc(scheduled_start).date(), to_naive_utc(scheduled_end).date(),
+                exclude_session_id=session_id, include_bookings=False
+            )
+            conflict = schedule.conflicts(scheduled_start, scheduled_end)
             
             if conflict:
                 return error_response(
-                    f'Scheduling conflict detected with session "{conflict.title}" at {conflict.scheduled_start.isoformat()}',
+                    f'Scheduling conflict detected with session "{conflict.ref.title}" at {conflict.start.isoformat()}',
                     409
                 )
         
@@ -632,12 +648,16 @@ def check_availability():
     """
     Check trainer availability for scheduling.
     
+    Working hours come from the trainer's BookingAvailability (8:00-20:00
+    if none is configured) with BookingExceptions applied.
+    
     Query Parameters:
         - date: Date to check (ISO format, default: today)
         - duration: Session duration in minutes (default: 60)
         
     Returns:
-        JSON response with available time slots
+        JSON response with available time slots and the next available
+        start within the following week
     """
     try:
         # Parse date
@@ -649,58 +669,29 @@ def check_availability():
         
         duration = request.args.get('duration', 60, type=int)
         
-        # Get all sessions for this date
+        # One load covers the day and the following week for next_available
+        schedule = TrainerSchedule.load(current_user.id, check_date, check_date + timedelta(days=6))
+        
         start_of_day = datetime.combine(check_date, datetime.min.time())
-        end_of_day = datetime.combine(check_date, datetime.max.time())
-        
-        booked_sessions = Session.query.filter(
-            Session.trainer_id == current_user.id,
-            Session.status.in_(['scheduled', 'completed']),
-            Session.scheduled_start >= start_of_day,
-            Session.scheduled_start <= end_of_day
-        ).order_by(Session.scheduled_start).all()
-        
-        # Define working hours (8 AM to 8 PM)
-        work_start = datetime.combine(check_date, datetime.min.time().replace(hour=8))
-        work_end = datetime.combine(check_date, datetime.min.time().replace(hour=20))
-        
-        # Find available slots
-        available_slots = []
-        current_time = work_start
-        
-        for session in booked_sessions:
-            # Check if there's a gap before this session
-            if current_time < session.scheduled_start:
-                gap_minutes = (session.scheduled_start - current_time).total_seconds() / 60
-                if gap_minutes >= duration:
-                    available_slots.append({
-                        'start': current_time.isoformat(),
-                        'end': session.scheduled_start.isoformat(),
-                        'duration_minutes': int(gap_minutes)
-                    })
-            current_time = max(current_time, session.scheduled_end)
-        
-        # Check remaining time after last session
-        if current_time < work_end:
-            gap_minutes = (work_end - current_time).total_seconds() / 60
-            if gap_minutes >= duration:
-                available_slots.append({
-                    'start': current_time.isoformat(),
-                    'end': work_end.isoformat(),
-                    'duration_minutes': int(gap_minutes)
-                })
+        busy = schedule.busy.overlapping(start_of_day, start_of_day + timedelta(days=1))
+        next_slot = schedule.next_available(max(start_of_day, datetime.utcnow()), duration)
         
         return success_response({
             'date': check_date.isoformat(),
             'requested_duration': duration,
-            'available_slots': available_slots,
+            'working_hours': [
+                {'start': start.isoformat(), 'end': end.isoformat()}
+                for start, end in schedule.working_windows(check_date)
+            ],
+            'available_slots': schedule.free_slots(check_date, duration),
+            'next_available': next_slot.isoformat() if next_slot else None,
             'booked_sessions': [
                 {
-                    'start': s.scheduled_start.isoformat(),
-                    'end': s.scheduled_end.isoformat(),
-                    'title': s.title
+                    'start': interval.start.isoformat(),
+                    'end': interval.end.isoformat(),
+                    'title': interval.ref.title if interval.kind == 'session' else 'Booking request'
                 }
-                for s in booked_sessions
+                for interval in busy
             ]
         })
         
@@ -5,6 +5,7 @@ from app import db
 from app.models.integrations import Integration
 from app.models.payments import Payment
 from app.models.client import Client
+from app.services import stripe_events
 from app.services.stripe_service import stripe_service
 from datetime import datetime
 from decimal import Decimal
@@ -246,7 +247,13 @@ def create_payment_intent():
 
 @bp.route('/webhook', methods=['POST'])
 def webhook():
-    """Handle Stripe webhooks."""
+    """
+    Receive Stripe webhooks.
+
+    The event is only verified and stored here; the worker applies it
+    (see ``app.services.stripe_events``). Retries of a stored event are
+    acknowledged without being stored again.
+    """
     try:
         payload = request.get_data()
         sig_header = request.headers.get('Stripe-Signature')
@@ -257,64 +264,12 @@ def webhook():
         if not event:
             return jsonify({'success': False, 'error': 'Invalid signature'}), 400
         
-        event_type = event['type']
-        data = event['data']['object']
-        
-        logger.info(f"Received Stripe webhook: {event_type}")
-        
-        # Handle different event types
-        if event_type == 'payment_intent.succeeded':
-            payment_intent_id = data['id']
-            
-            # Update payment status
-            payment = Payment.query.filter_by(
-                stripe_payment_intent_id=payment_intent_id
-            ).first()
-            
-            if payment:
-                payment.status = 'completed'
-                payment.paid_at = datetime.utcnow()
-                db.session.commit()
-                logger.info(f"Payment {payment.id} marked as completed")
-        
-        elif event_type == 'payment_intent.payment_failed':
-            payment_intent_id = data['id']
-            
-            # Update payment status
-            payment = Payment.query.filter_by(
-                stripe_payment_intent_id=payment_intent_id
-            ).first()
-            
-            if payment:
-                payment.status = 'failed'
-                db.session.commit()
-                logger.info(f"Payment {payment.id} marked as failed")
-        
-        elif event_type == 'customer.subscription.created':
-            subscription_id = data['id']
-            customer_id = data['customer']
-            
-            # Find client by stripe customer ID
-            client = Client.query.filter_by(stripe_customer_id=customer_id).first()
-            
-            if client:
-                client.stripe_subscription_id = subscription_id
-                db.session.commit()
-                logger.info(f"Subscription created for client {client.id}")
-        
-        elif event_type == 'customer.subscription.deleted':
-            subscription_id = data['id']
-            
-            # Find client by subscription ID
-            client = Client.query.filter_by(stripe_subscription_id=subscription_id).first()
-            
-            if client:
-                client.stripe_subscription_id = None
-                db.session.commit()
-                logger.info(f"Subscription cancelled for client {client.id}")
+        created = stripe_events.record(event, payload)
+        logger.info(f"Received Stripe webhook: {event['type']} ({'new' if created else 'duplicate'})")
         
         return jsonify({'success': True})
         
     except Exception as e:
-        logger.error(f"Error processing Stripe webhook: {str(e)}")
+        db.session.rollback()
+        logger.error(f"Error recording Stripe webhook: {str(e)}")
         return jsonify({'success': False}), 500
@@ -5,7 +5,10 @@ from app import db
 from app.models.integrations import Integration, VideoConference
 from app.models.session import Session
 from app.services.zoom_service import zoom_service
+from app.services.zoom_provisioning import MAX_SESSIONS, meeting_params, provision_sessions
+from app.utils.query_stats import query_budget
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 import logging
 
 bp = Blueprint('api_zoom', __name__, url_prefix='/api/v1/zoom')
@@ -136,12 +139,7 @@ def create_meeting():
             }), 400
         
         # Create meeting via Zoom API
-        meeting_info = zoom_service.create_meeting(
-            topic=f"Training Session with {session.client.first_name} {session.client.last_name}",
-            start_time=session.scheduled_time,
-            duration=session.duration or 60,
-            agenda=session.notes or "Personal training session"
-        )
+        meeting_info = zoom_service.create_meeting(**meeting_params(session))
         
         if not meeting_info:
             return jsonify({
@@ -159,7 +157,7 @@ def create_meeting():
             meeting_password=meeting_info.get('meeting_password'),
             zoom_meeting_id=meeting_info['meeting_id'],
             status='scheduled',
-            scheduled_start=session.scheduled_time
+            scheduled_start=session.scheduled_start
         )
         
         db.session.add(video_conference)
@@ -183,6 +181,73 @@ def create_meeting():
         return jsonify({'success': False, 'error': 'Failed to create meeting'}), 500
 
 
+@bp.route('/meetings/bulk', methods=['POST'])
+@login_required
+@query_budget(MAX_SESSIONS + 5)  # one INSERT per new meeting; reads are batched
+def provision_meetings():
+    """
+    Create or update Zoom meetings for a list of sessions (e.g. a recurring series).
+    
+    Request body: ``{"session_ids": [1, 2, ...]}``. Sessions that already
+    have a Zoom meeting get it updated to their current time. Every session
+    gets its own result, so a partial failure can be retried with just the
+    failed ids.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        session_ids = data.get('session_ids')
+        
+        if not isinstance(session_ids, list) or not session_ids:
+            return jsonify({'success': False, 'error': 'session_ids must be a non-empty list'}), 400
+        if not all(isinstance(i, int) and not isinstance(i, bool) for i in session_ids):
+            return jsonify({'success': False, 'error': 'session_ids must be integers'}), 400
+        session_ids = list(dict.fromkeys(session_ids))
+        if len(session_ids) > MAX_SESSIONS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_SESSIONS} sessions per request'
+            }), 400
+        
+        if not zoom_service.is_configured():
+            return jsonify({
+                'success': False,
+                'error': 'Zoom credentials not configured in server'
+            }), 400
+        
+        sessions = {
+            s.id: s for s in Session.query.options(joinedload(Session.client)).filter(
+                Session.id.in_(session_ids),
+                Session.trainer_id == current_user.id
+            )
+        }
+        
+        results = provision_sessions(
+            [sessions[i] for i in session_ids if i in sessions],
+            current_user.id
+        )
+        results += [
+            {'session_id': i, 'status': 'failed', 'error': 'Session not found'}
+            for i in session_ids if i not in sessions
+        ]
+        
+        summary = {status: 0 for status in ('created', 'updated', 'skipped', 'failed')}
+        for result in results:
+            summary[result['status']] += 1
+        
+        logger.info(f"Bulk Zoom provisioning for user {current_user.id}: {summary}")
+        
+        return jsonify({
+            'success': summary['failed'] == 0,
+            'summary': summary,
+            'results': results
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error provisioning Zoom meetings: {str(e)}")
+        return jsonify({'success': False, 'error': 'Failed to provision meetings'}), 500
+
+
 @bp.route('/meetings/<int:meeting_id>', methods=['DELETE'])
 @login_required
 def delete_meeting(meeting_id):
@@ -5,7 +5,9 @@ from app import db
 from app.models.exercise_library import ExerciseLibrary, ProgramTemplate
 from app.models.program import Program, Exercise
 from app.models.client import Client
-import json
+from app.models.types import json_array_contains_any
+from app.services import exercise_search
+from app.services.exercise_index import exercise_index
 
 bp = Blueprint('exercise_library', __name__, url_prefix='/exercise-library')
 
@@ -24,13 +26,18 @@ def index():
     
     # Apply filters
     if search:
-        query = query.filter(ExerciseLibrary.name.ilike(f'%{search}%'))
+        match = exercise_search.match_clause(search)
+        query = query.filter(match if match is not None else ExerciseLibrary.name.ilike(f'%{search}%'))
     if category:
         query = query.filter_by(category=category)
     if difficulty:
         query = query.filter_by(difficulty_level=difficulty)
     if equipment:
-        query = query.filter(ExerciseLibrary.equipment_required.like(f'%{equipment}%'))
+        index = exercise_index.snapshot()
+        query = query.filter(json_array_contains_any(
+            [ExerciseLibrary.equipment_required], index.values_matching(index.equipment, equipment),
+            db.session.get_bind().dialect.name
+        ))
     
     page = request.args.get('page', 1, type=int)
     exercises = query.order_by(ExerciseLibrary.name).paginate(
@@ -71,11 +78,11 @@ def create_exercise():
         # Handle JSON fields
         primary_muscles = request.form.getlist('primary_muscles')
         if primary_muscles:
-            exercise.primary_muscle_groups = json.dumps(primary_muscles)
+            exercise.primary_muscle_groups = primary_muscles
         
         equipment = request.form.getlist('equipment')
         if equipment:
-            exercise.equipment_required = json.dumps(equipment)
+            exercise.equipment_required = equipment
         
         db.session.add(exercise)
         db.session.commit()
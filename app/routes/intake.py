@@ -180,25 +180,25 @@ def start_intake(client_id):
         trainer_name = current_user.full_name if current_user.full_name else "Your Trainer"
         business_name = trainer_settings.business_name if trainer_settings else "Mectofitn essCRM"
         
-        # Send welcome email
+        # Queue welcome and intake form emails (delivered by the background worker)
         try:
-            intake_service.send_welcome_email(
-                client_email=client.email,
-                client_name=client.full_name,
-                trainer_name=trainer_name,
-                business_name=business_name
-            )
-            
-            # Send intake form request
             form_link = url_for('intake.client_form', client_id=client.id, _external=True)
-            intake_service.send_intake_form_request(
-                client_email=client.email,
-                client_name=client.full_name,
-                trainer_name=trainer_name,
-                form_link=form_link
-            )
+            results = [
+                intake_service.send_welcome_email(
+                    client_id=client.id,
+                    trainer_name=trainer_name
+                ),
+                intake_service.send_intake_form_request(
+                    client_id=client.id,
+                    trainer_name=trainer_name,
+                    intake_form_url=form_link
+                )
+            ]
+            failed = [r['error'] for r in results if not r.get('success')]
+            if failed:
+                raise RuntimeError(failed[0])
             
-            flash(f'Intake flow started! Welcome and intake form emails sent to {client.email}', 'success')
+            flash(f'Intake flow started! Welcome and intake form emails are on their way to {client.email}', 'success')
             return redirect(url_for('clients.view_client', client_id=client.id))
         except Exception as e:
             flash(f'Error sending emails: {str(e)}. Check your SendGrid configuration.', 'danger')
@@ -252,10 +252,10 @@ def client_form(client_id):
         
         try:
             intake_service.send_document_signing_request(
-                client_email=client.email,
-                client_name=client.full_name,
+                client_id=client.id,
                 trainer_name=client.trainer.full_name if client.trainer else "Your Trainer",
-                documents_link=documents_link
+                document_type="Liability Waiver & PAR-Q",
+                document_url=documents_link
             )
         except Exception as e:
             print(f"Error sending document email: {e}")
@@ -291,10 +291,9 @@ def client_documents(intake_id):
         
         try:
             intake_service.send_photo_upload_request(
-                client_email=intake.client.email,
-                client_name=intake.client.full_name,
+                client_id=intake.client_id,
                 trainer_name=intake.client.trainer.full_name if intake.client.trainer else "Your Trainer",
-                upload_link=photos_link
+                upload_url=photos_link
             )
         except Exception as e:
             print(f"Error sending photo email: {e}")
@@ -8,7 +8,7 @@ from flask import Blueprint, render_template, redirect, url_for, send_from_direc
 from flask_login import login_required, current_user
 from app.models.client import Client
 from app.models.session import Session
-from app.models.program import Program
+from app.services.dashboard_stats import get_overview_counters
 from datetime import datetime, timedelta
 import os
 
@@ -44,8 +44,7 @@ def app(path=''):
 def dashboard_legacy():
     """Legacy dashboard - Jinja template version (for backwards compatibility)."""
     # Get statistics
-    total_clients = Client.query.filter_by(trainer_id=current_user.id, is_active=True).count()
-    total_programs = Program.query.filter_by(trainer_id=current_user.id, status='active').count()
+    counters = get_overview_counters(current_user.id, metrics=['clients_active', 'programs_active'])
     
     # Get upcoming sessions (next 7 days)
     now = datetime.utcnow()
@@ -73,8 +72,8 @@ def dashboard_legacy():
     ).order_by(Client.created_at.desc()).limit(5).all()
     
     return render_template('dashboard.html',
-                         total_clients=total_clients,
-                         total_programs=total_programs,
+                         total_clients=counters['clients_active'],
+                         total_programs=counters['programs_active'],
                          upcoming_sessions=upcoming_sessions,
                          today_sessions=today_sessions,
                          recent_clients=recent_clients)
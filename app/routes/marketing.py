@@ -4,6 +4,7 @@ from flask_login import login_required, current_user
 from app import db
 from app.models.marketing import EmailTemplate, SMSTemplate, MarketingCampaign, CommunicationLog
 from app.models.client import Client
+from app.services.campaigns import launch
 from datetime import datetime
 import json
 
@@ -249,12 +250,13 @@ def launch_campaign(campaign_id):
         trainer_id=current_user.id
     ).first_or_404()
     
-    campaign.status = 'active'
-    campaign.launched_at = datetime.utcnow()
-    db.session.commit()
+    if campaign.status not in ('draft', 'paused'):
+        flash(f'Campaign "{campaign.name}" is already {campaign.status}.', 'warning')
+        return redirect(url_for('marketing.view_campaign', campaign_id=campaign.id))
     
-    # Note: Campaign execution logic should integrate with Twilio/SendGrid
-    # to send actual messages to clients based on the campaign configuration.
+    # Sending happens in the background worker; a paused campaign resumes at its checkpoint
+    launch(campaign)
+    db.session.commit()
     
     flash(f'Campaign "{campaign.name}" launched!', 'success')
     return redirect(url_for('marketing.view_campaign', campaign_id=campaign.id))
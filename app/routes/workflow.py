@@ -3,6 +3,7 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_required, current_user
 from app import db
 from app.models.flow import WorkflowTemplate, WorkflowExecution, AutomationRule
+from app.services.automation import compile_conditions
 from datetime import datetime
 import json
 
@@ -67,7 +68,11 @@ def create_template():
         # Parse workflow steps from form
         steps_json = request.form.get('steps_json')
         if steps_json:
-            template.steps = steps_json
+            try:
+                template.set_steps(json.loads(steps_json))
+            except ValueError as e:
+                flash(f'Invalid workflow steps: {e}', 'danger')
+                return render_template('workflow/create_template.html')
         
         db.session.add(template)
         db.session.commit()
@@ -124,11 +129,21 @@ def create_automation():
         # Parse conditions and actions from form
         conditions_json = request.form.get('trigger_conditions')
         if conditions_json:
-            rule.trigger_conditions = conditions_json
+            try:
+                conditions = json.loads(conditions_json)
+                compile_conditions(conditions)
+            except (ValueError, TypeError) as e:
+                flash(f'Invalid trigger conditions: {e}', 'danger')
+                return render_template('workflow/create_automation.html')
+            rule.trigger_conditions = conditions
         
         action_config_json = request.form.get('action_config')
         if action_config_json:
-            rule.action_config = action_config_json
+            try:
+                rule.action_config = json.loads(action_config_json)
+            except ValueError as e:
+                flash(f'Invalid action configuration: {e}', 'danger')
+                return render_template('workflow/create_automation.html')
         
         db.session.add(rule)
         db.session.commit()
@@ -0,0 +1,414 @@
+"""Event-driven automation rule engine.
+
+Model writes are turned into domain events (``client_created``,
+``session_completed``, ``payment_failed``, ...) by mapper listeners. After
+each flush the events are matched against the trainer's active
+``AutomationRule`` rows, and every match is written to the job queue
+(task ``automation.execute``) in the same transaction. A rolled-back write
+therefore never fires a rule, and actions run in ``flask worker``, not in
+the request.
+
+The same events are fanned out to subscribed webhook endpoints (see
+``app.services.webhooks``).
+
+Rules are compiled once. ``trigger_conditions`` becomes a Python predicate
+and is cached in a ``RuleIndex`` keyed by trainer and event type, so an
+event only evaluates the rules that listen for it. A trainer's entry is
+dropped when one of their rules is written in this process. Other
+processes notice changes through a cheap ``count/max(updated_at)``
+signature check, at most every ``REVALIDATE_SECONDS``.
+
+Condition format (JSON object, all keys must match)::
+
+    {"status": "failed"}                         equality
+    {"amount": {"gte": 100}}                     eq, ne, gt, gte, lt, lte
+    {"session_type": {"in": ["group", "online"]}} in, not_in
+    {"notes": {"contains": "vip"}}               contains, exists
+    {"any": [{...}, {...}]}, {"all": [...]}, {"not": {...}}
+"""
+import json
+import logging
+import threading
+import time
+from datetime import date, datetime
+from sqlalchemy import event, func, insert, inspect, select, update
+from sqlalchemy.orm import Session as OrmSession
+from app import db
+from app.models.client import Client
+from app.models.flow import AutomationRule, WorkflowExecution, WorkflowTemplate
+from app.models.intake import ClientIntake
+from app.models.jobs import Job
+from app.models.payments import Payment
+from app.models.program import Program
+from app.models.session import Session
+from app.services.job_queue import task
+
+logger = logging.getLogger(__name__)
+
+# How often a cached trainer entry is checked against the database
+REVALIDATE_SECONDS = 30
+
+# model -> [(event type, fires(target, is_insert))]
+EVENT_SOURCES = {
+    Client: [
+        ('client_created', lambda target, is_insert: is_insert),
+        ('client_inactive', lambda target, is_insert: _changed_to(target, 'is_active', False)),
+    ],
+    Session: [
+        ('session_completed', lambda target, is_insert: _changed_to(target, 'status', 'completed')),
+        ('session_no_show', lambda target, is_insert: _changed_to(target, 'status', 'no-show')),
+        ('session_cancelled', lambda target, is_insert: _changed_to(target, 'status', 'cancelled')),
+    ],
+    Payment: [
+        ('payment_failed', lambda target, is_insert: _changed_to(target, 'status', 'failed')),
+        ('payment_completed', lambda target, is_insert: _changed_to(target, 'status', 'completed')),
+    ],
+    Program: [
+        ('program_complete', lambda target, is_insert: _changed_to(target, 'status', 'completed')),
+    ],
+    ClientIntake: [
+        ('intake_complete', lambda target, is_insert: _changed_to(target, 'status', 'form_completed')),
+    ],
+}
+
+EVENT_TYPES = tuple(name for sources in EVENT_SOURCES.values() for name, _ in sources)
+
+
+def _changed_to(target, attribute, value):
+    """True if ``attribute`` was just set to ``value`` (on insert or update)."""
+    added = inspect(target).attrs[attribute].history.added
+    return bool(added) and added[0] == value
+
+
+# ----------------------------------------------------------------------
+# Condition compiler
+# ----------------------------------------------------------------------
+
+def _compare(op, expected):
+    if op == 'eq':
+        return lambda actual: actual == expected
+    if op == 'ne':
+        return lambda actual: actual != expected
+    if op in ('gt', 'gte', 'lt', 'lte'):
+        check = {
+            'gt': lambda a: a > expected, 'gte': lambda a: a >= expected,
+            'lt': lambda a: a < expected, 'lte': lambda a: a <= expected,
+        }[op]
+        return lambda actual: actual is not None and check(actual)
+    if op == 'in':
+        options = set(expected)
+        return lambda actual: actual in options
+    if op == 'not_in':
+        options = set(expected)
+        return lambda actual: actual not in options
+    if op == 'contains':
+        needle = str(expected).lower()
+        return lambda actual: actual is not None and needle in str(actual).lower()
+    if op == 'exists':
+        return lambda actual: (actual is not None) == bool(expected)
+    raise ValueError(f"Unknown condition operator '{op}'")
+
+
+def compile_conditions(conditions):
+    """
+    Compile a condition object into ``predicate(payload) -> bool``.
+
+    Raises:
+        ValueError: If the conditions are malformed
+    """
+    if not conditions:
+        return lambda payload: True
+    if not isinstance(conditions, dict):
+        raise ValueError('Conditions must be a JSON object')
+
+    checks = []
+    for key, spec in conditions.items():
+        if key in ('all', 'any'):
+            parts = [compile_conditions(part) for part in spec]
+            combine = all if key == 'all' else any
+            checks.append(lambda payload, parts=parts, combine=combine: combine(p(payload) for p in parts))
+        elif key == 'not':
+            inner = compile_conditions(spec)
+            checks.append(lambda payload, inner=inner: not inner(payload))
+        elif isinstance(spec, dict):
+            tests = [_compare(op, expected) for op, expected in spec.items()]
+            checks.append(lambda payload, key=key, tests=tests: all(t(payload.get(key)) for t in tests))
+        else:
+            test = _compare('eq', spec)
+            checks.append(lambda payload, key=key, test=test: test(payload.get(key)))
+    return lambda payload: all(check(payload) for check in checks)
+
+
+class CompiledRule:
+    """An active rule with its conditions compiled to a predicate."""
+
+    __slots__ = ('id', 'trainer_id', 'event', 'action_type', 'matches')
+
+    def __init__(self, row):
+        self.id = row.id
+        self.trainer_id = row.trainer_id
+        self.event = row.trigger_event
+        self.action_type = row.action_type
+        try:
+            self.matches = compile_conditions(row.trigger_conditions or {})
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Automation rule {row.id} has invalid conditions and is disabled: {e}")
+            self.matches = lambda payload: False
+
+
+class RuleIndex:
+    """Per-process cache of compiled rules, keyed by trainer then event type."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(connection, trainer_id):
+        table = AutomationRule.__table__
+        count, latest = connection.execute(
+            select(func.count(), func.max(table.c.updated_at)).where(table.c.trainer_id == trainer_id)
+        ).one()
+        return count, str(latest)
+
+    def _load(self, connection, trainer_id):
+        table = AutomationRule.__table__
+        rows = connection.execute(
+            select(table.c.id, table.c.trainer_id, table.c.trigger_event, table.c.trigger_conditions,
+                   table.c.action_type)
+            .where(table.c.trainer_id == trainer_id, table.c.is_active.is_(True))
+        ).all()
+        by_event = {}
+        for row in rows:
+            by_event.setdefault(row.trigger_event, []).append(CompiledRule(row))
+        return by_event
+
+    def rules_for(self, connection, trainer_id, event_type):
+        """Compiled active rules of ``trainer_id`` listening for ``event_type``."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(trainer_id)
+        if entry is not None and now - entry['checked_at'] > REVALIDATE_SECONDS:
+            if self._signature(connection, trainer_id) != entry['signature']:
+                entry = None
+            else:
+                entry['checked_at'] = now
+        if entry is None:
+            entry = {
+                'signature': self._signature(connection, trainer_id),
+                'rules': self._load(connection, trainer_id),
+                'checked_at': now,
+            }
+            with self._lock:
+                self._entries[trainer_id] = entry
+        return entry['rules'].get(event_type, ())
+
+    def invalidate(self, trainer_id=None):
+        with self._lock:
+            if trainer_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(trainer_id, None)
+
+
+rule_index = RuleIndex()
+
+
+# ----------------------------------------------------------------------
+# Event capture and dispatch
+# ----------------------------------------------------------------------
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _payload(mapper, target):
+    return {column.key: _json_value(getattr(target, column.key, None)) for column in mapper.column_attrs}
+
+
+def _capture(is_insert):
+    def listener(mapper, connection, target):
+        session = OrmSession.object_session(target)
+        trainer_id = getattr(target, 'trainer_id', None)
+        if session is None or trainer_id is None:
+            return
+        for event_type, fires in EVENT_SOURCES[mapper.class_]:
+            if fires(target, is_insert):
+                session.info.setdefault('automation_events', []).append(
+                    (trainer_id, event_type, _payload(mapper, target))
+                )
+    return listener
+
+
+def dispatch(connection, events):
+    """
+    Match events against cached rules and queue an action job per match,
+    plus one webhook delivery job per event with subscribed endpoints.
+
+    Returns:
+        Number of jobs queued
+    """
+    from app.services.webhooks import fan_out
+
+    now = datetime.utcnow()
+    jobs = fan_out(connection, events, now)
+    for trainer_id, event_type, payload in events:
+        for rule in rule_index.rules_for(connection, trainer_id, event_type):
+            if rule.matches(payload):
+                jobs.append({
+                    'queue': 'default',
+                    'task': 'automation.execute',
+                    'payload': json.dumps({'rule_id': rule.id, 'event': event_type, 'data': payload}),
+                    'status': 'queued',
+                    'attempts': 0,
+                    'max_attempts': 5,
+                    'run_at': now,
+                    'created_at': now,
+                })
+    if jobs:
+        connection.execute(insert(Job.__table__), jobs)
+    return len(jobs)
+
+
+def _after_flush_postexec(session, flush_context):
+    events = session.info.pop('automation_events', None)
+    if events:
+        dispatch(session.connection(), events)
+
+
+def _record_rule_change(mapper, connection, target):
+    session = OrmSession.object_session(target)
+    if session is not None:
+        session.info.setdefault('automation_rules_dirty', set()).add(target.trainer_id)
+
+
+def _after_commit(session):
+    for trainer_id in session.info.pop('automation_rules_dirty', ()):
+        rule_index.invalidate(trainer_id)
+
+
+def _after_rollback(session):
+    session.info.pop('automation_events', None)
+    # A rolled-back rule edit may already have been cached; drop those entries
+    for trainer_id in session.info.pop('automation_rules_dirty', ()):
+        rule_index.invalidate(trainer_id)
+
+
+_events_registered = False
+
+
+def register_automation_events():
+    """Attach the event capture and rule cache listeners (idempotent)."""
+    global _events_registered
+    if _events_registered:
+        return
+
+    for model in EVENT_SOURCES:
+        event.listen(model, 'after_insert', _capture(True))
+        event.listen(model, 'after_update', _capture(False))
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(AutomationRule, name, _record_rule_change)
+
+    event.listen(OrmSession, 'after_flush_postexec', _after_flush_postexec)
+    event.listen(OrmSession, 'after_commit', _after_commit)
+    event.listen(OrmSession, 'after_rollback', _after_rollback)
+    _events_registered = True
+
+
+# ----------------------------------------------------------------------
+# Actions (run by the worker)
+# ----------------------------------------------------------------------
+
+def _event_client(data, event_type):
+    client_id = data.get('id') if event_type.startswith('client_') else data.get('client_id')
+    return db.session.get(Client, client_id) if client_id else None
+
+
+def _send_email(rule, config, client):
+    from app.models.marketing import EmailTemplate
+    from app.services.campaigns import render, template_values
+    from app.services.transports import get_transport
+
+    subject, body = config.get('subject', ''), config.get('body', '')
+    if config.get('template_id'):
+        template = db.session.get(EmailTemplate, config['template_id'])
+        if template is None or template.trainer_id != rule.trainer_id:
+            raise LookupError(f"Email template {config['template_id']} not found")
+        subject, body = template.subject, template.body
+    if client is None or not client.email:
+        logger.info(f"Automation rule {rule.id}: no client email, skipping send_email")
+        return
+    values = template_values(client, rule.trainer.full_name if rule.trainer else '')
+    get_transport().send_email(client.email, render(subject, values), render(body, values))
+
+
+def _send_sms(rule, config, client):
+    from app.models.marketing import SMSTemplate
+    from app.services.campaigns import render, template_values
+    from app.services.transports import get_transport
+
+    message = config.get('message', '')
+    if config.get('template_id'):
+        template = db.session.get(SMSTemplate, config['template_id'])
+        if template is None or template.trainer_id != rule.trainer_id:
+            raise LookupError(f"SMS template {config['template_id']} not found")
+        message = template.message
+    if client is None or not client.phone:
+        logger.info(f"Automation rule {rule.id}: no client phone, skipping send_sms")
+        return
+    values = template_values(client, rule.trainer.full_name if rule.trainer else '')
+    get_transport().send_sms(client.phone, render(message, values))
+
+
+def _start_workflow(rule, config, client):
+    from app.services.workflow_scheduler import first_run_at
+
+    if client is None:
+        return
+    template = db.session.get(WorkflowTemplate, config['workflow_template_id'])
+    if template is None or template.trainer_id != rule.trainer_id:
+        raise LookupError(f"Workflow template {config['workflow_template_id']} not found")
+    db.session.add(WorkflowExecution(
+        workflow_template_id=template.id,
+        client_id=client.id,
+        trainer_id=rule.trainer_id,
+        status='active',
+        next_step_at=first_run_at(template, datetime.utcnow())
+    ))
+
+
+ACTIONS = {
+    'send_email': _send_email,
+    'send_sms': _send_sms,
+    'start_workflow': _start_workflow,
+}
+
+
+@task('automation.execute')
+def execute_rule(rule_id, event, data):
+    """Run one matched rule's action."""
+    rule = db.session.get(AutomationRule, rule_id)
+    if rule is None or not rule.is_active:
+        return
+
+    action = ACTIONS.get(rule.action_type)
+    if action is None:
+        logger.warning(f"Automation rule {rule.id}: action '{rule.action_type}' is not supported")
+        return
+
+    action(rule, rule.get_action_config(), _event_client(data, event))
+
+    # Core UPDATE: bookkeeping must not bump updated_at and invalidate cached rules
+    table = AutomationRule.__table__
+    db.session.execute(
+        update(table).where(table.c.id == rule.id).values(
+            trigger_count=func.coalesce(table.c.trigger_count, 0) + 1,
+            last_triggered_at=datetime.utcnow(),
+            updated_at=table.c.updated_at
+        )
+    )
+    db.session.commit()
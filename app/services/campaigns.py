@@ -0,0 +1,262 @@
+"""Marketing campaign execution.
+
+``CampaignExecutor`` sends a campaign's email and/or SMS template to its
+audience:
+
+* The audience is one keyset-paginated query over ``clients``, ordered by
+  id. Custom segments use ``id IN (...)`` instead of a per-client lookup.
+* Each template is compiled once. Placeholders such as ``{{client_name}}``
+  or ``{client_name}`` become SendGrid substitution tags, and only
+  per-recipient values are computed in the loop.
+* Recipients are sent in provider-sized batches (``EMAIL_BATCH_SIZE``,
+  ``SMS_BATCH_SIZE``) through the shared transport.
+* Every page is committed together with its ``CommunicationLog`` rows
+  (one bulk INSERT), the campaign counters and the checkpoint
+  (``last_client_id``). After a crash the next run resumes after the last
+  committed client. At most the page in flight is sent twice.
+
+Campaigns are launched through the job queue (task ``campaign.execute``).
+Each checkpoint renews the job's lease, so the worker's stale-job recovery
+restarts a campaign whose worker died, never one that is still sending.
+"""
+import logging
+import re
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app import db
+from app.models.client import Client
+from app.models.marketing import CommunicationLog, MarketingCampaign
+from app.models.user import User
+from app.services.job_queue import heartbeat, task
+from app.services.transports import EMAIL_BATCH_SIZE, SMS_BATCH_SIZE, apply_substitutions, get_transport
+
+logger = logging.getLogger(__name__)
+
+# Clients processed (and committed) per checkpoint
+PAGE_SIZE = EMAIL_BATCH_SIZE
+
+# How recent "new_clients" are
+NEW_CLIENT_DAYS = 30
+
+# Placeholders understood in template subjects and bodies
+FIELDS = ('client_name', 'first_name', 'last_name', 'email', 'trainer_name')
+
+_PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*\}\}|\{(\w+)\}')
+
+
+class CompiledTemplate:
+    """A template parsed once into SendGrid-style substitution tags."""
+
+    def __init__(self, text):
+        self.fields = []
+
+        def tag(match):
+            field = match.group(1) or match.group(2)
+            if field not in FIELDS:
+                return match.group(0)
+            if field not in self.fields:
+                self.fields.append(field)
+            return f'-{field}-'
+
+        self.tagged = _PLACEHOLDER.sub(tag, text or '')
+
+    def substitutions(self, values):
+        """Tag -> value map for one recipient (only fields this template uses)."""
+        return {f'-{field}-': values[field] for field in self.fields}
+
+
+def template_values(client, trainer_name):
+    """Placeholder values for one client."""
+    return {
+        'client_name': f'{client.first_name} {client.last_name}',
+        'first_name': client.first_name or '',
+        'last_name': client.last_name or '',
+        'email': client.email or '',
+        'trainer_name': trainer_name or '',
+    }
+
+
+def render(text, values):
+    """Render a template string for one recipient (compiles it first)."""
+    template = CompiledTemplate(text)
+    return apply_substitutions(template.tagged, template.substitutions(values))
+
+
+def audience_query(campaign):
+    """
+    Clients targeted by ``campaign``, ordered by id.
+
+    Raises:
+        ValueError: If the target segment is unknown
+    """
+    query = Client.query.filter(Client.trainer_id == campaign.trainer_id)
+    segment = campaign.target_segment or 'all_clients'
+    if segment == 'all_clients':
+        query = query.filter(Client.is_active.is_(True))
+    elif segment == 'new_clients':
+        query = query.filter(Client.is_active.is_(True),
+                             Client.created_at >= datetime.utcnow() - timedelta(days=NEW_CLIENT_DAYS))
+    elif segment == 'inactive_clients':
+        query = query.filter(Client.is_active.is_(False))
+    elif segment == 'custom':
+        query = query.filter(Client.id.in_(campaign.get_target_clients()))
+    else:
+        raise ValueError(f"Unknown target segment '{segment}'")
+    return query.order_by(Client.id)
+
+
+class CampaignExecutor:
+    """Sends one campaign in checkpointed pages."""
+
+    def __init__(self, campaign, transport=None, page_size=PAGE_SIZE):
+        self.campaign = campaign
+        self.campaign_id = campaign.id
+        self.transport = transport or get_transport()
+        self.page_size = page_size
+
+        channel = campaign.campaign_type or 'email'
+        self.email_template = campaign.email_template if channel in ('email', 'both') else None
+        self.sms_template = campaign.sms_template if channel in ('sms', 'both') else None
+        if self.email_template is None and self.sms_template is None:
+            raise ValueError('Campaign has no template for its campaign type')
+
+        if self.email_template is not None:
+            self.email_subject = CompiledTemplate(self.email_template.subject)
+            self.email_body = CompiledTemplate(self.email_template.body)
+        if self.sms_template is not None:
+            self.sms_body = CompiledTemplate(self.sms_template.message)
+
+        trainer = db.session.get(User, campaign.trainer_id)
+        self.trainer_name = trainer.full_name if trainer else ''
+
+    def _values(self, client):
+        return template_values(client, self.trainer_name)
+
+    def _send_email(self, clients, now):
+        logs = []
+        recipients = [c for c in clients if c.email]
+        for i in range(0, len(recipients), EMAIL_BATCH_SIZE):
+            batch = recipients[i:i + EMAIL_BATCH_SIZE]
+            substitutions = [
+                {**self.email_subject.substitutions(values), **self.email_body.substitutions(values)}
+                for values in map(self._values, batch)
+            ]
+            errors = self.transport.send_email_batch(
+                self.email_subject.tagged, self.email_body.tagged,
+                [{'to': c.email, 'substitutions': subs} for c, subs in zip(batch, substitutions)]
+            )
+            for client, subs, error in zip(batch, substitutions, errors):
+                logs.append({
+                    'campaign_id': self.campaign_id,
+                    'client_id': client.id,
+                    'communication_type': 'email',
+                    'recipient': client.email,
+                    'subject': apply_substitutions(self.email_subject.tagged, subs)[:300],
+                    'content': apply_substitutions(self.email_body.tagged, subs),
+                    'status': 'failed' if error else 'sent',
+                    'error_message': error,
+                    'sent_at': now,
+                })
+        return logs
+
+    def _send_sms(self, clients, now):
+        logs = []
+        recipients = [c for c in clients if c.phone]
+        for i in range(0, len(recipients), SMS_BATCH_SIZE):
+            batch = recipients[i:i + SMS_BATCH_SIZE]
+            bodies = [apply_substitutions(self.sms_body.tagged, self.sms_body.substitutions(self._values(c)))
+                      for c in batch]
+            errors = self.transport.send_sms_batch(
+                [{'to': c.phone, 'body': body} for c, body in zip(batch, bodies)]
+            )
+            for client, body, error in zip(batch, bodies, errors):
+                logs.append({
+                    'campaign_id': self.campaign_id,
+                    'client_id': client.id,
+                    'communication_type': 'sms',
+                    'recipient': client.phone,
+                    'subject': None,
+                    'content': body,
+                    'status': 'failed' if error else 'sent',
+                    'error_message': error,
+                    'sent_at': now,
+                })
+        return logs
+
+    def run(self):
+        """
+        Send to every remaining recipient, committing after each page.
+
+        Returns:
+            Dict with sent, failed, elapsed_seconds and messages_per_second
+            for this run (a resumed run only counts its own sends)
+        """
+        campaign = self.campaign
+        base_query = audience_query(campaign)
+        started = time.perf_counter()
+        sent = failed = 0
+
+        while True:
+            query = base_query
+            if campaign.last_client_id is not None:
+                query = query.filter(Client.id > campaign.last_client_id)
+            clients = query.limit(self.page_size).all()
+            if not clients:
+                break
+
+            now = datetime.utcnow()
+            logs = []
+            if self.email_template is not None:
+                logs.extend(self._send_email(clients, now))
+            if self.sms_template is not None:
+                logs.extend(self._send_sms(clients, now))
+
+            page_failed = sum(1 for log in logs if log['status'] == 'failed')
+            if logs:
+                db.session.execute(insert(CommunicationLog), logs)
+            campaign.sent_count = (campaign.sent_count or 0) + len(logs) - page_failed
+            campaign.failed_count = (campaign.failed_count or 0) + page_failed
+            campaign.last_client_id = clients[-1].id
+            heartbeat()
+            # The commit expires the campaign, so the status check below sees a pause
+            db.session.commit()
+
+            sent += len(logs) - page_failed
+            failed += page_failed
+            if campaign.status != 'active':
+                # Paused from the UI; a later launch resumes at the checkpoint
+                break
+
+        if campaign.status == 'active':
+            campaign.status = 'completed'
+            campaign.completed_at = datetime.utcnow()
+            db.session.commit()
+
+        elapsed = time.perf_counter() - started
+        stats = {
+            'sent': sent,
+            'failed': failed,
+            'elapsed_seconds': round(elapsed, 3),
+            'messages_per_second': round((sent + failed) / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        logger.info(f"Campaign {campaign.id} finished: {stats}")
+        return stats
+
+
+def launch(campaign):
+    """Mark ``campaign`` active and queue its execution."""
+    from app.services.job_queue import enqueue
+
+    campaign.status = 'active'
+    campaign.launched_at = datetime.utcnow()
+    return enqueue('campaign.execute', {'campaign_id': campaign.id}, queue='email')
+
+
+@task('campaign.execute')
+def execute_campaign(campaign_id):
+    """Job entry point; resumes from the campaign's checkpoint."""
+    campaign = db.session.get(MarketingCampaign, campaign_id)
+    if campaign is None or campaign.status != 'active':
+        return None
+    return CampaignExecutor(campaign).run()
@@ -0,0 +1,116 @@
+"""Dashboard counters computed in a single database round trip.
+
+Every table that contributes to the overview is reduced to one derived row
+of conditional aggregates (``COUNT(CASE WHEN ...)`` / ``SUM(CASE WHEN ...)``)
+scoped to the requested trainers. The derived rows are cross-joined, so all
+counters come back as a single result row. The generated SQL is portable
+between SQLite and PostgreSQL and each derived table is served by the
+``(trainer_id, ...)`` composite indexes.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, select, true
+from app import db
+from app.models.client import Client
+from app.models.session import Session
+from app.models.program import Program
+from app.models.payments import Payment, Subscription
+from app.models.booking import OnlineBooking
+
+
+def _count_if(condition):
+    return func.count(case((condition, 1)))
+
+
+def _sum_if(column, condition):
+    return func.coalesce(func.sum(case((condition, column))), 0)
+
+
+# metric name -> (model, builder(since, now) returning an aggregate expression)
+METRICS = {
+    'clients_total': (Client, lambda since, now: func.count()),
+    'clients_active': (Client, lambda since, now: _count_if(Client.is_active.is_(True))),
+    'clients_new': (Client, lambda since, now: _count_if(Client.created_at >= since)),
+    'sessions_total': (Session, lambda since, now: func.count()),
+    'sessions_completed': (Session, lambda since, now: _count_if(
+        (Session.status == 'completed') & (Session.scheduled_start >= since))),
+    'sessions_upcoming': (Session, lambda since, now: _count_if(
+        (Session.status == 'scheduled') & (Session.scheduled_start >= now))),
+    'programs_total': (Program, lambda since, now: func.count()),
+    'programs_active': (Program, lambda since, now: _count_if(Program.status == 'active')),
+    'revenue': (Payment, lambda since, now: _sum_if(
+        Payment.amount, (Payment.status == 'completed') & (Payment.payment_date >= since))),
+    'subscriptions_active': (Subscription, lambda since, now: _count_if(Subscription.status == 'active')),
+    'bookings_pending': (OnlineBooking, lambda since, now: _count_if(OnlineBooking.status == 'pending')),
+}
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.combine(value, datetime.min.time())
+
+
+def build_overview_query(trainer_ids, since, now, metrics):
+    """
+    Build the single SELECT that computes ``metrics`` for ``trainer_ids``.
+
+    Args:
+        trainer_ids: List of trainer (user) ids to aggregate over
+        since: Start of the reporting period
+        now: Reference time for "upcoming" counters
+        metrics: Metric names from ``METRICS``
+
+    Returns:
+        SQLAlchemy Select producing one row with a column per metric
+    """
+    by_model = {}
+    for name in metrics:
+        model, builder = METRICS[name]
+        by_model.setdefault(model, []).append(builder(since, now).label(name))
+
+    derived = []
+    for model, columns in by_model.items():
+        if len(trainer_ids) == 1:
+            scope = model.trainer_id == trainer_ids[0]
+        else:
+            scope = model.trainer_id.in_(trainer_ids)
+        derived.append(select(*columns).where(scope).subquery(f'{model.__tablename__}_agg'))
+
+    from_clause = derived[0]
+    for subquery in derived[1:]:
+        from_clause = from_clause.join(subquery, true())
+
+    return select(*[subquery.c[name] for subquery in derived for name in subquery.c.keys()]).select_from(from_clause)
+
+
+def get_overview_counters(trainer_ids, since=None, now=None, metrics=None):
+    """
+    Compute dashboard counters for one or more trainers in one query.
+
+    Args:
+        trainer_ids: Trainer id or list of trainer ids
+        since: Start of the reporting period (date or datetime, default 30 days ago)
+        now: Reference time for upcoming counters (default utcnow)
+        metrics: Metric names to compute (default all of ``METRICS``)
+
+    Returns:
+        Dict of metric name -> int (float for ``revenue``)
+    """
+    if isinstance(trainer_ids, int):
+        trainer_ids = [trainer_ids]
+    metrics = list(metrics or METRICS)
+    unknown = [name for name in metrics if name not in METRICS]
+    if unknown:
+        raise ValueError(f"Unknown dashboard metric(s): {', '.join(unknown)}")
+
+    if not trainer_ids:
+        return {name: 0 for name in metrics}
+
+    now = now or datetime.utcnow()
+    since = _as_datetime(since) if since else now - timedelta(days=30)
+
+    row = db.session.execute(build_overview_query(trainer_ids, since, now, metrics)).mappings().one()
+    return {
+        name: float(row[name] or 0) if name == 'revenue' else int(row[name] or 0)
+        for name in metrics
+    }
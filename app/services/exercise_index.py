@@ -0,0 +1,410 @@
+"""Per-process search and filter index over the exercise library.
+
+``exercise_index`` keeps an inverted index of every active
+``ExerciseLibrary`` row in memory: tokens of the name, muscles, equipment,
+tags, category and description, each with a field weight. Search is then
+dictionary and ``bisect`` work with no database or network round trip.
+Every query term matches as a prefix, for typeahead. A result must match
+all terms, and results are ranked by their summed field weights.
+
+The same build holds a set of exercise ids per category, difficulty,
+exercise type, muscle and equipment value, precomputed facet counts and
+the id order for each listing sort. Filtered listings and the facet
+endpoints are set intersections over these instead of table scans over
+the JSON columns.
+
+The index is built on first use (or by ``warm()`` when a worker starts)
+and swapped atomically when rebuilt. A transaction that changes an
+indexed ``ExerciseLibrary`` column also bumps the shared
+``exercise_index_generation`` row before it commits. This holds wherever
+the write happens: any gunicorn worker, or a mirror sync run by
+``scripts/seed_exercises.py``. Each request that uses the index reads
+the generation once (a primary-key lookup) and rebuilds the index if the
+generation moved, so every worker serves a change from the next request
+on. Usage-count bumps touch no indexed column and keep the index.
+"""
+import logging
+import re
+import threading
+import time
+from flask import g, has_request_context, request
+from bisect import bisect_left
+from collections import namedtuple
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session as OrmSession
+from app import db
+from app.models.exercise_library import ExerciseIndexGeneration, ExerciseLibrary
+from app.utils.pagination import NULLS_HIGH_DIALECTS
+
+logger = logging.getLogger(__name__)
+
+# Score of a term found in each field (a prefix match counts half)
+FIELD_WEIGHTS = {
+    'name': 8,
+    'tags': 4,
+    'muscles': 3,
+    'equipment': 2,
+    'category': 2,
+    'description': 1,
+}
+
+# Columns the index is built from; updates that touch none of them (usage
+# counts, ratings) leave it alone
+INDEXED_COLUMNS = (
+    'name', 'description', 'category', 'difficulty_level', 'exercise_type', 'primary_muscle_groups',
+    'secondary_muscle_groups', 'equipment_required', 'tags', 'image_url', 'wger_id', 'is_public',
+    'is_custom', 'is_active', 'created_by_trainer_id', 'created_at',
+)
+
+# Loaded row; plain tuple attribute access is several times cheaper than Row's
+_IndexRow = namedtuple('_IndexRow', ('id',) + tuple(name for name in INDEXED_COLUMNS if name != 'is_active'))
+
+# Listing sorts answered from the index (usage_count changes too often)
+SORT_FIELDS = ('name', 'category', 'difficulty_level', 'created_at')
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Lower-case word tokens of ``text``."""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def _json_list(value):
+    return [str(item) for item in value if item] if isinstance(value, list) else []
+
+
+class _Snapshot:
+    """One immutable build of the index."""
+
+    def __init__(self, rows, generation, nulls_high=False):
+        self.generation = generation
+        self.docs = {}
+        self.public = set()
+        self.custom = set()
+        self.owner = {}
+        self.by_owner = {}
+        self.by_category = {}
+        self.by_difficulty = {}
+        self.by_type = {}
+        self.by_muscle = {}
+        self.by_equipment = {}
+        sort_values = {field: {} for field in SORT_FIELDS}
+        postings = {}
+        for row in rows:
+            muscles = _json_list(row.primary_muscle_groups)
+            secondary = _json_list(row.secondary_muscle_groups)
+            equipment = _json_list(row.equipment_required)
+            tags = _json_list(row.tags)
+            self.docs[row.id] = {
+                'id': row.id,
+                'wger_id': row.wger_id,
+                'name': row.name,
+                'description': row.description,
+                'category': row.category,
+                'difficulty_level': row.difficulty_level,
+                'primary_muscle_groups': muscles,
+                'secondary_muscle_groups': secondary,
+                'equipment_required': equipment,
+                'image_url': row.image_url,
+            }
+            if row.is_public:
+                self.public.add(row.id)
+            if row.is_custom:
+                self.custom.add(row.id)
+            if row.created_by_trainer_id:
+                self.owner[row.id] = row.created_by_trainer_id
+                self.by_owner.setdefault(row.created_by_trainer_id, set()).add(row.id)
+            for facet, value in ((self.by_category, row.category), (self.by_difficulty, row.difficulty_level),
+                                 (self.by_type, row.exercise_type)):
+                if value:
+                    facet.setdefault(value, set()).add(row.id)
+            for muscle in muscles + secondary:
+                self.by_muscle.setdefault(muscle, set()).add(row.id)
+            for item in equipment:
+                self.by_equipment.setdefault(item, set()).add(row.id)
+            for field in SORT_FIELDS:
+                sort_values[field][row.id] = getattr(row, field)
+
+            fields = (
+                ('name', [row.name]),
+                ('tags', tags),
+                ('muscles', muscles + secondary),
+                ('equipment', equipment),
+                ('category', [row.category]),
+                ('description', [row.description]),
+            )
+            for field, texts in fields:
+                weight = FIELD_WEIGHTS[field]
+                for text in texts:
+                    for token in tokenize(text):
+                        doc_weights = postings.setdefault(token, {})
+                        if doc_weights.get(row.id, 0) < weight:
+                            doc_weights[row.id] = weight
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+        self.by_name = sorted(self.docs, key=lambda i: ((self.docs[i]['name'] or '').lower(), i))
+
+        # (value, id) order per sort field and direction, with NULLs where the
+        # database sorts them, like ORDER BY in app.utils.pagination
+        self.orders, self.ranks = {}, {}
+        for field, values in sort_values.items():
+            ascending = sorted((i for i in values if values[i] is not None), key=lambda i: (values[i], i))
+            nulls = sorted(i for i in values if values[i] is None)
+            ascending = ascending + nulls if nulls_high else nulls + ascending
+            for descending, order in ((False, ascending), (True, ascending[::-1])):
+                self.orders[field, descending] = order
+                self.ranks[field, descending] = {exercise_id: rank for rank, exercise_id in enumerate(order)}
+
+        self.category_counts = {value: len(ids) for value, ids in self.by_category.items()}
+        self.difficulty_counts = {value: len(ids) for value, ids in self.by_difficulty.items()}
+        self.muscles = sorted(self.by_muscle)
+        self.equipment = sorted(self.by_equipment)
+
+    def visible(self, exercise_id, trainer_id):
+        return exercise_id in self.public or (trainer_id is not None and self.owner.get(exercise_id) == trainer_id)
+
+    def visible_ids(self, trainer_id):
+        """Ids of public exercises plus the trainer's own."""
+        return self.public | self.by_owner.get(trainer_id, set())
+
+    @staticmethod
+    def values_matching(values, needle):
+        """The ``values`` that contain ``needle`` (case-insensitive)."""
+        needle = needle.lower()
+        return [value for value in values if needle in value.lower()]
+
+    def _matching(self, facet, needle):
+        """Union of the facet sets whose value contains ``needle`` (case-insensitive)."""
+        ids = set()
+        for value in self.values_matching(facet, needle):
+            ids |= facet[value]
+        return ids
+
+    def filter(self, trainer_id, custom_only=False, category=None, muscle=None, equipment=None,
+               difficulty=None, exercise_type=None):
+        """Ids of the exercises that pass the listing filters, smallest sets first."""
+        if custom_only:
+            ids = self.custom & self.by_owner.get(trainer_id, set())
+        else:
+            ids = self.visible_ids(trainer_id)
+        constraints = []
+        for facet, value in ((self.by_category, category), (self.by_difficulty, difficulty),
+                             (self.by_type, exercise_type)):
+            if value:
+                constraints.append(facet.get(value, set()))
+        if muscle:
+            constraints.append(self._matching(self.by_muscle, muscle))
+        if equipment:
+            constraints.append(self._matching(self.by_equipment, equipment))
+        for members in sorted(constraints, key=len):
+            ids = ids & members
+            if not ids:
+                break
+        return ids
+
+    def page(self, ids, sort_by='name', descending=False, offset=0, limit=20):
+        """One page of ``ids`` in the order of ``sort_by`` (ties broken by id)."""
+        if not ids:
+            return []
+        order = self.orders[sort_by, descending]
+        if len(ids) * 4 < len(order):
+            return sorted(ids, key=self.ranks[sort_by, descending].__getitem__)[offset:offset + limit]
+        # Most of the library matches: walk the precomputed order instead of sorting
+        wanted, result = offset + limit, []
+        for exercise_id in order:
+            if exercise_id in ids:
+                result.append(exercise_id)
+                if len(result) == wanted:
+                    break
+        return result[offset:]
+
+    def facets(self, ids):
+        """Counts per category, difficulty, type, muscle and equipment within ``ids``."""
+        def counts(facet):
+            found = {value: len(members & ids) for value, members in facet.items()}
+            return {value: count for value, count in sorted(found.items()) if count}
+
+        return {
+            'category': counts(self.by_category),
+            'difficulty': counts(self.by_difficulty),
+            'exercise_type': counts(self.by_type),
+            'muscle': counts(self.by_muscle),
+            'equipment': counts(self.by_equipment),
+        }
+
+    def _term_scores(self, term):
+        scores = {}
+        start = bisect_left(self.vocabulary, term)
+        for token in self.vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            factor = 1.0 if token == term else 0.5
+            for exercise_id, weight in self.postings[token].items():
+                score = weight * factor
+                if scores.get(exercise_id, 0) < score:
+                    scores[exercise_id] = score
+        return scores
+
+    def search(self, query, trainer_id=None, offset=0, limit=20):
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            matches = [i for i in self.by_name if self.visible(i, trainer_id)]
+            return len(matches), [self.docs[i] for i in matches[offset:offset + limit]]
+
+        totals = None
+        for term in sorted(terms, key=len, reverse=True):  # longest (most selective) first
+            scores = self._term_scores(term)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {i: totals[i] + s for i, s in scores.items() if i in totals}
+            if not totals:
+                return 0, []
+        ranked = sorted(
+            (i for i in totals if self.visible(i, trainer_id)),
+            key=lambda i: (-totals[i], (self.docs[i]['name'] or '').lower(), i)
+        )
+        return len(ranked), [self.docs[i] for i in ranked[offset:offset + limit]]
+
+
+class ExerciseIndex:
+    """Lazily built, self-refreshing in-memory exercise index."""
+
+    def __init__(self):
+        self._snapshot = None
+        self._build_lock = threading.Lock()
+
+    @staticmethod
+    def _generation(connection):
+        table = ExerciseIndexGeneration.__table__
+        return connection.execute(select(table.c.generation).where(table.c.id == 1)).scalar() or 0
+
+    @staticmethod
+    def _load(connection):
+        table = ExerciseLibrary.__table__
+        columns = [table.c[name] for name in _IndexRow._fields]
+        result = connection.execute(select(*columns).where(table.c.is_active.is_(True)))
+        return [_IndexRow._make(row) for row in result]
+
+    def snapshot(self):
+        """
+        The current build, rebuilding it first if it was dropped or the generation moved.
+
+        The generation is read once per request (on every call outside a
+        request); later calls in the same request reuse the checked build.
+        """
+        # Keyed on the request too: ``g`` outlives it when the app context was pushed first
+        current = request._get_current_object() if has_request_context() else None
+        checked = g.get('exercise_index') if current is not None else None
+        if checked is not None and checked[0] is current and checked[1] is self._snapshot:
+            return checked[1]
+        connection = db.session.connection()
+        generation = self._generation(connection)
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.generation != generation:
+            with self._build_lock:
+                snapshot = self._snapshot
+                # Another thread may have rebuilt it while we waited
+                if snapshot is None or snapshot.generation != generation:
+                    started = time.perf_counter()
+                    snapshot = _Snapshot(self._load(connection), generation,
+                                         connection.dialect.name in NULLS_HIGH_DIALECTS)
+                    logger.info(f"Built exercise index: {len(snapshot.docs)} exercises, {len(snapshot.vocabulary)} "
+                                f"terms in {(time.perf_counter() - started) * 1000:.0f}ms")
+                    self._snapshot = snapshot
+        if current is not None:
+            g.exercise_index = (current, snapshot)
+        return snapshot
+
+    def search(self, query, trainer_id=None, offset=0, limit=20):
+        """
+        Ranked prefix search.
+
+        Args:
+            query: Free text; every term must match the start of a word
+            trainer_id: Also include this trainer's private custom exercises
+            offset, limit: Page of results to return
+
+        Returns:
+            Tuple of (total matches, list of exercise summary dicts)
+        """
+        return self.snapshot().search(query, trainer_id, offset, limit)
+
+    def warm(self):
+        """Build the index now, e.g. when a worker starts, instead of on the first request."""
+        return self.snapshot()
+
+    def invalidate(self):
+        self._snapshot = None
+
+
+exercise_index = ExerciseIndex()
+
+
+def _record_change(mapper, connection, target):
+    session = OrmSession.object_session(target)
+    if session is not None:
+        session.info['exercise_index_dirty'] = True
+
+
+def _record_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in INDEXED_COLUMNS):
+        _record_change(mapper, connection, target)
+
+
+def bump_generation(connection):
+    """Move the shared index generation on (race-safe upsert); call in the writing transaction."""
+    table = ExerciseIndexGeneration.__table__
+    values = {'id': 1, 'generation': 1}
+    if connection.dialect.name == 'postgresql':
+        stmt = postgresql.insert(table).values(**values)
+    elif connection.dialect.name == 'sqlite':
+        stmt = sqlite.insert(table).values(**values)
+    else:
+        bumped = connection.execute(
+            update(table).where(table.c.id == 1).values(generation=table.c.generation + 1)
+        )
+        if not bumped.rowcount:
+            connection.execute(table.insert().values(**values))
+        return
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=['id'], set_={'generation': table.c.generation + 1}
+    ))
+
+
+def _before_commit(session):
+    # Flush first, so writes still pending in this commit are recorded too
+    session.flush()
+    if session.info.get('exercise_index_dirty'):
+        bump_generation(session.connection())
+
+
+def _after_commit(session):
+    if session.info.pop('exercise_index_dirty', False):
+        # Later reads in this request must not reuse the build checked before the write
+        exercise_index.invalidate()
+
+
+def _after_rollback(session):
+    session.info.pop('exercise_index_dirty', None)
+
+
+_events_registered = False
+
+
+def register_exercise_index_events():
+    """Attach the index invalidation listeners (idempotent)."""
+    global _events_registered
+    if _events_registered:
+        return
+
+    event.listen(ExerciseLibrary, 'after_insert', _record_change)
+    event.listen(ExerciseLibrary, 'after_update', _record_update)
+    event.listen(ExerciseLibrary, 'after_delete', _record_change)
+    event.listen(OrmSession, 'before_commit', _before_commit)
+    event.listen(OrmSession, 'after_commit', _after_commit)
+    event.listen(OrmSession, 'after_rollback', _after_rollback)
+    _events_registered = True
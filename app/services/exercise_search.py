@@ -0,0 +1,287 @@
+"""Full-text search over the exercise library.
+
+The database does the matching and ranking. Each dialect has its own
+backend:
+
+* PostgreSQL: a generated, weighted ``search_vector`` tsvector column on
+  ``exercise_library`` with a GIN index. Results are ranked with
+  ``ts_rank_cd``.
+* SQLite: an external-content FTS5 table, ``exercise_library_fts``, kept in
+  sync by triggers. It uses the Porter stemmer, and results are ranked with
+  ``bm25()``.
+
+Both cover the name, tags, muscles, tips/cues and description, weighted in
+that order. Queries are stemmed; the last word also matches as a prefix,
+for typeahead. When nothing matches, misspelled words are replaced with
+the closest term in the exercise index vocabulary and the search is retried
+once.
+
+Migration ``e1a3c5d7f9b0`` creates the search objects on existing
+databases (``f2b4d6e8a0c1`` recreates the PostgreSQL column over the jsonb
+muscle, tag and cue arrays). ``db.create_all()`` creates them through ``install`` (see
+``register_exercise_search_ddl``). ``flask exercises rebuild-search``
+creates any that are missing and re-indexes every row. Where neither backend is installed, callers
+fall back to ``ILIKE`` (``available`` returns False).
+"""
+import difflib
+import logging
+import weakref
+from sqlalchemy import Integer, event, literal_column, select, text
+from app import db
+from app.models.exercise_library import ExerciseLibrary
+from app.services.exercise_index import exercise_index, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Text search configuration (PostgreSQL) used for stemming
+TS_CONFIG = 'english'
+
+# Cut-off for replacing an unknown word with a close vocabulary term
+TYPO_CUTOFF = 0.8
+
+# Columns in FTS5 order with their bm25 weights (name weighs most)
+SQLITE_COLUMNS = (
+    ('name', 10.0),
+    ('tags', 4.0),
+    ('primary_muscle_groups', 3.0),
+    ('secondary_muscle_groups', 2.0),
+    ('tips_and_cues', 1.5),
+    ('description', 1.0),
+)
+
+_SQLITE_NAMES = ', '.join(name for name, _ in SQLITE_COLUMNS)
+_SQLITE_NEW = ', '.join(f'new.{name}' for name, _ in SQLITE_COLUMNS)
+_SQLITE_OLD = ', '.join(f'old.{name}' for name, _ in SQLITE_COLUMNS)
+
+SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS exercise_library_fts USING fts5("
+    f"{_SQLITE_NAMES}, content='exercise_library', content_rowid='id', "
+    f"tokenize='porter unicode61', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS exercise_library_fts_insert AFTER INSERT ON exercise_library BEGIN "
+    f"INSERT INTO exercise_library_fts(rowid, {_SQLITE_NAMES}) VALUES (new.id, {_SQLITE_NEW}); END",
+    f"CREATE TRIGGER IF NOT EXISTS exercise_library_fts_delete AFTER DELETE ON exercise_library BEGIN "
+    f"INSERT INTO exercise_library_fts(exercise_library_fts, rowid, {_SQLITE_NAMES}) "
+    f"VALUES ('delete', old.id, {_SQLITE_OLD}); END",
+    f"CREATE TRIGGER IF NOT EXISTS exercise_library_fts_update AFTER UPDATE OF {_SQLITE_NAMES} "
+    f"ON exercise_library BEGIN "
+    f"INSERT INTO exercise_library_fts(exercise_library_fts, rowid, {_SQLITE_NAMES}) "
+    f"VALUES ('delete', old.id, {_SQLITE_OLD}); "
+    f"INSERT INTO exercise_library_fts(rowid, {_SQLITE_NAMES}) VALUES (new.id, {_SQLITE_NEW}); END",
+)
+
+SQLITE_DROP = (
+    "DROP TRIGGER IF EXISTS exercise_library_fts_update",
+    "DROP TRIGGER IF EXISTS exercise_library_fts_delete",
+    "DROP TRIGGER IF EXISTS exercise_library_fts_insert",
+    "DROP TABLE IF EXISTS exercise_library_fts",
+)
+
+
+def _jsonb_words(column):
+    # String values of a JSONB array column
+    return f"jsonb_to_tsvector('{TS_CONFIG}', coalesce({column}, '[]'::jsonb), '[\"string\"]')"
+
+
+POSTGRES_DDL = (
+    f"ALTER TABLE exercise_library ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(name, '')), 'A') || "
+    f"setweight({_jsonb_words('tags')} || {_jsonb_words('primary_muscle_groups')} "
+    f"|| {_jsonb_words('secondary_muscle_groups')}, 'B') || "
+    f"setweight({_jsonb_words('tips_and_cues')}, 'C') || "
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(description, '')), 'D')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_exercise_library_search_vector ON exercise_library USING gin (search_vector)",
+)
+
+POSTGRES_DROP = (
+    "DROP INDEX IF EXISTS ix_exercise_library_search_vector",
+    "ALTER TABLE exercise_library DROP COLUMN IF EXISTS search_vector",
+)
+
+_search_vector = literal_column('exercise_library.search_vector')
+
+# Engines known to have the search objects (a missing backend is re-checked,
+# so a migration applied while the app runs is picked up)
+_installed = weakref.WeakSet()
+
+
+def _backend(connection):
+    """The dialect's backend name if its search objects exist, else None."""
+    dialect = connection.dialect.name
+    if dialect not in ('postgresql', 'sqlite'):
+        return None
+    if connection.engine in _installed:
+        return dialect
+    if dialect == 'sqlite':
+        found = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'exercise_library_fts'"
+        )).first()
+    else:
+        found = connection.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'exercise_library' AND column_name = 'search_vector' "
+            "AND table_schema = current_schema()"
+        )).first()
+    if found is None:
+        return None
+    _installed.add(connection.engine)
+    return dialect
+
+
+def available():
+    """True if full-text search is installed on the current database."""
+    return _backend(db.session.connection()) is not None
+
+
+def install(connection, rebuild=False):
+    """
+    Create the search objects for the connection's dialect (idempotent).
+
+    Args:
+        connection: SQLAlchemy connection
+        rebuild: Also re-index existing rows (SQLite; PostgreSQL computes the
+            generated column itself)
+
+    Returns:
+        True if the dialect has a full-text backend
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            connection.exec_driver_sql(statement)
+        if rebuild:
+            connection.exec_driver_sql("INSERT INTO exercise_library_fts(exercise_library_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
+    else:
+        return False
+    logger.info(f"Exercise full-text search installed ({dialect})")
+    _installed.add(connection.engine)
+    return True
+
+
+def uninstall(connection):
+    """Drop the search objects for the connection's dialect."""
+    statements = {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}.get(connection.dialect.name, ())
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+    _installed.discard(connection.engine)
+
+
+def _sqlite_match(terms):
+    # Quoted so words like AND/NOT/NEAR are not operators; implicit AND
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _postgres_tsquery(terms):
+    return ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+
+
+def match_clause(query):
+    """
+    A WHERE clause restricting an ``ExerciseLibrary`` query to ``query``'s matches.
+
+    Returns None if the query has no words or no backend is installed.
+    """
+    terms = tokenize(query)
+    backend = _backend(db.session.connection()) if terms else None
+    if backend == 'sqlite':
+        matches = text(
+            "SELECT rowid FROM exercise_library_fts WHERE exercise_library_fts MATCH :fts_query"
+        ).bindparams(fts_query=_sqlite_match(terms)).columns(rowid=Integer)
+        return ExerciseLibrary.id.in_(matches)
+    if backend == 'postgresql':
+        tsquery = db.func.to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), _postgres_tsquery(terms))
+        return _search_vector.op('@@')(tsquery)
+    return None
+
+
+def _ranked(connection, backend, terms):
+    """List of ``(exercise_id, score)`` for active exercises, best first."""
+    table = ExerciseLibrary.__table__
+    if backend == 'sqlite':
+        weights = ', '.join(str(weight) for _, weight in SQLITE_COLUMNS)
+        rows = connection.execute(text(
+            f"SELECT fts.rowid, -bm25(exercise_library_fts, {weights}) AS score "
+            f"FROM exercise_library_fts AS fts JOIN exercise_library ON exercise_library.id = fts.rowid "
+            f"WHERE exercise_library_fts MATCH :fts_query AND exercise_library.is_active "
+            f"ORDER BY score DESC, fts.rowid"
+        ), {'fts_query': _sqlite_match(terms)})
+    else:
+        tsquery = db.func.to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), _postgres_tsquery(terms))
+        score = db.func.ts_rank_cd(_search_vector, tsquery)
+        rows = connection.execute(
+            select(table.c.id, score.label('score'))
+            .where(_search_vector.op('@@')(tsquery), table.c.is_active.is_(True))
+            .order_by(score.desc(), table.c.id)
+        )
+    return [(exercise_id, float(score)) for exercise_id, score in rows]
+
+
+def _corrected(terms):
+    """``terms`` with words unknown to the exercise index replaced by close ones."""
+    snapshot = exercise_index.snapshot()
+    corrected = []
+    for term in terms:
+        if term in snapshot.postings:
+            corrected.append(term)
+            continue
+        close = difflib.get_close_matches(term, snapshot.vocabulary, n=1, cutoff=TYPO_CUTOFF)
+        corrected.append(close[0] if close else term)
+    return corrected
+
+
+def search(query, correct_typos=True):
+    """
+    Rank active exercises against ``query``.
+
+    Visibility and listing filters are left to the caller (see
+    ``ExerciseIndex.filter``).
+
+    Args:
+        query: Free text
+        correct_typos: Retry once with misspellings corrected if nothing matches
+
+    Returns:
+        Tuple of (list of ``(exercise_id, score)`` best first, the query that
+        produced them), or None if no backend is installed
+    """
+    connection = db.session.connection()
+    backend = _backend(connection)
+    if backend is None:
+        return None
+    terms = tokenize(query)
+    if not terms:
+        return [], query
+    ranked = _ranked(connection, backend, terms)
+    if not ranked and correct_typos:
+        corrected = _corrected(terms)
+        if corrected != terms:
+            ranked = _ranked(connection, backend, corrected)
+            if ranked:
+                return ranked, ' '.join(corrected)
+    return ranked, query
+
+
+def _create_search_objects(table, connection, **kw):
+    install(connection)
+
+
+def _drop_search_objects(table, connection, **kw):
+    uninstall(connection)
+
+
+_events_registered = False
+
+
+def register_exercise_search_ddl():
+    """Create/drop the search objects with ``exercise_library`` in create_all/drop_all (idempotent)."""
+    global _events_registered
+    if _events_registered:
+        return
+
+    event.listen(ExerciseLibrary.__table__, 'after_create', _create_search_objects)
+    event.listen(ExerciseLibrary.__table__, 'before_drop', _drop_search_objects)
+    _events_registered = True
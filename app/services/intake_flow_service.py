@@ -2,16 +2,20 @@
 import os
 from typing import Dict, List, Optional
 from datetime import datetime
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 from app import db
 from app.models.client import Client
+from app.services.job_queue import enqueue
+from app.services.transports import get_transport
 
 
 class IntakeFlowService:
     """
     Service for managing automated client intake workflows.
     Handles email sending, document management, and progress tracking.
+    
+    Emails are rendered in the request and handed to the background job
+    queue (``flask worker`` delivers them), so callers never wait on the
+    mail provider.
     """
     
     def __init__(self):
@@ -23,11 +27,20 @@ class IntakeFlowService:
     
     def is_email_configured(self) -> bool:
         """Check if email service is configured."""
-        return bool(self.sendgrid_key)
+        return get_transport().is_email_configured()
     
     def is_sms_configured(self) -> bool:
         """Check if SMS service is configured."""
-        return bool(self.twilio_sid and self.twilio_token)
+        return get_transport().is_sms_configured()
+    
+    def _queue_email(self, to_email: str, subject: str, html_content: str) -> int:
+        """Queue an email for background delivery and return the job id."""
+        job = enqueue('email.send', {
+            'to': to_email,
+            'subject': subject,
+            'html_content': html_content
+        }, queue='email')
+        return job.id
     
     def send_welcome_email(
         self,
@@ -36,7 +49,7 @@ class IntakeFlowService:
         custom_message: Optional[str] = None
     ) -> Dict:
         """
-        Send welcome email to new client.
+        Queue welcome email to new client.
         
         Args:
             client_id: Client ID
@@ -63,21 +76,12 @@ class IntakeFlowService:
                 custom_message=custom_message
             )
             
-            # Send via SendGrid
-            message = Mail(
-                from_email=self.from_email,
-                to_emails=client.email,
-                subject=subject,
-                html_content=html_content
-            )
-            
-            sg = SendGridAPIClient(self.sendgrid_key)
-            response = sg.send(message)
+            job_id = self._queue_email(client.email, subject, html_content)
             
             return {
                 "success": True,
-                "message": "Welcome email sent successfully",
-                "status_code": response.status_code
+                "message": "Welcome email queued",
+                "job_id": job_id
             }
             
         except Exception as e:
@@ -107,17 +111,9 @@ class IntakeFlowService:
                 form_url=intake_form_url
             )
             
-            message = Mail(
-                from_email=self.from_email,
-                to_emails=client.email,
-                subject=subject,
-                html_content=html_content
-            )
-            
-            sg = SendGridAPIClient(self.sendgrid_key)
-            response = sg.send(message)
+            job_id = self._queue_email(client.email, subject, html_content)
             
-            return {"success": True, "message": "Intake form request sent"}
+            return {"success": True, "message": "Intake form request queued", "job_id": job_id}
             
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -144,17 +140,9 @@ class IntakeFlowService:
                 document_url=document_url
             )
             
-            message = Mail(
-                from_email=self.from_email,
-                to_emails=client.email,
-                subject=subject,
-                html_content=html_content
-            )
-            
-            sg = SendGridAPIClient(self.sendgrid_key)
-            response = sg.send(message)
+            job_id = self._queue_email(client.email, subject, html_content)
             
-            return {"success": True, "message": "Document signing request sent"}
+            return {"success": True, "message": "Document signing request queued", "job_id": job_id}
             
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -179,17 +167,9 @@ class IntakeFlowService:
                 upload_url=upload_url
             )
             
-            message = Mail(
-                from_email=self.from_email,
-                to_emails=client.email,
-                subject=subject,
-                html_content=html_content
-            )
-            
-            sg = SendGridAPIClient(self.sendgrid_key)
-            response = sg.send(message)
+            job_id = self._queue_email(client.email, subject, html_content)
             
-            return {"success": True, "message": "Photo upload request sent"}
+            return {"success": True, "message": "Photo upload request queued", "job_id": job_id}
             
         except Exception as e:
             return {"success": False, "error": str(e)}
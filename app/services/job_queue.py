@@ -0,0 +1,334 @@
+"""Database-backed background job queue.
+
+Request handlers call ``enqueue`` and return immediately; ``flask worker``
+claims due jobs and runs the registered task functions outside the web
+workers.
+
+Claiming is safe with any number of worker processes:
+
+* PostgreSQL - ``SELECT ... FOR UPDATE SKIP LOCKED`` picks a batch of due
+  jobs that no other worker is looking at, without waiting on their locks.
+* SQLite (and anything else) - each candidate is claimed with a
+  compare-and-set ``UPDATE ... WHERE id = :id AND status = 'queued'``.
+  SQLite serializes writers, so only one worker sees ``rowcount == 1``.
+
+Failures are retried with exponential backoff plus jitter until
+``max_attempts`` is reached.
+
+A claimed job is leased to its worker through ``locked_by``/``locked_at``.
+The lease is renewed when the job starts and at every ``heartbeat()`` a
+long task calls at its checkpoints. Jobs whose lease has not been renewed
+for ``stale_after`` seconds (a crashed worker) are put back in the queue,
+or marked failed once they have used ``max_attempts``, so a job that kills
+its worker is not retried forever.
+Every later write by the worker that lost the lease is conditional on
+still holding it, so the job is never finished twice, and the next
+heartbeat raises ``LeaseLost`` to stop the task.
+"""
+import importlib
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import case, select, update
+from app import db
+from app.models.jobs import Job
+
+logger = logging.getLogger(__name__)
+
+# Retry delay is BACKOFF_BASE * 2**(attempt - 1) seconds, capped at BACKOFF_MAX
+BACKOFF_BASE = 30
+BACKOFF_MAX = 3600
+
+# Modules that register tasks with @task; the worker imports them at startup
+TASK_MODULES = ('app.services.campaigns', 'app.services.automation', 'app.services.webhooks',
+                'app.services.stripe_events')
+
+_tasks = {}
+
+# The (job id, worker id) lease of the job running on this thread
+_current = threading.local()
+
+
+class LeaseLost(Exception):
+    """The running job was requeued for another worker; stop without committing."""
+
+
+def task(name):
+    """Register a function as a job task under ``name``."""
+    def decorator(func):
+        _tasks[name] = func
+        return func
+    return decorator
+
+
+def enqueue(task_name, payload=None, queue='default', delay=0, max_attempts=5, commit=True):
+    """
+    Add a job to the queue.
+
+    Args:
+        task_name: Name the task was registered under
+        payload: JSON-serializable keyword arguments for the task
+        queue: Queue name (workers can be limited to specific queues)
+        delay: Seconds to wait before the job becomes due
+        max_attempts: Runs before the job is marked failed
+        commit: Commit immediately (pass False to enqueue inside the caller's transaction)
+
+    Returns:
+        The new Job
+    """
+    job = Job(queue=queue, task=task_name, max_attempts=max_attempts,
+              run_at=datetime.utcnow() + timedelta(seconds=delay))
+    job.set_payload(payload)
+    db.session.add(job)
+    if commit:
+        db.session.commit()
+    return job
+
+
+def backoff_seconds(attempt):
+    """Delay before retry number ``attempt`` (1-based), with +/-10% jitter."""
+    delay = min(BACKOFF_BASE * 2 ** (attempt - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.9, 1.1)
+
+
+def claim(worker_id, queues=('default',), batch_size=10):
+    """
+    Lock up to ``batch_size`` due jobs for ``worker_id``.
+
+    Returns:
+        List of claimed job ids, oldest first
+    """
+    table = Job.__table__
+    now = datetime.utcnow()
+    due = (select(table.c.id)
+           .where(table.c.status == 'queued', table.c.queue.in_(queues), table.c.run_at <= now)
+           .order_by(table.c.run_at, table.c.id)
+           .limit(batch_size))
+    claimed_values = {'status': 'running', 'locked_by': worker_id, 'locked_at': now,
+                      'attempts': table.c.attempts + 1}
+
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        ids = list(connection.execute(due.with_for_update(skip_locked=True)).scalars())
+        if ids:
+            connection.execute(update(table).where(table.c.id.in_(ids)).values(**claimed_values))
+    else:
+        ids = []
+        for job_id in connection.execute(due).scalars().all():
+            result = connection.execute(
+                update(table).where(table.c.id == job_id, table.c.status == 'queued').values(**claimed_values)
+            )
+            if result.rowcount == 1:
+                ids.append(job_id)
+    db.session.commit()
+    return ids
+
+
+def heartbeat():
+    """
+    Renew the lease on the job running on this thread.
+
+    Long tasks call this at each checkpoint, just before committing it, so
+    the renewal is committed together with their progress. Checkpoints must
+    come more often than the worker's ``stale_after``. Outside a job this
+    does nothing.
+
+    Raises:
+        LeaseLost: The job was requeued and may already run elsewhere
+    """
+    lease = getattr(_current, 'lease', None)
+    if lease is None:
+        return
+    job_id, worker_id = lease
+    if not _renew(job_id, worker_id):
+        raise LeaseLost(f"Job {job_id} is no longer leased to {worker_id}")
+
+
+def _held(job_id, worker_id):
+    """WHERE clause matching ``job_id`` only while ``worker_id`` holds its lease."""
+    table = Job.__table__
+    return (table.c.id == job_id) & (table.c.status == 'running') & (table.c.locked_by == worker_id)
+
+
+def _renew(job_id, worker_id):
+    result = db.session.execute(
+        update(Job.__table__).where(_held(job_id, worker_id)).values(locked_at=datetime.utcnow())
+    )
+    return result.rowcount == 1
+
+
+def _release(job_id, worker_id, **values):
+    """Record a job's outcome if ``worker_id`` still holds it; False if it was requeued."""
+    result = db.session.execute(
+        update(Job.__table__).where(_held(job_id, worker_id)).values(locked_by=None, locked_at=None, **values)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def requeue_stale(stale_after=600):
+    """
+    Return running jobs whose lease was not renewed for ``stale_after`` seconds to the queue.
+
+    Jobs that have already used ``max_attempts`` are marked failed instead.
+
+    Returns:
+        Number of jobs requeued or failed
+    """
+    table = Job.__table__
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=stale_after)
+    exhausted = table.c.attempts >= table.c.max_attempts
+    result = db.session.execute(
+        update(table)
+        .where(table.c.status == 'running', table.c.locked_at < cutoff)
+        .values(status=case((exhausted, 'failed'), else_='queued'),
+                finished_at=case((exhausted, now), else_=None),
+                locked_by=None, locked_at=None, run_at=now,
+                last_error=case((exhausted, 'Worker lost while running job; giving up after max_attempts'),
+                                else_='Worker lost while running job'))
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def run_job(job_id, worker_id):
+    """
+    Run one job claimed by ``worker_id`` and record the outcome.
+
+    Returns:
+        True if the task succeeded
+    """
+    # Renew the lease first: the job may have waited behind the rest of its
+    # batch long enough to be requeued and claimed by another worker
+    started = _renew(job_id, worker_id)
+    db.session.commit()
+    if not started:
+        logger.warning(f"Job {job_id} was requeued before {worker_id} started it; skipping")
+        return False
+
+    job = db.session.get(Job, job_id)
+    func = _tasks.get(job.task)
+    _current.lease = (job_id, worker_id)
+    try:
+        if func is None:
+            raise LookupError(f"No task registered as '{job.task}'")
+        func(**job.get_payload())
+    except LeaseLost as e:
+        db.session.rollback()
+        logger.warning(f"Job {job_id} ({job.task}) stopped: {e}")
+        return False
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        error = f'{type(e).__name__}: {e}'[:2000]
+        if job.attempts >= job.max_attempts:
+            _release(job_id, worker_id, status='failed', last_error=error, finished_at=datetime.utcnow())
+            logger.error(f"Job {job.id} ({job.task}) failed permanently: {e}")
+        else:
+            _release(job_id, worker_id, status='queued', last_error=error,
+                     run_at=datetime.utcnow() + timedelta(seconds=backoff_seconds(job.attempts)))
+            logger.warning(f"Job {job.id} ({job.task}) attempt {job.attempts} failed, retrying: {e}")
+        return False
+    finally:
+        _current.lease = None
+
+    if not _release(job_id, worker_id, status='succeeded', last_error=None, finished_at=datetime.utcnow()):
+        logger.warning(f"Job {job_id} ({job.task}) finished after its lease was lost")
+    return True
+
+
+class Worker:
+    """Polls the queue and runs jobs until stopped."""
+
+    def __init__(self, queues=('default',), batch_size=10, poll_interval=2.0, stale_after=600, worker_id=None):
+        self.queues = tuple(queues)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self._stopping = False
+        for module in TASK_MODULES:
+            importlib.import_module(module)
+
+    def stop(self, *args):
+        """Finish the current job, then exit (bound to SIGTERM/SIGINT)."""
+        self._stopping = True
+
+    def work_once(self):
+        """
+        Claim and run one batch.
+
+        Returns:
+            Number of jobs run
+        """
+        job_ids = claim(self.worker_id, self.queues, self.batch_size)
+        ran = 0
+        for job_id in job_ids:
+            if self._stopping:
+                break
+            run_job(job_id, self.worker_id)
+            ran += 1
+
+        # Give back anything claimed but not started before shutdown
+        remaining = job_ids[ran:]
+        if remaining:
+            table = Job.__table__
+            db.session.execute(
+                update(table)
+                .where(table.c.id.in_(remaining), table.c.status == 'running', table.c.locked_by == self.worker_id)
+                .values(status='queued', locked_by=None, locked_at=None, attempts=table.c.attempts - 1)
+            )
+            db.session.commit()
+        return ran
+
+    def run(self, burst=False):
+        """
+        Process jobs until stopped.
+
+        Args:
+            burst: Exit as soon as the queue has no due jobs
+        """
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info(f"Worker {self.worker_id} started on queues: {', '.join(self.queues)}")
+
+        processed = 0
+        requeue_stale(self.stale_after)
+        while not self._stopping:
+            ran = self.work_once()
+            processed += ran
+            if ran:
+                continue
+            if burst:
+                break
+            requeue_stale(self.stale_after)
+            time.sleep(self.poll_interval)
+            # Drop any identity-map state between polls
+            db.session.remove()
+
+        logger.info(f"Worker {self.worker_id} stopped after {processed} job(s)")
+        return processed
+
+
+# ----------------------------------------------------------------------
+# Tasks
+# ----------------------------------------------------------------------
+
+@task('email.send')
+def send_email(to, subject, html_content):
+    """Deliver one email through the configured transport."""
+    from app.services.transports import get_transport
+    get_transport().send_email(to, subject, html_content)
+
+
+@task('sms.send')
+def send_sms(to, body):
+    """Deliver one SMS through the configured transport."""
+    from app.services.transports import get_transport
+    get_transport().send_sms(to, body)
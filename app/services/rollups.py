@@ -0,0 +1,289 @@
+"""Maintenance and reads for the ``daily_trainer_metrics`` rollup.
+
+Sessions and payments are pre-aggregated per ``(trainer_id, day)`` into
+``DailyTrainerMetric`` rows. The rollup is kept current incrementally:
+
+* Mapper events on ``Session`` and ``Payment`` record every
+  ``(trainer_id, day)`` a flushed row belonged to before and after the
+  change.
+* After the flush, each touched day is recomputed from the source table
+  inside the same transaction. Recomputing is idempotent, so inserts,
+  updates, deletes and moves between days all take the same path.
+
+``backfill`` rebuilds the rollup for existing data and is exposed as
+``flask rollups backfill``. Bulk ``query.update()``/``delete()`` bypass
+mapper events, so run the backfill after such maintenance.
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import String, cast, event, func, literal, select
+from sqlalchemy.orm import Session as OrmSession
+from app import db
+from app.models.analytics import DailyTrainerMetric
+from app.models.payments import Payment
+from app.models.session import Session
+from app.models.user import User
+from app.utils.aggregation import date_bucket, grouped_totals
+
+logger = logging.getLogger(__name__)
+
+# Source model -> the column that decides which day a row counts towards
+_DAY_COLUMNS = {Session: 'scheduled_start', Payment: 'payment_date'}
+
+_events_registered = False
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _window(column, start, end):
+    """Filters for ``start <= column < end + 1 day`` (either bound optional)."""
+    clauses = []
+    if start is not None:
+        clauses.append(column >= datetime.combine(start, time.min))
+    if end is not None:
+        clauses.append(column < datetime.combine(end + timedelta(days=1), time.min))
+    return clauses
+
+
+def _aggregate(connection, trainer_id=None, start=None, end=None):
+    """Aggregate sessions and payments into rollup row dicts."""
+    sessions = Session.__table__
+    payments = Payment.__table__
+    queries = []
+
+    session_day = date_bucket(sessions.c.scheduled_start, 'day')
+    session_filters = _window(sessions.c.scheduled_start, start, end)
+    if trainer_id is not None:
+        session_filters.append(sessions.c.trainer_id == trainer_id)
+    for metric, column in (('sessions_status', sessions.c.status),
+                           ('sessions_type', sessions.c.session_type)):
+        dimension = func.coalesce(column, 'unknown')
+        queries.append(
+            select(sessions.c.trainer_id, session_day, literal(metric), dimension,
+                   func.count(), literal(0.0))
+            .where(*session_filters)
+            .group_by(sessions.c.trainer_id, session_day, dimension)
+        )
+
+    payment_day = date_bucket(payments.c.payment_date, 'day')
+    payment_filters = _window(payments.c.payment_date, start, end) + [
+        payments.c.status == 'completed',
+        payments.c.trainer_id.isnot(None),
+    ]
+    if trainer_id is not None:
+        payment_filters.append(payments.c.trainer_id == trainer_id)
+    for metric, dimension in (('revenue_method', func.coalesce(payments.c.payment_method, 'unknown')),
+                              ('revenue_client', cast(payments.c.client_id, String))):
+        queries.append(
+            select(payments.c.trainer_id, payment_day, literal(metric), dimension,
+                   func.count(), func.coalesce(func.sum(payments.c.amount), 0))
+            .where(*payment_filters)
+            .group_by(payments.c.trainer_id, payment_day, dimension)
+        )
+
+    now = datetime.utcnow()
+    rows = []
+    for query in queries:
+        for trainer, day, metric, dimension, count, amount in connection.execute(query):
+            rows.append({
+                'trainer_id': trainer,
+                'metric_date': _as_date(day),
+                'metric': metric,
+                'dimension': str(dimension)[:100],
+                'count': count,
+                'amount': float(amount or 0),
+                'updated_at': now,
+            })
+    return rows
+
+
+def _replace(connection, trainer_id, start, end):
+    """Recompute the rollup for one trainer over ``[start, end]`` (inclusive days)."""
+    table = DailyTrainerMetric.__table__
+    if connection.dialect.name == 'postgresql':
+        # Serialize concurrent recomputes for the same trainer
+        connection.execute(
+            select(User.__table__.c.id).where(User.__table__.c.id == trainer_id).with_for_update()
+        )
+
+    delete = table.delete().where(table.c.trainer_id == trainer_id)
+    if start is not None:
+        delete = delete.where(table.c.metric_date >= start)
+    if end is not None:
+        delete = delete.where(table.c.metric_date <= end)
+    connection.execute(delete)
+
+    rows = _aggregate(connection, trainer_id, start, end)
+    if rows:
+        connection.execute(table.insert(), rows)
+    return len(rows)
+
+
+def refresh_days(connection, keys):
+    """
+    Recompute the rollup for a set of ``(trainer_id, day)`` pairs.
+
+    Args:
+        connection: Connection in the transaction that changed the source rows
+        keys: Iterable of (trainer_id, date) tuples
+    """
+    for trainer_id, day in sorted(set(keys)):
+        _replace(connection, trainer_id, day, day)
+
+
+def backfill(trainer_id=None, start=None, end=None):
+    """
+    Rebuild the rollup from the source tables.
+
+    Each trainer is rebuilt and committed separately so memory use and
+    lock time stay bounded on large databases.
+
+    Args:
+        trainer_id: Only rebuild this trainer (default: all trainers)
+        start: First day to rebuild (default: all history)
+        end: Last day to rebuild (default: all history)
+
+    Returns:
+        Dict of trainer_id -> number of rollup rows written
+    """
+    if trainer_id is not None:
+        trainer_ids = [trainer_id]
+    else:
+        trainer_ids = [row.id for row in db.session.query(User.id).order_by(User.id)]
+
+    written = {}
+    for tid in trainer_ids:
+        written[tid] = _replace(db.session.connection(), tid, start, end)
+        db.session.commit()
+    return written
+
+
+def _row_keys(connection, mapper, target):
+    """Current database ``(trainer_id, day)`` for ``target``'s row, if any."""
+    table = mapper.local_table
+    day_column = table.c[_DAY_COLUMNS[mapper.class_]]
+    row = connection.execute(
+        select(table.c.trainer_id, day_column).where(table.c.id == target.id)
+    ).first()
+    if row is None or row[0] is None or row[1] is None:
+        return set()
+    return {(row[0], _as_date(row[1]))}
+
+
+def _record(mapper, connection, target):
+    session = OrmSession.object_session(target)
+    if session is None or target.id is None:
+        return
+    session.info.setdefault('rollup_dirty', set()).update(_row_keys(connection, mapper, target))
+
+
+def _after_flush_postexec(session, flush_context):
+    keys = session.info.pop('rollup_dirty', None)
+    if keys:
+        refresh_days(session.connection(), keys)
+
+
+def _after_rollback(session):
+    session.info.pop('rollup_dirty', None)
+
+
+def register_rollup_events():
+    """Attach the incremental maintenance listeners (idempotent)."""
+    global _events_registered
+    if _events_registered:
+        return
+
+    # Old values are read before the write, new values after it
+    for model in _DAY_COLUMNS:
+        for name in ('after_insert', 'before_update', 'after_update', 'before_delete'):
+            event.listen(model, name, _record)
+
+    event.listen(OrmSession, 'after_flush_postexec', _after_flush_postexec)
+    event.listen(OrmSession, 'after_rollback', _after_rollback)
+    _events_registered = True
+
+
+def _scope(trainer_id, metric, start, end):
+    filters = [DailyTrainerMetric.trainer_id == trainer_id, DailyTrainerMetric.metric == metric]
+    if start is not None:
+        filters.append(DailyTrainerMetric.metric_date >= start)
+    if end is not None:
+        filters.append(DailyTrainerMetric.metric_date <= end)
+    return filters
+
+
+def session_series(trainer_id, start=None, end=None, bucket='day'):
+    """Session counts per day/week/month bucket label."""
+    return grouped_totals(date_bucket(DailyTrainerMetric.metric_date, bucket),
+                          func.sum(DailyTrainerMetric.count),
+                          *_scope(trainer_id, 'sessions_status', start, end))
+
+
+def revenue_series(trainer_id, start=None, end=None, bucket='month'):
+    """Completed revenue per day/week/month bucket label."""
+    return grouped_totals(date_bucket(DailyTrainerMetric.metric_date, bucket),
+                          func.sum(DailyTrainerMetric.amount),
+                          *_scope(trainer_id, 'revenue_method', start, end))
+
+
+def session_summary(trainer_id, start=None, end=None, bucket='day'):
+    """
+    Session counts for a trainer between two days (inclusive).
+
+    Args:
+        bucket: Granularity of the time series ('day', 'week' or 'month')
+
+    Returns:
+        Dict with total_sessions, by_status, by_type and counts_by_bucket
+    """
+    count = func.sum(DailyTrainerMetric.count)
+    by_status = grouped_totals(DailyTrainerMetric.dimension, count,
+                               *_scope(trainer_id, 'sessions_status', start, end))
+    by_type = grouped_totals(DailyTrainerMetric.dimension, count,
+                             *_scope(trainer_id, 'sessions_type', start, end))
+
+    return {
+        'total_sessions': sum(by_status.values()),
+        'by_status': by_status,
+        'by_type': by_type,
+        'counts_by_bucket': session_series(trainer_id, start, end, bucket),
+    }
+
+
+def revenue_summary(trainer_id, start=None, end=None, bucket='month'):
+    """
+    Completed-payment revenue for a trainer between two days (inclusive).
+
+    Args:
+        bucket: Granularity of the time series ('day', 'week' or 'month')
+
+    Returns:
+        Dict with total_revenue, total_transactions, unique_clients,
+        by_payment_method, revenue_by_bucket and first_date
+    """
+    method_scope = _scope(trainer_id, 'revenue_method', start, end)
+    amount = func.sum(DailyTrainerMetric.amount)
+
+    total, transactions, first_date = db.session.execute(
+        select(func.coalesce(amount, 0), func.coalesce(func.sum(DailyTrainerMetric.count), 0),
+               func.min(DailyTrainerMetric.metric_date)).where(*method_scope)
+    ).one()
+    unique_clients = db.session.execute(
+        select(func.count(func.distinct(DailyTrainerMetric.dimension)))
+        .where(*_scope(trainer_id, 'revenue_client', start, end))
+    ).scalar()
+
+    return {
+        'total_revenue': float(total),
+        'total_transactions': int(transactions),
+        'unique_clients': unique_clients,
+        'by_payment_method': grouped_totals(DailyTrainerMetric.dimension, amount, *method_scope),
+        'revenue_by_bucket': revenue_series(trainer_id, start, end, bucket),
+        'first_date': _as_date(first_date) if first_date else None,
+    }
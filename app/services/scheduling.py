@@ -0,0 +1,386 @@
+"""Scheduling engine shared by the session and booking endpoints.
+
+A ``TrainerSchedule`` loads a trainer's sessions, open booking requests,
+weekly ``BookingAvailability`` and ``BookingException`` rows for a date
+window with one query per table. After that it answers these queries in
+memory:
+
+* ``conflicts(start, end)`` - first busy interval overlapping a range
+* ``working_windows(day)`` - bookable hours for a day, after exceptions
+* ``free_slots(day, duration)`` - gaps inside working hours
+* ``next_available(after, duration)`` - earliest gap of a given length
+
+Busy intervals are held in an ``IntervalIndex``, a list sorted by start
+with a running maximum of end times. An overlap lookup is two binary
+searches plus the overlapping hits, i.e. O(log n + k).
+"""
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+from datetime import datetime, time, timedelta, timezone
+from app.models.booking import BookingAvailability, BookingException, OnlineBooking
+from app.models.session import Session
+
+# Session statuses that occupy the trainer's time
+BLOCKING_SESSION_STATUSES = ('scheduled', 'completed')
+
+# Booking requests that hold a slot until they are converted or declined
+BLOCKING_BOOKING_STATUSES = ('pending', 'confirmed')
+
+# Used when a trainer has not configured any BookingAvailability yet
+DEFAULT_WORKING_HOURS = (time(8, 0), time(20, 0))
+
+# Exception types that close the whole day
+CLOSED_EXCEPTION_TYPES = ('unavailable', 'holiday')
+
+Interval = namedtuple('Interval', ['start', 'end', 'kind', 'ref'])
+
+
+def to_naive_utc(value):
+    """Drop tzinfo after converting to UTC; stored datetimes are naive UTC."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class IntervalIndex:
+    """Sorted interval list with O(log n) overlap lookups."""
+
+    def __init__(self, intervals=()):
+        self._intervals = sorted(intervals, key=lambda i: (i.start, i.end))
+        self._rebuild()
+
+    def _rebuild(self):
+        self._starts = [i.start for i in self._intervals]
+        # _max_ends[i] is the latest end among intervals[0..i]; it never decreases
+        self._max_ends = []
+        latest = None
+        for interval in self._intervals:
+            latest = interval.end if latest is None else max(latest, interval.end)
+            self._max_ends.append(latest)
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def __iter__(self):
+        return iter(self._intervals)
+
+    def add(self, interval):
+        """Insert an interval, keeping the index sorted."""
+        insort(self._intervals, interval, key=lambda i: (i.start, i.end))
+        self._rebuild()
+
+    def overlapping(self, start, end):
+        """All intervals with ``interval.start < end`` and ``interval.end > start``."""
+        # Intervals starting at or after ``end`` cannot overlap
+        hi = bisect_left(self._starts, end)
+        # Before ``lo`` every interval has already ended by ``start``
+        lo = bisect_right(self._max_ends, start, 0, hi)
+        return [i for i in self._intervals[lo:hi] if i.end > start]
+
+    def first_overlap(self, start, end):
+        """The earliest-starting interval overlapping ``[start, end)``, or None."""
+        hi = bisect_left(self._starts, end)
+        lo = bisect_right(self._max_ends, start, 0, hi)
+        for interval in self._intervals[lo:hi]:
+            if interval.end > start:
+                return interval
+        return None
+
+    def gaps(self, window_start, window_end):
+        """Free ``(start, end)`` ranges inside a window."""
+        free = []
+        cursor = window_start
+        for interval in self.overlapping(window_start, window_end):
+            if interval.start > cursor:
+                free.append((cursor, interval.start))
+            cursor = max(cursor, interval.end)
+        if cursor < window_end:
+            free.append((cursor, window_end))
+        return free
+
+
+class TrainerSchedule:
+    """A trainer's busy time and working hours over a date window."""
+
+    def __init__(self, trainer_id, start_date, end_date, sessions=(), bookings=(),
+                 availability=(), exceptions=()):
+        self.trainer_id = trainer_id
+        self.start_date = start_date
+        self.end_date = end_date
+
+        intervals = [
+            Interval(to_naive_utc(s.scheduled_start), to_naive_utc(s.scheduled_end), 'session', s)
+            for s in sessions
+        ]
+        for b in bookings:
+            booking_start = datetime.combine(b.requested_date, b.requested_time)
+            intervals.append(Interval(
+                booking_start, booking_start + timedelta(minutes=b.duration_minutes or 60), 'booking', b
+            ))
+        self.busy = IntervalIndex(intervals)
+
+        self.availability = {}
+        for slot in availability:
+            self.availability.setdefault(slot.day_of_week, []).append(slot)
+        for slots in self.availability.values():
+            slots.sort(key=lambda s: s.start_time)
+        self.exceptions = sorted(exceptions, key=lambda e: e.start_date)
+
+    @classmethod
+    def load(cls, trainer_id, start_date, end_date=None, exclude_session_id=None,
+             include_bookings=True):
+        """
+        Load a trainer's schedule for ``start_date``..``end_date`` (inclusive).
+
+        Args:
+            trainer_id: Trainer (user) id
+            start_date: First day of the window
+            end_date: Last day of the window (default: ``start_date``)
+            exclude_session_id: Leave this session out (when rescheduling it)
+            include_bookings: Treat open online booking requests as busy
+        """
+        return cls.load_many([trainer_id], start_date, end_date, exclude_session_id=exclude_session_id,
+                             include_bookings=include_bookings)[trainer_id]
+
+    @classmethod
+    def load_many(cls, trainer_ids, start_date, end_date=None, exclude_session_id=None,
+                  include_bookings=True):
+        """
+        Load schedules for several trainers with one query per table.
+
+        Returns:
+            Dict of trainer_id -> TrainerSchedule (every requested id is present)
+        """
+        trainer_ids = list(trainer_ids)
+        end_date = end_date or start_date
+        window_start = datetime.combine(start_date, time.min)
+        window_end = datetime.combine(end_date + timedelta(days=1), time.min)
+
+        # Sessions that start before the window but run into it still block
+        sessions_query = Session.query.filter(
+            Session.trainer_id.in_(trainer_ids),
+            Session.status.in_(BLOCKING_SESSION_STATUSES),
+            Session.scheduled_start < window_end,
+            Session.scheduled_end > window_start
+        )
+        if exclude_session_id is not None:
+            sessions_query = sessions_query.filter(Session.id != exclude_session_id)
+
+        bookings = []
+        if include_bookings:
+            bookings = OnlineBooking.query.filter(
+                OnlineBooking.trainer_id.in_(trainer_ids),
+                OnlineBooking.requested_date >= start_date - timedelta(days=1),
+                OnlineBooking.requested_date <= end_date,
+                OnlineBooking.status.in_(BLOCKING_BOOKING_STATUSES),
+                # Converted bookings are already represented by their session
+                OnlineBooking.session_id.is_(None)
+            ).all()
+
+        availability = BookingAvailability.query.filter(
+            BookingAvailability.trainer_id.in_(trainer_ids),
+            BookingAvailability.is_active.is_(True)
+        ).all()
+
+        exceptions = BookingException.query.filter(
+            BookingException.trainer_id.in_(trainer_ids),
+            BookingException.start_date <= end_date,
+            BookingException.end_date >= start_date
+        ).all()
+
+        rows = {tid: {'sessions': [], 'bookings': [], 'availability': [], 'exceptions': []}
+                for tid in trainer_ids}
+        for key, items in (('sessions', sessions_query.all()), ('bookings', bookings),
+                           ('availability', availability), ('exceptions', exceptions)):
+            for item in items:
+                rows[item.trainer_id][key].append(item)
+
+        return {tid: cls(tid, start_date, end_date, **rows[tid]) for tid in trainer_ids}
+
+    # ------------------------------------------------------------------
+    # Working hours
+    # ------------------------------------------------------------------
+
+    def exception_for(self, day):
+        """The ``BookingException`` covering ``day``, if any."""
+        for exception in self.exceptions:
+            if exception.start_date > day:
+                break
+            if exception.end_date >= day:
+                return exception
+        return None
+
+    def availability_slots(self, day):
+        """
+        Weekly availability rows for ``day`` with exceptions applied.
+
+        Returns:
+            List of ``(start, end, BookingAvailability or None)`` tuples;
+            empty if the day is closed
+        """
+        exception = self.exception_for(day)
+        if exception and exception.exception_type in CLOSED_EXCEPTION_TYPES:
+            return []
+
+        if self.availability:
+            slots = [
+                (datetime.combine(day, s.start_time), datetime.combine(day, s.end_time), s)
+                for s in self.availability.get(day.weekday(), [])
+            ]
+        else:
+            slots = [(datetime.combine(day, DEFAULT_WORKING_HOURS[0]),
+                      datetime.combine(day, DEFAULT_WORKING_HOURS[1]), None)]
+
+        if exception and exception.special_start_time and exception.special_end_time:
+            special_start = datetime.combine(day, exception.special_start_time)
+            special_end = datetime.combine(day, exception.special_end_time)
+            if not self.availability:
+                return [(special_start, special_end, None)]
+            slots = [
+                (max(start, special_start), min(end, special_end), slot)
+                for start, end, slot in slots
+                if start < special_end and end > special_start
+            ]
+        return slots
+
+    def slot_at(self, start, end):
+        """
+        The ``BookingAvailability`` slot that fully contains ``[start, end)``.
+
+        Returns:
+            The slot, or None if no configured slot covers the range
+        """
+        start, end = to_naive_utc(start), to_naive_utc(end)
+        for slot_start, slot_end, slot in self.availability_slots(start.date()):
+            if slot is not None and slot_start <= start and end <= slot_end:
+                return slot
+        return None
+
+    def has_slots(self, day):
+        """True if ``day`` is bookable through configured availability slots."""
+        return any(slot is not None for _, _, slot in self.availability_slots(day))
+
+    def working_windows(self, day):
+        """Merged bookable ``(start, end)`` ranges for ``day``."""
+        windows = []
+        for start, end, _ in sorted(self.availability_slots(day), key=lambda s: s[0]):
+            if windows and start <= windows[-1][1]:
+                windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+            else:
+                windows.append((start, end))
+        return windows
+
+    def is_within_working_hours(self, start, end):
+        """True if ``[start, end)`` lies inside one working window."""
+        start, end = to_naive_utc(start), to_naive_utc(end)
+        return any(w_start <= start and end <= w_end for w_start, w_end in self.working_windows(start.date()))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def conflicts(self, start, end):
+        """First busy interval overlapping ``[start, end)``, or None."""
+        return self.busy.first_overlap(to_naive_utc(start), to_naive_utc(end))
+
+    def free_slots(self, day, duration_minutes=60):
+        """
+        Gaps of at least ``duration_minutes`` inside ``day``'s working hours.
+
+        Returns:
+            List of dicts with start, end and duration_minutes
+        """
+        needed = timedelta(minutes=duration_minutes)
+        slots = []
+        for window_start, window_end in self.working_windows(day):
+            for gap_start, gap_end in self.busy.gaps(window_start, window_end):
+                if gap_end - gap_start >= needed:
+                    slots.append(self._slot(gap_start, gap_end))
+        return slots
+
+    def next_available(self, after, duration_minutes=60):
+        """
+        Earliest start at or after ``after`` with a free gap of the given length.
+
+        Only the loaded date window is searched.
+
+        Returns:
+            Datetime or None if nothing fits in the window
+        """
+        needed = timedelta(minutes=duration_minutes)
+        after = to_naive_utc(after)
+        day = max(after.date(), self.start_date)
+        while day <= self.end_date:
+            for window_start, window_end in self.working_windows(day):
+                window_start = max(window_start, after)
+                if window_end - window_start < needed:
+                    continue
+                for gap_start, gap_end in self.busy.gaps(window_start, window_end):
+                    if gap_end - gap_start >= needed:
+                        return gap_start
+            day += timedelta(days=1)
+        return None
+
+    def free_slots_range(self, duration_minutes=60, not_before=None):
+        """
+        Open slots for every day of the loaded window in a single sweep.
+
+        Working windows are generated in time order and walked together with
+        the sorted busy intervals, so the whole range costs O(windows + busy)
+        instead of one overlap lookup per day.
+
+        Args:
+            duration_minutes: Minimum gap length
+            not_before: Ignore time before this moment (e.g. now)
+
+        Returns:
+            Dict of ISO date -> list of slot dicts (days without slots omitted)
+        """
+        needed = timedelta(minutes=duration_minutes)
+        not_before = to_naive_utc(not_before)
+        busy = list(self.busy)
+        pointer = 0
+        # Latest end among busy intervals that started before the current cursor
+        carried_end = None
+        result = {}
+
+        day = self.start_date
+        while day <= self.end_date:
+            for window_start, window_end in self.working_windows(day):
+                if not_before is not None:
+                    window_start = max(window_start, not_before)
+                if window_end - window_start < needed:
+                    continue
+
+                cursor = window_start
+                if carried_end is not None:
+                    cursor = max(cursor, carried_end)
+                # Skip intervals that end before this window
+                while pointer < len(busy) and busy[pointer].start < window_end:
+                    interval = busy[pointer]
+                    if interval.end <= cursor:
+                        pointer += 1
+                        continue
+                    if interval.start > cursor and interval.start - cursor >= needed:
+                        result.setdefault(day.isoformat(), []).append(self._slot(cursor, interval.start))
+                    cursor = max(cursor, interval.end)
+                    carried_end = cursor if carried_end is None else max(carried_end, cursor)
+                    pointer += 1
+                if window_end - cursor >= needed:
+                    result.setdefault(day.isoformat(), []).append(self._slot(cursor, window_end))
+            day += timedelta(days=1)
+        return result
+
+    @staticmethod
+    def _slot(start, end):
+        return {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'duration_minutes': int((end - start).total_seconds() // 60)
+        }
+
+    def add_session(self, session):
+        """Mark a newly created session as busy."""
+        self.busy.add(Interval(
+            to_naive_utc(session.scheduled_start), to_naive_utc(session.scheduled_end), 'session', session
+        ))
@@ -0,0 +1,163 @@
+"""Per-slot seat counts for online bookings.
+
+Every pending or confirmed ``OnlineBooking`` that falls inside a configured
+``BookingAvailability`` slot holds one seat in a ``BookingSlotOccupancy``
+row keyed by ``(trainer_id, slot_date, slot_start)``. This gives:
+
+* availability checks that read one row per slot instead of counting
+  bookings, and
+* overbooking protection. A seat is taken with a single conditional
+  ``UPDATE ... SET booked = booked + 1 WHERE booked < capacity``. The
+  database row lock serializes concurrent requests for the same slot, so
+  the last seat can be taken only once.
+
+The counters follow booking status changes through ``reserve_seat`` and
+``release_seat``. ``rebuild`` recomputes them from ``online_bookings`` and
+is exposed as ``flask bookings rebuild-occupancy``.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.booking import BookingSlotOccupancy, OnlineBooking
+from app.services.scheduling import BLOCKING_BOOKING_STATUSES, TrainerSchedule
+
+
+class SlotFull(Exception):
+    """Raised when a booking slot has no seats left."""
+
+
+def _ensure_row(connection, trainer_id, slot_date, slot_start):
+    """Create the counter row if it does not exist yet (race-safe)."""
+    table = BookingSlotOccupancy.__table__
+    values = {'trainer_id': trainer_id, 'slot_date': slot_date, 'slot_start': slot_start,
+              'booked': 0, 'updated_at': datetime.utcnow()}
+    keys = ['trainer_id', 'slot_date', 'slot_start']
+    if connection.dialect.name == 'postgresql':
+        stmt = postgresql.insert(table).values(**values).on_conflict_do_nothing(index_elements=keys)
+    elif connection.dialect.name == 'sqlite':
+        stmt = sqlite.insert(table).values(**values).on_conflict_do_nothing(index_elements=keys)
+    else:
+        exists = connection.execute(
+            select(table.c.id).where(*(table.c[k] == values[k] for k in keys))
+        ).first()
+        if exists:
+            return
+        stmt = table.insert().values(**values)
+    connection.execute(stmt)
+
+
+def _slot_filter(trainer_id, slot_date, slot_start):
+    table = BookingSlotOccupancy.__table__
+    return (table.c.trainer_id == trainer_id, table.c.slot_date == slot_date,
+            table.c.slot_start == slot_start)
+
+
+def reserve_seat(booking, capacity):
+    """
+    Take a seat for ``booking`` in its slot.
+
+    Must run inside the transaction that writes the booking. Bookings
+    without a ``slot_start`` are not capacity-limited and are ignored.
+
+    Raises:
+        SlotFull: If the slot already holds ``capacity`` bookings
+    """
+    if booking.slot_start is None:
+        return
+    table = BookingSlotOccupancy.__table__
+    connection = db.session.connection()
+    _ensure_row(connection, booking.trainer_id, booking.requested_date, booking.slot_start)
+    result = connection.execute(
+        update(table)
+        .where(*_slot_filter(booking.trainer_id, booking.requested_date, booking.slot_start),
+               table.c.booked < (capacity or 1))
+        .values(booked=table.c.booked + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        raise SlotFull('This time slot is fully booked')
+
+
+def release_seat(booking):
+    """Give back the seat held by ``booking`` (no-op if it holds none)."""
+    if booking.slot_start is None:
+        return
+    table = BookingSlotOccupancy.__table__
+    db.session.connection().execute(
+        update(table)
+        .where(*_slot_filter(booking.trainer_id, booking.requested_date, booking.slot_start),
+               table.c.booked > 0)
+        .values(booked=table.c.booked - 1, updated_at=datetime.utcnow())
+    )
+
+
+def occupancy_for(trainer_id, day):
+    """
+    Seats taken per slot on ``day``.
+
+    Returns:
+        Dict of slot start ``time`` -> booked count
+    """
+    rows = db.session.execute(
+        select(BookingSlotOccupancy.slot_start, BookingSlotOccupancy.booked)
+        .where(BookingSlotOccupancy.trainer_id == trainer_id, BookingSlotOccupancy.slot_date == day)
+    )
+    return {slot_start: booked for slot_start, booked in rows}
+
+
+def rebuild(trainer_id=None, since=None):
+    """
+    Recompute slot assignments and seat counts from ``online_bookings``.
+
+    Open bookings without a ``slot_start`` (e.g. created before the
+    occupancy index existed) are matched to their availability slot first.
+
+    Args:
+        trainer_id: Only rebuild this trainer (default: all trainers)
+        since: First date to rebuild (default: today)
+
+    Returns:
+        Number of occupancy rows written
+    """
+    since = since or date.today()
+    bookings = OnlineBooking.query.filter(
+        OnlineBooking.requested_date >= since,
+        OnlineBooking.status.in_(BLOCKING_BOOKING_STATUSES)
+    )
+    if trainer_id is not None:
+        bookings = bookings.filter(OnlineBooking.trainer_id == trainer_id)
+    bookings = bookings.all()
+
+    unassigned = [b for b in bookings if b.slot_start is None]
+    if unassigned:
+        schedules = TrainerSchedule.load_many(
+            {b.trainer_id for b in unassigned}, min(b.requested_date for b in unassigned),
+            max(b.requested_date for b in unassigned), include_bookings=False
+        )
+        for booking in unassigned:
+            start = datetime.combine(booking.requested_date, booking.requested_time)
+            slot = schedules[booking.trainer_id].slot_at(
+                start, start + timedelta(minutes=booking.duration_minutes or 60)
+            )
+            if slot is not None:
+                booking.slot_start = slot.start_time
+
+    counts = defaultdict(int)
+    for booking in bookings:
+        if booking.slot_start is not None:
+            counts[(booking.trainer_id, booking.requested_date, booking.slot_start)] += 1
+
+    table = BookingSlotOccupancy.__table__
+    delete = table.delete().where(table.c.slot_date >= since)
+    if trainer_id is not None:
+        delete = delete.where(table.c.trainer_id == trainer_id)
+    db.session.execute(delete)
+    now = datetime.utcnow()
+    if counts:
+        db.session.execute(table.insert(), [
+            {'trainer_id': tid, 'slot_date': day, 'slot_start': start, 'booked': booked, 'updated_at': now}
+            for (tid, day, start), booked in sorted(counts.items())
+        ])
+    db.session.commit()
+    return len(counts)
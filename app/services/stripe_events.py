@@ -0,0 +1,258 @@
+"""Stripe webhook ingestion.
+
+The webhook route only verifies the signature and records the raw event
+in ``stripe_events``. ``event_id`` is unique, so an event Stripe retries is
+stored once and applied once. The route then returns 200 without touching
+payments or subscriptions.
+
+The worker task ``stripe.apply_events`` then drains pending events:
+
+* in Stripe ``created`` order (ties broken by arrival);
+* in batches of ``BATCH_SIZE``. Each batch loads the payments and
+  subscriptions it refers to with one ``IN`` query per kind, applies every
+  event, and commits once;
+* on Postgres, one batch at a time across workers (a transaction-scoped
+  advisory lock), so the order holds.
+
+Handlers are idempotent: re-applying an event leaves the same state. That
+lets ``replay`` reset stored events to ``pending`` for recovery or load
+tests (``flask stripe replay``).
+"""
+import json
+import logging
+from datetime import datetime
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.jobs import Job
+from app.models.payments import Payment, StripeEvent, Subscription
+from app.services.job_queue import enqueue, task
+
+logger = logging.getLogger(__name__)
+
+# Events applied per transaction
+BATCH_SIZE = 200
+
+# Advisory lock key serializing drainers on Postgres
+_APPLY_LOCK_KEY = 0x5712E
+
+# Payment statuses a late or replayed event must not overwrite
+_FINAL_PAYMENT_STATUSES = ('completed', 'refunded')
+
+
+def record(event, raw_payload):
+    """
+    Store a verified event and queue it for the worker.
+
+    Args:
+        event: Event parsed by ``stripe.Webhook.construct_event``
+        raw_payload: Request body exactly as received
+
+    Returns:
+        True if the event is new, False for a retry of a stored event
+    """
+    table = StripeEvent.__table__
+    values = {
+        'event_id': event['id'],
+        'event_type': event['type'],
+        'payload': raw_payload.decode() if isinstance(raw_payload, bytes) else raw_payload,
+        'stripe_created': event.get('created'),
+        'status': 'pending',
+        'attempts': 0,
+        'received_at': datetime.utcnow(),
+    }
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        stmt = postgresql.insert(table).values(**values).on_conflict_do_nothing(index_elements=['event_id'])
+    elif connection.dialect.name == 'sqlite':
+        stmt = sqlite.insert(table).values(**values).on_conflict_do_nothing(index_elements=['event_id'])
+    else:
+        exists = connection.execute(select(table.c.id).where(table.c.event_id == values['event_id'])).first()
+        stmt = None if exists else table.insert().values(**values)
+    created = stmt is not None and connection.execute(stmt).rowcount == 1
+    if created:
+        _queue_apply()
+    db.session.commit()
+    return created
+
+
+def _queue_apply():
+    # One drain job per new event, committed together with it. A starting
+    # drain absorbs the drain jobs already queued (their events are committed,
+    # so it will see them), which keeps a burst of webhooks to a few drains.
+    enqueue('stripe.apply_events', {}, commit=False)
+
+
+# ----------------------------------------------------------------------
+# Handlers
+# ----------------------------------------------------------------------
+
+class _Batch:
+    """Payments and subscriptions referenced by one batch of events, loaded up front."""
+
+    def __init__(self, events):
+        intent_ids, subscription_ids, customer_ids = set(), set(), set()
+        for event_type, obj in events:
+            if event_type.startswith('payment_intent.'):
+                intent_ids.add(obj.get('id'))
+            elif event_type.startswith('customer.subscription.'):
+                subscription_ids.add(obj.get('id'))
+                customer_ids.add(obj.get('customer'))
+
+        self.payments = {}
+        if intent_ids:
+            for payment in Payment.query.filter(Payment.stripe_payment_intent_id.in_(intent_ids)):
+                self.payments[payment.stripe_payment_intent_id] = payment
+
+        self.subscriptions = {}
+        self.unlinked = {}  # stripe customer id -> subscriptions without a Stripe subscription yet
+        if subscription_ids:
+            for subscription in Subscription.query.filter(
+                Subscription.stripe_subscription_id.in_(subscription_ids)
+            ):
+                self.subscriptions[subscription.stripe_subscription_id] = subscription
+        customer_ids.discard(None)
+        if customer_ids:
+            for subscription in Subscription.query.filter(
+                Subscription.stripe_customer_id.in_(customer_ids),
+                Subscription.stripe_subscription_id.is_(None)
+            ).order_by(Subscription.id):
+                self.unlinked.setdefault(subscription.stripe_customer_id, []).append(subscription)
+
+
+def _payment_succeeded(obj, batch):
+    payment = batch.payments.get(obj['id'])
+    if payment is not None and payment.status not in _FINAL_PAYMENT_STATUSES:
+        payment.status = 'completed'
+
+
+def _payment_failed(obj, batch):
+    payment = batch.payments.get(obj['id'])
+    if payment is not None and payment.status not in _FINAL_PAYMENT_STATUSES:
+        payment.status = 'failed'
+
+
+def _subscription_created(obj, batch):
+    if obj['id'] in batch.subscriptions:
+        return
+    candidates = batch.unlinked.get(obj.get('customer'))
+    if candidates:
+        subscription = candidates.pop(0)
+        subscription.stripe_subscription_id = obj['id']
+        batch.subscriptions[obj['id']] = subscription
+
+
+def _subscription_deleted(obj, batch):
+    subscription = batch.subscriptions.get(obj['id'])
+    if subscription is not None and subscription.status != 'cancelled':
+        subscription.status = 'cancelled'
+        subscription.cancelled_at = datetime.utcnow()
+
+
+HANDLERS = {
+    'payment_intent.succeeded': _payment_succeeded,
+    'payment_intent.payment_failed': _payment_failed,
+    'customer.subscription.created': _subscription_created,
+    'customer.subscription.deleted': _subscription_deleted,
+}
+
+
+# ----------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------
+
+def apply_pending(batch_size=BATCH_SIZE):
+    """
+    Apply pending events in order, one transaction per batch.
+
+    Returns:
+        Dict with applied, ignored and failed counts
+    """
+    stats = {'applied': 0, 'ignored': 0, 'failed': 0}
+    while True:
+        connection = db.session.connection()
+        if connection.dialect.name == 'postgresql':
+            # Wait for any other drainer's batch, so batches apply one after another
+            connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _APPLY_LOCK_KEY})
+
+        rows = (StripeEvent.query.filter(StripeEvent.status == 'pending')
+                .order_by(StripeEvent.stripe_created, StripeEvent.id)
+                .limit(batch_size).all())
+        if not rows:
+            db.session.commit()
+            break
+
+        events = []
+        for row in rows:
+            try:
+                obj = row.get_payload()['data']['object']
+            except (ValueError, KeyError, TypeError):
+                obj = None
+            events.append((row.event_type, obj))
+        batch = _Batch([(event_type, obj) for event_type, obj in events if obj is not None])
+
+        now = datetime.utcnow()
+        for row, (event_type, obj) in zip(rows, events):
+            row.attempts += 1
+            row.processed_at = now
+            handler = HANDLERS.get(event_type)
+            if obj is None:
+                row.status, row.last_error = 'failed', 'Malformed event payload'
+            elif handler is None:
+                row.status = 'ignored'
+            else:
+                try:
+                    handler(obj, batch)
+                    row.status, row.last_error = 'applied', None
+                except Exception as e:
+                    row.status, row.last_error = 'failed', f'{type(e).__name__}: {e}'[:2000]
+                    logger.error(f"Stripe event {row.event_id} ({event_type}) failed: {e}")
+            stats[row.status] += 1
+        db.session.commit()
+    return stats
+
+
+def replay(event_ids=None, event_type=None, since=None, failed_only=False):
+    """
+    Reset stored events to ``pending`` and queue a drain.
+
+    Args:
+        event_ids: Only these Stripe event ids
+        event_type: Only events of this type
+        since: Only events received at or after this datetime
+        failed_only: Only events that failed
+
+    Returns:
+        Number of events reset
+    """
+    table = StripeEvent.__table__
+    stmt = update(table).values(status='pending', last_error=None)
+    if event_ids:
+        stmt = stmt.where(table.c.event_id.in_(event_ids))
+    if event_type:
+        stmt = stmt.where(table.c.event_type == event_type)
+    if since:
+        stmt = stmt.where(table.c.received_at >= since)
+    if failed_only:
+        stmt = stmt.where(table.c.status == 'failed')
+    reset = db.session.execute(stmt).rowcount
+    if reset:
+        _queue_apply()
+    db.session.commit()
+    return reset
+
+
+@task('stripe.apply_events')
+def apply_events():
+    """Job entry point: drain pending Stripe events."""
+    table = Job.__table__
+    db.session.execute(
+        update(table)
+        .where(table.c.queue == 'default', table.c.status == 'queued', table.c.task == 'stripe.apply_events')
+        .values(status='succeeded', finished_at=datetime.utcnow())
+    )
+    db.session.commit()
+    stats = apply_pending()
+    if any(stats.values()):
+        logger.info(f"Applied Stripe events: {json.dumps(stats)}")
+    return stats
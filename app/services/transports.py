@@ -0,0 +1,180 @@
+"""Outbound email and SMS transports used by background jobs.
+
+The transport is chosen with ``MESSAGE_TRANSPORT``:
+
+* ``live`` (default) - SendGrid for email, Twilio for SMS
+* ``stub`` - nothing leaves the process; messages are appended to
+  ``StubTransport.outbox`` so tests and local runs can inspect them
+
+Both offer batch sends for campaigns. A batch email is one template plus a
+list of recipients, each with their own ``substitutions`` (tag -> value).
+SendGrid takes up to ``EMAIL_BATCH_SIZE`` recipients in one API call via
+personalizations. SMS has no batch endpoint, so a batch is sent over the
+transport's single, connection-pooling Twilio client.
+"""
+import os
+import re
+import threading
+from flask import current_app, has_app_context
+
+# SendGrid accepts at most 1000 personalizations per request
+EMAIL_BATCH_SIZE = 1000
+
+# Twilio has no batch endpoint; this only bounds work between checkpoints
+SMS_BATCH_SIZE = 100
+
+
+def apply_substitutions(text, substitutions):
+    """Replace every tag in ``text`` with its value in a single pass."""
+    if not substitutions:
+        return text
+    pattern = re.compile('|'.join(re.escape(tag) for tag in substitutions))
+    return pattern.sub(lambda m: substitutions[m.group(0)], text)
+
+
+class LiveTransport:
+    """Send through SendGrid (email) and Twilio (SMS)."""
+
+    def __init__(self):
+        self.sendgrid_key = os.environ.get('SENDGRID_API_KEY')
+        self.from_email = os.environ.get('FROM_EMAIL', 'noreply@mectofitness.com')
+        self.twilio_sid = os.environ.get('TWILIO_ACCOUNT_SID')
+        self.twilio_token = os.environ.get('TWILIO_AUTH_TOKEN')
+        self.twilio_from = os.environ.get('TWILIO_PHONE_NUMBER')
+        self._sendgrid = None
+        self._twilio = None
+
+    def is_email_configured(self):
+        return bool(self.sendgrid_key)
+
+    def is_sms_configured(self):
+        return bool(self.twilio_sid and self.twilio_token and self.twilio_from)
+
+    def send_email(self, to, subject, html_content):
+        """Send one email; raises on any non-2xx response."""
+        from sendgrid import SendGridAPIClient
+        from sendgrid.helpers.mail import Mail
+
+        if self._sendgrid is None:
+            self._sendgrid = SendGridAPIClient(self.sendgrid_key)
+        message = Mail(from_email=self.from_email, to_emails=to, subject=subject,
+                       html_content=html_content)
+        response = self._sendgrid.send(message)
+        if response.status_code >= 300:
+            raise RuntimeError(f'SendGrid returned {response.status_code}')
+        return {'status_code': response.status_code}
+
+    def send_email_batch(self, subject, html_content, recipients):
+        """
+        Send one templated email to up to ``EMAIL_BATCH_SIZE`` recipients.
+
+        Args:
+            subject: Subject with substitution tags
+            html_content: Body with substitution tags
+            recipients: List of ``{'to': email, 'substitutions': {tag: value}}``
+
+        Returns:
+            List with an error message (or None) per recipient
+        """
+        from sendgrid import SendGridAPIClient
+        from sendgrid.helpers.mail import Mail, Personalization, Substitution, To
+
+        if self._sendgrid is None:
+            self._sendgrid = SendGridAPIClient(self.sendgrid_key)
+        message = Mail(from_email=self.from_email, subject=subject, html_content=html_content)
+        for recipient in recipients:
+            personalization = Personalization()
+            personalization.add_to(To(recipient['to']))
+            for tag, value in recipient['substitutions'].items():
+                personalization.add_substitution(Substitution(tag, value))
+            message.add_personalization(personalization)
+        try:
+            response = self._sendgrid.send(message)
+            error = None if response.status_code < 300 else f'SendGrid returned {response.status_code}'
+        except Exception as e:
+            error = str(e)
+        return [error] * len(recipients)
+
+    def send_sms_batch(self, messages):
+        """
+        Send several SMS over one Twilio client.
+
+        Args:
+            messages: List of ``{'to': phone, 'body': text}``
+
+        Returns:
+            List with an error message (or None) per message
+        """
+        errors = []
+        for message in messages:
+            try:
+                self.send_sms(message['to'], message['body'])
+                errors.append(None)
+            except Exception as e:
+                errors.append(str(e))
+        return errors
+
+    def send_sms(self, to, body):
+        """Send one SMS; raises on failure."""
+        from twilio.rest import Client as TwilioClient
+
+        if self._twilio is None:
+            self._twilio = TwilioClient(self.twilio_sid, self.twilio_token)
+        message = self._twilio.messages.create(to=to, from_=self.twilio_from, body=body)
+        return {'sid': message.sid}
+
+
+class StubTransport:
+    """Record messages in memory instead of sending them."""
+
+    outbox = []
+    _lock = threading.Lock()
+
+    def is_email_configured(self):
+        return True
+
+    def is_sms_configured(self):
+        return True
+
+    def send_email(self, to, subject, html_content):
+        with self._lock:
+            self.outbox.append({'channel': 'email', 'to': to, 'subject': subject, 'body': html_content})
+        return {'status_code': 202}
+
+    def send_sms(self, to, body):
+        with self._lock:
+            self.outbox.append({'channel': 'sms', 'to': to, 'body': body})
+        return {'sid': f'stub-{len(self.outbox)}'}
+
+    def send_email_batch(self, subject, html_content, recipients):
+        for recipient in recipients:
+            self.send_email(recipient['to'], apply_substitutions(subject, recipient['substitutions']),
+                            apply_substitutions(html_content, recipient['substitutions']))
+        return [None] * len(recipients)
+
+    def send_sms_batch(self, messages):
+        for message in messages:
+            self.send_sms(message['to'], message['body'])
+        return [None] * len(messages)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls.outbox.clear()
+
+
+_TRANSPORTS = {'live': LiveTransport, 'stub': StubTransport}
+_instances = {}
+
+
+def get_transport():
+    """The configured transport (one shared instance per kind)."""
+    kind = None
+    if has_app_context():
+        kind = current_app.config.get('MESSAGE_TRANSPORT')
+    kind = kind or os.environ.get('MESSAGE_TRANSPORT', 'live')
+    if kind not in _TRANSPORTS:
+        raise ValueError(f"Unknown MESSAGE_TRANSPORT '{kind}', expected one of: {', '.join(_TRANSPORTS)}")
+    if kind not in _instances:
+        _instances[kind] = _TRANSPORTS[kind]()
+    return _instances[kind]
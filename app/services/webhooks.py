@@ -0,0 +1,353 @@
+"""Outbound webhook delivery for ``WebhookEndpoint``.
+
+Every domain event captured by the automation engine (``client_created``,
+``payment_failed``, ...) is also fanned out to the trainer's webhook
+endpoints:
+
+* ``EndpointIndex`` caches each trainer's active endpoints by event type,
+  so fan-out is a dictionary lookup. Endpoint writes in this process drop
+  the trainer's entry on commit. Other processes notice changes through the
+  same ``count/max(updated_at)`` signature check the rule index uses.
+* Fan-out writes one ``webhook.deliver`` job per event (queue
+  ``webhooks``) in the transaction that produced it. The job lists the
+  subscribed endpoint ids and the serialized body.
+* The worker POSTs the body to all those endpoints concurrently through a
+  bounded thread pool. Each host has one pooled ``requests`` session, so
+  connections are reused across deliveries.
+* Endpoints that failed get a new job of their own, retried with the job
+  queue's exponential backoff. After ``DISABLE_AFTER`` consecutive
+  failures an endpoint is deactivated.
+
+Each request is signed with the endpoint's ``secret``::
+
+    X-Webhook-Signature: t=<unix time>,v1=<hex HMAC-SHA256 of "<t>.<body>">
+
+Receivers should recompute the HMAC and reject stale timestamps.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session as OrmSession
+from app import db
+from app.models.integrations import WebhookEndpoint
+from app.services.job_queue import backoff_seconds, enqueue, task
+
+logger = logging.getLogger(__name__)
+
+# Concurrent requests per worker process (also the per-host connection pool size)
+MAX_WORKERS = 16
+
+# Seconds to connect / to wait for a response
+CONNECT_TIMEOUT = 3
+READ_TIMEOUT = 10
+
+# Delivery attempts per event and endpoint (the first try plus retries)
+MAX_ATTEMPTS = 6
+
+# Consecutive failed attempts (across events) before an endpoint is disabled
+DISABLE_AFTER = 20
+
+# How often a cached trainer entry is checked against the database
+REVALIDATE_SECONDS = 30
+
+# Subscribe an endpoint to every event type
+ALL_EVENTS = '*'
+
+
+def sign(secret, timestamp, body):
+    """Signature header value for ``body`` sent at ``timestamp``."""
+    digest = hmac.new(secret.encode(), f'{timestamp}.{body}'.encode(), hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={digest}'
+
+
+def verify(secret, header, body, tolerance=300):
+    """Check a signature header as a receiver would (used by tests and tooling)."""
+    try:
+        parts = dict(item.split('=', 1) for item in header.split(','))
+        timestamp = int(parts['t'])
+    except (KeyError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > tolerance:
+        return False
+    return hmac.compare_digest(sign(secret, timestamp, body), header)
+
+
+# ----------------------------------------------------------------------
+# Endpoint index
+# ----------------------------------------------------------------------
+
+class EndpointIndex:
+    """Per-process cache of active endpoint ids, keyed by trainer then event type."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(connection, trainer_id):
+        table = WebhookEndpoint.__table__
+        count, latest = connection.execute(
+            select(func.count(), func.max(table.c.updated_at)).where(table.c.trainer_id == trainer_id)
+        ).one()
+        return count, str(latest)
+
+    def _load(self, connection, trainer_id):
+        table = WebhookEndpoint.__table__
+        rows = connection.execute(
+            select(table.c.id, table.c.events)
+            .where(table.c.trainer_id == trainer_id, table.c.is_active.is_(True))
+        ).all()
+        by_event = {}
+        for row in rows:
+            events = row.events or []
+            if not isinstance(events, list):
+                logger.warning(f"Webhook endpoint {row.id} has invalid events JSON and is skipped")
+                continue
+            for event_type in events:
+                by_event.setdefault(event_type, []).append(row.id)
+        return by_event
+
+    def endpoints_for(self, connection, trainer_id, event_type):
+        """Ids of ``trainer_id``'s active endpoints subscribed to ``event_type``."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(trainer_id)
+        if entry is not None and now - entry['checked_at'] > REVALIDATE_SECONDS:
+            if self._signature(connection, trainer_id) != entry['signature']:
+                entry = None
+            else:
+                entry['checked_at'] = now
+        if entry is None:
+            entry = {
+                'signature': self._signature(connection, trainer_id),
+                'endpoints': self._load(connection, trainer_id),
+                'checked_at': now,
+            }
+            with self._lock:
+                self._entries[trainer_id] = entry
+        endpoints = entry['endpoints']
+        return endpoints.get(event_type, []) + endpoints.get(ALL_EVENTS, [])
+
+    def invalidate(self, trainer_id=None):
+        with self._lock:
+            if trainer_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(trainer_id, None)
+
+
+endpoint_index = EndpointIndex()
+
+
+def fan_out(connection, events, now):
+    """
+    Build one ``webhook.deliver`` job row per event that has subscribers.
+
+    Args:
+        connection: Connection of the flushing session
+        events: ``(trainer_id, event_type, payload)`` tuples
+        now: Timestamp for the job rows and the event body
+
+    Returns:
+        List of job rows for a bulk INSERT into ``jobs``
+    """
+    jobs = []
+    for trainer_id, event_type, payload in events:
+        endpoint_ids = endpoint_index.endpoints_for(connection, trainer_id, event_type)
+        if not endpoint_ids:
+            continue
+        delivery_id = uuid.uuid4().hex
+        body = json.dumps({'id': delivery_id, 'event': event_type,
+                           'created_at': now.isoformat(), 'data': payload}, separators=(',', ':'))
+        jobs.append({
+            'queue': 'webhooks',
+            'task': 'webhook.deliver',
+            'payload': json.dumps({'delivery_id': delivery_id, 'event': event_type, 'body': body,
+                                   'endpoint_ids': endpoint_ids}),
+            'status': 'queued',
+            'attempts': 0,
+            'max_attempts': 5,
+            'run_at': now,
+            'created_at': now,
+        })
+    return jobs
+
+
+def _record_endpoint_change(mapper, connection, target):
+    session = OrmSession.object_session(target)
+    if session is not None:
+        session.info.setdefault('webhook_endpoints_dirty', set()).add(target.trainer_id)
+
+
+def _after_commit(session):
+    for trainer_id in session.info.pop('webhook_endpoints_dirty', ()):
+        endpoint_index.invalidate(trainer_id)
+
+
+def _after_rollback(session):
+    for trainer_id in session.info.pop('webhook_endpoints_dirty', ()):
+        endpoint_index.invalidate(trainer_id)
+
+
+_events_registered = False
+
+
+def register_webhook_events():
+    """Attach the endpoint cache listeners (idempotent)."""
+    global _events_registered
+    if _events_registered:
+        return
+
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(WebhookEndpoint, name, _record_endpoint_change)
+    event.listen(OrmSession, 'after_commit', _after_commit)
+    event.listen(OrmSession, 'after_rollback', _after_rollback)
+    _events_registered = True
+
+
+# ----------------------------------------------------------------------
+# HTTP delivery
+# ----------------------------------------------------------------------
+
+class SessionPool:
+    """One keep-alive ``requests.Session`` per scheme and host."""
+
+    def __init__(self, pool_size=MAX_WORKERS):
+        self.pool_size = pool_size
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount(f'{parts.scheme}://{parts.netloc}', adapter)
+                self._sessions[key] = session
+        return session
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+session_pool = SessionPool()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='webhook')
+        return _executor
+
+
+def post(url, secret, event_type, delivery_id, body):
+    """
+    POST one signed delivery.
+
+    Returns:
+        Dict with ok, status_code, error and latency_ms
+    """
+    headers = {
+        'Content-Type': 'application/json',
+        'User-Agent': 'MectoFitness-Webhooks/1.0',
+        'X-Webhook-Event': event_type,
+        'X-Webhook-Id': delivery_id,
+    }
+    if secret:
+        headers['X-Webhook-Signature'] = sign(secret, int(time.time()), body)
+    started = time.perf_counter()
+    try:
+        response = session_pool.get(url).post(url, data=body.encode(), headers=headers,
+                                              timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        status_code, error = response.status_code, None
+        if status_code >= 300:
+            error = f'HTTP {status_code}'
+        response.close()
+    except requests.RequestException as e:
+        status_code, error = None, f'{type(e).__name__}: {e}'
+    return {'ok': error is None, 'status_code': status_code, 'error': error,
+            'latency_ms': (time.perf_counter() - started) * 1000}
+
+
+def deliver_all(endpoints, event_type, delivery_id, body):
+    """
+    Deliver ``body`` to every endpoint concurrently.
+
+    Args:
+        endpoints: ``(id, url, secret)`` tuples
+
+    Returns:
+        Dict of endpoint id -> result of ``post``
+    """
+    executor = _get_executor()
+    futures = {
+        endpoint_id: executor.submit(post, url, secret, event_type, delivery_id, body)
+        for endpoint_id, url, secret in endpoints
+    }
+    return {endpoint_id: future.result() for endpoint_id, future in futures.items()}
+
+
+@task('webhook.deliver')
+def deliver(delivery_id, event, body, endpoint_ids, attempt=1):
+    """Job entry point: deliver one event and schedule retries for failed endpoints."""
+    table = WebhookEndpoint.__table__
+    endpoints = db.session.execute(
+        select(table.c.id, table.c.url, table.c.secret, table.c.trainer_id, table.c.consecutive_failures)
+        .where(table.c.id.in_(endpoint_ids), table.c.is_active.is_(True))
+    ).all()
+    if not endpoints:
+        return {}
+    results = deliver_all([(e.id, e.url, e.secret) for e in endpoints], event, delivery_id, body)
+
+    now = datetime.utcnow()
+    retry, disabled = [], set()
+    for endpoint in endpoints:
+        result = results[endpoint.id]
+        # Core UPDATE: statistics must not bump updated_at and invalidate cached indexes
+        values = {'total_calls': func.coalesce(table.c.total_calls, 0) + 1, 'last_called_at': now,
+                  'updated_at': table.c.updated_at}
+        if result['ok']:
+            values.update(successful_calls=func.coalesce(table.c.successful_calls, 0) + 1,
+                          consecutive_failures=0)
+        else:
+            failures = (endpoint.consecutive_failures or 0) + 1
+            values.update(failed_calls=func.coalesce(table.c.failed_calls, 0) + 1,
+                          consecutive_failures=func.coalesce(table.c.consecutive_failures, 0) + 1,
+                          last_error=result['error'][:2000])
+            if failures >= DISABLE_AFTER:
+                values.update(is_active=False, updated_at=now,
+                              last_error=f"Disabled after {failures} consecutive failures: {result['error']}"[:2000])
+                disabled.add(endpoint.trainer_id)
+                logger.warning(f"Webhook endpoint {endpoint.id} disabled after {failures} consecutive failures")
+            elif attempt < MAX_ATTEMPTS:
+                retry.append(endpoint.id)
+        db.session.execute(update(table).where(table.c.id == endpoint.id).values(**values))
+
+    if retry:
+        enqueue('webhook.deliver', {'delivery_id': delivery_id, 'event': event, 'body': body,
+                                    'endpoint_ids': retry, 'attempt': attempt + 1},
+                queue='webhooks', delay=backoff_seconds(attempt), commit=False)
+    db.session.commit()
+    for trainer_id in disabled:
+        endpoint_index.invalidate(trainer_id)
+    return results
@@ -0,0 +1,379 @@
+"""Local mirror of the WGER exercise database (https://wger.de/api/v2/).
+
+Exercise search is served from ``ExerciseLibrary`` rows synced from WGER
+(see ``exercise_index``), not from the WGER API:
+
+* ``sync`` pulls ``exerciseinfo`` pages and upserts them by ``wger_id``.
+  After the first full sync it only asks for exercises changed since the
+  newest ``last_update`` it has seen (``last_update__gt``). The first page
+  is sent with ``If-None-Match`` when the watermark has not moved since the
+  last run, so "nothing changed" costs a single 304. The sync state lives
+  in the ``wger_sync`` system setting. ``scripts/seed_exercises.py`` runs it.
+* ``search_remote`` is the cold-miss fallback used when the mirror has no
+  match. Responses are cached for ``REMOTE_CACHE_TTL`` seconds. After a
+  failed call WGER is treated as unreachable for ``OFFLINE_SECONDS``, so
+  searching offline does not wait for a timeout on every keystroke.
+
+``WGER_BASE_URL`` points the mirror at another WGER instance.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app import db
+from app.models.exercise_library import ExerciseLibrary
+from app.models.settings import SystemSettings
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+WGER_BASE_URL = os.environ.get('WGER_BASE_URL', 'https://wger.de/api/v2').rstrip('/')
+LANGUAGE_ID = 2  # English
+
+# Seconds to connect / to wait for a response
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+
+# Seconds to wait for a remote search response
+SEARCH_TIMEOUT = 3
+
+# Exercises per exerciseinfo page during sync
+PAGE_SIZE = 100
+
+# How long remote search responses are reused
+REMOTE_CACHE_TTL = 3600
+
+# After a failed remote call, skip the remote API for this long
+OFFLINE_SECONDS = 60
+
+SYNC_SETTING_KEY = 'wger_sync'
+
+# Category mapping from WGER to our system
+CATEGORY_MAPPING = {
+    8: "strength",      # Arms
+    10: "strength",     # Legs
+    11: "strength",     # Chest
+    12: "strength",     # Back
+    13: "strength",     # Shoulders
+    14: "strength",     # Abs
+    9: "cardio",        # Cardio
+}
+
+# Difficulty mapping
+DIFFICULTY_MAPPING = {
+    1: "beginner",
+    2: "intermediate",
+    3: "advanced"
+}
+
+# Equipment mapping
+EQUIPMENT_MAPPING = {
+    1: "barbell",
+    2: "sz-bar",
+    3: "dumbbell",
+    4: "gym mat",
+    5: "swiss ball",
+    6: "pull-up bar",
+    7: "none (bodyweight)",
+    8: "bench",
+    9: "incline bench",
+    10: "kettlebell",
+}
+
+# Muscle group mapping
+MUSCLE_MAPPING = {
+    1: "biceps",
+    2: "anterior deltoid",
+    3: "serratus anterior",
+    4: "chest",
+    5: "triceps",
+    6: "abs",
+    7: "calves",
+    8: "glutes",
+    9: "trapezius",
+    10: "quads",
+    11: "hamstrings",
+    12: "lats",
+    13: "middle back",
+    14: "obliques",
+    15: "soleus",
+}
+
+_TAG_RE = re.compile('<[^<]+?>')
+
+
+def _build_session(retries):
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset({'GET'}), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Sync retries with backoff; remote search is on the request path and fails fast
+http = _build_session(retries=3)
+search_http = _build_session(retries=0)
+
+
+def _parse_timestamp(value):
+    """WGER ISO timestamp -> naive UTC datetime (None if missing or malformed)."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def transform_exercise(exercise_info):
+    """
+    Map a WGER ``exerciseinfo`` object to ``ExerciseLibrary`` column values.
+
+    Returns:
+        Dict of column values, or None if the exercise has no English translation
+    """
+    name = None
+    description = ''
+    for translation in exercise_info.get('translations', []):
+        if translation.get('language') == LANGUAGE_ID:
+            name = translation.get('name')
+            description = _TAG_RE.sub('', translation.get('description') or '').strip()
+            break
+    if not name:
+        return None
+
+    category_id = (exercise_info.get('category') or {}).get('id')
+    primary_muscles = [MUSCLE_MAPPING.get(m['id'], m.get('name_en') or m.get('name'))
+                       for m in exercise_info.get('muscles', [])]
+    secondary_muscles = [MUSCLE_MAPPING.get(m['id'], m.get('name_en') or m.get('name'))
+                         for m in exercise_info.get('muscles_secondary', [])]
+    primary_muscles = [m for m in primary_muscles if m]
+    secondary_muscles = [m for m in secondary_muscles if m]
+    equipment = [EQUIPMENT_MAPPING.get(e['id'], e.get('name', 'unknown'))
+                 for e in exercise_info.get('equipment', [])]
+    equipment = [e for e in equipment if e and e != 'unknown']
+
+    exercise_data = {
+        'wger_id': exercise_info['id'],
+        'wger_updated_at': _parse_timestamp(exercise_info.get('last_update')),
+        'name': name[:200],
+        'description': description[:500] if description else None,  # Limit length
+        'category': CATEGORY_MAPPING.get(category_id, 'strength'),
+        'primary_muscle_groups': primary_muscles or None,
+        'secondary_muscle_groups': secondary_muscles or None,
+        'equipment_required': equipment or ["none (bodyweight)"],
+        'difficulty_level': 'intermediate',  # Default since WGER doesn't provide this
+        'exercise_type': 'compound' if len(primary_muscles) > 1 else 'isolation',
+        'image_url': None,
+        'alternative_exercises': None,
+    }
+    images = exercise_info.get('images') or []
+    if images and images[0].get('image'):
+        exercise_data['image_url'] = images[0]['image']
+    if exercise_info.get('variations'):
+        exercise_data['alternative_exercises'] = [exercise_info['variations']]
+    return exercise_data
+
+
+# ----------------------------------------------------------------------
+# Sync
+# ----------------------------------------------------------------------
+
+def _load_state():
+    setting = SystemSettings.query.filter_by(key=SYNC_SETTING_KEY).first()
+    if setting is None:
+        setting = SystemSettings(key=SYNC_SETTING_KEY, value_type='json', category='integrations',
+                                 description='WGER exercise mirror sync state')
+        setting.set_value({})
+        db.session.add(setting)
+    try:
+        state = setting.get_value() or {}
+    except ValueError:
+        state = {}
+    return setting, state
+
+
+def _upsert_page(items, stats):
+    """Upsert one page of ``exerciseinfo`` results; returns the newest ``last_update`` on it."""
+    rows, newest = [], None
+    for info in items:
+        updated = _parse_timestamp(info.get('last_update'))
+        if updated and (newest is None or updated > newest):
+            newest = updated
+        data = transform_exercise(info)
+        if data is None:
+            stats['skipped'] += 1
+        else:
+            rows.append(data)
+    if not rows:
+        return newest
+
+    by_wger_id = {
+        e.wger_id: e for e in ExerciseLibrary.query.filter(
+            ExerciseLibrary.wger_id.in_([r['wger_id'] for r in rows])
+        )
+    }
+    by_name = {}
+    for exercise in ExerciseLibrary.query.filter(
+        ExerciseLibrary.name.in_([r['name'] for r in rows]),
+        ExerciseLibrary.is_custom == False  # noqa: E712
+    ):
+        by_name.setdefault(exercise.name, exercise)
+
+    for data in rows:
+        exercise = by_wger_id.get(data['wger_id'])
+        if exercise is None:
+            exercise = by_name.get(data['name'])
+            if exercise is not None and exercise.wger_id is not None:
+                # Same name as another WGER exercise; keep the first one
+                stats['skipped'] += 1
+                continue
+        if exercise is None:
+            exercise = ExerciseLibrary(is_custom=False, is_public=True, is_active=True, **data)
+            db.session.add(exercise)
+            by_wger_id[data['wger_id']] = by_name[data['name']] = exercise
+            stats['created'] += 1
+        elif exercise.wger_id is not None and exercise.wger_updated_at == data['wger_updated_at']:
+            stats['unchanged'] += 1
+        else:
+            for column, value in data.items():
+                setattr(exercise, column, value)
+            by_wger_id[data['wger_id']] = exercise
+            stats['updated'] += 1
+    return newest
+
+
+def sync(full=False, page_size=PAGE_SIZE, base_url=None):
+    """
+    Bring the mirror up to date with WGER.
+
+    Args:
+        full: Ignore the sync state and fetch every exercise
+        page_size: Exercises per request
+        base_url: WGER API root (defaults to ``WGER_BASE_URL``)
+
+    Returns:
+        Dict with fetched, created, updated, unchanged and skipped counts,
+        and not_modified if WGER answered 304
+
+    Raises:
+        requests.RequestException: If WGER is unreachable or returns an error
+    """
+    base_url = (base_url or WGER_BASE_URL).rstrip('/')
+    setting, state = _load_state()
+    since = None if full else state.get('last_update')
+    stats = {'fetched': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'not_modified': False}
+
+    params = {'language': LANGUAGE_ID, 'limit': page_size}
+    if since:
+        params['last_update__gt'] = since
+    headers = {'Accept': 'application/json'}
+    if not full and state.get('etag') and state.get('etag_since') == since:
+        headers['If-None-Match'] = state['etag']
+
+    url, newest, etag = f'{base_url}/exerciseinfo/', None, None
+    while url:
+        response = http.get(url, params=params, headers=headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        if response.status_code == 304:
+            stats['not_modified'] = True
+            break
+        response.raise_for_status()
+        data = response.json()
+        if etag is None:
+            etag = response.headers.get('ETag') or ''
+        items = data.get('results', [])
+        stats['fetched'] += len(items)
+        page_newest = _upsert_page(items, stats)
+        if page_newest and (newest is None or page_newest > newest):
+            newest = page_newest
+        db.session.commit()
+        url, params, headers = data.get('next'), None, {'Accept': 'application/json'}
+
+    if newest is not None:
+        watermark = newest.replace(tzinfo=timezone.utc).isoformat()
+        if since is None or watermark > since:
+            state['last_update'] = watermark
+    if not stats['not_modified'] and stats['fetched'] == 0 and etag:
+        # An empty delta: its ETag stands for "nothing newer than the watermark"
+        state.update(etag=etag, etag_since=since)
+    elif stats['fetched']:
+        state.pop('etag', None)
+        state.pop('etag_since', None)
+    state['synced_at'] = datetime.utcnow().isoformat()
+    setting.set_value(state)
+    db.session.commit()
+    return stats
+
+
+# ----------------------------------------------------------------------
+# Remote fallback
+# ----------------------------------------------------------------------
+
+_remote_cache = LRUCache(max_entries=512)
+_offline_until = 0.0
+_offline_lock = threading.Lock()
+
+
+def summarize_remote(exercise):
+    """Remote ``/exercise/`` result in the shape of a local search result."""
+    return {
+        'id': None,
+        'wger_id': exercise.get('id'),
+        'name': exercise.get('name'),
+        'description': _TAG_RE.sub('', exercise.get('description') or '').strip() or None,
+        'category': CATEGORY_MAPPING.get(exercise.get('category'), 'strength'),
+        'difficulty_level': None,
+        'primary_muscle_groups': [MUSCLE_MAPPING[m] for m in exercise.get('muscles', []) if m in MUSCLE_MAPPING],
+        'secondary_muscle_groups': [MUSCLE_MAPPING[m] for m in exercise.get('muscles_secondary', [])
+                                    if m in MUSCLE_MAPPING],
+        'equipment_required': [EQUIPMENT_MAPPING[e] for e in exercise.get('equipment', [])
+                               if e in EQUIPMENT_MAPPING],
+        'image_url': None,
+    }
+
+
+def search_remote(query, language=LANGUAGE_ID, page=1, limit=20):
+    """
+    Search the WGER API directly (cached).
+
+    Returns:
+        List of results shaped like local ones, or None if WGER is unreachable
+    """
+    global _offline_until
+    key = f'wger:search:{language}:{page}:{limit}:{query.lower()}'
+    cached = _remote_cache.get(key)
+    if cached is not None:
+        return cached
+    if time.monotonic() < _offline_until:
+        return None
+
+    params = {'language': language, 'status': '2', 'limit': limit, 'page': page}  # status 2: public
+    if query:
+        params['name'] = query
+    try:
+        response = search_http.get(f'{WGER_BASE_URL}/exercise/', params=params,
+                                   timeout=(CONNECT_TIMEOUT, SEARCH_TIMEOUT))
+        response.raise_for_status()
+        results = response.json().get('results', [])
+    except (requests.RequestException, ValueError) as e:
+        with _offline_lock:
+            _offline_until = time.monotonic() + OFFLINE_SECONDS
+        logger.warning(f"WGER search unavailable, serving the local mirror only: {e}")
+        return None
+
+    needle = query.lower()
+    matches = [summarize_remote(ex) for ex in results
+               if not needle or needle in (ex.get('name') or '').lower()
+               or needle in (ex.get('description') or '').lower()]
+    _remote_cache.set(key, matches, REMOTE_CACHE_TTL)
+    return matches
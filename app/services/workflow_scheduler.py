@@ -0,0 +1,326 @@
+"""Scheduled workflow step runner.
+
+Each active ``WorkflowExecution`` stores when its next step is due in
+``next_step_at``, indexed with ``status``. The scheduler never polls every
+execution:
+
+* Executions due within the wheel's horizon (one day by default) are
+  loaded with one range scan on ``(status, next_step_at)``. They go into an
+  in-memory hierarchical ``TimingWheel``. The scan is repeated only when the
+  horizon moves, and then only for the new part of the window.
+* Each tick pops the executions whose time has come and advances them in
+  batches. Per batch there is one SELECT, one bulk INSERT of the outbound
+  jobs, and one UPDATE per execution (compare-and-set outside Postgres).
+* Another process can start an execution or change its timing inside the
+  window that is already loaded. A cheap sweep for still-overdue rows picks
+  these up once they are due.
+
+Step format (``WorkflowTemplate.steps``, JSON array)::
+
+    {"id": "welcome", "type": "send_email", "subject": "...", "body": "..."}
+    {"type": "send_email", "template_id": 3, "delay_days": 2}
+    {"type": "send_sms", "message": "...", "delay_hours": 4}
+    {"type": "wait", "delay_days": 7}
+
+``delay_days`` / ``delay_hours`` / ``delay_minutes`` are measured from the
+previous step, or from the start for the first step. Email and SMS steps
+are queued for ``flask worker``. They are never sent from the scheduler.
+"""
+import json
+import logging
+import math
+import signal
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select, update
+from app import db
+from app.models.client import Client
+from app.models.flow import WorkflowExecution, WorkflowTemplate
+from app.models.jobs import Job
+from app.models.marketing import EmailTemplate, SMSTemplate
+from app.models.user import User
+from app.utils.timing_wheel import TimingWheel
+
+logger = logging.getLogger(__name__)
+
+# Executions advanced per transaction
+BATCH_SIZE = 500
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def step_delay(step):
+    """Delay before ``step`` runs, relative to the previous step."""
+    return timedelta(days=float(step.get('delay_days') or 0),
+                     hours=float(step.get('delay_hours') or 0),
+                     minutes=float(step.get('delay_minutes') or 0))
+
+
+def first_run_at(template, start):
+    """When the first step of ``template`` is due for an execution started at ``start``."""
+    steps = template.get_steps() if template is not None else []
+    return start + step_delay(steps[0]) if steps else start
+
+
+class WorkflowScheduler:
+    """Advances due workflow executions using a timing wheel."""
+
+    def __init__(self, resolution=1, slots=(60, 60, 24), batch_size=BATCH_SIZE,
+                 poll_interval=1.0, clock=datetime.utcnow):
+        """
+        Args:
+            resolution: Seconds per wheel tick
+            slots: Buckets per wheel level (the horizon is their product in ticks)
+            batch_size: Executions advanced per transaction
+            poll_interval: Seconds to sleep between ticks in ``run``
+            clock: Returns the current naive UTC datetime (overridable for simulations)
+        """
+        self.resolution = resolution
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.wheel = TimingWheel(slots, start_tick=self._tick(clock()))
+        self._loaded_until = None  # executions due before this are in the wheel
+        self._pending = {}         # execution id -> tick it is scheduled for
+        self._stopping = False
+        self.stats = {'advanced': 0, 'completed': 0, 'jobs': 0, 'loaded': 0, 'swept': 0, 'batches': 0}
+
+    def _tick(self, when):
+        # Round up so nothing fires before it is due
+        return math.ceil((when - _EPOCH).total_seconds() / self.resolution)
+
+    def _at(self, tick):
+        return _EPOCH + timedelta(seconds=tick * self.resolution)
+
+    def _schedule(self, execution_id, when):
+        tick = self._tick(when)
+        if self.wheel.add(execution_id, tick):
+            self._pending[execution_id] = tick
+
+    def refill(self):
+        """Load executions that became due inside the wheel's horizon since the last refill."""
+        table = WorkflowExecution.__table__
+        # Last whole tick inside the wheel, so every loaded row fits
+        horizon = self._at(self.wheel.horizon - 1)
+        if self._loaded_until is not None and horizon <= self._loaded_until:
+            return 0
+        query = select(table.c.id, table.c.next_step_at).where(
+            table.c.status == 'active', table.c.next_step_at < horizon
+        )
+        if self._loaded_until is not None:
+            query = query.where(table.c.next_step_at >= self._loaded_until)
+        loaded = 0
+        for execution_id, next_step_at in db.session.execute(query):
+            if execution_id not in self._pending:
+                self._schedule(execution_id, next_step_at)
+                loaded += 1
+        db.session.commit()
+        self._loaded_until = horizon
+        self.stats['loaded'] += loaded
+        return loaded
+
+    def sweep(self, now):
+        """Overdue executions the wheel does not know about (written by other processes)."""
+        table = WorkflowExecution.__table__
+        rows = db.session.execute(
+            select(table.c.id).where(table.c.status == 'active', table.c.next_step_at <= now)
+            .order_by(table.c.next_step_at).limit(self.batch_size * 10)
+        ).scalars().all()
+        db.session.commit()
+        missed = [execution_id for execution_id in rows if execution_id not in self._pending]
+        self.stats['swept'] += len(missed)
+        return missed
+
+    def tick(self):
+        """
+        Advance every execution due by now.
+
+        Returns:
+            Number of executions advanced
+        """
+        now = self.clock()
+        self.refill()
+        due = self.wheel.advance(self._tick(now))
+        for execution_id in due:
+            self._pending.pop(execution_id, None)
+        advanced = self._advance_all(due, now)
+        advanced += self._advance_all(self.sweep(now), now)
+        # A moved horizon may expose rows the previous refill could not see yet
+        self.refill()
+        return advanced
+
+    def _advance_all(self, execution_ids, now):
+        advanced = 0
+        for i in range(0, len(execution_ids), self.batch_size):
+            advanced += self.advance_batch(execution_ids[i:i + self.batch_size], now)
+        return advanced
+
+    def advance_batch(self, execution_ids, now):
+        """
+        Run the current step of each due execution and schedule the next one.
+
+        Executions that are no longer active, or whose ``next_step_at`` moved
+        past ``now`` since they were loaded, are skipped.
+
+        Returns:
+            Number of executions advanced
+        """
+        table = WorkflowExecution.__table__
+        due = select(table).where(table.c.id.in_(execution_ids), table.c.status == 'active',
+                                  table.c.next_step_at <= now)
+        connection = db.session.connection()
+        postgres = connection.dialect.name == 'postgresql'
+        if postgres:
+            due = due.with_for_update(skip_locked=True)
+        rows = connection.execute(due).mappings().all()
+        if not rows:
+            db.session.commit()
+            return 0
+
+        steps_by_template = {
+            template.id: template.get_steps()
+            for template in WorkflowTemplate.query.filter(
+                WorkflowTemplate.id.in_({row['workflow_template_id'] for row in rows})
+            )
+        }
+        clients = {c.id: c for c in Client.query.filter(Client.id.in_({row['client_id'] for row in rows}))}
+        trainers = {u.id: u.full_name for u in User.query.filter(User.id.in_({row['trainer_id'] for row in rows}))}
+        templates = _MessageTemplates(rows, steps_by_template)
+
+        jobs, changes = [], []
+        for row in rows:
+            steps = steps_by_template.get(row['workflow_template_id'], [])
+            index = row['current_step'] or 0
+            change = {'_id': row['id'], '_due': row['next_step_at']}
+            if index < len(steps):
+                step = steps[index]
+                job = _step_job(step, templates, clients.get(row['client_id']), row['trainer_id'],
+                                trainers.get(row['trainer_id'], ''), now)
+                if job is not None:
+                    jobs.append((row['id'], job))
+                completed = json.loads(row['completed_steps']) if row['completed_steps'] else []
+                completed.append({'step_id': step.get('id', index), 'completed_at': now.isoformat()})
+                change['completed_steps'] = json.dumps(completed)
+                index += 1
+            else:
+                change['completed_steps'] = row['completed_steps']
+            change['current_step'] = index
+            if index < len(steps):
+                change.update(status='active', completed_at=None, next_step_at=now + step_delay(steps[index]))
+            else:
+                change.update(status='completed', completed_at=now, next_step_at=None)
+            changes.append(change)
+
+        statement = update(table).where(table.c.id == db.bindparam('_id'))
+        if not postgres:
+            # Compare-and-set: skip rows another scheduler advanced meanwhile
+            statement = statement.where(table.c.next_step_at == db.bindparam('_due'))
+        statement = statement.values(
+            current_step=db.bindparam('current_step'), status=db.bindparam('status'),
+            completed_steps=db.bindparam('completed_steps'), completed_at=db.bindparam('completed_at'),
+            next_step_at=db.bindparam('next_step_at'),
+        )
+        if postgres:
+            connection.execute(statement, changes)
+            applied = changes
+        else:
+            applied = [change for change in changes if connection.execute(statement, change).rowcount == 1]
+        applied_ids = {change['_id'] for change in applied}
+        jobs = [job for execution_id, job in jobs if execution_id in applied_ids]
+        if jobs:
+            connection.execute(insert(Job), jobs)
+        db.session.commit()
+
+        for change in applied:
+            next_step_at = change['next_step_at']
+            if next_step_at is not None and self._loaded_until is not None and next_step_at < self._loaded_until:
+                self._schedule(change['_id'], next_step_at)
+        completed = sum(1 for change in applied if change['status'] == 'completed')
+        self.stats['advanced'] += len(applied)
+        self.stats['completed'] += completed
+        self.stats['jobs'] += len(jobs)
+        self.stats['batches'] += 1
+        return len(applied)
+
+    def stop(self, *args):
+        """Finish the current tick, then exit (bound to SIGTERM/SIGINT)."""
+        self._stopping = True
+
+    def run(self, burst=False):
+        """
+        Advance executions until stopped.
+
+        Args:
+            burst: Exit after one tick
+        """
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info(f"Workflow scheduler started (horizon {self.wheel.horizon - self.wheel.now} ticks "
+                    f"of {self.resolution}s)")
+        advanced = 0
+        while not self._stopping:
+            advanced += self.tick()
+            if burst:
+                break
+            time.sleep(self.poll_interval)
+            db.session.remove()
+        logger.info(f"Workflow scheduler stopped after advancing {advanced} execution(s)")
+        return advanced
+
+
+class _MessageTemplates:
+    """Email/SMS templates referenced by a batch's steps, loaded with one query each."""
+
+    def __init__(self, rows, steps_by_template):
+        email_ids, sms_ids = set(), set()
+        for row in rows:
+            steps = steps_by_template.get(row['workflow_template_id'], [])
+            index = row['current_step'] or 0
+            if index < len(steps) and steps[index].get('template_id'):
+                target = email_ids if steps[index].get('type') == 'send_email' else sms_ids
+                target.add(steps[index]['template_id'])
+        self.email = {t.id: t for t in EmailTemplate.query.filter(EmailTemplate.id.in_(email_ids))} if email_ids else {}
+        self.sms = {t.id: t for t in SMSTemplate.query.filter(SMSTemplate.id.in_(sms_ids))} if sms_ids else {}
+
+    def lookup(self, kind, template_id, trainer_id):
+        template = (self.email if kind == 'send_email' else self.sms).get(template_id)
+        if template is None or template.trainer_id != trainer_id:
+            return None
+        return template
+
+
+def _step_job(step, templates, client, trainer_id, trainer_name, now):
+    """The outbound job row for one step, or None for steps that send nothing."""
+    from app.services.campaigns import render, template_values
+
+    kind = step.get('type')
+    if kind not in ('send_email', 'send_sms'):
+        if kind not in (None, 'wait'):
+            logger.warning(f"Workflow step type '{kind}' is not supported; skipping")
+        return None
+    if client is None:
+        return None
+
+    template = None
+    if step.get('template_id'):
+        template = templates.lookup(kind, step['template_id'], trainer_id)
+        if template is None:
+            logger.warning(f"Workflow step template {step['template_id']} not found; skipping")
+            return None
+
+    values = template_values(client, trainer_name)
+    if kind == 'send_email':
+        if not client.email:
+            return None
+        subject = template.subject if template else step.get('subject', '')
+        body = template.body if template else step.get('body', '')
+        task_name, payload = 'email.send', {'to': client.email, 'subject': render(subject, values),
+                                            'html_content': render(body, values)}
+    else:
+        if not client.phone:
+            return None
+        message = template.message if template else step.get('message', '')
+        task_name, payload = 'sms.send', {'to': client.phone, 'body': render(message, values)}
+
+    return {'queue': 'email', 'task': task_name,
+            'payload': json.dumps(payload), 'run_at': now}
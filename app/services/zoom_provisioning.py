@@ -0,0 +1,221 @@
+"""Bulk Zoom meeting provisioning for session series.
+
+``provision_sessions`` creates a Zoom meeting for every session that has
+none and updates the meeting of every session that already has one (a
+rescheduled series). It works in three steps:
+
+1. Plan on the request thread. One query loads the sessions' existing
+   ``VideoConference`` rows, and each session becomes a create, an update
+   or a skip.
+2. Call Zoom from a bounded thread pool (``MAX_WORKERS``). Worker threads
+   only see plain dicts and never touch the database session. Every call
+   first takes a token from ``rate_limiter``, which is shared by the whole
+   process, so concurrent bulk requests together stay under Zoom's
+   per-account limit. A 429 empties the bucket and the call waits for
+   ``Retry-After`` before trying again, up to ``RATE_LIMIT_RETRIES`` times.
+3. Write every successful result in one transaction. If that commit fails,
+   the meetings created in step 2 are deleted again so no orphans are left
+   in Zoom.
+
+The result has one entry per session (``created``, ``updated``,
+``skipped`` or ``failed``, plus the error), so a partly failed series can
+be retried for just the failed sessions.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from app import db
+from app.models.integrations import VideoConference
+from app.services.zoom_service import ZoomService, meeting_details, meeting_payload
+from app.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Concurrent Zoom calls per bulk request
+MAX_WORKERS = 8
+
+# Sessions accepted by one bulk request
+MAX_SESSIONS = 100
+
+# Retries of a call that Zoom answered with 429
+RATE_LIMIT_RETRIES = 3
+
+# Wait after a 429 without a Retry-After header (seconds)
+DEFAULT_RETRY_AFTER = 1.0
+
+# Zoom limits meeting endpoints per account and second. A full bucket lets
+# through its capacity plus one second's refill, so 10/s stays within 20/s.
+rate_limiter = TokenBucket(rate=float(os.environ.get('ZOOM_RATE_LIMIT_PER_SECOND', 10)))
+
+
+def meeting_params(session):
+    """Meeting topic, start, duration and agenda for a training session."""
+    client = session.client
+    duration = int((session.scheduled_end - session.scheduled_start).total_seconds() // 60)
+    return {
+        'topic': f"Training Session with {client.first_name} {client.last_name}",
+        'start_time': session.scheduled_start,
+        'duration': duration if duration > 0 else 60,
+        'agenda': session.notes or "Personal training session",
+    }
+
+
+def _retry_after(response):
+    try:
+        return max(float(response.headers.get('Retry-After', DEFAULT_RETRY_AFTER)), 0.0)
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
+
+
+def _call(service, method, path, **kwargs):
+    """``service.request`` paced by ``rate_limiter``, retrying 429 responses."""
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        rate_limiter.acquire()
+        try:
+            return service.request(method, path, **kwargs)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+                raise
+            rate_limiter.drain()
+            time.sleep(_retry_after(e.response))
+
+
+def _error(e):
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        try:
+            message = e.response.json().get('message')
+        except ValueError:
+            message = None
+        return f'Zoom returned HTTP {e.response.status_code}' + (f': {message}' if message else '')
+    return f'{type(e).__name__}: {e}'
+
+
+def _provision_one(service, plan):
+    """Run one planned create or update; returns ``(action, meeting, error)``."""
+    params = plan['params']
+    try:
+        if plan['action'] == 'update':
+            try:
+                _call(service, 'PATCH', f"/meetings/{plan['zoom_meeting_id']}", json={
+                    'topic': params['topic'],
+                    'start_time': params['start_time'].strftime('%Y-%m-%dT%H:%M:%S'),
+                    'duration': params['duration'],
+                    'agenda': params['agenda'],
+                })
+                return 'updated', None, None
+            except requests.HTTPError as e:
+                # Deleted in Zoom since: provision a replacement
+                if e.response is None or e.response.status_code != 404:
+                    raise
+        response = _call(service, 'POST', '/users/me/meetings', json=meeting_payload(**params))
+        return 'created', meeting_details(response.json()), None
+    except Exception as e:
+        return 'failed', None, _error(e)
+
+
+def _delete_created(service, meeting_ids, executor):
+    def delete(meeting_id):
+        try:
+            _call(service, 'DELETE', f'/meetings/{meeting_id}')
+        except Exception as e:
+            logger.error(f"Failed to delete orphaned Zoom meeting {meeting_id}: {e}")
+
+    list(executor.map(delete, meeting_ids))
+
+
+def provision_sessions(sessions, trainer_id, service=None, max_workers=MAX_WORKERS):
+    """
+    Create or update the Zoom meetings of ``sessions`` and save them in one transaction.
+
+    Args:
+        sessions: ``Session`` objects owned by ``trainer_id`` (with clients loaded)
+        trainer_id: Owner of the new ``VideoConference`` rows
+        service: ``ZoomService`` to call (a new one by default)
+        max_workers: Concurrent Zoom calls
+
+    Returns:
+        List of dicts with session_id, status (created, updated, skipped or
+        failed), meeting and error, in the order of ``sessions``
+    """
+    service = service or ZoomService()
+    # Read before the commit below expires the sessions (one reload per row otherwise)
+    session_ids = [session.id for session in sessions]
+    conferences = {}
+    if sessions:
+        for conference in VideoConference.query.filter(
+            VideoConference.session_id.in_(session_ids)
+        ).order_by(VideoConference.id):
+            conferences.setdefault(conference.session_id, conference)
+
+    results, plans = {}, []
+    for session in sessions:
+        conference = conferences.get(session.id)
+        if session.status == 'cancelled':
+            results[session.id] = {'status': 'skipped', 'error': 'Session is cancelled'}
+        elif conference is not None and not conference.zoom_meeting_id:
+            results[session.id] = {'status': 'skipped',
+                                   'error': f'Session already has a {conference.platform} meeting'}
+        else:
+            plans.append({
+                'session_id': session.id,
+                'action': 'update' if conference is not None else 'create',
+                'zoom_meeting_id': conference.zoom_meeting_id if conference is not None else None,
+                'params': meeting_params(session),
+            })
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(plans))),
+                                  thread_name_prefix='zoom-provision')
+    try:
+        outcomes = list(executor.map(lambda plan: _provision_one(service, plan), plans))
+
+        created = []
+        for plan, (action, meeting, error) in zip(plans, outcomes):
+            if action == 'failed':
+                results[plan['session_id']] = {'status': 'failed', 'error': error}
+                continue
+            start = plan['params']['start_time']
+            conference = conferences.get(plan['session_id'])
+            if action == 'created':
+                created.append(meeting['meeting_id'])
+                if conference is None:
+                    conference = VideoConference(session_id=plan['session_id'], trainer_id=trainer_id,
+                                                 platform='zoom', status='scheduled')
+                    db.session.add(conference)
+                conference.meeting_id = conference.zoom_meeting_id = meeting['meeting_id']
+                conference.meeting_url = meeting['meeting_url']
+                conference.meeting_password = meeting.get('meeting_password')
+            conference.scheduled_start = start
+            results[plan['session_id']] = {'status': action, 'conference': conference}
+
+        try:
+            db.session.flush()
+            for result in results.values():
+                conference = result.pop('conference', None)
+                if conference is not None:
+                    result['meeting'] = _meeting_json(conference)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to save provisioned Zoom meetings, deleting {len(created)}: {e}")
+            _delete_created(service, created, executor)
+            for result in results.values():
+                if result['status'] in ('created', 'updated'):
+                    result.update(status='failed', error='Failed to save meeting')
+                    result.pop('conference', None)
+                    result.pop('meeting', None)
+    finally:
+        executor.shutdown(wait=True)
+
+    return [{'session_id': session_id, 'error': None, **results[session_id]} for session_id in session_ids]
+
+
+def _meeting_json(conference):
+    return {
+        'id': conference.id,
+        'meeting_url': conference.meeting_url,
+        'meeting_password': conference.meeting_password,
+        'scheduled_start': conference.scheduled_start.isoformat() if conference.scheduled_start else None,
+        'platform': 'zoom',
+    }
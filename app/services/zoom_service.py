@@ -1,13 +1,173 @@
-"""Zoom Integration Service for Video Conferencing."""
+"""Zoom Integration Service for Video Conferencing.
+
+All ``ZoomService`` instances in a process share two things:
+
+* ``token_cache`` - Server-to-Server OAuth tokens keyed by account and
+  client id. Refresh is single-flight: when the token expires, one thread
+  fetches a new one while the others wait and then reuse it. With
+  ``ZOOM_TOKEN_CACHE_BACKEND=sqlite`` the token lives in a file shared by
+  every gunicorn worker on the host, and a file lock makes the refresh
+  single-flight across workers too.
+* ``http`` - one keep-alive ``requests.Session``, so consecutive API calls
+  reuse TCP/TLS connections. Idempotent requests are retried on connection
+  errors, 429 and 5xx with backoff (honouring ``Retry-After``). Every call
+  has a timeout.
+
+A 401 response drops the cached token and the call is retried once with a
+fresh token.
+"""
 import os
 import requests
 import base64
-from datetime import datetime, timedelta
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 from typing import Optional, Dict, Any
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.utils.cache import LRUCache, SQLiteCache
 
 logger = logging.getLogger(__name__)
 
+# Seconds to connect / to wait for a response
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 15
+
+# Refresh tokens this many seconds before Zoom expires them
+TOKEN_EXPIRY_MARGIN = 300
+
+# Connections kept open to api.zoom.us per process
+POOL_SIZE = 10
+
+
+class TokenCache:
+    """OAuth tokens shared by the process (optionally by all workers) with single-flight refresh."""
+    
+    def __init__(self, backend=None, lock_path=None):
+        self.backend = backend or LRUCache(max_entries=64)
+        self.lock_path = lock_path
+        self._locks = {}
+        self._guard = threading.Lock()
+    
+    def _valid(self, key):
+        entry = self.backend.get(key)
+        if entry and entry.get('expires_at', 0) > time.time():
+            return entry['access_token']
+        return None
+    
+    def _thread_lock(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+    
+    @contextmanager
+    def _process_lock(self):
+        if self.lock_path is None:
+            yield
+            return
+        import fcntl
+        with open(self.lock_path, 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+    
+    def get(self, key, fetch):
+        """
+        Return the cached token for ``key``, calling ``fetch`` once if it is missing or expired.
+        
+        Args:
+            key: Cache key
+            fetch: Returns ``(access_token, expires_in_seconds)``
+        """
+        token = self._valid(key)
+        if token:
+            return token
+        with self._thread_lock(key), self._process_lock():
+            # Another thread or worker may have refreshed while we waited
+            token = self._valid(key)
+            if token:
+                return token
+            token, expires_in = fetch()
+            ttl = max(expires_in - TOKEN_EXPIRY_MARGIN, 1)
+            self.backend.set(key, {'access_token': token, 'expires_at': time.time() + ttl}, ttl)
+            return token
+    
+    def invalidate(self, key, token):
+        """Drop ``token`` if it is still the cached one (a newer token is kept)."""
+        with self._thread_lock(key):
+            entry = self.backend.get(key)
+            if entry and entry.get('access_token') == token:
+                self.backend.delete(key)
+
+
+def _build_token_cache():
+    if os.environ.get('ZOOM_TOKEN_CACHE_BACKEND', 'memory') != 'sqlite':
+        return TokenCache()
+    path = os.environ.get('ZOOM_TOKEN_CACHE_PATH') or os.path.join(
+        tempfile.gettempdir(), 'mectofitness_zoom_tokens.db'
+    )
+    # The database and its WAL files hold bearer tokens; keep them private to
+    # the app user whatever the umask (gunicorn runs with umask 0)
+    backend = SQLiteCache(path, max_entries=64, mode=0o600)
+    return TokenCache(backend, lock_path=f'{path}.lock')
+
+
+def _build_session():
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset({'GET', 'PUT', 'DELETE'}), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+token_cache = _build_token_cache()
+http = _build_session()
+
+
+def meeting_payload(topic, start_time, duration=60, timezone='UTC', password=None, agenda=None):
+    """Request body for creating a scheduled meeting."""
+    meeting_data = {
+        'topic': topic,
+        'type': 2,  # Scheduled meeting
+        'start_time': start_time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'duration': duration,
+        'timezone': timezone,
+        'settings': {
+            'host_video': True,
+            'participant_video': True,
+            'join_before_host': False,
+            'mute_upon_entry': True,
+            'waiting_room': True,
+            'audio': 'both',
+            'auto_recording': 'cloud'  # Auto-record to cloud
+        }
+    }
+    
+    if password:
+        meeting_data['password'] = password
+    
+    if agenda:
+        meeting_data['agenda'] = agenda
+    
+    return meeting_data
+
+
+def meeting_details(meeting_info):
+    """The fields we keep from Zoom's meeting object."""
+    return {
+        'meeting_id': str(meeting_info['id']),
+        'meeting_url': meeting_info['join_url'],
+        'meeting_password': meeting_info.get('password'),
+        'host_url': meeting_info.get('start_url'),
+        'platform': 'zoom'
+    }
+
 
 class ZoomService:
     """Service for managing Zoom video conferences."""
@@ -19,54 +179,74 @@ class ZoomService:
         self.account_id = os.environ.get('ZOOM_ACCOUNT_ID')
         self.base_url = 'https://api.zoom.us/v2'
         self.oauth_url = 'https://zoom.us/oauth/token'
-        self._access_token = None
-        self._token_expires_at = None
     
     def is_configured(self) -> bool:
         """Check if Zoom credentials are configured."""
         return all([self.client_id, self.client_secret, self.account_id])
     
-    def _get_access_token(self) -> Optional[str]:
-        """Get or refresh access token."""
-        # Check if we have a valid token
-        if self._access_token and self._token_expires_at:
-            if datetime.utcnow() < self._token_expires_at:
-                return self._access_token
+    @property
+    def _token_key(self) -> str:
+        return f'zoom:token:{self.account_id}:{self.client_id}'
+    
+    def _fetch_token(self):
+        """Request a new Server-to-Server OAuth token from Zoom."""
+        auth_string = f"{self.client_id}:{self.client_secret}"
+        auth_bytes = auth_string.encode('utf-8')
+        auth_b64 = base64.b64encode(auth_bytes).decode('utf-8')
+        
+        headers = {
+            'Authorization': f'Basic {auth_b64}',
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+        
+        data = {
+            'grant_type': 'account_credentials',
+            'account_id': self.account_id
+        }
         
+        response = http.post(self.oauth_url, headers=headers, data=data,
+                             timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        response.raise_for_status()
+        
+        token_data = response.json()
+        return token_data['access_token'], token_data.get('expires_in', 3600)
+    
+    def _get_access_token(self) -> Optional[str]:
+        """Get the shared access token, refreshing it if needed."""
         if not self.is_configured():
             logger.error("Zoom credentials not configured")
             return None
         
         try:
-            # Create Server-to-Server OAuth token
-            auth_string = f"{self.client_id}:{self.client_secret}"
-            auth_bytes = auth_string.encode('utf-8')
-            auth_b64 = base64.b64encode(auth_bytes).decode('utf-8')
-            
-            headers = {
-                'Authorization': f'Basic {auth_b64}',
-                'Content-Type': 'application/x-www-form-urlencoded'
-            }
-            
-            data = {
-                'grant_type': 'account_credentials',
-                'account_id': self.account_id
-            }
-            
-            response = requests.post(self.oauth_url, headers=headers, data=data)
-            response.raise_for_status()
-            
-            token_data = response.json()
-            self._access_token = token_data['access_token']
-            expires_in = token_data.get('expires_in', 3600)
-            self._token_expires_at = datetime.utcnow() + timedelta(seconds=expires_in - 300)  # 5 min buffer
-            
-            return self._access_token
-            
+            return token_cache.get(self._token_key, self._fetch_token)
         except Exception as e:
             logger.error(f"Failed to get Zoom access token: {str(e)}")
             return None
     
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Call the Zoom API with the shared token and session.
+        
+        Raises:
+            RuntimeError: If no access token is available
+            requests.HTTPError: On a non-2xx response
+        """
+        for attempt in range(2):
+            token = self._get_access_token()
+            if not token:
+                raise RuntimeError('No Zoom access token')
+            headers = {'Authorization': f'Bearer {token}'}
+            if 'json' in kwargs:
+                headers['Content-Type'] = 'application/json'
+            response = http.request(method, f'{self.base_url}{path}', headers=headers,
+                                    timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+            if response.status_code == 401 and attempt == 0:
+                # Revoked or expired early: drop it and retry once with a fresh token
+                token_cache.invalidate(self._token_key, token)
+                continue
+            response.raise_for_status()
+            return response
+    
     def create_meeting(
         self,
         topic: str,
@@ -90,56 +270,13 @@ class ZoomService:
         Returns:
             Dictionary with meeting details or None if failed
         """
-        token = self._get_access_token()
-        if not token:
-            return None
-        
         try:
-            headers = {
-                'Authorization': f'Bearer {token}',
-                'Content-Type': 'application/json'
-            }
-            
-            meeting_data = {
-                'topic': topic,
-                'type': 2,  # Scheduled meeting
-                'start_time': start_time.strftime('%Y-%m-%dT%H:%M:%S'),
-                'duration': duration,
-                'timezone': timezone,
-                'settings': {
-                    'host_video': True,
-                    'participant_video': True,
-                    'join_before_host': False,
-                    'mute_upon_entry': True,
-                    'waiting_room': True,
-                    'audio': 'both',
-                    'auto_recording': 'cloud'  # Auto-record to cloud
-                }
-            }
-            
-            if password:
-                meeting_data['password'] = password
-            
-            if agenda:
-                meeting_data['agenda'] = agenda
+            meeting_data = meeting_payload(topic, start_time, duration, timezone, password, agenda)
             
             # Use 'me' as user_id for account-level app
-            response = requests.post(
-                f'{self.base_url}/users/me/meetings',
-                headers=headers,
-                json=meeting_data
-            )
-            response.raise_for_status()
-            
-            meeting_info = response.json()
+            response = self.request('POST', '/users/me/meetings', json=meeting_data)
             
-            return {
-                'meeting_id': str(meeting_info['id']),
-                'meeting_url': meeting_info['join_url'],
-                'meeting_password': meeting_info.get('password'),
-                'host_url': meeting_info.get('start_url'),
-                'platform': 'zoom'
-            }
+            return meeting_details(response.json())
             
         except Exception as e:
             logger.error(f"Failed to create Zoom meeting: {str(e)}")
@@ -155,20 +292,8 @@ class ZoomService:
         Returns:
             True if successful, False otherwise
         """
-        token = self._get_access_token()
-        if not token:
-            return False
-        
         try:
-            headers = {
-                'Authorization': f'Bearer {token}'
-            }
-            
-            response = requests.delete(
-                f'{self.base_url}/meetings/{meeting_id}',
-                headers=headers
-            )
-            response.raise_for_status()
+            self.request('DELETE', f'/meetings/{meeting_id}')
             
             return True
             
@@ -186,20 +311,8 @@ class ZoomService:
         Returns:
             Dictionary with meeting details or None if failed
         """
-        token = self._get_access_token()
-        if not token:
-            return None
-        
         try:
-            headers = {
-                'Authorization': f'Bearer {token}'
-            }
-            
-            response = requests.get(
-                f'{self.base_url}/meetings/{meeting_id}',
-                headers=headers
-            )
-            response.raise_for_status()
+            response = self.request('GET', f'/meetings/{meeting_id}')
             
             return response.json()
             
@@ -228,16 +341,7 @@ class ZoomService:
         Returns:
             True if successful, False otherwise
         """
-        token = self._get_access_token()
-        if not token:
-            return False
-        
         try:
-            headers = {
-                'Authorization': f'Bearer {token}',
-                'Content-Type': 'application/json'
-            }
-            
             update_data = {}
             if topic:
                 update_data['topic'] = topic
@@ -251,12 +355,7 @@ class ZoomService:
             if not update_data:
                 return True  # Nothing to update
             
-            response = requests.patch(
-                f'{self.base_url}/meetings/{meeting_id}',
-                headers=headers,
-                json=update_data
-            )
-            response.raise_for_status()
+            self.request('PATCH', f'/meetings/{meeting_id}', json=update_data)
             
             return True
             
@@ -0,0 +1,84 @@
+"""Dialect-aware SQL aggregation helpers for analytics endpoints.
+
+``date_bucket`` renders a date/datetime column as a bucket label string
+that is identical on SQLite and PostgreSQL:
+
+* ``day``   - ``YYYY-MM-DD``
+* ``week``  - ``YYYY-MM-DD`` of the Monday starting the ISO week
+* ``month`` - ``YYYY-MM``
+
+``grouped_totals`` runs a ``GROUP BY`` and returns plain dicts straight
+from result tuples, so no ORM entities are hydrated.
+"""
+from sqlalchemy import String, select
+from sqlalchemy.exc import CompileError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+from app import db
+
+BUCKETS = ('day', 'week', 'month')
+
+
+class date_bucket(FunctionElement):
+    """SQL expression truncating a date/datetime to a day, week or month label."""
+
+    type = String()
+    name = 'date_bucket'
+    inherit_cache = True
+
+    def __init__(self, column, granularity='day'):
+        if granularity not in BUCKETS:
+            raise ValueError(f"Invalid bucket '{granularity}', expected one of: {', '.join(BUCKETS)}")
+        self.granularity = granularity
+        super().__init__(column)
+
+    # granularity changes the SQL, so it must be part of the statement cache key
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ('granularity', InternalTraversal.dp_string)
+    ]
+
+
+@compiles(date_bucket, 'sqlite')
+def _date_bucket_sqlite(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    if element.granularity == 'month':
+        return f"strftime('%Y-%m', {column})"
+    if element.granularity == 'week':
+        # Step back six days, then forward to the next Monday: the week's Monday
+        return f"date({column}, '-6 days', 'weekday 1')"
+    return f"date({column})"
+
+
+@compiles(date_bucket, 'postgresql')
+def _date_bucket_postgresql(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    if element.granularity == 'month':
+        return f"to_char({column}, 'YYYY-MM')"
+    if element.granularity == 'week':
+        return f"to_char(date_trunc('week', {column}), 'YYYY-MM-DD')"
+    return f"to_char({column}, 'YYYY-MM-DD')"
+
+
+@compiles(date_bucket)
+def _date_bucket_default(element, compiler, **kw):
+    raise CompileError(f"date_bucket is not supported on the {compiler.dialect.name} dialect")
+
+
+def grouped_totals(key, measure, *filters, order_by_key=True):
+    """
+    Aggregate ``measure`` grouped by ``key`` in the database.
+
+    Args:
+        key: Column or SQL expression to group by (e.g. ``date_bucket(...)``)
+        measure: Aggregate expression (e.g. ``func.sum(Model.amount)``)
+        *filters: WHERE clauses
+        order_by_key: Return buckets sorted by key
+
+    Returns:
+        Dict of key -> aggregated value
+    """
+    stmt = select(key, measure).where(*filters).group_by(key)
+    if order_by_key:
+        stmt = stmt.order_by(key)
+    return {row[0]: row[1] for row in db.session.execute(stmt)}
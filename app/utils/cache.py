@@ -0,0 +1,354 @@
+"""Per-trainer response cache for the dashboard endpoints.
+
+Cached entries are keyed by trainer, endpoint and query string, and every
+key embeds the trainer's current *generation* number. Invalidation does
+not hunt for keys. It bumps the generation, which orphans all of that
+trainer's entries in O(1). Orphaned entries fall out through LRU
+eviction or TTL expiry.
+
+Generations live in the ``dashboard_cache_generations`` table of the
+application database, which every gunicorn worker and ``flask worker``
+process shares, whichever backend holds the entries. Each cached request
+reads its trainer's generation with one primary-key lookup.
+
+Generations are bumped from SQLAlchemy mapper events on the models that
+feed the dashboard. The affected trainers are collected during flush and
+bumped in the same transaction, just before it commits. The new
+generation becomes visible together with the data. A request that read
+the old generation therefore stores its result under a key nobody asks
+for again, and stale data is never served. A rolled-back transaction
+bumps nothing.
+
+Backends (entries only):
+
+* ``memory`` - in-process LRU (default, one copy per gunicorn worker)
+* ``sqlite`` - a shared SQLite file, so all workers on a host share
+  entries
+* ``null``   - caching disabled
+"""
+import functools
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from flask import request, jsonify
+from flask_login import current_user
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session as OrmSession
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+class NullCache:
+    """Backend that never stores anything."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache:
+    """
+    Cache stored in a SQLite file shared by every worker on the host.
+
+    Pass ``mode`` (e.g. ``0o600``) to create the database with those
+    permission bits instead of the process umask. SQLite gives the ``-wal``
+    and ``-shm`` files it creates the database file's permissions, so they
+    are covered too.
+    """
+
+    def __init__(self, path, max_entries=10000, mode=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.mode = mode
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if self.mode is not None:
+                self._restrict()
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _restrict(self):
+        # Create the file with ``mode`` before SQLite opens it, and tighten
+        # files left by earlier runs
+        os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, self.mode))
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.chmod(self.path + suffix, self.mode)
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        expires_at = time.time() + ttl if ttl else None
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, json.dumps(value), expires_at)
+        )
+        # Cheap periodic cleanup instead of a background sweeper
+        self._writes += 1
+        if self._writes % 100 == 0:
+            conn.execute('DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?', (time.time(),))
+            conn.execute(
+                'DELETE FROM cache WHERE expires_at IS NOT NULL AND key NOT IN '
+                '(SELECT key FROM cache ORDER BY expires_at DESC LIMIT ?)',
+                (self.max_entries,)
+            )
+
+    def delete(self, key):
+        self._connect().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache')
+
+
+class DashboardCache:
+    """Per-trainer cache with generation-based invalidation."""
+
+    def __init__(self):
+        self.backend = NullCache()
+        self.enabled = False
+        self.ttl = 300
+
+    def init_app(self, app):
+        """Configure the backend from ``DASHBOARD_CACHE_*`` settings."""
+        backend = app.config.get('DASHBOARD_CACHE_BACKEND', 'memory')
+        self.ttl = app.config.get('DASHBOARD_CACHE_TTL', 300)
+        max_entries = app.config.get('DASHBOARD_CACHE_MAX_ENTRIES', 1024)
+
+        if backend == 'sqlite':
+            path = app.config.get('DASHBOARD_CACHE_PATH') or os.path.join(
+                tempfile.gettempdir(), 'mectofitness_dashboard_cache.db'
+            )
+            self.backend = SQLiteCache(path, max_entries=max_entries)
+        elif backend == 'memory':
+            self.backend = LRUCache(max_entries=max_entries)
+        else:
+            self.backend = NullCache()
+        self.enabled = not isinstance(self.backend, NullCache)
+
+        register_invalidation_events()
+        app.extensions['dashboard_cache'] = self
+        logger.info(f"Dashboard cache backend: {backend}")
+
+    def _generation(self, trainer_id):
+        from app.models.analytics import DashboardCacheGeneration
+        return db.session.execute(
+            select(DashboardCacheGeneration.generation).where(DashboardCacheGeneration.trainer_id == trainer_id)
+        ).scalar() or 0
+
+    def make_key(self, trainer_id, endpoint, params):
+        """Build the cache key for one trainer/endpoint/query string."""
+        query = '&'.join(f'{k}={v}' for k, v in sorted(params))
+        return f'dash:{trainer_id}:{self._generation(trainer_id)}:{endpoint}:{query}'
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value):
+        self.backend.set(key, value, self.ttl)
+
+    def invalidate(self, trainer_id):
+        """Drop every cached entry for ``trainer_id`` when the current transaction commits."""
+        bump_generations(db.session.connection(), [trainer_id])
+
+    def clear(self):
+        self.backend.clear()
+
+
+dashboard_cache = DashboardCache()
+
+
+def cached_per_trainer(endpoint):
+    """
+    Cache a successful JSON view response for the current trainer.
+
+    Must be applied below ``@login_required``. The key includes every
+    query-string argument, so ``?days=7`` and ``?days=30`` are separate
+    entries. Only 200 responses are cached.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not dashboard_cache.enabled:
+                return view(*args, **kwargs)
+            key = dashboard_cache.make_key(
+                current_user.id, endpoint, request.args.items(multi=True)
+            )
+            body = dashboard_cache.get(key)
+            if body is not None:
+                return jsonify(body), 200
+
+            result = view(*args, **kwargs)
+            response, status = result if isinstance(result, tuple) else (result, 200)
+            if status == 200:
+                dashboard_cache.set(key, response.get_json())
+            return result
+        return wrapper
+    return decorator
+
+
+_events_registered = False
+
+
+def _affected_trainers(connection, target):
+    """Trainer ids whose dashboards are affected by a write to ``target``."""
+    trainer_ids = set()
+    state = inspect(target)
+    if 'trainer_id' in state.attrs:
+        history = state.attrs.trainer_id.history
+        trainer_ids.update(history.added or ())
+        trainer_ids.update(history.unchanged or ())
+        trainer_ids.update(history.deleted or ())
+    trainer_ids.discard(None)
+
+    # Rows written before trainer_id was denormalized only carry client_id
+    client_id = getattr(target, 'client_id', None)
+    if not trainer_ids and client_id is not None:
+        from app.models.client import Client
+        trainer_id = connection.execute(
+            Client.__table__.select().with_only_columns(Client.__table__.c.trainer_id)
+            .where(Client.__table__.c.id == client_id)
+        ).scalar()
+        if trainer_id is not None:
+            trainer_ids.add(trainer_id)
+    return trainer_ids
+
+
+def _record_write(mapper, connection, target):
+    session = OrmSession.object_session(target)
+    if session is None:
+        return
+    session.info.setdefault('dashboard_cache_dirty', set()).update(
+        _affected_trainers(connection, target)
+    )
+
+
+def bump_generations(connection, trainer_ids):
+    """Increment the dashboard cache generation of each trainer (race-safe upsert)."""
+    from app.models.analytics import DashboardCacheGeneration
+    table = DashboardCacheGeneration.__table__
+    # Sorted, so concurrent transactions lock the rows in the same order
+    for trainer_id in sorted(trainer_ids):
+        values = {'trainer_id': trainer_id, 'generation': 1}
+        if connection.dialect.name == 'postgresql':
+            stmt = postgresql.insert(table).values(**values)
+        elif connection.dialect.name == 'sqlite':
+            stmt = sqlite.insert(table).values(**values)
+        else:
+            bumped = connection.execute(
+                update(table).where(table.c.trainer_id == trainer_id).values(generation=table.c.generation + 1)
+            )
+            if not bumped.rowcount:
+                connection.execute(table.insert().values(**values))
+            continue
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=['trainer_id'], set_={'generation': table.c.generation + 1}
+        ))
+
+
+def _before_commit(session):
+    # Flush first, so writes still pending in this commit are recorded too
+    session.flush()
+    trainer_ids = session.info.pop('dashboard_cache_dirty', None)
+    # Bumped even where caching is off: other processes may cache these dashboards
+    if trainer_ids:
+        bump_generations(session.connection(), trainer_ids)
+
+
+def _after_rollback(session):
+    session.info.pop('dashboard_cache_dirty', None)
+
+
+def register_invalidation_events():
+    """Attach the write-through invalidation listeners (idempotent)."""
+    global _events_registered
+    if _events_registered:
+        return
+
+    from app.models.client import Client
+    from app.models.session import Session
+    from app.models.program import Program
+    from app.models.payments import Payment, Subscription
+    from app.models.booking import OnlineBooking
+
+    # Models whose writes change dashboard output
+    for model in (Client, Session, Program, Payment, Subscription, OnlineBooking):
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(model, name, _record_write)
+
+    event.listen(OrmSession, 'before_commit', _before_commit)
+    event.listen(OrmSession, 'after_rollback', _after_rollback)
+    _events_registered = True
@@ -0,0 +1,56 @@
+"""Named eager-loading profiles for API endpoints.
+
+A profile maps an endpoint's include flags (``include_client``,
+``include_exercises``, ...) to the loader options that fetch those
+relationships with the rows, so serializing a page touches no lazy
+relationship:
+
+* ``selectinload`` for lists: one ``SELECT ... WHERE id IN (...)`` per
+  relationship for the whole page, however many rows it has;
+* ``joinedload`` for a single row (detail views): fetched in the same
+  query.
+
+Usage::
+
+    program_loading = register_profile('programs', exercises=selectinload(Program.ordered_exercises))
+
+    query = query.options(*program_loading.options(exercises=include_exercises))
+"""
+
+profiles = {}
+
+
+class LoadingProfile:
+    """Loader options per include flag of one endpoint."""
+
+    def __init__(self, name, includes):
+        """
+        Args:
+            name: Registry name
+            includes: Mapping of include flag to a loader option or a tuple
+                of them
+        """
+        self.name = name
+        self.includes = {
+            flag: tuple(options) if isinstance(options, (list, tuple)) else (options,)
+            for flag, options in includes.items()
+        }
+
+    def options(self, **flags):
+        """Loader options for the include flags that are true."""
+        unknown = set(flags) - set(self.includes)
+        if unknown:
+            raise ValueError(f'{self.name}: unknown include flags {", ".join(sorted(unknown))}')
+        return [option for flag, included in flags.items() if included for option in self.includes[flag]]
+
+    def __repr__(self):
+        return f'<LoadingProfile {self.name} ({", ".join(self.includes)})>'
+
+
+def register_profile(name, **includes):
+    """Register a loading profile (see ``LoadingProfile``); returns it."""
+    if name in profiles:
+        raise ValueError(f'Loading profile {name!r} is already registered')
+    profile = LoadingProfile(name, includes)
+    profiles[name] = profile
+    return profile
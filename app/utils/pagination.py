@@ -0,0 +1,229 @@
+"""Shared pagination helpers for list endpoints.
+
+Two modes are supported:
+
+* Offset mode (default) - ``?page=N&per_page=M``. Backed by Flask-SQLAlchemy's
+  ``paginate`` and returns total counts, exactly like the endpoints always did.
+* Keyset mode (opt-in) - ``?cursor=`` (empty for the first page, then the
+  ``next_cursor``/``prev_cursor`` values from the previous response). The query
+  seeks on ``(sort_column, id)`` so deep pages cost the same as page 1, and the
+  ``COUNT(*)`` is skipped unless ``?include_total=true`` is passed.
+
+Both modes order by plain ``sort_column, id``, so the ``(trainer_id,
+sort_column)`` indexes serve the ORDER BY in either direction. NULL sort
+values therefore sit where the database puts them: last when ascending on
+PostgreSQL, first on SQLite and MySQL (and the other way round when
+descending).
+"""
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded or does not match the query."""
+
+
+def _encode_value(value):
+    """Serialize a sort value into a JSON-safe, type-tagged pair."""
+    if isinstance(value, datetime):
+        return ['dt', value.isoformat()]
+    if isinstance(value, date):
+        return ['d', value.isoformat()]
+    return ['v', value]
+
+
+def _decode_value(tagged):
+    """Reverse of ``_encode_value``."""
+    kind, value = tagged
+    if kind == 'dt':
+        return datetime.fromisoformat(value)
+    if kind == 'd':
+        return date.fromisoformat(value)
+    return value
+
+
+def encode_cursor(sort_key, value, row_id, direction):
+    """
+    Build an opaque cursor string.
+
+    Args:
+        sort_key: Name of the sort column (cursors are bound to one sort)
+        value: Sort column value of the boundary row
+        row_id: Primary key of the boundary row
+        direction: 'next' or 'prev'
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = {'k': sort_key, 'v': _encode_value(value), 'i': row_id, 'd': direction}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_key):
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or was issued for another sort
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        value = _decode_value(payload['v'])
+        row_id = int(payload['i'])
+        direction = payload['d']
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+    if payload.get('k') != sort_key or direction not in ('next', 'prev'):
+        raise InvalidCursor('Cursor does not match the requested sort order')
+
+    return value, row_id, direction
+
+
+# Dialects that sort NULL after every value in ascending order
+NULLS_HIGH_DIALECTS = frozenset(('postgresql', 'oracle'))
+
+
+def _is_nullable(column):
+    """Return True if the mapped column can hold NULLs."""
+    try:
+        return any(c.nullable for c in column.property.columns)
+    except AttributeError:
+        return True
+
+
+def _nulls_high(query, sort_column):
+    """Return True if the query's database sorts NULL after all values ascending."""
+    try:
+        bind = query.session.get_bind(mapper=sort_column.class_)
+    except AttributeError:
+        return False
+    return bind.dialect.name in NULLS_HIGH_DIALECTS
+
+
+def _seek_ranges(sort_column, id_column, value, row_id, ascending, nullable, nulls_after):
+    """
+    Build the WHERE clauses that resume after ``(value, row_id)``.
+
+    Returns one clause per index range, in the order their rows come: the
+    rest of the non-NULL (or NULL) sort values, then the NULL (or non-NULL)
+    ones when they follow. Each clause is a single range, so the planner
+    seeks straight to the cursor instead of filtering everything before it.
+    The ``sort_column >= value`` bound is kept outside of the OR for the
+    same reason.
+    """
+    id_cmp = id_column > row_id if ascending else id_column < row_id
+
+    if value is None:
+        ranges = [and_(sort_column.is_(None), id_cmp)]
+        if not nulls_after:
+            ranges.append(sort_column.isnot(None))
+        return ranges
+
+    if ascending:
+        ranges = [and_(sort_column >= value, or_(sort_column > value, id_cmp))]
+    else:
+        ranges = [and_(sort_column <= value, or_(sort_column < value, id_cmp))]
+
+    if nullable and nulls_after:
+        ranges.append(sort_column.is_(None))
+    return ranges
+
+
+def paginate_query(query, sort_column, descending=False, page=1, per_page=20,
+                   cursor=None, include_total=False, id_column=None):
+    """
+    Paginate an unordered query in offset or keyset mode.
+
+    Args:
+        query: Filtered query without ORDER BY
+        sort_column: Mapped column to sort on
+        descending: Sort direction
+        page: Page number (offset mode only)
+        per_page: Page size
+        cursor: None for offset mode, '' for the first keyset page, or a
+            cursor from a previous response
+        include_total: Run COUNT(*) in keyset mode
+        id_column: Tie-breaker column (defaults to the entity's ``id``)
+
+    Returns:
+        Tuple of (items, pagination_dict)
+
+    Raises:
+        InvalidCursor: If ``cursor`` cannot be used with this sort
+    """
+    if id_column is None:
+        id_column = sort_column.class_.id
+
+    if cursor is None:
+        order = [sort_column.desc(), id_column.desc()] if descending else [sort_column.asc(), id_column.asc()]
+        pagination = query.order_by(*order).paginate(page=page, per_page=per_page, error_out=False)
+        return pagination.items, {
+            'page': pagination.page,
+            'per_page': pagination.per_page,
+            'total_pages': pagination.pages,
+            'total_items': pagination.total,
+            'has_next': pagination.has_next,
+            'has_prev': pagination.has_prev
+        }
+
+    sort_key = sort_column.key
+    ascending = not descending
+    total = query.order_by(None).count() if include_total else None
+
+    direction = 'next'
+    if cursor:
+        value, row_id, direction = decode_cursor(cursor, sort_key)
+
+    # Walking backwards means seeking in the opposite order
+    forward = direction == 'next'
+    seek_ascending = ascending if forward else not ascending
+    if seek_ascending:
+        order = [sort_column.asc(), id_column.asc()]
+    else:
+        order = [sort_column.desc(), id_column.desc()]
+
+    limit = per_page + 1
+    if not cursor:
+        rows = query.order_by(*order).limit(limit).all()
+    else:
+        # A page that crosses between NULL and non-NULL sort values takes one
+        # query per side
+        nulls_after = seek_ascending == _nulls_high(query, sort_column)
+        rows = []
+        for clause in _seek_ranges(sort_column, id_column, value, row_id, seek_ascending,
+                                   _is_nullable(sort_column), nulls_after):
+            rows += query.filter(clause).order_by(*order).limit(limit - len(rows)).all()
+            if len(rows) >= limit:
+                break
+
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    if not forward:
+        items.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, bool(cursor)
+
+    next_cursor = prev_cursor = None
+    if items:
+        first, last = items[0], items[-1]
+        if has_next:
+            next_cursor = encode_cursor(sort_key, getattr(last, sort_key), last.id, 'next')
+        if has_prev:
+            prev_cursor = encode_cursor(sort_key, getattr(first, sort_key), first.id, 'prev')
+
+    meta = {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'has_next': has_next,
+        'has_prev': has_prev
+    }
+    if total is not None:
+        meta['total_items'] = total
+    return items, meta
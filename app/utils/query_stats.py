@@ -0,0 +1,187 @@
+"""Per-request SQL query counting, timing and query budgets.
+
+Every statement a request sends to the database is counted and timed on
+``flask.g`` (engine-level ``before_cursor_execute``/``after_cursor_execute``
+listeners, so ORM loads, lazy loads and Core statements all count). The
+request keeps its query count, total DB time and its slowest statements.
+
+* ``SERVER_TIMING``: each response carries a ``Server-Timing`` header with
+  the request's query count and DB time, e.g.
+  ``db;dur=12.4;desc="5 queries", db-slowest;dur=8.1``. Browser dev tools
+  show it next to the request; statements are never sent to the client.
+* ``SLOW_QUERY_MS``: statements slower than this are logged to the
+  ``app.slow_queries`` logger as one JSON object per statement, with the
+  request they ran in (method, path, endpoint, position in the request).
+  Parameters are not logged. Statements outside a request (background
+  jobs, CLI) are logged without the request fields.
+
+With ``QUERY_BUDGET`` set (the testing config sets it), a request that
+issues more queries than its budget fails with ``QueryBudgetExceeded``
+after the view returns, so an N+1 regression fails the test that hits the
+endpoint instead of slipping through. Views declare a tighter budget with
+``@query_budget(n)``; the budget counts every query of the request,
+including the login user load and pagination counts.
+
+Usage::
+
+    @api_programs.route('', methods=['GET'])
+    @login_required
+    @query_budget(6)
+    def get_programs():
+        ...
+"""
+import json
+import logging
+import re
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('app.slow_queries')
+
+# Slowest statements kept per request
+SLOWEST_KEPT = 3
+# Longest statement text written to the slow-query log
+MAX_STATEMENT_LENGTH = 2000
+
+_events_registered = False
+_slow_query_ms = 0.0
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request issued more queries than its budget."""
+
+
+def query_budget(limit):
+    """Decorator: fail (under ``QUERY_BUDGET``) when the view issues more than ``limit`` queries."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def query_count():
+    """Queries issued so far by the current request (0 outside a request)."""
+    return g.get('query_count', 0) if has_request_context() else 0
+
+
+def query_time_ms():
+    """Milliseconds the current request has spent in the database (0 outside a request)."""
+    return g.get('query_time', 0.0) * 1000 if has_request_context() else 0.0
+
+
+def slowest_queries():
+    """The current request's slowest statements as ``(milliseconds, statement)``, slowest first."""
+    return list(g.get('slowest_queries', ())) if has_request_context() else []
+
+
+def _normalize(statement):
+    """Statement on one line, truncated for the log."""
+    statement = re.sub(r'\s+', ' ', statement).strip()
+    if len(statement) > MAX_STATEMENT_LENGTH:
+        statement = statement[:MAX_STATEMENT_LENGTH] + '...'
+    return statement
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    ms = elapsed * 1000
+    in_request = has_request_context()
+
+    if in_request:
+        g.query_time = g.get('query_time', 0.0) + elapsed
+        slowest = g.get('slowest_queries')
+        if slowest is None:
+            slowest = g.slowest_queries = []
+        if len(slowest) < SLOWEST_KEPT or ms > slowest[-1][0]:
+            slowest.append((ms, statement))
+            slowest.sort(key=lambda item: item[0], reverse=True)
+            del slowest[SLOWEST_KEPT:]
+
+    if _slow_query_ms and ms >= _slow_query_ms:
+        record = {
+            'event': 'slow_query',
+            'duration_ms': round(ms, 2),
+            'threshold_ms': _slow_query_ms,
+            'statement': _normalize(statement),
+            'executemany': executemany,
+        }
+        if in_request:
+            record.update(
+                method=request.method,
+                path=request.path,
+                endpoint=request.endpoint,
+                query_index=g.get('query_count', 0),
+            )
+        slow_query_logger.warning(json.dumps(record))
+
+
+def register_query_events():
+    """Attach the statement counter and timer to every engine (idempotent)."""
+    global _events_registered
+    if _events_registered:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _events_registered = True
+
+
+def server_timing():
+    """``Server-Timing`` value for the current request's queries."""
+    metrics = [f'db;dur={query_time_ms():.1f};desc="{query_count()} queries"']
+    slowest = g.get('slowest_queries')
+    if slowest:
+        metrics.append(f'db-slowest;dur={slowest[0][0]:.1f}')
+    return ', '.join(metrics)
+
+
+def init_app(app):
+    """Count and time queries per request; add ``Server-Timing``, log slow queries, enforce ``QUERY_BUDGET``."""
+    global _slow_query_ms
+    register_query_events()
+    _slow_query_ms = app.config.get('SLOW_QUERY_MS') or 0.0
+
+    @app.before_request
+    def reset_query_count():
+        # g outlives the request when an app context was already pushed
+        g.query_count = 0
+        g.query_time = 0.0
+        g.slowest_queries = []
+
+    if app.config.get('SERVER_TIMING'):
+        @app.after_request
+        def add_server_timing(response):
+            existing = response.headers.get('Server-Timing')
+            value = server_timing()
+            response.headers['Server-Timing'] = f'{existing}, {value}' if existing else value
+            return response
+
+    default_budget = app.config.get('QUERY_BUDGET')
+    if not default_budget:
+        return
+
+    @app.after_request
+    def check_query_budget(response):
+        view = app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', default_budget)
+        count = query_count()
+        if count > budget:
+            raise QueryBudgetExceeded(
+                f'{request.method} {request.full_path.rstrip("?")} issued {count} queries '
+                f'(budget {budget}, endpoint {request.endpoint})'
+            )
+        return response
+
+    logger.info(f"Query budget enforced: {default_budget} queries per request")
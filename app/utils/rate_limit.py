@@ -0,0 +1,69 @@
+"""Client-side rate limiting for calls to external APIs.
+
+``TokenBucket`` holds up to ``capacity`` tokens and refills at ``rate``
+tokens per second. Each call takes one token, so short bursts go out
+immediately and sustained traffic is paced to ``rate``. It is thread-safe,
+so one bucket can be shared by a thread pool (and by every request in a
+process) to stay under a provider's per-account limit.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst (defaults to one second's worth)
+            clock: Monotonic time source (seconds)
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take ``tokens`` if available now; return False instead of waiting."""
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Take ``tokens``, sleeping until they are available.
+
+        Returns:
+            False if ``timeout`` seconds would pass first, otherwise True
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def drain(self):
+        """Empty the bucket, e.g. after the provider answered 429."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = 0.0
@@ -0,0 +1,292 @@
+"""Compiled model serializers and the JSON encoder for API responses.
+
+A ``Schema`` is the field list of one API representation of a model (a
+client in a listing, a session with its notes, ...). Each schema is
+compiled once into a plain function that builds the dict with a single
+literal: no ``getattr`` loop and no per-field branching at request time.
+Loaded column values are read straight from the instance dict; expired or
+deferred columns fall back to attribute access, which loads them.
+Date and datetime columns, found from the model's mapper, are rendered with
+``isoformat()`` (``None`` stays ``None``). Computed fields are callables
+taking the object.
+
+``?fields=`` projections compile their own function the first time they are
+requested and are cached on the schema, so ``?fields=id,name`` costs the
+same as a schema with two fields. The same projection narrows the SQL
+SELECT: ``load_options(fields)`` is a ``load_only`` of the columns those
+fields read, so other columns are never fetched. Fields declared
+``deferred`` (large Text columns) are left out of list views unless named
+in ``?fields=``.
+
+``FastJSONProvider`` replaces Flask's stdlib JSON provider, so every
+``jsonify`` encodes with ``orjson`` when it is installed (``JSON_BACKEND``
+config: ``auto``, ``orjson`` or ``json``). orjson builds the response body
+straight as bytes. Output matches the stdlib provider: sorted keys,
+indented in debug mode, dates as HTTP dates, ``Decimal`` and ``UUID`` as
+strings.
+
+Usage::
+
+    client_schema = register_schema('client', Client, ('id', 'email', 'created_at'),
+                                    computed={'name': lambda c: c.full_name})
+
+    fields = parse_fields(request.args.get('fields'), client_schema,  # InvalidFields -> 400
+                          default=client_schema.list_fields)
+    clients = query.options(*client_schema.load_options(fields)).all()
+    data = client_schema.dump_many(clients, fields)
+"""
+import json
+import logging
+import threading
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Date, DateTime, Time, inspect
+from sqlalchemy.orm import load_only
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Most distinct ?fields= projections compiled per schema (oldest dropped)
+MAX_PROJECTIONS = 64
+
+_ISO_TYPES = (Date, DateTime, Time)
+
+
+class InvalidFields(ValueError):
+    """``?fields=`` names a field the schema does not have."""
+
+
+class Schema:
+    """One API representation of a model, compiled to a serializer function."""
+
+    def __init__(self, name, model, fields=(), computed=None, defaults=None, requires=None, deferred=()):
+        """
+        Args:
+            name: Registry name
+            model: SQLAlchemy model class
+            fields: Attribute names, in output order
+            computed: Mapping of output key to ``callable(obj)``
+            defaults: Mapping of attribute name to the value used when it is
+                falsy (e.g. ``[]`` for a JSON array column)
+            requires: Mapping of computed or property field to the column
+                attributes it reads (columns require themselves)
+            deferred: Heavy fields left out of ``list_fields``
+        """
+        self.name = name
+        self.model = model
+        self.computed = dict(computed or {})
+        self.defaults = dict(defaults or {})
+        self.requires = {key: tuple(columns) for key, columns in (requires or {}).items()}
+        self.fields = tuple(fields) + tuple(key for key in self.computed if key not in fields)
+        self.field_set = frozenset(self.fields)
+        unknown = (frozenset(deferred) | frozenset(self.requires)) - self.field_set
+        if unknown:
+            raise ValueError(f'{self.name}: unknown fields {", ".join(sorted(unknown))}')
+        # Fields of list views without ?fields= (None: all fields)
+        self.list_fields = self.field_set - frozenset(deferred) if deferred else None
+        mapper = inspect(model)
+        columns = mapper.columns
+        self._columns = frozenset(attribute.key for attribute in mapper.column_attrs)
+        self._primary_key = [getattr(model, mapper.get_property_by_column(column).key)
+                             for column in mapper.primary_key]
+        self._iso = frozenset(
+            key for key in fields
+            if key in columns and isinstance(columns[key].type, _ISO_TYPES)
+        )
+        self._projections = {}
+        self._lock = threading.Lock()
+        self.serialize = self._compile(self.fields)
+
+    def _compile(self, fields):
+        namespace = {}
+        fast = self._source('_fast', fields, namespace, loaded=True)
+        slow = self._source('_slow', fields, namespace, loaded=False)
+        # Loaded column values are read from the instance dict, skipping the
+        # attribute descriptors; an unloaded (expired or deferred) column
+        # takes the attribute path, which loads it.
+        source = '\n'.join([
+            fast, slow,
+            'def serialize(obj):',
+            '    try:',
+            '        return _fast(obj, obj.__dict__)',
+            '    except KeyError:',
+            '        return _slow(obj, None)',
+        ])
+        exec(compile(source, f'<schema {self.name}>', 'exec'), namespace)
+        return namespace['serialize']
+
+    def _source(self, function, fields, namespace, loaded):
+        lines, items = [], []
+        for index, key in enumerate(fields):
+            if key in self.computed:
+                namespace[f'_c{index}'] = self.computed[key]
+                items.append(f'{key!r}: _c{index}(obj)')
+                continue
+            if not key.isidentifier():
+                raise ValueError(f'{self.name}: field {key!r} is not an attribute name')
+            value = f'state[{key!r}]' if loaded and key in self._columns else f'obj.{key}'
+            if key in self._iso:
+                lines.append(f'    v{index} = {value}')
+                items.append(f'{key!r}: v{index}.isoformat() if v{index} is not None else None')
+            elif key in self.defaults:
+                items.append(f'{key!r}: {value} or {self._default_expr(index, key, namespace)}')
+            else:
+                items.append(f'{key!r}: {value}')
+        return '\n'.join(
+            [f'def {function}(obj, state):'] + lines + ['    return {' + ', '.join(items) + '}']
+        )
+
+    def _default_expr(self, index, key, namespace):
+        default = self.defaults[key]
+        # Empty containers as literals: a fresh object per call, no function call
+        if default == [] or default == {}:
+            return repr(default)
+        namespace[f'_d{index}'] = default
+        # Copy other mutable defaults so callers cannot share one object
+        if isinstance(default, (list, dict)):
+            return f'_d{index}.copy()'
+        return f'_d{index}'
+
+    def serializer(self, fields=None):
+        """The compiled function for ``fields`` (a projection of this schema), or all fields."""
+        if not fields:
+            return self.serialize
+        key = frozenset(fields)
+        function = self._projections.get(key)
+        if function is None:
+            unknown = key - self.field_set
+            if unknown:
+                raise InvalidFields(f'Unknown fields: {", ".join(sorted(unknown))}')
+            function = self._compile([name for name in self.fields if name in key])
+            with self._lock:
+                if len(self._projections) >= MAX_PROJECTIONS:
+                    self._projections.pop(next(iter(self._projections)))
+                self._projections[key] = function
+        return function
+
+    def load_options(self, fields=None, *also):
+        """
+        Query options loading only the columns ``fields`` read.
+
+        Args:
+            fields: Projection as passed to ``dump`` (default: all fields)
+            also: Further column attributes the caller reads (e.g.
+                ``Session.client_id`` for an included client, or the sort
+                column)
+
+        Returns:
+            ``[load_only(...)]``, or ``[]`` (full rows) when a field reads
+            columns the schema does not know about
+        """
+        columns = {column.key for column in also}
+        for key in fields or self.fields:
+            if key in self.requires:
+                columns.update(self.requires[key])
+            elif key in self._columns:
+                columns.add(key)
+            else:
+                return []
+        attributes = [getattr(self.model, column) for column in sorted(columns)] or self._primary_key
+        return [load_only(*attributes)]
+
+    def dump(self, obj, fields=None):
+        """``obj`` as a dict."""
+        return self.serializer(fields)(obj)
+
+    def dump_many(self, objects, fields=None):
+        """List of dicts for ``objects``."""
+        serialize = self.serializer(fields)
+        return [serialize(obj) for obj in objects]
+
+    def __repr__(self):
+        return f'<Schema {self.name} ({len(self.fields)} fields)>'
+
+
+schemas = {}
+
+
+def register_schema(name, model, fields=(), computed=None, defaults=None, requires=None, deferred=()):
+    """Compile and register a schema (see ``Schema``); returns it."""
+    if name in schemas:
+        raise ValueError(f'Schema {name!r} is already registered')
+    schema = Schema(name, model, fields, computed, defaults, requires, deferred)
+    schemas[name] = schema
+    return schema
+
+
+def parse_fields(value, schema, default=None):
+    """
+    Parse a ``?fields=`` value against ``schema``.
+
+    Args:
+        value: Comma-separated field names
+        schema: Schema the names belong to
+        default: Returned when ``value`` is empty (list views pass
+            ``schema.list_fields``)
+
+    Returns:
+        frozenset of field names, or ``default``
+
+    Raises:
+        InvalidFields: A name is not one of the schema's fields
+    """
+    if not value:
+        return default
+    fields = frozenset(name.strip() for name in value.split(',') if name.strip())
+    unknown = fields - schema.field_set
+    if unknown:
+        raise InvalidFields(f'Unknown fields: {", ".join(sorted(unknown))}')
+    return fields or default
+
+
+# ----------------------------------------------------------------------
+# Encoding
+# ----------------------------------------------------------------------
+
+# Dates, dataclasses, Decimal, UUID: rendered as Flask's stdlib provider does
+_default = DefaultJSONProvider.default
+
+
+def dumps_bytes(obj, sort_keys=False, indent=False):
+    """Encode ``obj`` to JSON bytes (orjson when installed, else the stdlib)."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+    return json.dumps(
+        obj, default=_default, sort_keys=sort_keys,
+        indent=2 if indent else None, separators=None if indent else (',', ':')
+    ).encode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when it is available."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        backend = app.config.get('JSON_BACKEND', 'auto')
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_BACKEND=orjson but orjson is not installed')
+        self.use_orjson = orjson is not None and backend != 'json'
+        logger.info(f"API JSON encoder: {'orjson' if self.use_orjson else 'json'}")
+
+    def _indent(self):
+        return self.compact is False or (self.compact is None and self._app.debug)
+
+    def dumps(self, obj, **kwargs):
+        if not self.use_orjson or kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj, sort_keys=self.sort_keys, indent=self._indent()).decode()
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = dumps_bytes(obj, sort_keys=self.sort_keys, indent=self._indent())
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
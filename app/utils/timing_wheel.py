@@ -0,0 +1,101 @@
+"""Hierarchical timing wheel.
+
+Holds timers for a bounded horizon with O(1) insertion and O(1) amortized
+expiry per tick, independent of how many timers are pending. Level 0 has
+one bucket per tick. Each higher level has buckets as wide as the whole
+level below it. When time reaches a higher-level bucket, its timers
+cascade down to finer levels.
+
+With ``slots=(60, 60, 24)`` and a 1-second tick, level 0 covers the next
+minute, level 1 the next hour and level 2 the next day.
+"""
+
+
+class TimingWheel:
+    """Timers keyed by integer tick."""
+
+    def __init__(self, slots=(60, 60, 24), start_tick=0):
+        self.slots = tuple(slots)
+        # Ticks covered by one bucket at each level: 1, slots[0], slots[0]*slots[1], ...
+        self.spans = []
+        span = 1
+        for count in self.slots:
+            self.spans.append(span)
+            span *= count
+        self.now = start_tick
+        self._levels = [[[] for _ in range(count)] for count in self.slots]
+        self._due = []
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def horizon(self):
+        """First tick that no longer fits in the wheel."""
+        top = len(self.slots) - 1
+        span = self.spans[top]
+        return (self.now // span) * span + span * self.slots[top]
+
+    def add(self, item, tick):
+        """
+        Schedule ``item`` to expire at ``tick``.
+
+        Returns:
+            False if ``tick`` is beyond the horizon (the caller keeps it)
+        """
+        if tick <= self.now:
+            self._due.append(item)
+            self._size += 1
+            return True
+        for level, (span, count) in enumerate(zip(self.spans, self.slots)):
+            window_start = (self.now // span) * span
+            if tick < window_start + span * count:
+                self._levels[level][(tick // span) % count].append((tick, item))
+                self._size += 1
+                return True
+        return False
+
+    def advance(self, to_tick):
+        """
+        Move time forward to ``to_tick`` and return every expired item.
+
+        Empty stretches are skipped bucket by bucket, so advancing over a
+        long idle period costs O(buckets), not O(ticks).
+        """
+        expired, self._due = self._due, []
+        self._size -= len(expired)
+        while self.now < to_tick:
+            tick = self._next_boundary(to_tick)
+            self.now = tick
+            # Cascade coarse buckets that start now, highest level first
+            for level in range(len(self.slots) - 1, 0, -1):
+                span = self.spans[level]
+                if tick % span == 0:
+                    bucket = self._levels[level][(tick // span) % self.slots[level]]
+                    if bucket:
+                        entries, bucket[:] = bucket[:], []
+                        self._size -= len(entries)
+                        for entry_tick, item in entries:
+                            self.add(item, entry_tick)
+                        expired.extend(self._due)
+                        self._size -= len(self._due)
+                        self._due = []
+            bucket = self._levels[0][tick % self.slots[0]]
+            if bucket:
+                expired.extend(item for _, item in bucket)
+                self._size -= len(bucket)
+                bucket.clear()
+        return expired
+
+    def _next_boundary(self, to_tick):
+        """The next tick with work to do (an occupied level-0 bucket or a cascade), capped at ``to_tick``."""
+        tick = self.now + 1
+        count0 = self.slots[0]
+        # Scan level 0 up to the next level-1 boundary
+        boundary = (tick // count0 + 1) * count0 if len(self.slots) > 1 else tick + count0
+        while tick < min(boundary, to_tick):
+            if self._levels[0][tick % count0]:
+                return tick
+            tick += 1
+        return min(tick, to_tick)
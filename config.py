@@ -63,6 +63,29 @@ class Config:
     # Pagination
     ITEMS_PER_PAGE = 20
     
+    # Dashboard cache entries: 'memory' (per worker), 'sqlite' (shared by all workers on a host) or 'null'.
+    # Invalidation goes through the database, so every process sees every write either way.
+    DASHBOARD_CACHE_BACKEND = os.environ.get('DASHBOARD_CACHE_BACKEND', 'memory')
+    DASHBOARD_CACHE_PATH = os.environ.get('DASHBOARD_CACHE_PATH')
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 300))
+    DASHBOARD_CACHE_MAX_ENTRIES = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRIES', 1024))
+    
+    # API JSON encoder: 'auto' (orjson when installed), 'orjson' or 'json' (stdlib)
+    JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+    
+    # Most SQL queries one request may issue before it fails (0 = not enforced).
+    # Views set tighter budgets with @query_budget(n).
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 0))
+    
+    # Server-Timing response header with each request's query count and DB time
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', 'true').lower() == 'true'
+    
+    # Statements slower than this are logged to 'app.slow_queries' with their request (0 = off)
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+    
+    # Outbound email/SMS: 'live' (SendGrid/Twilio) or 'stub' (recorded in memory, nothing sent)
+    MESSAGE_TRANSPORT = os.environ.get('MESSAGE_TRANSPORT', 'live')
+    
     # Upload
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = os.path.join(basedir, 'uploads')
@@ -93,6 +116,8 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    MESSAGE_TRANSPORT = 'stub'
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 30))
 
 
 config = {
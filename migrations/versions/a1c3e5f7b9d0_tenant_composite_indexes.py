@@ -0,0 +1,90 @@
+"""Add composite indexes for tenant-scoped hot filters
+
+Adds a denormalized trainer_id to payments and subscriptions (backfilled
+from clients.trainer_id) so revenue and subscription queries can be
+scoped by tenant, then creates the composite indexes used by the list,
+calendar, stats and conflict-check queries.
+
+Revision ID: a1c3e5f7b9d0
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f7b9d0'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_clients_trainer_active_last_name', 'clients', ['trainer_id', 'is_active', 'last_name']),
+    ('ix_clients_trainer_created', 'clients', ['trainer_id', 'created_at']),
+    ('ix_sessions_trainer_start', 'sessions', ['trainer_id', 'scheduled_start']),
+    ('ix_sessions_trainer_status_start', 'sessions', ['trainer_id', 'status', 'scheduled_start']),
+    ('ix_sessions_client_start', 'sessions', ['client_id', 'scheduled_start']),
+    ('ix_programs_trainer_status', 'programs', ['trainer_id', 'status']),
+    ('ix_programs_trainer_created', 'programs', ['trainer_id', 'created_at']),
+    ('ix_programs_client_created', 'programs', ['client_id', 'created_at']),
+    ('ix_exercises_program_day_order', 'exercises', ['program_id', 'day_number', 'order_in_day']),
+    ('ix_payments_trainer_status_date', 'payments', ['trainer_id', 'status', 'payment_date']),
+    ('ix_payments_client_date', 'payments', ['client_id', 'payment_date']),
+    ('ix_subscriptions_trainer_status', 'subscriptions', ['trainer_id', 'status']),
+    ('ix_subscriptions_client_status', 'subscriptions', ['client_id', 'status']),
+    ('ix_booking_availability_trainer_day', 'booking_availability', ['trainer_id', 'day_of_week', 'is_active']),
+    ('ix_booking_exceptions_trainer_dates', 'booking_exceptions', ['trainer_id', 'start_date', 'end_date']),
+    ('ix_online_bookings_trainer_date_status', 'online_bookings', ['trainer_id', 'requested_date', 'status']),
+    ('ix_online_bookings_trainer_status', 'online_bookings', ['trainer_id', 'status']),
+]
+
+# Tables that gain a denormalized trainer_id column
+TENANT_COLUMNS = ['payments', 'subscriptions']
+
+
+def _existing_columns(table):
+    inspector = sa.inspect(op.get_bind())
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade():
+    # Databases bootstrapped with db.create_all() may already have the
+    # columns and indexes, so every step is guarded.
+    for table in TENANT_COLUMNS:
+        if 'trainer_id' not in _existing_columns(table):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.add_column(sa.Column('trainer_id', sa.Integer(), nullable=True))
+                batch_op.create_foreign_key(f'fk_{table}_trainer_id_users', 'users', ['trainer_id'], ['id'])
+
+        op.execute(sa.text(f"""
+            UPDATE {table}
+            SET trainer_id = (SELECT clients.trainer_id FROM clients WHERE clients.id = {table}.client_id)
+            WHERE trainer_id IS NULL
+        """))
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
+
+    # Only drop what is there: the column may predate this revision or have
+    # an unnamed foreign key from db.create_all().
+    for table in TENANT_COLUMNS:
+        if 'trainer_id' not in _existing_columns(table):
+            continue
+        inspector = sa.inspect(op.get_bind())
+        foreign_keys = [
+            fk['name'] for fk in inspector.get_foreign_keys(table)
+            if fk['constrained_columns'] == ['trainer_id'] and fk['name']
+        ]
+        with op.batch_alter_table(table) as batch_op:
+            for name in foreign_keys:
+                batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.drop_column('trainer_id')
@@ -0,0 +1,31 @@
+"""Add dashboard_cache_generations table
+
+Revision ID: a3c5e7f9b1d3
+Revises: f2b4d6e8a0c1
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e7f9b1d3'
+down_revision = 'f2b4d6e8a0c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'dashboard_cache_generations',
+        sa.Column('trainer_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['trainer_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('trainer_id'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('dashboard_cache_generations')
@@ -0,0 +1,24 @@
+"""Add workflow_executions status/next_step_at index
+
+Revision ID: a7c9e1f3b5d6
+Revises: f6b8d0e2a4c5
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c9e1f3b5d6'
+down_revision = 'f6b8d0e2a4c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_workflow_executions_status_next_step', 'workflow_executions',
+                    ['status', 'next_step_at'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_workflow_executions_status_next_step', table_name='workflow_executions', if_exists=True)
@@ -0,0 +1,47 @@
+"""Add daily_trainer_metrics rollup table
+
+Pre-aggregated per-trainer, per-day session and revenue counters used by
+the analytics endpoints. Populate existing data with
+``flask rollups backfill`` after upgrading.
+
+Revision ID: b2d4f6a8c0e1
+Revises: a1c3e5f7b9d0
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d4f6a8c0e1'
+down_revision = 'a1c3e5f7b9d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'daily_trainer_metrics',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('trainer_id', sa.Integer(), nullable=False),
+        sa.Column('metric_date', sa.Date(), nullable=False),
+        sa.Column('metric', sa.String(length=30), nullable=False),
+        sa.Column('dimension', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['trainer_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('trainer_id', 'metric_date', 'metric', 'dimension',
+                            name='uq_daily_trainer_metrics_key'),
+        if_not_exists=True
+    )
+    op.create_index('ix_daily_trainer_metrics_trainer_metric_date', 'daily_trainer_metrics',
+                    ['trainer_id', 'metric', 'metric_date'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_daily_trainer_metrics_trainer_metric_date', table_name='daily_trainer_metrics',
+                  if_exists=True)
+    op.drop_table('daily_trainer_metrics')
@@ -0,0 +1,30 @@
+"""Add exercise_index_generation table
+
+Revision ID: b4d6f8a0c2e5
+Revises: a3c5e7f9b1d3
+Create Date: 2026-10-17 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d6f8a0c2e5'
+down_revision = 'a3c5e7f9b1d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'exercise_index_generation',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('exercise_index_generation')
@@ -0,0 +1,28 @@
+"""Add webhook_endpoints consecutive failure counter
+
+Revision ID: b8d0f2a4c6e7
+Revises: a7c9e1f3b5d6
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d0f2a4c6e7'
+down_revision = 'a7c9e1f3b5d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('webhook_endpoints')}
+    if 'consecutive_failures' not in columns:
+        with op.batch_alter_table('webhook_endpoints') as batch_op:
+            batch_op.add_column(sa.Column('consecutive_failures', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('webhook_endpoints') as batch_op:
+        batch_op.drop_column('consecutive_failures')
@@ -0,0 +1,47 @@
+"""Add booking_slot_occupancy and online_bookings.slot_start
+
+Per-slot seat counters used for booking capacity checks and overbooking
+protection. Populate them for existing bookings with
+``flask bookings rebuild-occupancy`` after upgrading.
+
+Revision ID: c3e5a7b9d1f2
+Revises: b2d4f6a8c0e1
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e5a7b9d1f2'
+down_revision = 'b2d4f6a8c0e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('online_bookings')}
+    if 'slot_start' not in columns:
+        with op.batch_alter_table('online_bookings') as batch_op:
+            batch_op.add_column(sa.Column('slot_start', sa.Time(), nullable=True))
+
+    op.create_table(
+        'booking_slot_occupancy',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('trainer_id', sa.Integer(), nullable=False),
+        sa.Column('slot_date', sa.Date(), nullable=False),
+        sa.Column('slot_start', sa.Time(), nullable=False),
+        sa.Column('booked', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['trainer_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('trainer_id', 'slot_date', 'slot_start', name='uq_booking_slot_occupancy_slot'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('booking_slot_occupancy')
+    with op.batch_alter_table('online_bookings') as batch_op:
+        batch_op.drop_column('slot_start')
@@ -0,0 +1,52 @@
+"""Add stripe_events table and Stripe id indexes
+
+Revision ID: c9e1a3b5d7f8
+Revises: b8d0f2a4c6e7
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e1a3b5d7f8'
+down_revision = 'b8d0f2a4c6e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'stripe_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.String(length=255), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('stripe_created', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('event_id'),
+        if_not_exists=True
+    )
+    op.create_index('ix_stripe_events_status_created', 'stripe_events',
+                    ['status', 'stripe_created', 'id'], unique=False, if_not_exists=True)
+
+    op.create_index('ix_payments_stripe_payment_intent', 'payments',
+                    ['stripe_payment_intent_id'], unique=False, if_not_exists=True)
+    op.create_index('ix_subscriptions_stripe_subscription', 'subscriptions',
+                    ['stripe_subscription_id'], unique=False, if_not_exists=True)
+    op.create_index('ix_subscriptions_stripe_customer', 'subscriptions',
+                    ['stripe_customer_id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_subscriptions_stripe_customer', table_name='subscriptions', if_exists=True)
+    op.drop_index('ix_subscriptions_stripe_subscription', table_name='subscriptions', if_exists=True)
+    op.drop_index('ix_payments_stripe_payment_intent', table_name='payments', if_exists=True)
+    op.drop_index('ix_stripe_events_status_created', table_name='stripe_events', if_exists=True)
+    op.drop_table('stripe_events')
@@ -0,0 +1,34 @@
+"""Add WGER mirror columns to exercise_library
+
+Revision ID: d0f2b4c6e8a9
+Revises: c9e1a3b5d7f8
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd0f2b4c6e8a9'
+down_revision = 'c9e1a3b5d7f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('exercise_library')}
+    with op.batch_alter_table('exercise_library') as batch_op:
+        if 'wger_id' not in columns:
+            batch_op.add_column(sa.Column('wger_id', sa.Integer(), nullable=True))
+        if 'wger_updated_at' not in columns:
+            batch_op.add_column(sa.Column('wger_updated_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_exercise_library_wger_id', 'exercise_library', ['wger_id'],
+                    unique=True, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_exercise_library_wger_id', table_name='exercise_library', if_exists=True)
+    with op.batch_alter_table('exercise_library') as batch_op:
+        batch_op.drop_column('wger_updated_at')
+        batch_op.drop_column('wger_id')
@@ -0,0 +1,47 @@
+"""Add jobs table for the background job queue
+
+Revision ID: d4f6b8c0e2a3
+Revises: c3e5a7b9d1f2
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f6b8c0e2a3'
+down_revision = 'c3e5a7b9d1f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('queue', sa.String(length=50), nullable=False),
+        sa.Column('task', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('run_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_index('ix_jobs_queue_status_run_at', 'jobs', ['queue', 'status', 'run_at'],
+                    unique=False, if_not_exists=True)
+    op.create_index('ix_jobs_status_locked_at', 'jobs', ['status', 'locked_at'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_jobs_status_locked_at', table_name='jobs', if_exists=True)
+    op.drop_index('ix_jobs_queue_status_run_at', table_name='jobs', if_exists=True)
+    op.drop_table('jobs')
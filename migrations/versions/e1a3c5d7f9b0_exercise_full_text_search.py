@@ -0,0 +1,75 @@
+"""Add full-text search over exercise_library
+
+PostgreSQL: a generated, weighted search_vector tsvector column with a GIN
+index. SQLite: an external-content FTS5 table kept in sync by triggers,
+filled from the existing rows. Other dialects are left unchanged (search
+falls back to ILIKE).
+
+Revision ID: e1a3c5d7f9b0
+Revises: d0f2b4c6e8a9
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1a3c5d7f9b0'
+down_revision = 'd0f2b4c6e8a9'
+branch_labels = None
+depends_on = None
+
+FTS_COLUMNS = 'name, tags, primary_muscle_groups, secondary_muscle_groups, tips_and_cues, description'
+NEW_VALUES = ', '.join(f'new.{c.strip()}' for c in FTS_COLUMNS.split(','))
+OLD_VALUES = ', '.join(f'old.{c.strip()}' for c in FTS_COLUMNS.split(','))
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE exercise_library ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(tags, '') || ' ' || coalesce(primary_muscle_groups, '') "
+            "|| ' ' || coalesce(secondary_muscle_groups, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(tips_and_cues, '')), 'C') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'D')) STORED"
+        )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_exercise_library_search_vector "
+            "ON exercise_library USING gin (search_vector)"
+        )
+    elif dialect == 'sqlite':
+        op.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS exercise_library_fts USING fts5({FTS_COLUMNS}, "
+            f"content='exercise_library', content_rowid='id', tokenize='porter unicode61', prefix='2 3')"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS exercise_library_fts_insert AFTER INSERT ON exercise_library BEGIN "
+            f"INSERT INTO exercise_library_fts(rowid, {FTS_COLUMNS}) VALUES (new.id, {NEW_VALUES}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS exercise_library_fts_delete AFTER DELETE ON exercise_library BEGIN "
+            f"INSERT INTO exercise_library_fts(exercise_library_fts, rowid, {FTS_COLUMNS}) "
+            f"VALUES ('delete', old.id, {OLD_VALUES}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS exercise_library_fts_update AFTER UPDATE OF {FTS_COLUMNS} "
+            f"ON exercise_library BEGIN "
+            f"INSERT INTO exercise_library_fts(exercise_library_fts, rowid, {FTS_COLUMNS}) "
+            f"VALUES ('delete', old.id, {OLD_VALUES}); "
+            f"INSERT INTO exercise_library_fts(rowid, {FTS_COLUMNS}) VALUES (new.id, {NEW_VALUES}); END"
+        )
+        op.execute("INSERT INTO exercise_library_fts(exercise_library_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_exercise_library_search_vector")
+        op.execute("ALTER TABLE exercise_library DROP COLUMN IF EXISTS search_vector")
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS exercise_library_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS exercise_library_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS exercise_library_fts_insert")
+        op.execute("DROP TABLE IF EXISTS exercise_library_fts")
@@ -0,0 +1,35 @@
+"""Add campaign execution checkpoint and communication log index
+
+Revision ID: e5a7c9d1f3b4
+Revises: d4f6b8c0e2a3
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c9d1f3b4'
+down_revision = 'd4f6b8c0e2a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('marketing_campaigns')}
+    with op.batch_alter_table('marketing_campaigns') as batch_op:
+        if 'failed_count' not in columns:
+            batch_op.add_column(sa.Column('failed_count', sa.Integer(), nullable=True))
+        if 'last_client_id' not in columns:
+            batch_op.add_column(sa.Column('last_client_id', sa.Integer(), nullable=True))
+
+    op.create_index('ix_communication_logs_campaign_sent', 'communication_logs',
+                    ['campaign_id', 'sent_at'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_communication_logs_campaign_sent', table_name='communication_logs', if_exists=True)
+    with op.batch_alter_table('marketing_campaigns') as batch_op:
+        batch_op.drop_column('last_client_id')
+        batch_op.drop_column('failed_count')
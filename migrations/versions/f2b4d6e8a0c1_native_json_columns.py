@@ -0,0 +1,175 @@
+"""Store JSON-in-Text fields in native JSON columns
+
+Existing values are cleaned first: blank strings become NULL and text that
+is not valid JSON is kept as a JSON string, so every row decodes.
+
+PostgreSQL: the columns become jsonb, with jsonb_path_ops GIN indexes on
+the exercise muscle and equipment arrays. exercise_library.search_vector
+reads the JSON columns, so it is dropped and recreated over the jsonb
+values. SQLite keeps TEXT storage (SQLAlchemy's JSON type stores text
+there), so only the data clean-up applies; rebuilding the table to change
+the declared type would drop the full-text search triggers.
+
+Columns that are already JSON (e.g. on a schema built by ``db.create_all()``)
+are left as they are.
+
+Revision ID: f2b4d6e8a0c1
+Revises: e1a3c5d7f9b0
+Create Date: 2026-10-17 23:30:00.000000
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b4d6e8a0c1'
+down_revision = 'e1a3c5d7f9b0'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+JSON_COLUMNS = {
+    'exercise_library': (
+        'primary_muscle_groups', 'secondary_muscle_groups', 'equipment_required', 'execution_steps',
+        'common_mistakes', 'tips_and_cues', 'easier_variations', 'harder_variations',
+        'alternative_exercises', 'contraindications', 'tags',
+    ),
+    'program_templates': ('template_data', 'required_equipment'),
+    'workflow_templates': ('trigger_config', 'steps'),
+    'automation_rules': ('trigger_conditions', 'action_config'),
+    'nutrition_plans': ('meal_plan_data', 'dietary_preferences', 'foods_to_avoid'),
+    'progress_entries': ('custom_metrics_data',),
+    'invoices': ('items',),
+    'webhook_endpoints': ('events',),
+}
+
+GIN_INDEXES = {
+    'ix_exercise_library_primary_muscles': 'primary_muscle_groups',
+    'ix_exercise_library_secondary_muscles': 'secondary_muscle_groups',
+    'ix_exercise_library_equipment': 'equipment_required',
+}
+
+
+def _jsonb_words(column):
+    return f"jsonb_to_tsvector('english', coalesce({column}, '[]'::jsonb), '[\"string\"]')"
+
+
+JSONB_SEARCH_VECTOR = (
+    "ALTER TABLE exercise_library ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    f"setweight({_jsonb_words('tags')} || {_jsonb_words('primary_muscle_groups')} "
+    f"|| {_jsonb_words('secondary_muscle_groups')}, 'B') || "
+    f"setweight({_jsonb_words('tips_and_cues')}, 'C') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')) STORED"
+)
+
+TEXT_SEARCH_VECTOR = (
+    "ALTER TABLE exercise_library ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(tags, '') || ' ' || coalesce(primary_muscle_groups, '') "
+    "|| ' ' || coalesce(secondary_muscle_groups, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(tips_and_cues, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')) STORED"
+)
+
+
+def _cleaned(value):
+    """``value`` as valid JSON text, or None for blanks."""
+    if not isinstance(value, str):
+        return value
+    if not value.strip():
+        return None
+    try:
+        json.loads(value)
+    except ValueError:
+        return json.dumps(value)
+    return value
+
+
+def _clean_column(bind, table_name, column):
+    table = sa.table(table_name, sa.column('id', sa.Integer), sa.column(column, sa.Text))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, table.c[column])
+            .where(table.c.id > last_id, table.c[column].isnot(None))
+            .order_by(table.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        changes = []
+        for row_id, value in rows:
+            cleaned = _cleaned(value)
+            if cleaned != value:
+                changes.append({'row_id': row_id, 'value': cleaned})
+        if changes:
+            bind.execute(
+                table.update().where(table.c.id == sa.bindparam('row_id')).values({column: sa.bindparam('value')}),
+                changes
+            )
+        last_id = rows[-1][0]
+
+
+def _column_types(inspector, table_name, columns):
+    """Reflected type of each of ``columns`` that exists in ``table_name``."""
+    reflected = {column['name']: column['type'] for column in inspector.get_columns(table_name)}
+    return {column: reflected[column] for column in columns if column in reflected}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing = set(inspector.get_table_names())
+    types = {
+        table_name: _column_types(inspector, table_name, columns)
+        for table_name, columns in JSON_COLUMNS.items() if table_name in existing
+    }
+    for table_name, columns in types.items():
+        for column, column_type in columns.items():
+            if not isinstance(column_type, sa.JSON):
+                _clean_column(bind, table_name, column)
+
+    if bind.dialect.name != 'postgresql':
+        return
+    op.execute("DROP INDEX IF EXISTS ix_exercise_library_search_vector")
+    op.execute("ALTER TABLE exercise_library DROP COLUMN IF EXISTS search_vector")
+    for table_name, columns in types.items():
+        pending = [column for column, column_type in columns.items() if not isinstance(column_type, JSONB)]
+        if pending:
+            op.execute(
+                f"ALTER TABLE {table_name} "
+                + ', '.join(f"ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb" for column in pending)
+            )
+    op.execute(JSONB_SEARCH_VECTOR)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_exercise_library_search_vector "
+        "ON exercise_library USING gin (search_vector)"
+    )
+    for name, column in GIN_INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON exercise_library USING gin ({column} jsonb_path_ops)")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    existing = set(sa.inspect(bind).get_table_names())
+    for name in GIN_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("DROP INDEX IF EXISTS ix_exercise_library_search_vector")
+    op.execute("ALTER TABLE exercise_library DROP COLUMN IF EXISTS search_vector")
+    for table_name, columns in JSON_COLUMNS.items():
+        if table_name in existing:
+            op.execute(
+                f"ALTER TABLE {table_name} "
+                + ', '.join(f"ALTER COLUMN {column} TYPE text USING {column}::text" for column in columns)
+            )
+    op.execute(TEXT_SEARCH_VECTOR)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_exercise_library_search_vector "
+        "ON exercise_library USING gin (search_vector)"
+    )
@@ -0,0 +1,24 @@
+"""Add automation_rules trainer/active index
+
+Revision ID: f6b8d0e2a4c5
+Revises: e5a7c9d1f3b4
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b8d0e2a4c5'
+down_revision = 'e5a7c9d1f3b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_automation_rules_trainer_active', 'automation_rules',
+                    ['trainer_id', 'is_active'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_automation_rules_trainer_active', table_name='automation_rules', if_exists=True)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Benchmark eager-loading profiles against per-row lazy loads.
+
+Creates N programs (default 100) with exercises and clients, and as many
+sessions, in the testing database. For the program list with exercises
+and clients, the session list with clients and trainers, and the client
+detail with sessions and programs, the script:
+
+1. counts and times the queries of the old serialization (a dynamic
+   ``program.exercises`` query per program, a lazy ``client`` per row,
+   separate session/program queries for a client);
+2. counts and times the same request through the test client, which
+   serves it with the view's loading profile;
+3. checks that both produce the same data, that the page rows and their
+   exercises take two queries whatever the page size, and that
+   ``QUERY_BUDGET`` fails a request that goes over its budget.
+
+Usage:
+    python scripts/benchmark_eager_loading.py [programs] [exercises_per_program]
+"""
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models.client import Client
+from app.models.program import Exercise, Program
+from app.models.session import Session
+from app.models.user import User
+from app.routes import api_programs
+from app.routes.api_programs import program_client_schema, program_exercise_schema, program_schema
+from app.routes.api_sessions import session_client_schema, session_schema, session_trainer_schema
+from app.utils.query_stats import QueryBudgetExceeded
+
+
+def old_programs(trainer_id, per_page):
+    """get_programs?include_exercises=true&include_client=true before loading profiles."""
+    programs = Program.query.filter_by(trainer_id=trainer_id).order_by(Program.created_at.desc()) \
+        .limit(per_page).all()
+    data = []
+    for program in programs:
+        item = program_schema.dump(program, program_schema.list_fields)
+        item['client'] = program_client_schema.serialize(program.client)
+        exercises = program.exercises.order_by(Exercise.day_number, Exercise.order_in_day).all()
+        item['exercises'] = program_exercise_schema.dump_many(exercises)
+        item['total_exercises'] = len(exercises)
+        data.append(item)
+    return data
+
+
+def old_sessions(trainer_id, per_page):
+    """get_sessions?include_client=true&include_trainer=true before loading profiles."""
+    sessions = Session.query.filter_by(trainer_id=trainer_id).order_by(Session.scheduled_start.desc()) \
+        .limit(per_page).all()
+    data = []
+    for session in sessions:
+        item = session_schema.dump(session, session_schema.list_fields)
+        item['client'] = session_client_schema.serialize(session.client)
+        item['trainer'] = session_trainer_schema.serialize(session.trainer)
+        data.append(item)
+    return data
+
+
+def old_client(client_id):
+    """get_client?include_sessions=true&include_programs=true before loading profiles."""
+    client = db.session.get(Client, client_id)
+    sessions = Session.query.filter_by(client_id=client_id).order_by(Session.scheduled_start.desc()).limit(10).all()
+    programs = Program.query.filter_by(client_id=client_id).order_by(Program.created_at.desc()).all()
+    return client.id, [s.id for s in sessions], [p.id for p in programs]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    per_program = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    logging.disable(logging.WARNING)
+    app = create_app('testing')
+    failures = []
+    statements = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(message)
+
+    def measure(fn, repeat=5):
+        samples, queries = [], 0
+        for _ in range(repeat):
+            db.session.expunge_all()
+            statements.clear()
+            started = time.perf_counter()
+            result = fn()
+            samples.append((time.perf_counter() - started) * 1000)
+            queries = len(statements)
+        return result, queries, statistics.median(samples)
+
+    with app.app_context():
+        db.create_all()
+        trainer = User(username='bench', email='bench@example.com', password_hash='x',
+                       first_name='Bench', last_name='Trainer')
+        db.session.add(trainer)
+        db.session.flush()
+        clients = [Client(first_name=f'First{i}', last_name=f'Last{i}', email=f'client{i}@example.com',
+                          trainer_id=trainer.id) for i in range(count)]
+        db.session.add_all(clients)
+        db.session.flush()
+        created = datetime(2026, 1, 1)
+        db.session.bulk_insert_mappings(Program, [dict(
+            name=f'Program {i}', trainer_id=trainer.id, client_id=clients[i].id, status='active',
+            created_at=created + timedelta(hours=i),
+        ) for i in range(count)])
+        db.session.bulk_insert_mappings(Session, [dict(
+            title=f'Session {i}', trainer_id=trainer.id, client_id=clients[i].id,
+            scheduled_start=created + timedelta(hours=i), scheduled_end=created + timedelta(hours=i, minutes=60),
+        ) for i in range(count)])
+        program_ids = [program_id for program_id, in db.session.query(Program.id)]
+        db.session.bulk_insert_mappings(Exercise, [dict(
+            program_id=program_id, name=f'Exercise {day}.{order}', day_number=day, order_in_day=order, sets=3,
+        ) for program_id in program_ids for day in range(1, 3) for order in range(per_program // 2, 0, -1)])
+        db.session.commit()
+        trainer_id, client_id = trainer.id, clients[0].id
+
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        http = app.test_client()
+        with http.session_transaction() as sess:
+            sess['_user_id'] = str(trainer_id)
+
+        def get(url, query_string):
+            # The logged-in user is loaded by the first request only and kept on g
+            statements.clear()
+            response = http.get(url, query_string=query_string)
+            check(response.status_code == 200, f'GET {url} returned {response.status_code}')
+            return response.get_json()['data']
+
+        print("=" * 78)
+        print(f"Eager Loading Benchmark ({count} programs x {per_program} exercises, {count} sessions)")
+        print("=" * 78)
+        print(f"   {'view':<34} {'lazy loads':>18} {'profile':>18}")
+        cases = [
+            ('programs + exercises + client',
+             lambda: old_programs(trainer_id, count),
+             lambda: get('/api/v1/programs', query_string={
+                 'per_page': count, 'include_exercises': 'true', 'include_client': 'true'})['programs']),
+            ('sessions + client + trainer',
+             lambda: old_sessions(trainer_id, count),
+             lambda: get('/api/v1/sessions', query_string={
+                 'per_page': count, 'include_client': 'true', 'include_trainer': 'true'})['sessions']),
+            ('client + sessions + programs',
+             lambda: old_client(client_id),
+             lambda: get(f'/api/v1/clients/{client_id}', query_string={
+                 'include_sessions': 'true', 'include_programs': 'true'})),
+        ]
+        old_total = new_total = 0.0
+        for name, old, new in cases:
+            old_result, old_queries, old_ms = measure(old)
+            new_result, new_queries, new_ms = measure(new)
+            if name.startswith('client'):
+                new_result = (new_result['id'], [s['id'] for s in new_result['recent_sessions']],
+                              [p['id'] for p in new_result['programs']])
+            # Through JSON, as the response would be
+            check(json.loads(json.dumps(old_result, default=str)) == json.loads(json.dumps(new_result, default=str)),
+                  f'{name}: results differ')
+            old_total, new_total = old_total + old_ms, new_total + new_ms
+            print(f"   {name:<34} {old_queries:5} q {old_ms:8.1f}ms {new_queries:5} q {new_ms:8.1f}ms")
+
+        # Page rows + exercises: two queries for any page size
+        for per_page in (10, count):
+            get('/api/v1/programs', query_string={'per_page': per_page, 'include_exercises': 'true'})
+            page_queries = [s for s in statements if 'FROM programs' in s and 'count(' not in s
+                            or 'FROM exercises' in s]
+            check(len(page_queries) == 2, f'{per_page} programs with exercises took {len(page_queries)} queries')
+        print(f"   programs + exercises: 2 queries for pages of 10 and {count}")
+
+        # An N+1 regression fails under QUERY_BUDGET
+        saved = api_programs.program_detail_loading.includes['client']
+        api_programs.program_detail_loading.includes['client'] = ()
+        try:
+            # A fresh app context, so the request starts with an empty session and g
+            with app.app_context():
+                http.get(f'/api/v1/programs/{program_ids[0]}',
+                         query_string={'include_client': 'true', 'include_exercises': 'true'})
+            check(False, 'lazy client load was not caught by the query budget')
+        except QueryBudgetExceeded as e:
+            print(f"   regression caught: {e}")
+        finally:
+            api_programs.program_detail_loading.includes['client'] = saved
+
+    print()
+    if not failures:
+        print(f"✅ Same data with a fixed number of queries, {old_total / new_total:.1f}x faster in total")
+        return 0
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
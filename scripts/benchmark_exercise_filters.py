@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Benchmark filtered exercise listings and facets against the in-memory index.
+
+Creates N exercises (default 10,000) with JSON muscle and equipment lists,
+a mix of public, private and inactive rows. The script then:
+
+1. times the previous implementation of each call: ``ilike`` on the JSON
+   columns' text with a paginated ORDER BY query for listings, and loading
+   every row for ``/muscles`` and ``/equipment``;
+2. times the same calls through the API, answered from the exercise index;
+3. checks that both return the same page and totals, and that the index
+   is rebuilt after an exercise is edited but not after a usage bump;
+4. checks that a change committed by another process (the row change plus
+   the generation bump it commits) shows on the next request.
+
+Usage:
+    python scripts/benchmark_exercise_filters.py [exercises]
+"""
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import Text, cast, or_, update
+from app import create_app, db
+from app.models.exercise_library import ExerciseLibrary
+from app.models.user import User
+from app.services.exercise_index import bump_generation, exercise_index
+from app.utils.pagination import paginate_query
+
+MUSCLES = ['Chest', 'Upper Chest', 'Back', 'Lats', 'Lower Back', 'Shoulders', 'Rear Delts', 'Biceps', 'Triceps',
+           'Forearms', 'Abs', 'Obliques', 'Glutes', 'Quadriceps', 'Hamstrings', 'Calves', 'Hip Flexors']
+EQUIPMENT = ['Barbell', 'Dumbbell', 'Kettlebell', 'Cable', 'Machine', 'Bench', 'Pull-up Bar', 'Bands', 'None']
+CATEGORIES = ['strength', 'cardio', 'flexibility', 'balance', 'mobility']
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced', None]
+TYPES = ['compound', 'isolation', 'bodyweight', 'cardio']
+LISTINGS = [
+    {},
+    {'category': 'strength'},
+    {'muscle': 'chest'},
+    {'muscle': 'back', 'equipment': 'bell'},
+    {'equipment': 'cable', 'difficulty': 'advanced'},
+    {'category': 'mobility', 'exercise_type': 'isolation', 'sort_by': 'created_at', 'sort_order': 'desc'},
+    {'muscle': 'glutes', 'page': 5},
+    {'sort_by': 'difficulty_level', 'page': 3},
+    {'category': 'cardio', 'sort_by': 'difficulty_level', 'sort_order': 'desc', 'page': 2},
+    {'custom_only': 'true'},
+]
+
+
+def old_listing(trainer_id, args):
+    """The listing query get_exercises ran before the index."""
+    query = ExerciseLibrary.query.filter_by(is_active=True)
+    if args.get('custom_only') == 'true':
+        query = query.filter_by(is_custom=True, created_by_trainer_id=trainer_id)
+    else:
+        query = query.filter(or_(ExerciseLibrary.is_public == True,
+                                 ExerciseLibrary.created_by_trainer_id == trainer_id))
+    for key, column in (('category', 'category'), ('difficulty', 'difficulty_level'),
+                        ('exercise_type', 'exercise_type')):
+        if args.get(key):
+            query = query.filter_by(**{column: args[key]})
+    if args.get('muscle'):
+        pattern = f"%{args['muscle']}%"
+        query = query.filter(or_(cast(ExerciseLibrary.primary_muscle_groups, Text).ilike(pattern),
+                                 cast(ExerciseLibrary.secondary_muscle_groups, Text).ilike(pattern)))
+    if args.get('equipment'):
+        query = query.filter(cast(ExerciseLibrary.equipment_required, Text).ilike(f"%{args['equipment']}%"))
+    return paginate_query(query, getattr(ExerciseLibrary, args.get('sort_by', 'name')),
+                          descending=args.get('sort_order') == 'desc', page=args.get('page', 1), per_page=20)
+
+
+def old_muscles():
+    muscles = set()
+    for exercise in ExerciseLibrary.query.filter_by(is_active=True).all():
+        muscles.update(exercise.get_primary_muscles())
+        muscles.update(exercise.secondary_muscle_groups or [])
+    return sorted(m for m in muscles if m)
+
+
+def old_equipment():
+    equipment = set()
+    for exercise in ExerciseLibrary.query.filter_by(is_active=True).all():
+        equipment.update(exercise.get_equipment())
+    return sorted(e for e in equipment if e)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    logging.disable(logging.WARNING)
+    app = create_app('testing')
+    failures = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(message)
+
+    with app.app_context():
+        db.create_all()
+        trainers = [User(username=f'bench{i}', email=f'bench{i}@example.com', password_hash='x') for i in range(3)]
+        db.session.add_all(trainers)
+        db.session.flush()
+        trainer_id = trainers[0].id
+        rng = random.Random(19)
+        rows = []
+        for i in range(count):
+            owner = rng.choice(trainers).id if rng.random() < 0.1 else None
+            rows.append(dict(
+                name=f'{rng.choice(EQUIPMENT)} {rng.choice(["Press", "Row", "Curl", "Squat", "Raise"])} {i}',
+                category=rng.choice(CATEGORIES), difficulty_level=rng.choice(DIFFICULTIES),
+                exercise_type=rng.choice(TYPES),
+                primary_muscle_groups=rng.sample(MUSCLES, rng.randint(1, 3)),
+                secondary_muscle_groups=rng.sample(MUSCLES, rng.randint(0, 2)),
+                equipment_required=rng.sample(EQUIPMENT, rng.randint(1, 2)),
+                is_custom=owner is not None, created_by_trainer_id=owner,
+                is_public=owner is None or rng.random() < 0.2, is_active=rng.random() < 0.97,
+            ))
+        db.session.bulk_insert_mappings(ExerciseLibrary, rows)
+        db.session.commit()
+
+        http = app.test_client()
+        with http.session_transaction() as sess:
+            sess['_user_id'] = str(trainer_id)
+
+        print("=" * 70)
+        print(f"Exercise Filter Benchmark ({count} exercises)")
+        print("=" * 70)
+        exercise_index.invalidate()
+        started = time.perf_counter()
+        exercise_index.warm()
+        print(f"▶️  Index build: {(time.perf_counter() - started) * 1000:.0f}ms")
+
+        old_total = new_total = 0.0
+        for args in LISTINGS:
+            (items, old_page), old_ms = timed(lambda: old_listing(trainer_id, args), 5)
+            response, new_ms = timed(lambda: http.get('/api/v1/exercises', query_string={**args, 'per_page': 20}), 5)
+            data = response.get_json()['data']
+            check([e.id for e in items] == [e['id'] for e in data['exercises']]
+                  and old_page['total_items'] == data['pagination']['total_items'],
+                  f'listing {args} differs from the SQL result')
+            old_total, new_total = old_total + old_ms, new_total + new_ms
+            label = '&'.join(f'{k}={v}' for k, v in args.items()) or '(no filters)'
+            print(f"   {label:<58} {old_ms:7.2f}ms -> {new_ms:6.2f}ms ({old_page['total_items']} matches)")
+
+        response, facet_ms = timed(lambda: http.get('/api/v1/exercises', query_string={
+            'muscle': 'chest', 'include_facets': 'true'}), 5)
+        facets = response.get_json()['data']['facets']
+        check(sum(facets['category'].values()) == response.get_json()['data']['pagination']['total_items'],
+              'category facet counts do not add up to the filtered total')
+        print(f"   muscle=chest&include_facets=true {facet_ms:41.2f}ms")
+
+        for path, old_fn in (('/api/v1/exercises/muscles', old_muscles), ('/api/v1/exercises/equipment', old_equipment)):
+            expected, old_ms = timed(old_fn, 3)
+            response, new_ms = timed(lambda: http.get(path), 5)
+            check(response.get_json()['data'] == expected, f'{path} differs from the JSON scan')
+            old_total, new_total = old_total + old_ms, new_total + new_ms
+            print(f"   {path:<58} {old_ms:7.2f}ms -> {new_ms:6.2f}ms")
+
+        # Usage bumps keep the index, edits rebuild it
+        snapshot = exercise_index.snapshot()
+        exercise = ExerciseLibrary.query.filter_by(is_active=True, is_public=True).first()
+        exercise.increment_usage()
+        db.session.commit()
+        check(exercise_index.snapshot() is snapshot, 'usage bump rebuilt the index')
+        exercise.category = 'plyometrics'
+        db.session.commit()
+        check(exercise_index.snapshot().generation == snapshot.generation + 1, 'edit did not bump the generation')
+        response = http.get('/api/v1/exercises', query_string={'category': 'plyometrics'})
+        check([e['id'] for e in response.get_json()['data']['exercises']] == [exercise.id],
+              'edited exercise not found under its new category')
+
+        # Another process's commit: the row change and the generation bump,
+        # without this process's after-commit invalidation
+        db.session.execute(update(ExerciseLibrary).where(ExerciseLibrary.id == exercise.id)
+                           .values(category='calisthenics'))
+        bump_generation(db.session.connection())
+        db.session.commit()
+        response = http.get('/api/v1/exercises', query_string={'category': 'calisthenics'})
+        check([e['id'] for e in response.get_json()['data']['exercises']] == [exercise.id],
+              "another process's edit not seen on the next request")
+
+    print()
+    if not failures:
+        print(f"✅ Same results as the SQL/JSON scans, {old_total / new_total:.1f}x faster in total; "
+              f"edits from any process refresh the index, usage bumps do not")
+        return 0
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-text exercise search against the old ILIKE search.
+
+Creates N exercises (default 10,000) with names, descriptions, muscles and
+cues in the testing database (SQLite, so the FTS5 backend). For a set of
+queries the script:
+
+1. times the old ``name ILIKE '%q%' OR description ILIKE '%q%'`` query,
+   paginated by name;
+2. times ``exercise_search.search`` and ``GET /api/v1/exercises?search=``;
+3. checks that stemmed words ("curls", "pressing") and typeahead prefixes
+   match, that a name hit ranks above a description-only hit, and that a
+   misspelling is corrected.
+
+Usage:
+    python scripts/benchmark_exercise_fulltext.py [exercises]
+"""
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import or_
+from app import create_app, db
+from app.models.exercise_library import ExerciseLibrary
+from app.models.user import User
+from app.services import exercise_search
+
+MOVEMENTS = ['Bench Press', 'Squat', 'Deadlift', 'Curl', 'Row', 'Lunge', 'Fly', 'Pulldown', 'Shoulder Press',
+             'Extension', 'Raise', 'Crunch', 'Plank', 'Dip', 'Shrug', 'Hip Thrust', 'Step Up', 'Pullover']
+VARIANTS = ['Incline', 'Decline', 'Seated', 'Standing', 'Single Arm', 'Close Grip', 'Wide Grip', 'Paused',
+            'Tempo', 'Deficit', 'Banded', 'Kneeling', 'Reverse', 'Sumo', 'Front', 'Overhead', 'Bulgarian']
+TOOLS = ['Barbell', 'Dumbbell', 'Kettlebell', 'Cable', 'Machine', 'Smith Machine', 'Band', 'Bodyweight']
+MUSCLES = ['Chest', 'Back', 'Lats', 'Shoulders', 'Biceps', 'Triceps', 'Forearms', 'Abs', 'Obliques', 'Glutes',
+           'Quadriceps', 'Hamstrings', 'Calves']
+CUES = ['keep your core braced', 'drive through the heels', 'squeeze at the top', 'control the eccentric',
+        'keep elbows tucked', 'neutral spine throughout', 'full range of motion', 'exhale on the way up']
+QUERIES = ['press', 'bench press', 'incline dumbbell', 'curls', 'pressing', 'hamstrings', 'elbows tucked',
+           'ben', 'bench pr', 'kettlebell sw', 'glute', 'sumo dead']
+
+
+def timed(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def ilike_search(term, trainer_id):
+    """The search get_exercises ran before full-text search."""
+    pattern = f'%{term}%'
+    query = ExerciseLibrary.query.filter_by(is_active=True).filter(
+        or_(ExerciseLibrary.is_public == True, ExerciseLibrary.created_by_trainer_id == trainer_id),
+        or_(ExerciseLibrary.name.ilike(pattern), ExerciseLibrary.description.ilike(pattern))
+    )
+    pagination = query.order_by(ExerciseLibrary.name, ExerciseLibrary.id).paginate(page=1, per_page=20, error_out=False)
+    return pagination.total, pagination.items
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    logging.disable(logging.WARNING)
+    app = create_app('testing')
+    failures = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(message)
+
+    with app.app_context():
+        db.create_all()
+        trainer = User(username='bench', email='bench@example.com', password_hash='x')
+        db.session.add(trainer)
+        db.session.flush()
+        rng = random.Random(20)
+        rows = []
+        for i in range(count):
+            movement = rng.choice(MOVEMENTS)
+            muscles = rng.sample(MUSCLES, 2)
+            rows.append(dict(
+                name=f'{rng.choice(VARIANTS)} {rng.choice(TOOLS)} {movement} {i}',
+                description=f'A {movement.lower()} variation that works the {muscles[0].lower()}.',
+                primary_muscle_groups=muscles[:1], secondary_muscle_groups=muscles[1:],
+                tips_and_cues=rng.sample(CUES, 2), category='strength',
+                is_public=True, is_active=True,
+            ))
+        # Description-only mention of a rare word, to check ranking
+        rows.append(dict(name='Landmine Rotation', description='Not a zercher squat, but close.', is_public=True,
+                         is_active=True, category='strength'))
+        rows.append(dict(name='Zercher Squat', description='Bar in the elbow crease.', is_public=True,
+                         is_active=True, category='strength'))
+        db.session.bulk_insert_mappings(ExerciseLibrary, rows)
+        db.session.commit()
+        backend = db.engine.dialect.name
+        check(exercise_search.available(), f'full-text search is not installed on {backend}')
+
+        http = app.test_client()
+        with http.session_transaction() as sess:
+            sess['_user_id'] = str(trainer.id)
+
+        print("=" * 78)
+        print(f"Exercise Full-Text Search Benchmark ({len(rows)} exercises, {backend})")
+        print("=" * 78)
+        print(f"   {'query':<18} {'ILIKE':>16} {'full-text':>18} {'endpoint':>10}")
+        old_total = new_total = 0.0
+        for term in QUERIES:
+            (ilike_hits, _), ilike_ms = timed(lambda: ilike_search(term, trainer.id))
+            (ranked, _), fts_ms = timed(lambda: exercise_search.search(term))
+            response, endpoint_ms = timed(lambda: http.get('/api/v1/exercises', query_string={'search': term}))
+            check(response.status_code == 200, f'endpoint failed for {term!r}')
+            old_total, new_total = old_total + ilike_ms, new_total + fts_ms
+            print(f"   {term:<18} {ilike_ms:7.2f}ms {ilike_hits:6} {fts_ms:7.2f}ms {len(ranked):6} "
+                  f"{endpoint_ms:8.2f}ms")
+
+        # Stemming and prefixes find what ILIKE missed
+        check(ilike_search('curls', trainer.id)[0] == 0 and exercise_search.search('curls')[0],
+              'stemmed "curls" should match "Curl" exercises')
+        # A name hit outranks a description-only hit
+        ranked, _ = exercise_search.search('zercher')
+        names = [db.session.get(ExerciseLibrary, exercise_id).name for exercise_id, _ in ranked]
+        check(names[:1] == ['Zercher Squat'], f'name match not ranked first: {names}')
+        # Misspellings are corrected
+        data = http.get('/api/v1/exercises', query_string={'search': 'dumbell row'}).get_json()['data']
+        check(data.get('corrected_search') == 'dumbbell row' and data['exercises'],
+              f'typo not corrected: {data.get("corrected_search")}')
+        print(f"   'dumbell row' corrected to {data.get('corrected_search')!r}, "
+              f"{data['pagination']['total_items']} results")
+
+    print()
+    if not failures:
+        print(f"✅ Ranked, stemmed, prefix-matching search; {old_total / new_total:.1f}x faster than ILIKE in total")
+        return 0
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Benchmark the WGER exercise mirror and the local search index.
+
+Starts a fake WGER API serving N exercises (default 2,000). It supports
+``exerciseinfo`` pagination, ``last_update__gt``, ETags and a slow
+``/exercise/`` search. The script then:
+
+1. runs a full sync, an incremental sync with nothing new (an empty delta
+   whose ETag is saved) and a third sync that must get a 304;
+2. changes some exercises in the fake and checks that the next sync fetches
+   only those;
+3. times typeahead queries against the in-memory index, through
+   ``/api/v1/exercises/search``, and against the remote API as the old
+   proxy did;
+4. stops the fake and checks that search still answers from the mirror, and
+   that a cold miss returns quickly instead of timing out.
+
+Usage:
+    python scripts/benchmark_exercise_search.py [exercises] [remote_latency_ms]
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import socket
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models.exercise_library import ExerciseLibrary
+from app.services import wger
+from app.services.exercise_index import exercise_index
+
+MOVEMENTS = ['bench press', 'squat', 'deadlift', 'curl', 'row', 'lunge', 'fly', 'pulldown', 'press',
+             'extension', 'raise', 'crunch', 'plank', 'dip', 'shrug', 'thrust', 'step up', 'pullover']
+VARIANTS = ['incline', 'decline', 'seated', 'standing', 'single arm', 'close grip', 'wide grip', 'paused',
+            'tempo', 'deficit', 'banded', 'kneeling', 'reverse', 'sumo', 'front', 'overhead', 'bulgarian']
+TOOLS = {1: 'barbell', 3: 'dumbbell', 8: 'bench', 10: 'kettlebell', 7: 'bodyweight'}
+QUERIES = ['b', 'be', 'ben', 'bench', 'bench p', 'bench press', 'squ', 'squat', 'dumbbell row', 'curl',
+           'inc', 'incline dumb', 'sumo dead', 'pla', 'kettlebell thr', 'overhead ext', 'glute']
+
+
+def make_exercise(i, version=0):
+    rng = random.Random(i)
+    tool_id = rng.choice(list(TOOLS))
+    name = f"{rng.choice(VARIANTS).title()} {TOOLS[tool_id].title()} {rng.choice(MOVEMENTS).title()} {i}"
+    if version:
+        name += f' v{version}'
+    translations = [{'language': 2, 'name': name, 'description': f'<p>{name} for {rng.choice(MOVEMENTS)}.</p>'}]
+    if i % 20 == 0:
+        translations = [{'language': 1, 'name': f'Übung {i}', 'description': ''}]  # German only: skipped
+    updated = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i + version * 100000)
+    return {
+        'id': i, 'category': {'id': rng.choice([8, 9, 10, 11, 12, 13, 14])},
+        'muscles': [{'id': rng.randint(1, 15), 'name': 'x'}],
+        'muscles_secondary': [{'id': rng.randint(1, 15), 'name': 'x'}],
+        'equipment': [{'id': tool_id, 'name': TOOLS[tool_id]}],
+        'translations': translations, 'images': [], 'variations': None,
+        'last_update': updated.isoformat(),
+    }
+
+
+class FakeWger(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    exercises = {}
+    latency = 0.08
+    requests_seen = 0
+    not_modified = 0
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        FakeWger.requests_seen += 1
+        parts = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        limit, offset = int(query.get('limit', 20)), int(query.get('offset', 0))
+
+        if parts.path.endswith('/exerciseinfo/'):
+            items = sorted(self.exercises.values(), key=lambda e: e['id'])
+            if 'last_update__gt' in query:
+                since = datetime.fromisoformat(query['last_update__gt'])
+                items = [e for e in items if datetime.fromisoformat(e['last_update']) > since]
+            page = items[offset:offset + limit]
+            next_url = None
+            if offset + limit < len(items):
+                next_url = f"http://{self.headers['Host']}{parts.path}?{urlencode({**query, 'offset': offset + limit})}"
+            body = json.dumps({'count': len(items), 'next': next_url, 'results': page}).encode()
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                FakeWger.not_modified += 1
+                return self._send(304, headers={'ETag': etag})
+            return self._send(200, body, {'ETag': etag})
+
+        if parts.path.endswith('/exercise/'):
+            time.sleep(self.latency)
+            needle = query.get('name', '').lower()
+            results = [{'id': e['id'], 'name': e['translations'][0]['name'], 'description': '', 'category': 8,
+                        'muscles': [], 'muscles_secondary': [], 'equipment': []}
+                       for e in self.exercises.values() if needle in e['translations'][0]['name'].lower()]
+            return self._send(200, json.dumps({'count': len(results), 'results': results[:limit]}).encode())
+        return self._send(404, b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    FakeWger.latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 80) / 1000
+    logging.disable(logging.WARNING)
+    FakeWger.exercises = {i: make_exercise(i) for i in range(1, count + 1)}
+    english = sum(1 for i in FakeWger.exercises if i % 20)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeWger)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    wger.WGER_BASE_URL = f'http://127.0.0.1:{server.server_port}/api/v2'
+
+    app = create_app('testing')
+    failures = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(message)
+
+    with app.app_context():
+        db.create_all()
+        print("=" * 70)
+        print(f"Exercise Mirror Benchmark ({count} WGER exercises, {FakeWger.latency * 1000:.0f}ms remote latency)")
+        print("=" * 70)
+
+        # 1. Full sync, empty delta, 304
+        started = time.perf_counter()
+        full = wger.sync()
+        full_elapsed = time.perf_counter() - started
+        check(full['created'] == english and ExerciseLibrary.query.count() == english, f'full sync {full}')
+        empty = wger.sync()
+        check(empty['fetched'] == 0 and not empty['not_modified'], f'second sync {empty}')
+        started = time.perf_counter()
+        cached = wger.sync()
+        noop_elapsed = time.perf_counter() - started
+        check(cached['not_modified'], f'third sync should be a 304: {cached}')
+        print(f"▶️  Full sync: {full['created']} exercises in {full_elapsed:.2f}s; "
+              f"unchanged re-sync: 304 in {noop_elapsed * 1000:.1f}ms")
+
+        # 2. Incremental sync fetches only changed exercises
+        changed = random.Random(1).sample([i for i in FakeWger.exercises if i % 20], 25)
+        for i in changed:
+            FakeWger.exercises[i] = make_exercise(i, version=1)
+        delta = wger.sync()
+        check(delta['fetched'] == 25 and delta['updated'] == 25, f'incremental sync {delta}')
+        renamed = FakeWger.exercises[changed[0]]['translations'][0]['name']
+        total, hits = exercise_index.search(renamed)
+        check(hits and hits[0]['name'] == renamed, 'renamed exercise not found first after incremental sync')
+        print(f"   Incremental sync after 25 edits: {delta}")
+
+        # 3. Search latency
+        exercise_index.snapshot()  # build once, as the first request would
+        local = []
+        for _ in range(20):
+            for query in QUERIES:
+                started = time.perf_counter()
+                exercise_index.search(query, limit=20)
+                local.append((time.perf_counter() - started) * 1000)
+        http = app.test_client()
+        endpoint = []
+        for query in QUERIES * 5:
+            started = time.perf_counter()
+            response = http.get('/api/v1/exercises/search', query_string={'q': query})
+            endpoint.append((time.perf_counter() - started) * 1000)
+            check(response.status_code == 200 and response.get_json()['source'] == 'local',
+                  f'endpoint did not answer {query!r} locally')
+        remote = []
+        for query in QUERIES:
+            wger._remote_cache.clear()
+            started = time.perf_counter()
+            wger.search_remote(query)
+            remote.append((time.perf_counter() - started) * 1000)
+        local_p50, local_p99 = percentiles(local)
+        endpoint_p50, endpoint_p99 = percentiles(endpoint)
+        remote_p50, remote_p99 = percentiles(remote)
+        print(f"   Index search:    p50 {local_p50:.3f}ms, p99 {local_p99:.3f}ms")
+        print(f"   Endpoint:        p50 {endpoint_p50:.2f}ms, p99 {endpoint_p99:.2f}ms")
+        print(f"   Remote (old):    p50 {remote_p50:.1f}ms, p99 {remote_p99:.1f}ms")
+        check(local_p50 < 1, f'index search p50 {local_p50:.3f}ms is not sub-millisecond')
+
+        # 4. Offline
+        server.shutdown()
+        server.server_close()
+        wger.search_http.close()  # drop kept-alive connections to the stopped fake
+        wger._remote_cache.clear()
+        response = http.get('/api/v1/exercises/search', query_string={'q': 'bench'})
+        check(response.status_code == 200 and response.get_json()['total'] > 0, 'offline search failed')
+        started = time.perf_counter()
+        first_miss = http.get('/api/v1/exercises/search', query_string={'q': 'zzzz'})
+        first_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        second_miss = http.get('/api/v1/exercises/search', query_string={'q': 'zzzy'})
+        second_elapsed = time.perf_counter() - started
+        check(first_miss.status_code == second_miss.status_code == 200, 'offline cold miss did not return 200')
+        check(second_elapsed < 0.05, f'second offline cold miss took {second_elapsed * 1000:.0f}ms')
+        print(f"   Offline: mirror search OK; cold miss {first_elapsed * 1000:.0f}ms, "
+              f"then {second_elapsed * 1000:.1f}ms while WGER is marked unreachable")
+
+    print()
+    if not failures:
+        print(f"✅ Incremental sync with ETag/since, sub-millisecond local search "
+              f"({remote_p50 / local_p50:,.0f}x faster than the remote proxy), works offline")
+        return 0
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark keyset pagination on the program and session lists.
+
+Creates N programs and N sessions (default 20,000 each) for one trainer,
+plus as many for another trainer, in the testing database. One program in
+ten has no ``created_at`` (the default program sort). Through the test
+client the script:
+
+1. walks ``GET /api/v1/programs?cursor=`` and ``/api/v1/sessions?cursor=``
+   to the end with ``next_cursor`` and back with ``prev_cursor``, and
+   checks every row comes once, in the same order both ways, NULLs
+   included;
+2. times page 1 and the last page with ``?page=``, and page 1 and the
+   middle page with the cursor;
+3. checks with ``EXPLAIN QUERY PLAN`` that the middle and last cursor
+   pages seek on the ``(trainer_id, sort_column)`` index and sort no rows
+   beyond ties.
+
+Usage:
+    python scripts/benchmark_keyset_pagination.py [rows]
+"""
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models.client import Client
+from app.models.program import Program
+from app.models.session import Session
+from app.models.user import User
+
+PER_PAGE = 100
+
+
+def timed(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    logging.disable(logging.WARNING)
+    app = create_app('testing')
+    failures = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(message)
+
+    with app.app_context():
+        db.create_all()
+        trainers = [User(username=f'bench{i}', email=f'bench{i}@example.com', password_hash='x') for i in range(2)]
+        db.session.add_all(trainers)
+        db.session.flush()
+        start = datetime(2026, 1, 5, 7, 0)
+        for trainer in trainers:
+            client = Client(first_name='Bench', last_name='Client', email=f'client{trainer.id}@example.com',
+                            trainer_id=trainer.id)
+            db.session.add(client)
+            db.session.flush()
+            # Repeated timestamps, so ties on the sort column are broken by id
+            db.session.bulk_insert_mappings(Program, [dict(
+                name=f'Program {i}', trainer_id=trainer.id, client_id=client.id, status='active',
+                created_at=None if i % 10 == 0 else start + timedelta(minutes=i // 3),
+            ) for i in range(count)])
+            db.session.bulk_insert_mappings(Session, [dict(
+                title=f'Session {i}', trainer_id=trainer.id, client_id=client.id,
+                scheduled_start=start + timedelta(hours=i // 2), scheduled_end=start + timedelta(hours=i // 2, minutes=60),
+            ) for i in range(count)])
+        db.session.commit()
+        trainer_id = trainers[0].id
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters)))
+
+        http = app.test_client()
+        with http.session_transaction() as sess:
+            sess['_user_id'] = str(trainer_id)
+
+        def get(url, **query_string):
+            response = http.get(url, query_string={'per_page': PER_PAGE, **query_string})
+            check(response.status_code == 200, f'GET {url} {query_string} returned {response.status_code}')
+            return response.get_json()['data']
+
+        print("=" * 78)
+        print(f"Keyset Pagination Benchmark ({count} rows per list, pages of {PER_PAGE})")
+        print("=" * 78)
+        print(f"   {'list':<14} {'?page=1':>9} {'?page=last':>11} {'cursor p1':>10} {'cursor mid':>11}")
+        cases = [
+            ('programs', Program, {}, 'ix_programs_trainer_created'),
+            ('programs', Program, {'sort_order': 'asc'}, 'ix_programs_trainer_created'),
+            ('sessions', Session, {}, 'ix_sessions_trainer_start'),
+        ]
+        for name, model, sort, index in cases:
+            url = f'/api/v1/{name}'
+            expected = model.query.filter_by(trainer_id=trainer_id).count()
+
+            # Forward to the end, then back to the start
+            pages, cursor = [], ''
+            while cursor is not None:
+                data = get(url, cursor=cursor, **sort)
+                pages.append((cursor, [row['id'] for row in data[name]]))
+                cursor = data['pagination']['next_cursor']
+            forward = [row_id for _, ids in pages for row_id in ids]
+            check(len(forward) == expected and len(set(forward)) == expected,
+                  f'{name} {sort}: walked {len(set(forward))} of {expected} rows')
+            backward, cursor = [], data['pagination']['prev_cursor']
+            while cursor is not None:
+                data = get(url, cursor=cursor, **sort)
+                backward[:0] = [row['id'] for row in data[name]]
+                cursor = data['pagination']['prev_cursor']
+            check(backward + pages[-1][1] == forward, f'{name} {sort}: prev_cursor walk differs')
+
+            middle_cursor = pages[len(pages) // 2][0]
+            _, offset_first_ms = timed(lambda: get(url, page=1, **sort))
+            _, offset_last_ms = timed(lambda: get(url, page=len(pages), **sort))
+            _, cursor_first_ms = timed(lambda: get(url, cursor='', **sort))
+            statements.clear()
+            get(url, cursor=middle_cursor, **sort)
+            get(url, cursor=pages[-1][0], **sort)
+
+            # Deep pages seek on the index and only sort ties
+            page_statements = [(statement, parameters) for statement, parameters in statements
+                               if f'FROM {model.__tablename__}' in statement and 'LIMIT' in statement]
+            with db.engine.connect() as connection:
+                for statement, parameters in page_statements:
+                    plan = ' / '.join(row[-1] for row in connection.exec_driver_sql(
+                        f'EXPLAIN QUERY PLAN {statement}', parameters))
+                    check(index in plan and 'TEMP B-TREE FOR ORDER BY' not in plan,
+                          f'{name} {sort}: deep page plan is {plan}')
+            _, cursor_middle_ms = timed(lambda: get(url, cursor=middle_cursor, **sort))
+            check(cursor_middle_ms < cursor_first_ms * 3, f'{name} {sort}: middle cursor page is slower than page 1')
+            label = f"{name} {sort.get('sort_order', 'desc')}"
+            print(f"   {label:<14} {offset_first_ms:7.2f}ms {offset_last_ms:9.2f}ms {cursor_first_ms:8.2f}ms "
+                  f"{cursor_middle_ms:9.2f}ms")
+
+    print()
+    if not failures:
+        print("✅ Every row once in both directions; deep cursor pages seek on the index like page 1")
+        return 0
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request query stats and check the Server-Timing header and slow-query log.
+
+Creates N sessions (default 2,000) in the testing database, then:
+
+1. times N primary-key lookups with and without the query counting and
+   timing listeners, to show what the instrumentation costs per statement;
+2. requests the session list through the test client and checks that the
+   ``Server-Timing`` header reports the request's query count and DB time;
+3. with ``SLOW_QUERY_MS`` set low enough to catch every statement, checks
+   that each slow statement is logged once as JSON with its request (or
+   on its own outside a request), and without its parameters.
+
+Usage:
+    python scripts/benchmark_query_stats.py [rows]
+"""
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import create_app, db
+from app.models.client import Client
+from app.models.session import Session
+from app.models.user import User
+from app.utils import query_stats
+
+
+class Records(logging.Handler):
+    """Collects log records."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+
+
+def lookups(ids, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        for session_id in ids:
+            db.session.execute(db.select(Session.title).where(Session.id == session_id)).scalar()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    logging.disable(logging.INFO)
+    app = create_app('testing')
+    failures = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(message)
+
+    with app.app_context():
+        db.create_all()
+        trainer = User(username='bench', email='bench@example.com', password_hash='x')
+        db.session.add(trainer)
+        db.session.flush()
+        client = Client(first_name='Bench', last_name='Client', email='client@example.com', trainer_id=trainer.id)
+        db.session.add(client)
+        db.session.flush()
+        start = datetime(2026, 1, 5, 7, 0)
+        db.session.bulk_insert_mappings(Session, [dict(
+            title=f'Session {i}', trainer_id=trainer.id, client_id=client.id,
+            scheduled_start=start + timedelta(hours=i), scheduled_end=start + timedelta(hours=i, minutes=60),
+        ) for i in range(count)])
+        db.session.commit()
+        trainer_id = trainer.id
+        ids = [session_id for session_id, in db.session.query(Session.id)]
+
+        print("=" * 78)
+        print(f"Query Stats Benchmark ({count} primary-key lookups)")
+        print("=" * 78)
+        event.remove(Engine, 'before_cursor_execute', query_stats._before_cursor_execute)
+        event.remove(Engine, 'after_cursor_execute', query_stats._after_cursor_execute)
+        bare_ms = lookups(ids)
+        event.listen(Engine, 'before_cursor_execute', query_stats._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', query_stats._after_cursor_execute)
+        with app.test_request_context():
+            app.preprocess_request()
+            counted_ms = lookups(ids, repeat=1)
+            check(query_stats.query_count() == count, f'counted {query_stats.query_count()} of {count} queries')
+            check(len(query_stats.slowest_queries()) == query_stats.SLOWEST_KEPT, 'slowest statements not kept')
+        instrumented_ms = lookups(ids)
+        overhead_us = (instrumented_ms - bare_ms) * 1000 / count
+        print(f"   {'without listeners':<22} {bare_ms:8.1f}ms")
+        print(f"   {'with listeners':<22} {instrumented_ms:8.1f}ms  ({overhead_us:+.1f}us per statement)")
+        print(f"   {'inside a request':<22} {counted_ms:8.1f}ms")
+
+    http = app.test_client()
+    with http.session_transaction() as sess:
+        sess['_user_id'] = str(trainer_id)
+
+    # Server-Timing: query count and DB time of each request
+    with app.app_context():
+        response = http.get('/api/v1/sessions', query_string={'per_page': 50})
+        header = response.headers.get('Server-Timing', '')
+        print(f"   Server-Timing: {header}")
+        match = re.match(r'db;dur=([\d.]+);desc="(\d+) queries"', header)
+        check(response.status_code == 200 and match is not None, f'Server-Timing header missing: {header!r}')
+        if match:
+            check(int(match.group(2)) >= 2, f'Server-Timing counted {match.group(2)} queries')
+            check(float(match.group(1)) > 0, 'Server-Timing reported no DB time')
+        check('db-slowest;dur=' in header, 'Server-Timing has no slowest statement')
+
+    # Slow-query log: one JSON record per statement over the threshold
+    records = Records()
+    logging.disable(logging.NOTSET)
+    slow_logger = logging.getLogger('app.slow_queries')
+    slow_logger.addHandler(records)
+    slow_logger.propagate = False
+    saved = query_stats._slow_query_ms
+    query_stats._slow_query_ms = 0.000001
+    try:
+        with app.app_context():
+            response = http.get('/api/v1/sessions', query_string={'per_page': 10})
+            queries = int(re.search(r'desc="(\d+) queries"', response.headers['Server-Timing']).group(1))
+            logged = [json.loads(record) for record in records.records]
+            records.records.clear()
+            db.session.execute(db.select(Session.id).where(Session.title == 'Session 1-secret')).all()
+            unbound = [json.loads(record) for record in records.records]
+    finally:
+        query_stats._slow_query_ms = saved
+        slow_logger.removeHandler(records)
+        slow_logger.propagate = True
+        logging.disable(logging.INFO)
+    check(len(logged) == queries, f'{len(logged)} slow-query records for {queries} queries')
+    check(all(entry['event'] == 'slow_query' and entry['path'] == '/api/v1/sessions' for entry in logged),
+          'slow-query records without their request')
+    check([entry['query_index'] for entry in logged] == list(range(1, queries + 1)), 'query_index out of order')
+    check(len(unbound) == 1 and 'path' not in unbound[0], 'statement outside a request not logged on its own')
+    check(all('secret' not in record for record in map(json.dumps, unbound)), 'parameters written to the log')
+    if logged:
+        print(f"   slow-query log: {json.dumps(logged[-1])[:140]}...")
+
+    print()
+    if not failures:
+        print(f"✅ Queries counted and timed per request ({overhead_us:+.1f}us per statement); "
+              f"Server-Timing set, slow queries logged")
+        return 0
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
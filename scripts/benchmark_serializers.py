@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark compiled schemas and orjson against hand-written dicts and json.
+
+Creates N exercises and N clients (default 10,000 each), and a few
+sessions and programs, in the testing database. For exercises and clients
+the script:
+
+1. times the old hand-written ``*_to_dict`` plus stdlib ``json.dumps``
+   (Flask's old provider: sorted keys, HTTP dates) over every row;
+2. times the compiled schema plus ``dumps_bytes`` over the same rows, and
+   a ``?fields=id,name`` style projection;
+3. checks that both produce the same decoded JSON.
+
+It then times ``GET /api/v1/exercises``, ``/clients``, ``/sessions`` and
+``/programs`` (``per_page=100``) with and without ``fields`` through the
+test client, and checks each list returns only the requested fields and
+rejects an unknown field with 400.
+
+Usage:
+    python scripts/benchmark_serializers.py [rows]
+"""
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask.json.provider import DefaultJSONProvider
+from app import create_app, db
+from app.models.client import Client
+from app.models.exercise_library import ExerciseLibrary
+from app.models.program import Program
+from app.models.session import Session
+from app.models.user import User
+from app.routes.api_clients import client_schema
+from app.routes.api_exercises import exercise_schema
+from app.utils import serializers
+from app.utils.serializers import dumps_bytes
+
+MUSCLES = ['Chest', 'Back', 'Shoulders', 'Biceps', 'Triceps', 'Abs', 'Glutes', 'Quadriceps', 'Hamstrings']
+TOOLS = ['Barbell', 'Dumbbell', 'Kettlebell', 'Cable', 'Machine', 'Band']
+
+
+def timed(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def old_exercise_to_dict(exercise):
+    """exercise_to_dict before compiled schemas."""
+    return {
+        'id': exercise.id,
+        'name': exercise.name,
+        'description': exercise.description,
+        'category': exercise.category,
+        'primary_muscle_groups': exercise.get_primary_muscles(),
+        'secondary_muscle_groups': exercise.secondary_muscle_groups or [],
+        'difficulty_level': exercise.difficulty_level,
+        'equipment_required': exercise.get_equipment(),
+        'exercise_type': exercise.exercise_type,
+        'setup_instructions': exercise.setup_instructions,
+        'execution_steps': exercise.get_execution_steps(),
+        'common_mistakes': exercise.common_mistakes or [],
+        'tips_and_cues': exercise.tips_and_cues or [],
+        'image_url': exercise.image_url,
+        'video_url': exercise.video_url,
+        'animation_url': exercise.animation_url,
+        'easier_variations': exercise.easier_variations or [],
+        'harder_variations': exercise.harder_variations or [],
+        'alternative_exercises': exercise.alternative_exercises or [],
+        'contraindications': exercise.contraindications or [],
+        'injury_considerations': exercise.injury_considerations,
+        'typical_sets': exercise.typical_sets,
+        'typical_reps': exercise.typical_reps,
+        'typical_rest_seconds': exercise.typical_rest_seconds,
+        'tags': exercise.get_tags(),
+        'is_custom': exercise.is_custom,
+        'is_public': exercise.is_public,
+        'is_active': exercise.is_active,
+        'created_at': exercise.created_at.isoformat() if exercise.created_at else None,
+        'updated_at': exercise.updated_at.isoformat() if exercise.updated_at else None,
+    }
+
+
+def old_client_to_dict(client):
+    """client_to_dict before compiled schemas."""
+    return {
+        'id': client.id,
+        'first_name': client.first_name,
+        'last_name': client.last_name,
+        'full_name': client.full_name,
+        'email': client.email,
+        'phone': client.phone,
+        'is_active': client.is_active,
+        'created_at': client.created_at.isoformat() if client.created_at else None,
+        'updated_at': client.updated_at.isoformat() if client.updated_at else None,
+    }
+
+
+def old_dumps(obj):
+    """Flask's stdlib provider: sorted keys, compact separators."""
+    return json.dumps(obj, default=DefaultJSONProvider.default, sort_keys=True, separators=(',', ':'))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    logging.disable(logging.WARNING)
+    app = create_app('testing')
+    failures = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(message)
+
+    with app.app_context():
+        db.create_all()
+        trainer = User(username='bench', email='bench@example.com', password_hash='x')
+        db.session.add(trainer)
+        db.session.flush()
+        rng = random.Random(22)
+        db.session.bulk_insert_mappings(ExerciseLibrary, [dict(
+            name=f'{rng.choice(TOOLS)} Exercise {i}', description='A description ' * 8, category='strength',
+            primary_muscle_groups=rng.sample(MUSCLES, 2), equipment_required=[rng.choice(TOOLS)],
+            tips_and_cues=['keep your core braced'] if i % 2 else None, typical_sets=3, typical_reps='8-12',
+            is_public=True, is_active=True,
+        ) for i in range(count)])
+        db.session.bulk_insert_mappings(Client, [dict(
+            first_name=f'First{i}', last_name=f'Last{i}', email=f'client{i}@example.com',
+            phone='555-0100' if i % 3 else None, trainer_id=trainer.id, is_active=True,
+        ) for i in range(count)])
+        start = datetime(2026, 1, 5, 7, 0)
+        db.session.bulk_insert_mappings(Session, [dict(
+            title=f'Session {i}', trainer_id=trainer.id, client_id=1,
+            scheduled_start=start + timedelta(hours=i), scheduled_end=start + timedelta(hours=i, minutes=60),
+        ) for i in range(10)])
+        db.session.bulk_insert_mappings(Program, [dict(
+            name=f'Program {i}', trainer_id=trainer.id, client_id=1, status='active',
+        ) for i in range(10)])
+        db.session.commit()
+        exercises = ExerciseLibrary.query.all()
+        clients = Client.query.all()
+        backend = 'orjson' if serializers.orjson is not None else 'json'
+
+        print("=" * 78)
+        print(f"Serializer Benchmark ({count} rows per model, encoder: {backend})")
+        print("=" * 78)
+        print(f"   {'model':<10} {'hand-written+json':>18} {'schema+' + backend:>16} {'speedup':>8} "
+              f"{'?fields=id,name':>16}")
+        old_total = new_total = 0.0
+        cases = [
+            ('exercise', exercises, old_exercise_to_dict, exercise_schema),
+            ('client', clients, old_client_to_dict, client_schema),
+        ]
+        for name, rows, old, schema in cases:
+            old_body, old_ms = timed(lambda: old_dumps([old(row) for row in rows]))
+            new_body, new_ms = timed(lambda: dumps_bytes(schema.dump_many(rows), sort_keys=True))
+            projection = frozenset(('id', 'name' if 'name' in schema.field_set else 'email'))
+            projected, projected_ms = timed(lambda: dumps_bytes(schema.dump_many(rows, projection), sort_keys=True))
+            check(json.loads(old_body) == json.loads(new_body), f'{name}: schema output differs')
+            check(all(row.keys() == projection for row in json.loads(projected)), f'{name}: projection keys')
+            old_total, new_total = old_total + old_ms, new_total + new_ms
+            print(f"   {name:<10} {old_ms:16.1f}ms {new_ms:14.1f}ms {old_ms / new_ms:7.1f}x {projected_ms:14.1f}ms")
+
+        http = app.test_client()
+        with http.session_transaction() as sess:
+            sess['_user_id'] = str(trainer.id)
+        for name, field in (('exercises', 'name'), ('clients', 'email'), ('sessions', 'title'), ('programs', 'name')):
+            url = f'/api/v1/{name}'
+            response, full_ms = timed(lambda: http.get(url, query_string={'per_page': 100}))
+            check(response.status_code == 200, f'{name} listing failed')
+            response, fields_ms = timed(lambda: http.get(url, query_string={'per_page': 100, 'fields': f'id,{field}'}))
+            check(response.status_code == 200 and set(response.get_json()['data'][name][0]) == {'id', field},
+                  f'{url}?fields=id,{field} listing failed')
+            response = http.get(url, query_string={'fields': 'id,nope'})
+            check(response.status_code == 400, f'{url}: unknown field was not rejected')
+            print(f"   GET {url + '?per_page=100':<33} {full_ms:6.2f}ms, with fields=id,{field}: {fields_ms:.2f}ms")
+
+    print()
+    if not failures:
+        print(f"✅ Identical JSON; schemas + {backend} {old_total / new_total:.1f}x faster in total")
+        return 0
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
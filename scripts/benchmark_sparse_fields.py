@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark sparse fieldsets on the session, program and client lists.
+
+Creates N sessions, programs and clients (default 5,000 each) whose notes
+and other Text columns hold a few KB each, in the testing database. For
+each list the script:
+
+1. times loading every page of 100 full rows (the old behaviour) against
+   the same pages with the list view's ``load_only`` columns;
+2. times ``GET /api/v1/<list>`` with its default fields and with
+   ``?fields=id,...`` through the test client;
+3. checks that default list responses leave the large Text columns out,
+   that naming one in ``?fields=`` returns it, and that the SELECT only
+   lists the columns the response reads.
+
+Usage:
+    python scripts/benchmark_sparse_fields.py [rows]
+"""
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models.client import Client
+from app.models.program import Program
+from app.models.session import Session
+from app.models.user import User
+from app.routes.api_clients import client_schema
+from app.routes.api_programs import program_schema
+from app.routes.api_sessions import session_schema
+
+NOTE = 'Worked on hip hinge pattern, cue neutral spine, progress load next week. ' * 40
+PER_PAGE = 100
+
+
+def timed(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def load_pages(query, order, count, options=()):
+    rows = 0
+    for offset in range(0, count, PER_PAGE):
+        rows += len(query.options(*options).order_by(order).offset(offset).limit(PER_PAGE).all())
+    return rows
+
+
+def get(http, url, query_string):
+    """GET ``url`` with ``query_string``; returns the status and JSON body."""
+    response = http.get(url, query_string=query_string)
+    return response.status_code, response.get_json()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    logging.disable(logging.WARNING)
+    app = create_app('testing')
+    failures = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(message)
+
+    with app.app_context():
+        db.create_all()
+        trainer = User(username='bench', email='bench@example.com', password_hash='x')
+        db.session.add(trainer)
+        db.session.flush()
+        db.session.bulk_insert_mappings(Client, [dict(
+            first_name=f'First{i}', last_name=f'Last{i}', email=f'client{i}@example.com', trainer_id=trainer.id,
+            is_active=True, notes=NOTE, medical_conditions=NOTE,
+        ) for i in range(count)])
+        start = datetime(2026, 1, 5, 7, 0)
+        db.session.bulk_insert_mappings(Session, [dict(
+            title=f'Session {i}', trainer_id=trainer.id, client_id=i % count + 1, status='completed',
+            scheduled_start=start + timedelta(hours=i), scheduled_end=start + timedelta(hours=i, minutes=60),
+            description=NOTE, notes=NOTE, trainer_notes=NOTE, client_feedback=NOTE, exercises_performed=NOTE,
+        ) for i in range(count)])
+        db.session.bulk_insert_mappings(Program, [dict(
+            name=f'Program {i}', trainer_id=trainer.id, client_id=i % count + 1, status='active',
+            description=NOTE, notes=NOTE, program_data='{"weeks": [' + ', '.join(['{"days": 4}'] * 200) + ']}',
+        ) for i in range(count)])
+        db.session.commit()
+
+        http = app.test_client()
+        with http.session_transaction() as sess:
+            sess['_user_id'] = str(trainer.id)
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        print("=" * 78)
+        print(f"Sparse Fieldset Benchmark ({count} rows per list, pages of {PER_PAGE})")
+        print("=" * 78)
+        print(f"   {'list':<9} {'full rows':>10} {'list columns':>13} {'speedup':>8} "
+              f"{'view':>9} {'?fields=':>9}")
+        old_total = new_total = 0.0
+        cases = [
+            ('sessions', Session, Session.scheduled_start, session_schema, 'id,title,scheduled_start', 'notes'),
+            ('programs', Program, Program.created_at, program_schema, 'id,name,status', 'program_data'),
+            ('clients', Client, Client.last_name, client_schema, 'id,full_name,email', None),
+        ]
+        for name, model, order, schema, sparse, heavy in cases:
+            url = f'/api/v1/{name}'
+
+            def list_view(**query_string):
+                return get(http, url, query_string)
+
+            query = model.query.filter_by(trainer_id=trainer.id)
+            _, old_ms = timed(lambda: load_pages(query, order, count))
+            options = schema.load_options(schema.list_fields, order)
+            loaded, new_ms = timed(lambda: load_pages(query, order, count, options))
+            check(loaded == count, f'{name}: loaded {loaded} rows')
+
+            (status, body), endpoint_ms = timed(lambda: list_view(per_page=PER_PAGE))
+            check(status == 200 and 'notes' not in body['data'][name][0], f'{name}: default list returned notes')
+            statements.clear()
+            status, body = list_view(per_page=PER_PAGE, fields=sparse)
+            check(set(body['data'][name][0]) == set(sparse.split(',')), f'{name}: ?fields= keys')
+            select = next(statement for statement in statements if f'FROM {model.__tablename__}' in statement
+                          and 'count(' not in statement)
+            check('notes' not in select, f'{name}: ?fields={sparse} still selects notes')
+            if heavy:
+                status, body = list_view(fields=f'id,{heavy}')
+                check(body['data'][name][0].get(heavy), f'{name}: ?fields=id,{heavy} did not return it')
+            _, sparse_ms = timed(lambda: list_view(per_page=PER_PAGE, fields=sparse))
+            old_total, new_total = old_total + old_ms, new_total + new_ms
+            print(f"   {name:<9} {old_ms:8.1f}ms {new_ms:11.1f}ms {old_ms / new_ms:7.1f}x "
+                  f"{endpoint_ms:7.2f}ms {sparse_ms:7.2f}ms")
+
+    print()
+    if not failures:
+        print(f"✅ Large Text columns stay in the database; list pages {old_total / new_total:.1f}x faster to load")
+        return 0
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Load-test Stripe webhook ingestion and the batched event applier.
+
+Creates N pending payments with Stripe payment intents in an in-memory
+SQLite database. Each payment gets a ``payment_failed`` event, and most
+also get a later ``payment_intent.succeeded`` event. The events are signed
+and POSTed to ``/api/v1/stripe/webhook`` in shuffled order, and a share is
+re-sent as Stripe retries would be.
+
+The worker then applies the stored events, and finally all of them are
+replayed. The script reports webhook response latency p50/p99 and
+applied events/sec. It checks that duplicates were stored once, that
+events applied in Stripe order despite the shuffled arrival, and that the
+replay left the same state.
+
+Usage:
+    python scripts/benchmark_stripe_webhooks.py [payments]
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+SECRET = 'whsec_benchmark'
+os.environ['STRIPE_WEBHOOK_SECRET'] = SECRET
+
+from sqlalchemy import func, insert
+
+from app import create_app, db
+from app.models.client import Client
+from app.models.payments import Payment, StripeEvent
+from app.models.user import User
+from app.services.job_queue import Worker
+from app.services.stripe_events import apply_pending, replay
+
+DUPLICATE_SHARE = 0.2
+SUCCEED_SHARE = 0.8
+
+
+def signed_headers(payload):
+    timestamp = int(time.time())
+    digest = hmac.new(SECRET.encode(), f'{timestamp}.{payload}'.encode(), hashlib.sha256).hexdigest()
+    return {'Stripe-Signature': f't={timestamp},v1={digest}', 'Content-Type': 'application/json'}
+
+
+def event(event_id, event_type, created, intent_id):
+    return json.dumps({'id': event_id, 'object': 'event', 'type': event_type, 'created': created,
+                       'data': {'object': {'id': intent_id, 'object': 'payment_intent'}}})
+
+
+def main():
+    payments = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    logging.disable(logging.WARNING)
+    random.seed(15)
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        trainer = User(username='bench', email='bench@example.com', password_hash='x',
+                       first_name='Bench', last_name='Trainer')
+        db.session.add(trainer)
+        db.session.flush()
+        client = Client(trainer_id=trainer.id, first_name='Bench', last_name='Client', email='client@example.com',
+                        is_active=True)
+        db.session.add(client)
+        db.session.commit()
+        db.session.execute(insert(Payment), [
+            {'client_id': client.id, 'trainer_id': trainer.id, 'amount': 50.0, 'status': 'pending',
+             'stripe_payment_intent_id': f'pi_{i}'} for i in range(payments)
+        ])
+        db.session.commit()
+
+        created = int(time.time()) - 3600
+        bodies, expected = [], {}
+        for i in range(payments):
+            bodies.append(event(f'evt_fail_{i}', 'payment_intent.payment_failed', created + i, f'pi_{i}'))
+            expected[f'pi_{i}'] = 'failed'
+            if random.random() < SUCCEED_SHARE:
+                bodies.append(event(f'evt_ok_{i}', 'payment_intent.succeeded', created + i + 1, f'pi_{i}'))
+                expected[f'pi_{i}'] = 'completed'
+        unique = len(bodies)
+        bodies += random.sample(bodies, int(unique * DUPLICATE_SHARE))
+        random.shuffle(bodies)
+
+        print("=" * 70)
+        print(f"Stripe Webhook Benchmark ({payments} payments, {unique} events, "
+              f"{len(bodies) - unique} retries)")
+        print("=" * 70)
+
+        http = app.test_client()
+        latencies = []
+        started = time.perf_counter()
+        for body in bodies:
+            request_started = time.perf_counter()
+            response = http.post('/api/v1/stripe/webhook', data=body, headers=signed_headers(body))
+            latencies.append((time.perf_counter() - request_started) * 1000)
+            if response.status_code != 200:
+                print(f"❌ Webhook returned {response.status_code}: {response.get_data(as_text=True)}")
+                return 1
+        ingest_elapsed = time.perf_counter() - started
+        stored = db.session.query(func.count(StripeEvent.id)).scalar()
+
+        started = time.perf_counter()
+        Worker(queues=('default',), batch_size=50).run(burst=True)
+        apply_elapsed = time.perf_counter() - started
+
+        def statuses():
+            db.session.expire_all()
+            return dict(db.session.query(Payment.stripe_payment_intent_id, Payment.status))
+
+        after_apply = statuses()
+        failed_events = StripeEvent.query.filter(StripeEvent.status != 'applied').count()
+
+        started = time.perf_counter()
+        replayed = replay()
+        replay_stats = apply_pending()
+        replay_elapsed = time.perf_counter() - started
+        after_replay = statuses()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"▶️  Ingested {len(bodies)} webhooks in {ingest_elapsed:.2f}s "
+          f"(p50 {statistics.median(latencies):.1f}ms, p99 {p99:.1f}ms); {stored} stored")
+    print(f"   worker applied {stored} events in {apply_elapsed:.2f}s ({stored / apply_elapsed:,.0f} events/sec, "
+          f"including job overhead)")
+    print(f"   replayed {replayed} events in {replay_elapsed:.2f}s ({replayed / replay_elapsed:,.0f} events/sec): "
+          f"{replay_stats}")
+
+    print()
+    if stored == unique and not failed_events and after_apply == expected and after_replay == expected:
+        print(f"✅ {unique} events stored once, applied in Stripe order; replay left the same state")
+        return 0
+    wrong = sum(1 for key, status in expected.items() if after_apply.get(key) != status)
+    print(f"❌ Stored {stored}/{unique} events, {failed_events} not applied, {wrong} payment(s) in the wrong state, "
+          f"replay consistent: {after_replay == after_apply}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
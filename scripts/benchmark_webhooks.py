@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark outbound webhook delivery against a local stub HTTP server.
+
+Starts a threaded HTTP server on 127.0.0.1. It checks every request's
+signature, answers after a small simulated delay, and returns 500 on
+``/fail``. The script subscribes several endpoints to ``client_created``,
+plus one endpoint that always fails. It creates N clients (default 500)
+and drains the ``webhooks`` queue with a burst worker.
+
+Reports deliveries/sec and p50/p99 delivery latency. It checks that every
+healthy endpoint got every event exactly once with a valid signature, and
+that the failing endpoint was disabled.
+
+Usage:
+    python scripts/benchmark_webhooks.py [events] [endpoints] [server_delay_ms]
+"""
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models.client import Client
+from app.models.integrations import WebhookEndpoint
+from app.models.jobs import Job
+from app.models.user import User
+from app.services import webhooks
+from app.services.job_queue import Worker
+
+SECRET = 'bench-secret'
+
+
+class StubReceiver(BaseHTTPRequestHandler):
+    delay = 0.0
+    received = Counter()
+    bad_signatures = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode()
+        time.sleep(self.delay)
+        if self.path == '/fail':
+            self.send_response(500)
+        else:
+            valid = webhooks.verify(SECRET, self.headers.get('X-Webhook-Signature', ''), body)
+            with self.lock:
+                self.received[(self.path, json.loads(body)['id'])] += 1
+                if not valid:
+                    StubReceiver.bad_signatures += 1
+            self.send_response(200 if valid else 400)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    endpoint_count = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    StubReceiver.delay = (float(sys.argv[3]) if len(sys.argv) > 3 else 5) / 1000
+    logging.disable(logging.WARNING)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubReceiver)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    # Disable the failing endpoint quickly so the run shows it
+    webhooks.DISABLE_AFTER = 5
+    latencies = []
+    deliver_all = webhooks.deliver_all
+
+    def recording_deliver_all(*args, **kwargs):
+        results = deliver_all(*args, **kwargs)
+        latencies.extend(r['latency_ms'] for r in results.values() if r['ok'])
+        return results
+
+    webhooks.deliver_all = recording_deliver_all
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        trainer = User(username='bench', email='bench@example.com', password_hash='x',
+                       first_name='Bench', last_name='Trainer')
+        db.session.add(trainer)
+        db.session.commit()
+
+        for i in range(endpoint_count):
+            endpoint = WebhookEndpoint(trainer_id=trainer.id, name=f'ok-{i}', url=f'{base_url}/ok/{i}',
+                                       secret=SECRET)
+            endpoint.set_events(['client_created'] if i % 2 else [webhooks.ALL_EVENTS])
+            db.session.add(endpoint)
+        failing = WebhookEndpoint(trainer_id=trainer.id, name='broken', url=f'{base_url}/fail', secret=SECRET)
+        failing.set_events(['client_created'])
+        db.session.add(failing)
+        db.session.commit()
+
+        for i in range(events):
+            db.session.add(Client(trainer_id=trainer.id, first_name=f'Client{i}', last_name='Test',
+                                  email=f'client{i}@example.com', is_active=True))
+            if i % 100 == 99:
+                db.session.commit()
+        db.session.commit()
+        queued = Job.query.filter_by(task='webhook.deliver').count()
+
+        print("=" * 70)
+        print(f"Webhook Delivery Benchmark ({events} events x {endpoint_count + 1} endpoints, "
+              f"{StubReceiver.delay * 1000:.0f}ms server delay)")
+        print("=" * 70)
+
+        started = time.perf_counter()
+        Worker(queues=('webhooks',), batch_size=50).run(burst=True)
+        elapsed = time.perf_counter() - started
+
+        failing = db.session.get(WebhookEndpoint, failing.id)
+        retries = Job.query.filter(Job.task == 'webhook.deliver', Job.status == 'queued').count()
+
+    server.shutdown()
+    webhooks.session_pool.close()
+
+    delivered = sum(StubReceiver.received.values())
+    latencies.sort()
+    p50 = statistics.median(latencies) if latencies else 0
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0
+    print(f"▶️  {queued} delivery jobs, {delivered} successful deliveries in {elapsed:.2f}s "
+          f"({delivered / elapsed:,.0f}/sec)")
+    print(f"   latency p50 {p50:.1f}ms, p99 {p99:.1f}ms")
+    print(f"   failing endpoint: active={failing.is_active}, consecutive failures "
+          f"{failing.consecutive_failures}, {retries} retry job(s) scheduled")
+
+    print()
+    duplicates = sum(1 for count in StubReceiver.received.values() if count > 1)
+    expected = events * endpoint_count
+    if (delivered == expected and not duplicates and not StubReceiver.bad_signatures
+            and not failing.is_active):
+        print(f"✅ {expected} deliveries, each exactly once with a valid signature; failing endpoint disabled")
+        return 0
+    print(f"❌ Expected {expected} deliveries, got {delivered} ({duplicates} duplicated, "
+          f"{StubReceiver.bad_signatures} bad signatures), failing endpoint active={failing.is_active}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk Zoom provisioning against a local fake Zoom API.
+
+Starts a fake of the Zoom OAuth and meetings API. Every call takes a
+simulated latency, and the fake answers 429 once an account exceeds its
+per-second limit. Create requests whose agenda is ``FAIL`` get a 400.
+
+The script schedules a weekly series (default 12 weeks x 3 sessions) with
+a few sessions that Zoom will reject and one cancelled session. It then:
+
+1. times the same number of serial ``zoom_service.create_meeting`` calls,
+   the cost of provisioning one session at a time;
+2. POSTs the series to ``/api/v1/zoom/meetings/bulk``;
+3. reschedules the series, fixes the rejected sessions, deletes one
+   meeting in the fake and POSTs again, so meetings are updated or
+   re-created;
+4. runs once more with the client-side limit above the fake's, to show
+   that 429 responses are waited out and retried.
+
+It checks the per-session results, the ``VideoConference`` rows and the
+fake's meetings after each step.
+
+Usage:
+    python scripts/benchmark_zoom_bulk.py [weeks] [sessions_per_week] [latency_ms]
+"""
+import json
+import logging
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+ACCOUNT_LIMIT = 20  # fake Zoom: requests per second before 429
+os.environ.update(ZOOM_CLIENT_ID='bench', ZOOM_CLIENT_SECRET='secret', ZOOM_ACCOUNT_ID='account',
+                  ZOOM_RATE_LIMIT_PER_SECOND=str(ACCOUNT_LIMIT // 2))
+
+from app import create_app, db
+from app.models.client import Client
+from app.models.integrations import VideoConference
+from app.models.session import Session
+from app.models.user import User
+from app.services import zoom_provisioning, zoom_service as zoom
+from app.utils.rate_limit import TokenBucket
+
+
+class FakeZoom(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.1
+    lock = threading.Lock()
+    meetings = {}
+    next_id = 1000
+    recent = deque()
+    throttled = 0
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _reply(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _admit(self):
+        """Sliding one-second window per account, like Zoom's per-second limits."""
+        now = time.monotonic()
+        with self.lock:
+            while self.recent and now - self.recent[0] > 1:
+                self.recent.popleft()
+            if len(self.recent) >= ACCOUNT_LIMIT:
+                FakeZoom.throttled += 1
+                return False
+            self.recent.append(now)
+            return True
+
+    def _handle(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length)
+        if self.path.startswith('/oauth/token'):
+            return self._reply(200, {'access_token': 'fake-token', 'expires_in': 3600})
+        if self.headers.get('Authorization') != 'Bearer fake-token':
+            return self._reply(401, {'message': 'Invalid access token'})
+        if not self._admit():
+            return self._reply(429, {'message': 'Too many requests'}, {'Retry-After': '1'})
+        time.sleep(self.latency)
+        data = json.loads(raw) if raw else {}
+
+        if method == 'POST' and self.path == '/v2/users/me/meetings':
+            if data.get('agenda') == 'FAIL':
+                return self._reply(400, {'code': 300, 'message': 'Invalid meeting settings'})
+            with self.lock:
+                FakeZoom.next_id += 1
+                meeting_id = FakeZoom.next_id
+                self.meetings[meeting_id] = data
+            return self._reply(201, {'id': meeting_id, 'join_url': f'https://zoom.example/j/{meeting_id}',
+                                     'password': 'pw', 'start_url': f'https://zoom.example/s/{meeting_id}'})
+        match = re.fullmatch(r'/v2/meetings/(\d+)', self.path)
+        if match:
+            meeting_id = int(match.group(1))
+            with self.lock:
+                if meeting_id not in self.meetings:
+                    return self._reply(404, {'code': 3001, 'message': 'Meeting does not exist'})
+                if method == 'PATCH':
+                    self.meetings[meeting_id].update(data)
+                elif method == 'DELETE':
+                    del self.meetings[meeting_id]
+            return self._reply(204)
+        return self._reply(404, {'message': 'Not found'})
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    weeks = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    per_week = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    FakeZoom.latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 150) / 1000
+    logging.disable(logging.CRITICAL)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeZoom)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    def fake_service():
+        service = zoom.ZoomService()
+        service.base_url, service.oauth_url = f'{base}/v2', f'{base}/oauth/token'
+        return service
+
+    zoom_provisioning.ZoomService = fake_service
+    app = create_app('testing')
+    failures = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(message)
+
+    with app.app_context():
+        db.create_all()
+        trainer = User(username='bench', email='bench@example.com', password_hash='x',
+                       first_name='Bench', last_name='Trainer')
+        db.session.add(trainer)
+        db.session.flush()
+        client = Client(trainer_id=trainer.id, first_name='Series', last_name='Client', email='series@example.com',
+                        is_active=True)
+        db.session.add(client)
+        db.session.flush()
+        first = datetime(2026, 11, 2, 7)
+        sessions = []
+        for week in range(weeks):
+            for day in range(per_week):
+                start = first + timedelta(weeks=week, days=2 * day)
+                sessions.append(Session(trainer_id=trainer.id, client_id=client.id, title='Series',
+                                        scheduled_start=start, scheduled_end=start + timedelta(minutes=45),
+                                        status='scheduled'))
+        db.session.add_all(sessions)
+        db.session.flush()
+        rejected = {sessions[4].id, sessions[9].id}
+        for session in sessions:
+            if session.id in rejected:
+                session.notes = 'FAIL'
+        sessions[-1].status = 'cancelled'
+        cancelled = sessions[-1].id
+        db.session.commit()
+        session_ids = [s.id for s in sessions]
+        total = len(session_ids)
+
+        http = app.test_client()
+        with http.session_transaction() as sess:
+            sess['_user_id'] = str(trainer.id)
+
+        print("=" * 70)
+        print(f"Bulk Zoom Provisioning Benchmark ({total} sessions, {FakeZoom.latency * 1000:.0f}ms Zoom latency, "
+              f"limit {ACCOUNT_LIMIT}/s)")
+        print("=" * 70)
+
+        # 1. One call per session, as the single-meeting endpoint does
+        serial = fake_service()
+        started = time.perf_counter()
+        for i in range(total):
+            serial.create_meeting(f'Serial {i}', first, duration=45)
+        serial_elapsed = time.perf_counter() - started
+        FakeZoom.meetings.clear()
+        time.sleep(1)  # let the fake's rate window empty
+
+        # 2. Bulk provisioning
+        started = time.perf_counter()
+        response = http.post('/api/v1/zoom/meetings/bulk', json={'session_ids': session_ids})
+        bulk_elapsed = time.perf_counter() - started
+        body = response.get_json()
+        summary = body['summary']
+        by_session = {r['session_id']: r for r in body['results']}
+        expected_created = total - len(rejected) - 1
+        check(response.status_code == 200, f'bulk returned {response.status_code}')
+        check(summary == {'created': expected_created, 'updated': 0, 'skipped': 1, 'failed': len(rejected)},
+              f'first run summary {summary}')
+        check(all(by_session[i]['status'] == 'failed' and 'HTTP 400' in by_session[i]['error'] for i in rejected),
+              'rejected sessions not reported with the Zoom error')
+        check(by_session[cancelled]['status'] == 'skipped', 'cancelled session not skipped')
+        check(VideoConference.query.count() == expected_created == len(FakeZoom.meetings),
+              'conference rows do not match the meetings in Zoom')
+        throttled_first = FakeZoom.throttled
+
+        print(f"▶️  Serial: {total} create calls in {serial_elapsed:.2f}s")
+        print(f"   Bulk:   {total} sessions in {bulk_elapsed:.2f}s ({serial_elapsed / bulk_elapsed:.1f}x faster), "
+              f"{summary}, {throttled_first} throttled call(s)")
+
+        # 3. Reschedule the series, fix the rejected sessions, lose one meeting in Zoom
+        db.session.expire_all()
+        for session in Session.query.filter(Session.id.in_(session_ids)):
+            session.scheduled_start += timedelta(hours=1)
+            session.scheduled_end += timedelta(hours=1)
+            if session.id in rejected:
+                session.notes = None
+        db.session.commit()
+        lost = int(by_session[session_ids[0]]['meeting']['meeting_url'].rsplit('/', 1)[1])
+        FakeZoom.meetings.pop(lost)
+
+        started = time.perf_counter()
+        response = http.post('/api/v1/zoom/meetings/bulk', json={'session_ids': session_ids})
+        update_elapsed = time.perf_counter() - started
+        body = response.get_json()
+        summary = body['summary']
+        check(summary == {'created': len(rejected) + 1, 'updated': expected_created - 1, 'skipped': 1, 'failed': 0},
+              f'reschedule summary {summary}')
+        starts = sorted(m['start_time'] for m in FakeZoom.meetings.values())
+        expected_starts = sorted(s.scheduled_start.strftime('%Y-%m-%dT%H:%M:%S')
+                                 for s in Session.query.filter(Session.id.in_(session_ids), Session.id != cancelled))
+        check(starts == expected_starts, 'meetings in Zoom do not match the rescheduled sessions')
+        check(VideoConference.query.count() == total - 1, 'expected one conference per active session')
+        print(f"   Reschedule: {total} sessions in {update_elapsed:.2f}s, {summary}")
+
+        # 4. Client-side limit above Zoom's: 429s are waited out and retried
+        zoom_provisioning.rate_limiter = TokenBucket(rate=1000)
+        FakeZoom.throttled = 0
+        started = time.perf_counter()
+        response = http.post('/api/v1/zoom/meetings/bulk', json={'session_ids': session_ids})
+        burst_elapsed = time.perf_counter() - started
+        summary = response.get_json()['summary']
+        check(summary['failed'] == 0 and summary['updated'] == total - 1, f'throttled run summary {summary}')
+        print(f"   Without pacing: {total} sessions in {burst_elapsed:.2f}s, {FakeZoom.throttled} throttled "
+              f"call(s) retried, {summary}")
+
+    server.shutdown()
+    print()
+    if throttled_first:
+        failures.append(f'{throttled_first} call(s) throttled despite the token bucket')
+    if not failures:
+        print("✅ Partial failures reported per session, rows saved once, reschedules updated in place, "
+              "no 429s while paced")
+        return 0
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Zoom client's shared token cache and pooled session.
+
+Starts a local stub of the Zoom OAuth and meetings API. Several threads
+then create N meetings (default 400), each through a fresh
+``ZoomService()``, as bulk session scheduling does. The stub counts token
+requests and TCP connections. The same meetings are then created the old
+way, with a plain ``requests.post`` per call, for comparison.
+
+The check passes if the whole run fetched one token and opened no more
+connections than the pool holds.
+
+Usage:
+    python scripts/benchmark_zoom_client.py [meetings] [threads]
+"""
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.update(ZOOM_CLIENT_ID='bench', ZOOM_CLIENT_SECRET='secret', ZOOM_ACCOUNT_ID='account')
+
+import requests
+
+from app.services import zoom_service as zoom
+
+
+class StubZoom(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    lock = threading.Lock()
+    token_requests = 0
+    connections = set()
+    meetings = 0
+
+    def setup(self):
+        super().setup()
+        # Headers and body are separate writes; avoid Nagle stalls on keep-alive connections
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        with self.lock:
+            StubZoom.connections.add(self.client_address)
+        if self.path.startswith('/oauth/token'):
+            with self.lock:
+                StubZoom.token_requests += 1
+            time.sleep(0.02)  # token endpoint latency
+            return self._reply(200, {'access_token': 'stub-token', 'expires_in': 3600})
+        if self.headers.get('Authorization') != 'Bearer stub-token':
+            return self._reply(401, {'message': 'Invalid access token'})
+        with self.lock:
+            StubZoom.meetings += 1
+            meeting_id = StubZoom.meetings
+        return self._reply(201, {'id': meeting_id, 'join_url': f'https://zoom.example/j/{meeting_id}',
+                                 'password': 'x', 'start_url': f'https://zoom.example/s/{meeting_id}'})
+
+    def log_message(self, *args):
+        pass
+
+    @classmethod
+    def reset(cls):
+        cls.token_requests = 0
+        cls.connections = set()
+
+
+def main():
+    meetings = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubZoom)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    def create(i):
+        service = zoom.ZoomService()
+        service.base_url, service.oauth_url = f'{base}/v2', f'{base}/oauth/token'
+        return service.create_meeting(f'Session {i}', datetime(2026, 1, 1, 9), duration=45)
+
+    print("=" * 70)
+    print(f"Zoom Client Benchmark ({meetings} meetings, {threads} threads)")
+    print("=" * 70)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(create, range(meetings)))
+    pooled_elapsed = time.perf_counter() - started
+    pooled_tokens, pooled_connections = StubZoom.token_requests, len(StubZoom.connections)
+    created = sum(1 for r in results if r)
+
+    StubZoom.reset()
+
+    def create_unpooled(i):
+        # The previous client: a token request and a new connection for every meeting
+        token = requests.post(f'{base}/oauth/token', data={'grant_type': 'account_credentials'}).json()
+        return requests.post(f'{base}/v2/users/me/meetings', json={'topic': f'Session {i}'},
+                             headers={'Authorization': f"Bearer {token['access_token']}"}).json()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(create_unpooled, range(meetings)))
+    unpooled_elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    print(f"▶️  Shared token + pooled session: {created} meetings in {pooled_elapsed:.2f}s "
+          f"({created / pooled_elapsed:,.0f}/sec), {pooled_tokens} token request(s), "
+          f"{pooled_connections} connection(s)")
+    print(f"   Token + connection per meeting: {meetings} meetings in {unpooled_elapsed:.2f}s "
+          f"({meetings / unpooled_elapsed:,.0f}/sec), {StubZoom.token_requests} token requests, "
+          f"{len(StubZoom.connections)} connections")
+
+    print()
+    if created == meetings and pooled_tokens == 1 and pooled_connections <= zoom.POOL_SIZE + 1:
+        print("✅ One token fetch for the whole run; connections reused from the pool")
+        return 0
+    print(f"❌ Expected {meetings} meetings, 1 token request and <= {zoom.POOL_SIZE + 1} connections")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
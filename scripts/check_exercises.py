@@ -32,7 +32,7 @@ def main():
             print(f"   The exercise library will appear empty.")
             print(f"\n💡 SOLUTION:")
             print(f"   Run the seed script to populate exercises:")
-            print(f"   $ python seed_exercises.py")
+            print(f"   $ python scripts/seed_exercises.py")
             return
 
         # Category breakdown
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Check claiming, retries and stale-job recovery of the job queue.
+
+Runs against a temporary SQLite file with the stub transport, so several
+threads can act as separate workers. The script checks that:
+
+1. concurrent workers claim disjoint batches and every queued email is
+   sent exactly once;
+2. a failing job is retried with backoff until it succeeds, and ends as
+   ``failed`` after ``max_attempts``;
+3. a job claimed by a crashed worker is requeued after ``stale_after`` and
+   run once by another worker, and the crashed worker cannot run or finish
+   it when it comes back, and a job that crashes its worker on every
+   attempt ends as ``failed`` after ``max_attempts``;
+4. a campaign that runs longer than ``stale_after`` renews its lease at
+   every checkpoint and is not requeued;
+5. a campaign whose lease is taken away stops at its next checkpoint, and
+   the worker that picks it up resumes there, so every client is logged
+   once.
+
+Usage:
+    python scripts/test_job_queue.py [emails] [workers]
+"""
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+DB_DIR = tempfile.mkdtemp(prefix='mectofitness_jobs_')
+os.environ.pop('DATABASE_PUBLIC_URL', None)
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DB_DIR, 'jobs.db')
+os.environ['MESSAGE_TRANSPORT'] = 'stub'
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, insert, update
+from app import create_app, db
+from app.models.client import Client
+from app.models.jobs import Job
+from app.models.marketing import CommunicationLog, EmailTemplate, MarketingCampaign
+from app.models.user import User
+from app.services import job_queue
+from app.services.campaigns import CampaignExecutor
+from app.services.transports import StubTransport
+
+CAMPAIGN_PAGE = 10
+CAMPAIGN_CLIENTS = 60
+
+
+class SlowTransport(StubTransport):
+    """Stub transport that takes ``delay`` seconds per batch, then calls ``hook``."""
+
+    def __init__(self, delay=0.0, hook=None):
+        self.delay = delay
+        self.hook = hook
+
+    def send_email_batch(self, subject, html_content, recipients):
+        errors = super().send_email_batch(subject, html_content, recipients)
+        time.sleep(self.delay)
+        if self.hook is not None:
+            self.hook()
+        return errors
+
+
+campaign_transport = SlowTransport()
+flaky_failures = {}
+
+
+@job_queue.task('check.campaign')
+def run_campaign(campaign_id):
+    campaign = db.session.get(MarketingCampaign, campaign_id)
+    if campaign.status == 'active':
+        CampaignExecutor(campaign, transport=campaign_transport, page_size=CAMPAIGN_PAGE).run()
+
+
+@job_queue.task('check.flaky')
+def flaky(to, failures):
+    """Fail ``failures`` times, then send one email."""
+    flaky_failures[to] = flaky_failures.get(to, 0) + 1
+    if flaky_failures[to] <= failures:
+        raise RuntimeError(f'simulated failure {flaky_failures[to]}')
+    job_queue.send_email(to, 'Retried', '<p>ok</p>')
+
+
+def main():
+    emails = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    logging.disable(logging.ERROR)
+    app = create_app('production')
+    failures = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(message)
+
+    def in_thread(fn, *args):
+        """Run ``fn`` on another thread with its own app context and session, as another worker."""
+        result = []
+
+        def target():
+            with app.app_context():
+                result.append(fn(*args))
+                db.session.remove()
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def make_due(job_id):
+        """Skip a retry's backoff delay."""
+        db.session.execute(update(Job.__table__).where(Job.id == job_id).values(run_at=datetime.utcnow()))
+        db.session.commit()
+
+    def sent_to(recipient):
+        return sum(1 for message in StubTransport.outbox if message['to'] == recipient)
+
+    with app.app_context():
+        db.create_all()
+        trainer = User(username='jobs', email='jobs@example.com', password_hash='x')
+        db.session.add(trainer)
+        db.session.commit()
+        trainer_id = trainer.id
+
+        print("=" * 70)
+        print(f"Job Queue Check ({emails} emails, {workers} workers)")
+        print("=" * 70)
+
+        # 1. Concurrent claims
+        StubTransport.clear()
+        for i in range(emails):
+            job_queue.enqueue('email.send', {'to': f'user{i}@example.com', 'subject': 'Hi', 'html_content': 'x'},
+                              commit=False)
+        db.session.commit()
+        ran = [0] * workers
+
+        def drain(index):
+            worker = job_queue.Worker(batch_size=10, worker_id=f'check-{index}')
+            while True:
+                count = worker.work_once()
+                if not count:
+                    return
+                ran[index] += count
+
+        threads = [threading.Thread(target=lambda i=i: (app.app_context().push(), drain(i))) for i in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        recipients = [message['to'] for message in StubTransport.outbox]
+        check(len(recipients) == emails and len(set(recipients)) == emails,
+              f'claims: {len(recipients)} emails sent to {len(set(recipients))} of {emails} recipients')
+        check(Job.query.filter_by(task='email.send', status='succeeded').count() == emails,
+              'claims: not every email job succeeded')
+        print(f"📬 {emails} jobs over {workers} workers in {elapsed:.2f}s ({emails / elapsed:.0f} jobs/sec), "
+              f"per worker: {ran}")
+
+        # 2. Retries
+        retried = job_queue.enqueue('check.flaky', {'to': 'retry@example.com', 'failures': 2}).id
+        doomed = job_queue.enqueue('check.flaky', {'to': 'doomed@example.com', 'failures': 9}, max_attempts=3).id
+        worker = job_queue.Worker(worker_id='check-retry')
+        for _ in range(4):
+            worker.work_once()
+            job = db.session.get(Job, retried)
+            if job.status == 'queued':
+                check(job.run_at > datetime.utcnow(), 'retry: failed job is due again without backoff')
+            make_due(retried)
+            make_due(doomed)
+        retried_job, doomed_job = db.session.get(Job, retried), db.session.get(Job, doomed)
+        check(retried_job.status == 'succeeded' and retried_job.attempts == 3 and sent_to('retry@example.com') == 1,
+              f'retry: {retried_job.status} after {retried_job.attempts} attempts')
+        check(doomed_job.status == 'failed' and doomed_job.attempts == 3 and 'simulated failure 3' in doomed_job.last_error,
+              f'retry: doomed job is {doomed_job.status} after {doomed_job.attempts} attempts')
+        print(f"🔁 Retried job succeeded on attempt {retried_job.attempts}; "
+              f"doomed job {doomed_job.status} after {doomed_job.attempts}")
+
+        # 3. A worker crashes between claiming and running
+        lost = job_queue.enqueue('email.send', {'to': 'lost@example.com', 'subject': 'Hi', 'html_content': 'x'}).id
+        check(job_queue.claim('check-crashed', ('default',)) == [lost], 'crash: job was not claimed')
+        check(job_queue.requeue_stale(stale_after=600) == 0, 'crash: a fresh lease was requeued')
+        db.session.execute(update(Job.__table__).where(Job.id == lost)
+                           .values(locked_at=datetime.utcnow() - timedelta(seconds=601)))
+        db.session.commit()
+        check(in_thread(job_queue.requeue_stale, 600) == 1, 'crash: stale job was not requeued')
+        in_thread(lambda: job_queue.Worker(worker_id='check-rescuer').work_once())
+        check(not job_queue.run_job(lost, 'check-crashed'), 'crash: crashed worker ran a requeued job')
+        lost_job = db.session.get(Job, lost)
+        db.session.refresh(lost_job)
+        check(lost_job.status == 'succeeded' and sent_to('lost@example.com') == 1,
+              f"crash: job is {lost_job.status}, sent {sent_to('lost@example.com')} time(s)")
+        print(f"🩹 Crashed worker's job requeued and sent {sent_to('lost@example.com')} time(s)")
+
+        # 3b. The job kills its worker on every attempt
+        deadly = job_queue.enqueue('email.send', {'to': 'deadly@example.com', 'subject': 'Hi', 'html_content': 'x'},
+                                   max_attempts=2).id
+        for attempt in range(2):
+            check(job_queue.claim(f'check-killed-{attempt}', ('default',)) == [deadly],
+                  f'crash loop: attempt {attempt + 1} was not claimed')
+            db.session.execute(update(Job.__table__).where(Job.id == deadly)
+                               .values(locked_at=datetime.utcnow() - timedelta(seconds=601)))
+            db.session.commit()
+            check(job_queue.requeue_stale(stale_after=600) == 1, f'crash loop: attempt {attempt + 1} was not recovered')
+        deadly_job = db.session.get(Job, deadly)
+        db.session.refresh(deadly_job)
+        check(deadly_job.status == 'failed' and deadly_job.finished_at is not None and deadly_job.locked_by is None,
+              f'crash loop: job is {deadly_job.status} after {deadly_job.attempts} attempts')
+        check(job_queue.claim('check-killed-2', ('default',)) == [], 'crash loop: failed job was claimed again')
+        print(f"💀 Job that crashed its worker {deadly_job.attempts} times is {deadly_job.status}")
+
+        # 4 and 5. Long campaigns
+        db.session.execute(insert(Client), [
+            {'trainer_id': trainer_id, 'first_name': f'Client{i}', 'last_name': 'Test',
+             'email': f'client{i}@example.com', 'is_active': True}
+            for i in range(CAMPAIGN_CLIENTS)
+        ])
+        template = EmailTemplate(trainer_id=trainer_id, name='Check', subject='Hi {{first_name}}', body='<p>Hi</p>')
+        db.session.add(template)
+        db.session.flush()
+
+        def launch_campaign():
+            campaign = MarketingCampaign(trainer_id=trainer_id, name='Check', campaign_type='email',
+                                         target_segment='all_clients', email_template_id=template.id,
+                                         status='active')
+            db.session.add(campaign)
+            db.session.commit()
+            return campaign.id, job_queue.enqueue('check.campaign', {'campaign_id': campaign.id}).id
+
+        def campaign_logs(campaign_id):
+            return db.session.query(
+                func.count(CommunicationLog.id), func.count(func.distinct(CommunicationLog.client_id))
+            ).filter(CommunicationLog.campaign_id == campaign_id).one()
+
+        # 4. Pages take 0.4s, six pages take longer than stale_after=1s
+        stale_after = 1
+        campaign_id, job_id = launch_campaign()
+        requeued = []
+        campaign_transport.delay = 0.4
+        campaign_transport.hook = lambda: requeued.append(in_thread(job_queue.requeue_stale, stale_after))
+        started = time.perf_counter()
+        job_queue.Worker(worker_id='check-long', stale_after=stale_after).work_once()
+        elapsed = time.perf_counter() - started
+        job = db.session.get(Job, job_id)
+        logged, distinct = campaign_logs(campaign_id)
+        check(elapsed > stale_after * 2, f'long campaign: ran only {elapsed:.2f}s')
+        check(sum(requeued) == 0, f'long campaign: requeued {sum(requeued)} time(s) while sending')
+        check(job.status == 'succeeded' and job.attempts == 1, f'long campaign: job is {job.status}')
+        check(logged == distinct == CAMPAIGN_CLIENTS, f'long campaign: {logged} logs for {distinct} clients')
+        print(f"⏱️  {elapsed:.2f}s campaign with stale_after={stale_after}s: {len(requeued)} checks, "
+              f"{sum(requeued)} requeued")
+
+        # 5. The lease is taken away during the second page
+        StubTransport.clear()
+        campaign_id, job_id = launch_campaign()
+        pages = []
+
+        def steal():
+            pages.append(None)
+            if len(pages) == 2:
+                in_thread(job_queue.requeue_stale, 0)
+
+        campaign_transport.delay, campaign_transport.hook = 0, steal
+        job_queue.Worker(worker_id='check-victim').work_once()
+        job = db.session.get(Job, job_id)
+        db.session.refresh(job)
+        check(job.status == 'queued', f'lost lease: job is {job.status}, expected queued')
+        campaign_transport.hook = None
+        in_thread(lambda: job_queue.Worker(worker_id='check-heir').work_once())
+        db.session.refresh(job)
+        logged, distinct = campaign_logs(campaign_id)
+        duplicates = len(StubTransport.outbox) - len({message['to'] for message in StubTransport.outbox})
+        check(job.status == 'succeeded', f'lost lease: job is {job.status} after the rescue')
+        check(logged == distinct == CAMPAIGN_CLIENTS, f'lost lease: {logged} logs for {distinct} clients')
+        check(duplicates <= CAMPAIGN_PAGE, f'lost lease: {duplicates} duplicate sends')
+        print(f"🔒 Lease lost on page 2: resumed by another worker, {duplicates} resend(s) of the page in flight")
+
+    print()
+    if not failures:
+        print("✅ Claims are disjoint, retries back off, only unrenewed leases are requeued")
+        return 0
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Verify that the tenant-scoped hot queries are served by composite indexes.
+
+Runs EXPLAIN on each query against the configured database and reports
+whether the planner picked the expected index. On SQLite this uses
+EXPLAIN QUERY PLAN; on PostgreSQL sequential scans are disabled for the
+session so the check does not depend on table size.
+
+Usage:
+    python scripts/verify_indexes.py [config_name]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+
+# (description, expected index, SQL)
+HOT_QUERIES = [
+    (
+        'Calendar: sessions by trainer in a date range',
+        'ix_sessions_trainer_start',
+        "SELECT id FROM sessions WHERE trainer_id = :tid "
+        "AND scheduled_start >= :start AND scheduled_start < :end ORDER BY scheduled_start",
+    ),
+    (
+        'Conflict check: overlapping sessions for a trainer',
+        'ix_sessions_trainer_start',
+        "SELECT id FROM sessions WHERE trainer_id = :tid "
+        "AND scheduled_start < :end AND scheduled_end > :start",
+    ),
+    (
+        'Upcoming sessions by status',
+        'ix_sessions_trainer_status_start',
+        "SELECT id FROM sessions WHERE trainer_id = :tid AND status = 'scheduled' "
+        "AND scheduled_start >= :start ORDER BY scheduled_start",
+    ),
+    (
+        'Revenue: completed payments by trainer in a date range',
+        'ix_payments_trainer_status_date',
+        "SELECT SUM(amount) FROM payments WHERE trainer_id = :tid AND status = 'completed' "
+        "AND payment_date >= :start AND payment_date < :end",
+    ),
+    (
+        'Bookings for a trainer on a date',
+        'ix_online_bookings_trainer_date_status',
+        "SELECT id FROM online_bookings WHERE trainer_id = :tid "
+        "AND requested_date = :day AND status IN ('pending', 'confirmed')",
+    ),
+    (
+        'Active client list',
+        'ix_clients_trainer_active_last_name',
+        "SELECT id FROM clients WHERE trainer_id = :tid AND is_active = :active ORDER BY last_name",
+    ),
+    (
+        'Program exercises in display order',
+        'ix_exercises_program_day_order',
+        "SELECT id FROM exercises WHERE program_id = :pid ORDER BY day_number, order_in_day",
+    ),
+]
+
+PARAMS = {
+    'tid': 1,
+    'pid': 1,
+    'start': '2024-01-01 00:00:00',
+    'end': '2024-02-01 00:00:00',
+    'day': '2024-01-15',
+    'active': True,
+}
+
+
+def explain(connection, sql):
+    """Return the query plan as a single string for the current dialect."""
+    if connection.dialect.name == 'postgresql':
+        rows = connection.execute(db.text(f'EXPLAIN {sql}'), PARAMS).fetchall()
+        return '\n'.join(row[0] for row in rows)
+
+    rows = connection.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'), PARAMS).fetchall()
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def main():
+    config_name = sys.argv[1] if len(sys.argv) > 1 else None
+    app = create_app(config_name) if config_name else create_app()
+
+    print("=" * 70)
+    print("Composite Index Verification")
+    print("=" * 70)
+
+    failures = 0
+    with app.app_context():
+        with db.engine.connect() as connection:
+            print(f"Dialect: {connection.dialect.name}\n")
+            if connection.dialect.name == 'postgresql':
+                connection.execute(db.text('SET enable_seqscan = off'))
+
+            for description, index_name, sql in HOT_QUERIES:
+                plan = explain(connection, sql)
+                if index_name in plan:
+                    print(f"✅ {description}")
+                    print(f"   uses {index_name}")
+                else:
+                    failures += 1
+                    print(f"❌ {description}")
+                    print(f"   expected {index_name}, plan was:")
+                    for line in plan.splitlines():
+                        print(f"     {line}")
+
+    print()
+    if failures:
+        print(f"❌ {failures} of {len(HOT_QUERIES)} queries did not use the expected index")
+        print("   Run the migrations (flask db upgrade) or scripts/init_db.py and retry.")
+        return 1
+
+    print(f"✅ All {len(HOT_QUERIES)} hot queries use their composite index")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())